@@ -15,8 +15,8 @@ from common.background_tasks import submit_background_task
 from common.config import (
     cleanup_inactive_sessions,
     close_user_session,
+    delete_user,
     get_user_session,
-    save_all_users,
 )
 from common.utils import (
     decrypt_password,
@@ -33,12 +33,14 @@ logger = logging.getLogger("ninova")
 
 
 @bot.callback_query_handler(
-    func=lambda call: call.data.startswith("adm_")
-    and not call.data.startswith("adm_coursemgmt_")
-    and not call.data.startswith("adm_delcourse_")
-    and not call.data.startswith("adm_delconf_")
-    and not call.data.startswith("adm_clearcourses_")
-    and call.data != "adm_manage_courses"
+    func=lambda call: (
+        call.data.startswith("adm_")
+        and not call.data.startswith("adm_coursemgmt_")
+        and not call.data.startswith("adm_delcourse_")
+        and not call.data.startswith("adm_delconf_")
+        and not call.data.startswith("adm_clearcourses_")
+        and call.data != "adm_manage_courses"
+    )
 )
 def handle_admin_callbacks(call):
     """
@@ -484,10 +486,7 @@ def handle_optout_confirm(call):
     request_id = new_admin_request_id("cb")
 
     # Kullanıcıyı sil
-    users = load_admin_users()
-    if target_id in users:
-        del users[target_id]
-        save_all_users(users)
+    delete_user(target_id)
 
     # Notları sil
     grades = load_admin_grades()
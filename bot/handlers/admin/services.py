@@ -9,6 +9,7 @@ from pathlib import Path
 
 from bot.instance import bot_instance as bot
 from bot.keyboards import build_main_keyboard
+from common.broadcast import broadcast
 from common.config import (
     DATA_FILE,
     LOGS_DIR,
@@ -24,6 +25,7 @@ from .helpers import (
     has_admin_state,
     is_admin,
     log_admin_action,
+    new_admin_request_id,
     pop_admin_state,
 )
 
@@ -226,10 +228,11 @@ def send_broadcast(admin_chat_id, message_text, request_id: str | None = None):
     """
     Tüm kullanıcılara duyuru mesajı gönderir.
 
-    Başarılı ve başarısız gönderim sayılarını admin'e bildirir.
+    Başarılı ve başarısız gönderim sayılarını admin'e bildirir (toplu gönderim işi olarak).
 
     :param admin_chat_id: Admin'in chat ID'si
     :param message_text: Gönderilecek duyuru mesajı
+    :param request_id: Log korelasyonu için istek kimliği
     """
     users = load_admin_users()
     log_admin_action(
@@ -251,47 +254,23 @@ def send_broadcast(admin_chat_id, message_text, request_id: str | None = None):
         )
         return
 
-    success_count = 0
-    fail_count = 0
-    failed_users = []  # Track failed users with details
-
+    # Gönderim arka planda sürer; ilerleme ve sonuç özeti admin'e ayrı mesajla bildirilir
+    job_id = f"admin-broadcast:{admin_chat_id}:{request_id or new_admin_request_id('bc')}"
     broadcast_msg = f"📢 <b>Sistem Duyurusu</b>\n\n{message_text}"
-
-    for uid in users:
-        try:
-            bot.send_message(uid, broadcast_msg, parse_mode="HTML")
-            success_count += 1
-        except Exception as e:
-            fail_count += 1
-            # Store user ID and error message
-            error_msg = str(e)
-            # Shorten common errors for readability
-            if "bot was blocked" in error_msg:
-                error_msg = "Bot engellendi"
-            elif "user is deactivated" in error_msg:
-                error_msg = "Kullanıcı hesabı kapalı"
-            elif "chat not found" in error_msg:
-                error_msg = "Chat bulunamadı"
-            failed_users.append((uid, error_msg))
-
-    # Build response message
-    response = (
-        f"📢 <b>Duyuru Gönderildi</b>\n\n✅ Başarılı: {success_count}\n❌ Başarısız: {fail_count}"
+    broadcast(
+        job_id,
+        "sendMessage",
+        {"text": broadcast_msg, "parse_mode": "HTML"},
+        users,
+        title="Duyuru",
+        report_to=admin_chat_id,
     )
-
-    # Add detailed failure list if there are any
-    if failed_users:
-        response += "\n\n📋 <b>Başarısız Gönderimler:</b>\n"
-        for uid, error in failed_users:
-            response += f"• <code>{uid}</code> - {error}\n"
-
-    bot.send_message(admin_chat_id, response, parse_mode="HTML")
     log_admin_action(
         str(admin_chat_id),
         "broadcast",
-        status="completed",
+        status="queued",
         request_id=request_id,
-        details=f"success={success_count};failed={fail_count}",
+        details=f"job={job_id}",
     )
 
 
@@ -6,7 +6,7 @@ from bot.callback_parsing import callback_parse_fail, parse_int_part, split_call
 from bot.handlers.user.audit import log_user_action
 from bot.instance import bot_instance as bot
 from bot.keyboards import build_ari24_menu_keyboard
-from common.config import load_all_users, save_all_users
+from common.config import get_user_data, update_user_fields
 from services.ari24.client import Ari24Client
 
 logger = logging.getLogger("ninova")
@@ -18,8 +18,7 @@ CLUBS_PER_PAGE = 10
 def show_ari24_menu(message):
     chat_id = str(message.chat.id)
     log_user_action(chat_id, "ari24_menu")
-    users = load_all_users()
-    user_data = users.get(chat_id, {})
+    user_data = get_user_data(chat_id) or {}
     daily_sub = user_data.get("daily_subscription", False)
 
     bot.send_message(
@@ -62,8 +61,7 @@ def discover_events(message):
             count += 1
 
     # Refresh menu to current state
-    users = load_all_users()
-    daily_sub = users.get(str(chat_id), {}).get("daily_subscription", False)
+    daily_sub = (get_user_data(chat_id) or {}).get("daily_subscription", False)
     bot.send_message(
         chat_id,
         f"✅ Bu hafta toplam {count} etkinlik var.",
@@ -94,8 +92,7 @@ def show_news(message):
             bot.send_message(chat_id, caption, parse_mode="HTML")
 
     # Refresh menu
-    users = load_all_users()
-    daily_sub = users.get(str(chat_id), {}).get("daily_subscription", False)
+    daily_sub = (get_user_data(chat_id) or {}).get("daily_subscription", False)
     bot.send_message(
         chat_id,
         f"✅ Son {len(news)} haber listelendi.",
@@ -106,16 +103,15 @@ def show_news(message):
 @bot.message_handler(func=lambda message: message.text.startswith("☀️ Günlük Bülten"))
 def toggle_daily_bulletin(message):
     chat_id = str(message.chat.id)
-    users = load_all_users()
+    user_data = get_user_data(chat_id)
 
-    if chat_id not in users:
+    if user_data is None:
         bot.send_message(chat_id, "Kullanıcı kaydı bulunamadı.")
         return
 
-    current_status = users[chat_id].get("daily_subscription", False)
+    current_status = user_data.get("daily_subscription", False)
     new_status = not current_status
-    users[chat_id]["daily_subscription"] = new_status
-    save_all_users(users)
+    update_user_fields(chat_id, daily_subscription=new_status)
 
     status_text = "açıldı" if new_status else "kapatıldı"
     msg = f"☀️ Günlük Bülten aboneliği <b>{status_text}</b>."
@@ -194,12 +190,11 @@ def callback_subscribe(call):
     club_name_truncated = call.data[4:]
     chat_id = str(call.message.chat.id)
 
-    users = load_all_users()
-    if chat_id not in users:
+    user_data = get_user_data(chat_id)
+    if user_data is None:
         bot.answer_callback_query(call.id, "Kullanıcı bulunamadı.")
         return
 
-    user_data = users[chat_id]
     subs = user_data.get("subscriptions", [])
 
     # We need to find full name from truncated name if possible,
@@ -217,16 +212,14 @@ def callback_subscribe(call):
         bot.answer_callback_query(call.id, "Zaten abonesiniz!")
     else:
         subs.append(matched_club)
-        user_data["subscriptions"] = subs
-        save_all_users(users)
+        update_user_fields(chat_id, subscriptions=subs)
         bot.answer_callback_query(call.id, f"✅ {matched_club} takip ediliyor!")
 
 
 @bot.message_handler(func=lambda message: message.text == "❤️ Kulüplerim")
 def my_clubs(message):
     chat_id = str(message.chat.id)
-    users = load_all_users()
-    user_data = users.get(chat_id, {})
+    user_data = get_user_data(chat_id) or {}
     subs = user_data.get("subscriptions", [])
 
     if not subs:
@@ -251,9 +244,8 @@ def callback_unsubscribe(call):
     club_name_truncated = call.data[6:]
     chat_id = str(call.message.chat.id)
 
-    users = load_all_users()
-    if chat_id in users:
-        user_data = users[chat_id]
+    user_data = get_user_data(chat_id)
+    if user_data is not None:
         subs = user_data.get("subscriptions", [])
 
         # Match truncated name to full name in subs
@@ -261,8 +253,7 @@ def callback_unsubscribe(call):
 
         if matched_club:
             subs.remove(matched_club)
-            user_data["subscriptions"] = subs
-            save_all_users(users)
+            update_user_fields(chat_id, subscriptions=subs)
             bot.answer_callback_query(call.id, "Abonelikten çıkıldı.")
             bot.edit_message_reply_markup(chat_id, call.message.message_id, reply_markup=None)
             bot.send_message(chat_id, f"✅ {matched_club} listeden çıkarıldı.")
@@ -12,9 +12,19 @@ from bot.instance import bot_instance as bot
 from bot.keyboards import build_cancel_keyboard, build_main_keyboard
 from bot.utils import is_cancel_text, resolve_path_token, show_file_browser, validate_ninova_url
 from common.background_tasks import submit_background_task
-from common.cache_manager import get_cache_manager
-from common.config import close_user_session, load_all_users, save_all_users
+from common.cache_manager import content_key, get_cache_manager
+from common.config import (
+    DOWNLOAD_MAX_CONCURRENCY,
+    DOWNLOAD_PER_USER_LIMIT,
+    close_user_session,
+    delete_user,
+    get_user_data,
+    remove_user_fields,
+    update_user_fields,
+)
 from common.log_context import clear_log_context, set_log_context
+from common.scan_scheduler import get_download_scheduler
+from common.single_flight import SingleFlight
 from common.utils import (
     decrypt_password,
     delete_course_data,
@@ -27,9 +37,11 @@ from common.utils import (
     update_user_data,
 )
 from services.ninova import download_file
+from services.ninova.prewarm import get_prewarm_transfer
 
 logger = logging.getLogger("ninova")
 CACHE_MANAGER = get_cache_manager()
+DOWNLOAD_FLIGHTS = SingleFlight()  # Süren dosya aktarımları (anahtar: dosya URL'i)
 
 
 @bot.callback_query_handler(func=lambda call: call.data.startswith("crs_"))
@@ -451,24 +463,90 @@ def handle_file_download(call):
                 details=f"name={file_name}",
             )
             bot.answer_callback_query(call.id, "🚀 Hızlı gönderiliyor...")
-            send_telegram_document(
+            _send_by_file_id(chat_id, request_id, cached_id, file_name, source="cache")
+            return
+
+        # 2. Download and Send: indirme kuyrukta yapılır (bot iş parçacıkları bloklanmaz);
+        # aynı dosyanın eşzamanlı istekleri tek aktarımın file_id'sini paylaşır
+        flight = get_prewarm_transfer(file_url)
+        leader = False
+        if flight is None:
+            try:
+                flight, leader = _submit_download(chat_id, request_id, file_url, file_name)
+            except RuntimeError:  # Kapanış sırasında indirme kuyruğu iş kabul etmez
+                logger.warning(f"[{chat_id}] Download rejected: scheduler is shut down")
+                return
+        if leader:
+            bot.answer_callback_query(call.id, "Dosya indiriliyor...")
+            log_user_action(
                 chat_id,
-                cached_id,
-                caption=f"{get_file_icon(file_name)} {file_name}",
-                is_file_id=True,
-                filename=file_name,
+                "file_download",
+                status="queued",
+                request_id=request_id,
+                details=f"name={file_name}",
             )
+        else:
+            bot.answer_callback_query(call.id, "Dosya hazırlanıyor...")
             log_user_action(
                 chat_id,
                 "file_download",
-                status="completed",
+                status="coalesced",
                 request_id=request_id,
-                details="source=cache",
+                details=f"name={file_name}",
             )
-            return
+            flight.add_done_callback(
+                lambda done: _queue_shared_send(chat_id, request_id, done, file_name, file_url)
+            )
+    finally:
+        clear_log_context()
+
+
+def _download_scheduler():
+    """İndirme kuyruğunu config sınırlarıyla döndürür."""
+    return get_download_scheduler(
+        max_workers=DOWNLOAD_MAX_CONCURRENCY, per_user_limit=DOWNLOAD_PER_USER_LIMIT
+    )
+
+
+def _submit_download(chat_id, request_id, file_url, file_name):
+    """
+    Dosyanın süren aktarımına katılır ya da kullanıcının oturumuyla yenisini başlatır.
+
+    :param chat_id: Dosyayı isteyen kullanıcının chat ID'si
+    :param request_id: Log korelasyonu için istek kimliği
+    :param file_url: Ninova dosya URL'i
+    :param file_name: Varsayılan dosya adı
+    :return: (future, leader) ikilisi; leader ise aktarım bu kullanıcıya gönderir
+    :raises RuntimeError: İndirme kuyruğu kapatıldıysa
+    """
+    return DOWNLOAD_FLIGHTS.submit(
+        file_url,
+        lambda: _download_scheduler().submit(
+            chat_id, _transfer_file, chat_id, request_id, file_url, file_name
+        ),
+    )
+
+
+def _transfer_file(chat_id, request_id, file_url, file_name):
+    """
+    Dosyayı Ninova'dan indirip kullanıcıya gönderir ve file_id'yi önbelleğe yazar.
+
+    İndirme kuyruğunda çalışır; aynı dosyayı bekleyen diğer kullanıcılar
+    dönen file_id ile gönderim yapar.
+
+    :param chat_id: Dosyayı isteyen kullanıcının chat ID'si
+    :param request_id: Log korelasyonu için istek kimliği
+    :param file_url: Ninova dosya URL'i
+    :param file_name: Varsayılan dosya adı
+    :return: Gönderilen dosyanın file_id'si veya None
+    """
+    set_log_context(chat_id=chat_id, action="file_download", request_id=request_id)
+    try:
+        # Kuyrukta beklerken dosya önbelleğe girmiş olabilir (ör. ön ısıtma)
+        cached_id = CACHE_MANAGER.get(file_url)
+        if cached_id:
+            return _send_by_file_id(chat_id, request_id, cached_id, file_name, source="cache")
 
-        # 2. Download and Send
-        bot.answer_callback_query(call.id, "Dosya indiriliyor...")
         bot.send_chat_action(chat_id, "upload_document")
 
         user_info = load_user_profile(chat_id)
@@ -490,55 +568,169 @@ def handle_file_download(call):
             to_buffer=True,
         )
 
-        if result:
-            file_buffer, final_filename = result
+        if not result:
             log_user_action(
                 chat_id,
                 "file_download",
-                status="downloaded",
+                status="download_failed",
                 request_id=request_id,
-                details=f"name={final_filename}",
-            )
-            # Send
-            sent_id = send_telegram_document(
-                chat_id,
-                file_buffer,
-                caption=f"{get_file_icon(final_filename)} {final_filename}",
-                filename=final_filename,
+                details=f"name={file_name}",
+                level="warning",
             )
+            bot.send_message(chat_id, "❌ Dosya indirilemedi.")
+            return None
 
-            # Cache the file ID for future
-            if sent_id:
-                CACHE_MANAGER.set(file_url, sent_id)
-                CACHE_MANAGER.sync()
-                log_user_action(
-                    chat_id,
-                    "file_download",
-                    status="completed",
-                    request_id=request_id,
-                    details="source=remote;cached=true",
-                )
-            else:
-                log_user_action(
-                    chat_id,
-                    "file_download",
-                    status="send_failed",
-                    request_id=request_id,
-                    details="source=remote",
-                    level="warning",
-                )
+        file_buffer, final_filename = result
+        log_user_action(
+            chat_id,
+            "file_download",
+            status="downloaded",
+            request_id=request_id,
+            details=f"name={final_filename}",
+        )
 
+        # Aynı içerik başka bir URL'den yüklendiyse mevcut file_id kullanılır (yükleme atlanır)
+        digest = getattr(file_buffer, "sha256", None)
+        known_id = CACHE_MANAGER.get(content_key(digest)) if digest else None
+        if known_id:
             file_buffer.close()
+            CACHE_MANAGER.set(file_url, known_id)
+            return _send_by_file_id(chat_id, request_id, known_id, final_filename, source="content")
+
+        # Send
+        sent_id = send_telegram_document(
+            chat_id,
+            file_buffer,
+            caption=f"{get_file_icon(final_filename)} {final_filename}",
+            filename=final_filename,
+        )
+        file_buffer.close()
+
+        # Cache the file ID for future
+        if sent_id:
+            CACHE_MANAGER.set(file_url, sent_id)
+            if digest:
+                CACHE_MANAGER.set(content_key(digest), sent_id)
+            log_user_action(
+                chat_id,
+                "file_download",
+                status="completed",
+                request_id=request_id,
+                details="source=remote;cached=true",
+            )
         else:
             log_user_action(
                 chat_id,
                 "file_download",
-                status="download_failed",
+                status="send_failed",
+                request_id=request_id,
+                details="source=remote",
+                level="warning",
+            )
+        return sent_id
+    finally:
+        clear_log_context()
+
+
+def _send_by_file_id(chat_id, request_id, file_id, file_name, source):
+    """
+    Önbellekteki / paylaşılan file_id ile dosyayı gönderir.
+
+    :param chat_id: Kullanıcının chat ID'si
+    :param request_id: Log korelasyonu için istek kimliği
+    :param file_id: Telegram file_id
+    :param file_name: Dosya adı (açıklama için)
+    :param source: Log için kaynak etiketi (cache, shared, content)
+    :return: file_id
+    """
+    send_telegram_document(
+        chat_id,
+        file_id,
+        caption=f"{get_file_icon(file_name)} {file_name}",
+        is_file_id=True,
+        filename=file_name,
+    )
+    log_user_action(
+        chat_id,
+        "file_download",
+        status="completed",
+        request_id=request_id,
+        details=f"source={source}",
+    )
+    return file_id
+
+
+def _queue_shared_send(chat_id, request_id, flight, file_name, file_url, retry=True):
+    """
+    Paylaşılan aktarım bitince kullanıcının gönderimini indirme kuyruğuna ekler.
+
+    :param chat_id: Bekleyen kullanıcının chat ID'si
+    :param request_id: Log korelasyonu için istek kimliği
+    :param flight: Aktarımın Future'ı (file_id veya None)
+    :param file_name: Dosya adı
+    :param file_url: Ninova dosya URL'i (aktarım başarısızsa yeniden indirmek için)
+    :param retry: Aktarım başarısızsa kullanıcının kendi oturumuyla yeniden denensin mi
+    """
+    try:
+        _download_scheduler().submit(
+            chat_id, _send_shared_file, chat_id, request_id, flight, file_name, file_url, retry
+        )
+    except RuntimeError:
+        logger.warning(f"[{chat_id}] Shared file send dropped: scheduler is shut down")
+
+
+def _send_shared_file(chat_id, request_id, flight, file_name, file_url, retry=True):
+    """
+    Başka bir isteğin aktardığı dosyayı file_id ile gönderir.
+
+    Paylaşılan aktarım başarısızsa (ilk kullanıcının girişi, botu engellemesi,
+    ön ısıtma yüklemesi gibi ona özgü nedenlerle) dosya bir kez bu kullanıcının
+    kendi oturumuyla indirilir.
+
+    :param chat_id: Bekleyen kullanıcının chat ID'si
+    :param request_id: Log korelasyonu için istek kimliği
+    :param flight: Tamamlanmış aktarımın Future'ı
+    :param file_name: Dosya adı
+    :param file_url: Ninova dosya URL'i
+    :param retry: Aktarım başarısızsa yeniden denensin mi
+    """
+    set_log_context(chat_id=chat_id, action="file_download", request_id=request_id)
+    try:
+        file_id = None if flight.cancelled() or flight.exception() else flight.result()
+        if file_id:
+            _send_by_file_id(chat_id, request_id, file_id, file_name, source="shared")
+            return
+        if retry:
+            log_user_action(
+                chat_id,
+                "file_download",
+                status="shared_failed_retry",
                 request_id=request_id,
                 details=f"name={file_name}",
                 level="warning",
             )
-            bot.send_message(chat_id, "❌ Dosya indirilemedi.")
+            try:
+                own_flight, leader = _submit_download(chat_id, request_id, file_url, file_name)
+            except RuntimeError:
+                logger.warning(f"[{chat_id}] Download rejected: scheduler is shut down")
+                return
+            if not leader:
+                # Başka bir bekleyen zaten yeniden indiriyor; bir kez daha katılınır
+                own_flight.add_done_callback(
+                    lambda done: _queue_shared_send(
+                        chat_id, request_id, done, file_name, file_url, retry=False
+                    )
+                )
+            return
+        log_user_action(
+            chat_id,
+            "file_download",
+            status="download_failed",
+            request_id=request_id,
+            details=f"name={file_name};source=shared",
+            level="warning",
+        )
+        bot.send_message(chat_id, "❌ Dosya indirilemedi.")
     finally:
         clear_log_context()
 
@@ -611,10 +803,7 @@ def handle_folder_navigation(call):
 def handle_leave_confirm(call):
     """Confirm leaving: delete user data, cached grades, and close session."""
     chat_id = str(call.message.chat.id)
-    users = load_all_users()
-    if chat_id in users:
-        del users[chat_id]
-    save_all_users(users)
+    delete_user(chat_id)
     all_grades = load_saved_grades()
     if chat_id in all_grades:
         del all_grades[chat_id]
@@ -669,8 +858,7 @@ def handle_course_delete_any(call):
                 "Geçersiz silme onayı.",
             )
             return
-        users = load_all_users()
-        user_data = users.get(chat_id, {})
+        user_data = get_user_data(chat_id) or {}
         urls = user_data.get("urls", [])
         if idx < len(urls):
             # Önce veriyi sil (Deep Clean)
@@ -678,8 +866,8 @@ def handle_course_delete_any(call):
             delete_course_data(chat_id, course_url)
 
             # Sonra listeyi kullanıcıdan sil
-            del users[chat_id]["urls"][idx]
-            save_all_users(users)
+            del urls[idx]
+            update_user_fields(chat_id, urls=urls)
             bot.edit_message_text(
                 chat_id=chat_id,
                 message_id=call.message.message_id,
@@ -735,13 +923,9 @@ def handle_manual_delete(call):
     Manuel ders silme menüsünü gösterir.
     """
     chat_id = str(call.message.chat.id)
-    users = load_all_users()
-    user_data = users.get(chat_id, {})
+    user_data = get_user_data(chat_id) or {}
     urls = user_data.get("urls", [])
-    from common.utils import load_saved_grades
-
-    all_grades = load_saved_grades()
-    user_grades = all_grades.get(chat_id, {})
+    user_grades = load_user_grades(chat_id)
 
     if not urls:
         bot.edit_message_text(
@@ -770,13 +954,9 @@ def handle_manual_list(call):
     Takip edilen dersleri listeler.
     """
     chat_id = str(call.message.chat.id)
-    users = load_all_users()
-    user_data = users.get(chat_id, {})
+    user_data = get_user_data(chat_id) or {}
     urls = user_data.get("urls", [])
-    from common.utils import load_saved_grades
-
-    all_grades = load_saved_grades()
-    user_grades = all_grades.get(chat_id, {})
+    user_grades = load_user_grades(chat_id)
 
     if not urls:
         bot.edit_message_text(
@@ -859,8 +1039,7 @@ def process_manual_add(message):
         return
 
     chat_id = str(message.chat.id)
-    users = load_all_users()
-    user_data = users.get(chat_id, {})
+    user_data = get_user_data(chat_id) or {}
     urls = user_data.get("urls", [])
 
     if url in urls:
@@ -957,8 +1136,7 @@ def handle_kontrol(call):
             # Re-show the appropriate menu
             if course_idx is not None:
                 # Go back to course detail
-                all_grades = load_saved_grades()
-                user_grades = all_grades.get(chat_id, {})
+                user_grades = load_user_grades(chat_id)
                 urls = list(user_grades.keys())
 
                 if course_idx < len(urls):
@@ -1008,8 +1186,7 @@ def handle_kontrol(call):
                 return
 
             # Global refresh - Show main menu
-            all_grades = load_saved_grades()
-            user_grades = all_grades.get(chat_id, {})
+            user_grades = load_user_grades(chat_id)
             markup = types.InlineKeyboardMarkup()
             for i, (_url, data) in enumerate(user_grades.items()):
                 markup.add(
@@ -1090,8 +1267,7 @@ def handle_add_expired_yes(call):
     )
 
     chat_id = str(call.message.chat.id)
-    users = load_all_users()
-    user_data = users.get(chat_id, {})
+    user_data = get_user_data(chat_id) or {}
 
     # Temp listeyi al
     expired_urls = user_data.get("temp_expired_courses", [])
@@ -1105,9 +1281,7 @@ def handle_add_expired_yes(call):
     update_user_data(chat_id, "urls", updated_urls)
 
     # Temp'i sil
-    if "temp_expired_courses" in users[chat_id]:
-        del users[chat_id]["temp_expired_courses"]
-        save_all_users(users)
+    remove_user_fields(chat_id, "temp_expired_courses")
 
     # Senkronizasyon başlat
     def run_sync():
@@ -1141,10 +1315,7 @@ def handle_add_expired_no(call):
     """
     chat_id = str(call.message.chat.id)
     # Temp'i sil
-    users = load_all_users()
-    if chat_id in users and "temp_expired_courses" in users[chat_id]:
-        del users[chat_id]["temp_expired_courses"]
-        save_all_users(users)
+    remove_user_fields(chat_id, "temp_expired_courses")
 
     bot.edit_message_text(
         chat_id=call.message.chat.id,
@@ -2,22 +2,22 @@
 
 from __future__ import annotations
 
-from common.config import load_all_users
-from common.utils import load_saved_grades
+from common.config import get_user_data
+from common.utils import get_user_grades_view
 
 
 def load_user_snapshot(chat_id: str, *, urls_source: str = "user_data") -> tuple[dict, dict, list]:
     """Load user_data, user_grades and URL list in a single helper.
 
+    user_grades is the shared cached view and must be treated as read-only.
+
     Args:
         chat_id: User chat id as string.
         urls_source: "user_data" uses users.json URLs, "grades" uses ninova_data keys.
     """
-    users = load_all_users()
-    user_data = users.get(chat_id, {})
+    user_data = get_user_data(chat_id) or {}
 
-    all_grades = load_saved_grades()
-    user_grades = all_grades.get(chat_id, {})
+    user_grades = get_user_grades_view(chat_id)
 
     urls = list(user_grades.keys()) if urls_source == "grades" else user_data.get("urls", [])
 
@@ -25,10 +25,10 @@ def load_user_snapshot(chat_id: str, *, urls_source: str = "user_data") -> tuple
 
 
 def load_user_grades(chat_id: str) -> dict:
-    """Load only grade payload for a user."""
-    return load_saved_grades().get(chat_id, {})
+    """Load only grade payload for a user (cached, read-only)."""
+    return get_user_grades_view(chat_id)
 
 
 def load_user_profile(chat_id: str) -> dict:
     """Load only user profile payload for a user."""
-    return load_all_users().get(chat_id, {})
+    return get_user_data(chat_id) or {}
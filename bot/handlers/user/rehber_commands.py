@@ -12,7 +12,7 @@ from bot.keyboards import (
     build_rehber_soyad_keyboard,
 )
 from bot.utils import is_cancel_text
-from common.config import get_user_session, load_all_users
+from common.config import get_user_data, get_user_session
 from common.utils import decrypt_password, escape_html
 from services.rehber.scraper import RehberScraper
 
@@ -142,8 +142,7 @@ def process_rehber_soyad(message):
     scraper = RehberScraper(session)
 
     # Kullanıcı bilgilerini al ve Rehber SSO'ya giriş yap
-    users = load_all_users()
-    user_info = users.get(chat_id, {})
+    user_info = get_user_data(chat_id) or {}
     username = user_info.get("username", "")
     encrypted_pw = user_info.get("password", "")
     password = decrypt_password(encrypted_pw) if encrypted_pw else ""
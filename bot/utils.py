@@ -9,7 +9,7 @@ from telebot import types
 
 from bot.instance import bot_instance as bot
 from common.log_context import log_with_context
-from common.utils import escape_html, get_file_icon, load_saved_grades
+from common.utils import escape_html, get_file_icon, get_user_grades_view
 
 logger = logging.getLogger("ninova")
 
@@ -143,8 +143,7 @@ def show_file_browser(chat_id, message_id, course_idx, path_str=""):
     """
     path_segments = decode_path(path_str) if path_str else []
 
-    all_grades = load_saved_grades()
-    user_grades = all_grades.get(chat_id, {})
+    user_grades = get_user_grades_view(chat_id)
     urls = list(user_grades.keys())
 
     if course_idx >= len(urls):
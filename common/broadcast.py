@@ -0,0 +1,583 @@
+"""
+BroadcastEngine: Resumable fan-out of one message to many chats.
+
+SKS menus, Arı24 events/news, the daily bulletin and admin announcements are
+broadcast jobs instead of serial send loops on the main or handler thread:
+- A job is identified by a stable job_id (e.g. "sks:2026-10-17:lunch");
+  submitting an existing job_id does not create a second job
+- Per-recipient progress is checkpointed in SQLite with (job_id, chat_id) as
+  key, so after a crash only recipients that were not reached are sent to
+- Recipients that were in flight during a crash are marked "unknown" and not
+  resent (at most once delivery)
+- Bounded-parallel delivery on worker threads sharing the global TokenBucket
+  with the NotificationDispatcher; 429 retry_after pauses every sender
+- Optional progress report to an admin chat (one message, edited in place)
+- Remote media (e.g. Arı24 images) is uploaded once; the returned file_id is
+  reused for the remaining recipients and cached by media URL in CacheManager
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from common.cache_manager import CacheManager, get_cache_manager
+from common.config import (
+    BROADCAST_PROGRESS_INTERVAL,
+    BROADCAST_WORKERS,
+    NOTIFY_OUTBOX_FILE,
+)
+from common.notifier import TelegramApiError, TokenBucket, get_rate_limiter, telegram_api
+
+logger = logging.getLogger("ninova")
+
+# Uzak medya gönderen metotlar ve medya parametresi
+_MEDIA_FIELDS = {"sendPhoto": "photo", "sendDocument": "document", "sendVideo": "video"}
+
+
+def _short_error(description) -> str:
+    """Shorten common Telegram delivery errors for admin reports."""
+    error_msg = str(description)
+    if "bot was blocked" in error_msg:
+        return "Bot engellendi"
+    if "user is deactivated" in error_msg:
+        return "Kullanıcı hesabı kapalı"
+    if "chat not found" in error_msg:
+        return "Chat bulunamadı"
+    return error_msg
+
+
+class BroadcastEngine:
+    """
+    Thread-safe broadcast job runner with checkpointed per-recipient progress.
+
+    Features:
+    - Idempotent submit() by job_id
+    - Resume after restart (pending recipients only)
+    - Worker threads, or drain() in the calling thread when not started
+    - progress() for monitoring and admin reports
+    """
+
+    # Class constants
+    MAX_ATTEMPTS = 3  # Attempts per recipient for transient errors
+    MAX_BACKOFF = 30  # Seconds between transient retries
+    KEEP_FINISHED = 30 * 86400  # Seconds finished jobs are kept (dedupe window)
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS broadcasts (
+            job_id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            method TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            report_to TEXT,
+            report_message_id INTEGER,
+            status TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            finished_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            job_id TEXT NOT NULL,
+            chat_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            PRIMARY KEY (job_id, chat_id)
+        );
+        CREATE INDEX IF NOT EXISTS broadcast_pending
+            ON broadcast_recipients (job_id, status, position);
+    """
+
+    def __init__(
+        self,
+        db_file: str | Path,
+        sender: Callable = telegram_api,
+        workers: int = 8,
+        bucket: TokenBucket | None = None,
+        progress_interval: float = 15,
+        media_cache: CacheManager | None = None,
+    ):
+        """
+        Open (and create if needed) the job database.
+
+        Args:
+            db_file: SQLite database path
+            sender: sender(method, payload, chat_id) calling the Bot API
+            workers: Delivery threads started by start()
+            bucket: Shared TokenBucket (a private 30/s bucket if None)
+            progress_interval: Seconds between admin progress edits
+            media_cache: File ID cache for remote media, keyed by media URL
+        """
+        self._sender = sender
+        self._workers = max(1, workers)
+        self.bucket = bucket or TokenBucket(30)
+        self._progress_interval = progress_interval
+        self._media_cache = media_cache
+
+        path = Path(db_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        self._cond = threading.Condition(self._lock)
+        self._jobs: dict[str, dict] = {}  # Çalışan işler
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._recover()
+
+    def _recover(self) -> None:
+        with self._lock:
+            # Çökme sırasında gönderimde olanlar: teslim edilmiş olabilir, tekrar gönderilmez
+            unknown = self._conn.execute(
+                "UPDATE broadcast_recipients SET status = 'unknown' WHERE status = 'sending'"
+            ).rowcount
+            self._conn.execute(
+                "DELETE FROM broadcast_recipients WHERE job_id IN "
+                "(SELECT job_id FROM broadcasts WHERE status = 'done' AND finished_at < ?)",
+                (time.time() - self.KEEP_FINISHED,),
+            )
+            self._conn.execute(
+                "DELETE FROM broadcasts WHERE status = 'done' AND finished_at < ?",
+                (time.time() - self.KEEP_FINISHED,),
+            )
+            rows = self._conn.execute(
+                "SELECT job_id, title, method, payload, report_to, report_message_id "
+                "FROM broadcasts WHERE status = 'running' ORDER BY created_at"
+            ).fetchall()
+            for job_id, title, method, payload, report_to, report_message_id in rows:
+                self._jobs[job_id] = self._new_job(
+                    job_id, title, method, json.loads(payload), report_to, report_message_id
+                )
+        if rows:
+            logger.info(
+                f"[Broadcast] {len(rows)} unfinished jobs resumed "
+                f"({unknown} in-flight deliveries marked unknown)"
+            )
+
+    def _new_job(self, job_id, title, method, payload, report_to, report_message_id=None) -> dict:
+        media_field = _MEDIA_FIELDS.get(method)
+        media_url = payload.get(media_field) if media_field else None
+        if not (isinstance(media_url, str) and media_url.startswith(("http://", "https://"))):
+            media_url = None
+        return {
+            "job_id": job_id,
+            "title": title,
+            "method": method,
+            "payload": payload,
+            "report_to": report_to,
+            "report_message_id": report_message_id,
+            "last_report": 0.0,
+            # Uzak medya bir kez yüklenir, kalan alıcılara file_id ile gönderilir
+            "media_field": media_field,
+            "media_url": media_url,
+            "media_file_id": self._media_cache.get(media_url)
+            if media_url and self._media_cache
+            else None,
+            "media_lock": threading.Lock(),
+        }
+
+    def submit(
+        self,
+        job_id: str,
+        method: str,
+        payload: dict,
+        chat_ids,
+        title: str = "Duyuru",
+        report_to=None,
+    ) -> bool:
+        """
+        Create a broadcast job (no-op if job_id already exists).
+
+        Args:
+            job_id: Stable job id (deduplicates re-submissions after a crash)
+            method: Bot API method (sendMessage, sendPhoto, ...)
+            payload: Method parameters without chat_id
+            chat_ids: Recipients (duplicates are ignored)
+            title: Job title used in logs and admin reports
+            report_to: Admin chat ID receiving progress reports
+
+        Returns:
+            True if a new job was created
+        """
+        recipients = list(dict.fromkeys(str(chat_id) for chat_id in chat_ids))
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM broadcasts WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if exists:
+                return False
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO broadcasts (job_id, title, method, payload, report_to, "
+                    "status, created_at) VALUES (?, ?, ?, ?, ?, 'running', ?)",
+                    (
+                        job_id,
+                        title,
+                        method,
+                        json.dumps(payload, ensure_ascii=False),
+                        str(report_to) if report_to is not None else None,
+                        time.time(),
+                    ),
+                )
+                self._conn.executemany(
+                    "INSERT INTO broadcast_recipients (job_id, chat_id, position, status) "
+                    "VALUES (?, ?, ?, 'pending')",
+                    [(job_id, chat_id, i) for i, chat_id in enumerate(recipients)],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._jobs[job_id] = self._new_job(
+                job_id, title, method, payload, str(report_to) if report_to is not None else None
+            )
+            self._cond.notify_all()
+        logger.info(f"[Broadcast] {job_id}: {len(recipients)} recipients queued")
+        self._report(job_id, force=True)
+        return True
+
+    def _claim(self, job_id: str | None = None) -> tuple[dict, str] | None:
+        with self._lock:
+            if job_id is None:
+                job_ids = list(self._jobs)
+            else:
+                job_ids = [job_id] if job_id in self._jobs else []
+            for candidate in job_ids:
+                row = self._conn.execute(
+                    "SELECT chat_id FROM broadcast_recipients "
+                    "WHERE job_id = ? AND status = 'pending' ORDER BY position LIMIT 1",
+                    (candidate,),
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE broadcast_recipients SET status = 'sending' "
+                        "WHERE job_id = ? AND chat_id = ?",
+                        (candidate, row[0]),
+                    )
+                    return self._jobs[candidate], row[0]
+                self._finish_if_done(candidate)
+            return None
+
+    @staticmethod
+    def _sent_file_id(result, media_field: str) -> str | None:
+        media = (result or {}).get(media_field)
+        if isinstance(media, list):  # Fotoğraf: boyutlar küçükten büyüğe
+            media = media[-1] if media else None
+        return media.get("file_id") if isinstance(media, dict) else None
+
+    def _send(self, job: dict, payload: dict, chat_id: str):
+        """Call the sender, uploading remote media only once per job."""
+        if not job["media_url"]:
+            return self._sender(job["method"], payload, chat_id)
+
+        field = job["media_field"]
+        file_id = job["media_file_id"]
+        if file_id is None:
+            with job["media_lock"]:
+                file_id = job["media_file_id"]
+                if file_id is None:
+                    # İlk gönderim URL ile: Telegram görseli indirir, file_id yakalanır
+                    result = self._sender(job["method"], payload, chat_id)
+                    file_id = self._sent_file_id(result, field)
+                    if file_id:
+                        job["media_file_id"] = file_id
+                        if self._media_cache:
+                            self._media_cache.set(job["media_url"], file_id)
+                    return result
+        try:
+            return self._sender(job["method"], {**payload, field: file_id}, chat_id)
+        except TelegramApiError as e:
+            if e.status != 400 or "file" not in str(e.description).lower():
+                raise
+            # Önbellekteki file_id geçersiz (ör. bot değişti): URL ile yeniden yüklenir
+            logger.warning(f"[Broadcast] Cached file_id rejected for {job['media_url'][:50]}")
+            with job["media_lock"]:
+                if job["media_file_id"] == file_id:
+                    job["media_file_id"] = None
+            return self._send(job, payload, chat_id)
+
+    def _deliver(self, job: dict, chat_id: str) -> tuple[str, str | None] | None:
+        """Send to one recipient; None if stopped before sending."""
+        payload = {**job["payload"], "chat_id": chat_id}
+        attempts = 0
+        while True:
+            if not self.bucket.acquire(self._stop):
+                return None
+            try:
+                self._send(job, payload, chat_id)
+                return "sent", None
+            except TelegramApiError as e:
+                error = e
+            except Exception as e:
+                error = TelegramApiError(None, str(e))
+            if error.retry_after:
+                self.bucket.pause(error.retry_after)
+                continue
+            attempts += 1
+            if not error.transient or attempts >= self.MAX_ATTEMPTS:
+                return "failed", _short_error(error.description)
+            if self._stop.wait(min(2**attempts, self.MAX_BACKOFF)):
+                return None
+
+    def _process(self, job: dict, chat_id: str) -> None:
+        outcome = self._deliver(job, chat_id)
+        status, error = outcome or ("pending", None)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE broadcast_recipients SET status = ?, error = ? "
+                "WHERE job_id = ? AND chat_id = ?",
+                (status, error, job["job_id"], chat_id),
+            )
+        if status == "failed":
+            logger.error(f"[Broadcast] {job['job_id']}: {chat_id} gönderilemedi: {error}")
+        self._report(job["job_id"])
+
+    def _finish_if_done(self, job_id: str) -> None:
+        # _lock tutulurken çağrılır
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        open_count = self._conn.execute(
+            "SELECT COUNT(*) FROM broadcast_recipients "
+            "WHERE job_id = ? AND status IN ('pending', 'sending')",
+            (job_id,),
+        ).fetchone()[0]
+        if open_count:
+            return
+        self._conn.execute(
+            "UPDATE broadcasts SET status = 'done', finished_at = ? WHERE job_id = ?",
+            (time.time(), job_id),
+        )
+        del self._jobs[job_id]
+        progress = self.progress(job_id)
+        logger.info(
+            f"[Broadcast] {job_id} tamamlandı: {progress['sent']} başarılı, "
+            f"{progress['failed']} başarısız, {progress['unknown']} belirsiz"
+        )
+        if job["report_to"]:
+            threading.Thread(target=self._final_report, args=(job, progress), daemon=True).start()
+
+    def progress(self, job_id: str) -> dict:
+        """
+        Get per-status recipient counts of a job.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            Dictionary with total, sent, failed, unknown and pending counts
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM broadcast_recipients WHERE job_id = ? "
+                "GROUP BY status",
+                (job_id,),
+            ).fetchall()
+        counts = dict(rows)
+        progress = {
+            "sent": counts.get("sent", 0),
+            "failed": counts.get("failed", 0),
+            "unknown": counts.get("unknown", 0),
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+        }
+        progress["total"] = sum(progress.values())
+        return progress
+
+    def _report(self, job_id: str, force: bool = False) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job["report_to"]:
+                return
+            now = time.monotonic()
+            if not force and now - job["last_report"] < self._progress_interval:
+                return
+            job["last_report"] = now
+        progress = self.progress(job_id)
+        done = progress["total"] - progress["pending"]
+        text = (
+            f"📢 <b>{job['title']} gönderiliyor</b>\n\n"
+            f"⏳ {done}/{progress['total']}\n"
+            f"✅ Başarılı: {progress['sent']}\n❌ Başarısız: {progress['failed']}"
+        )
+        self._send_report(job, text)
+
+    def _send_report(self, job: dict, text: str) -> None:
+        try:
+            if job["report_message_id"]:
+                self._sender(
+                    "editMessageText",
+                    {
+                        "chat_id": job["report_to"],
+                        "message_id": job["report_message_id"],
+                        "text": text,
+                        "parse_mode": "HTML",
+                    },
+                    job["report_to"],
+                )
+                return
+            result = self._sender(
+                "sendMessage",
+                {"chat_id": job["report_to"], "text": text, "parse_mode": "HTML"},
+                job["report_to"],
+            )
+            message_id = (result or {}).get("message_id")
+            with self._lock:
+                job["report_message_id"] = message_id
+                self._conn.execute(
+                    "UPDATE broadcasts SET report_message_id = ? WHERE job_id = ?",
+                    (message_id, job["job_id"]),
+                )
+        except Exception as e:
+            logger.warning(f"[Broadcast] Progress report failed for {job['job_id']}: {e}")
+
+    def _final_report(self, job: dict, progress: dict) -> None:
+        response = (
+            f"📢 <b>{job['title']} Gönderildi</b>\n\n"
+            f"✅ Başarılı: {progress['sent']}\n❌ Başarısız: {progress['failed']}"
+        )
+        if progress["unknown"]:
+            response += f"\n❔ Belirsiz (kesinti): {progress['unknown']}"
+        with self._lock:
+            failed_users = self._conn.execute(
+                "SELECT chat_id, error FROM broadcast_recipients "
+                "WHERE job_id = ? AND status = 'failed' ORDER BY position",
+                (job["job_id"],),
+            ).fetchall()
+        if failed_users:
+            response += "\n\n📋 <b>Başarısız Gönderimler:</b>\n"
+            for uid, error in failed_users:
+                response += f"• <code>{uid}</code> - {error}\n"
+        job["report_message_id"] = None  # Özet yeni mesaj olarak gönderilir
+        self._send_report(job, response[:4000])
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                claimed = self._claim()
+                if claimed is None:
+                    self._cond.wait(1)
+                    continue
+            self._process(*claimed)
+
+    def start(self) -> None:
+        """Start the delivery threads (unfinished jobs resume immediately)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"broadcast-{i}", daemon=True)
+                for i in range(self._workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def running(self) -> bool:
+        """True while delivery threads are running."""
+        return bool(self._threads) and not self._stop.is_set()
+
+    def drain(self, job_id: str | None = None) -> None:
+        """
+        Deliver pending recipients in the calling thread (used when not started).
+
+        Args:
+            job_id: Only this job (all jobs if None)
+        """
+        while (claimed := self._claim(job_id)) is not None:
+            self._process(*claimed)
+
+    def active_jobs(self) -> list[str]:
+        """Ids of unfinished jobs."""
+        with self._lock:
+            return list(self._jobs)
+
+    def stop(self, timeout: float = 15) -> None:
+        """
+        Stop delivery threads; unsent recipients resume on the next start.
+
+        Args:
+            timeout: Seconds to wait for in-progress sends
+        """
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._lock:
+            self._conn.close()
+
+
+# Global singleton instance
+_broadcast_engine: BroadcastEngine | None = None
+_broadcast_engine_lock = threading.Lock()
+
+
+def get_broadcast_engine() -> BroadcastEngine:
+    """
+    Get or create the global BroadcastEngine (not started).
+
+    Returns:
+        Global BroadcastEngine instance
+    """
+    global _broadcast_engine
+    with _broadcast_engine_lock:
+        if _broadcast_engine is None:
+            _broadcast_engine = BroadcastEngine(
+                NOTIFY_OUTBOX_FILE,
+                workers=BROADCAST_WORKERS,
+                bucket=get_rate_limiter(),
+                progress_interval=BROADCAST_PROGRESS_INTERVAL,
+                media_cache=get_cache_manager(),
+            )
+        return _broadcast_engine
+
+
+def start_broadcast_engine() -> BroadcastEngine | None:
+    """
+    Start the global BroadcastEngine's workers (if BROADCAST_WORKERS > 0).
+
+    Returns:
+        Running engine, or None when broadcasts are delivered inline
+    """
+    if BROADCAST_WORKERS <= 0:
+        return None
+    engine = get_broadcast_engine()
+    engine.start()
+    return engine
+
+
+def shutdown_broadcast_engine() -> None:
+    """Stop the global BroadcastEngine if it was created."""
+    global _broadcast_engine
+    with _broadcast_engine_lock:
+        engine, _broadcast_engine = _broadcast_engine, None
+    if engine is not None:
+        engine.stop()
+
+
+def broadcast(job_id: str, method: str, payload: dict, chat_ids, **kwargs) -> bool:
+    """
+    Submit a broadcast job; delivered in the background when the engine runs,
+    otherwise in the calling thread before returning.
+
+    Args:
+        job_id: Stable job id (re-submitting an existing id is a no-op)
+        method: Bot API method (sendMessage, sendPhoto, ...)
+        payload: Method parameters without chat_id
+        chat_ids: Recipients
+        **kwargs: title, report_to (see BroadcastEngine.submit)
+
+    Returns:
+        True if a new job was created
+    """
+    engine = get_broadcast_engine()
+    created = engine.submit(job_id, method, payload, chat_ids, **kwargs)
+    if not engine.running:
+        engine.drain(job_id)
+    return created
@@ -4,6 +4,15 @@ CacheManager: Thread-safe file ID cache management with TTL and size limits.
 Manages Telegram file ID caching with automatic cleanup based on:
 - Maximum entry count (LRU eviction)
 - Time-to-live (TTL) for cache entries
+
+Entries are keyed by Ninova URL; content_key() adds a secondary index by
+file content (SHA-256), so identical files posted under different URLs share
+one Telegram upload.
+
+Persistence is write-behind: set() only marks the entry dirty. Dirty entries
+are appended to a small log file (file_cache.log) after a debounce interval
+or when enough of them accumulate, and the full snapshot (file_cache.json) is
+rewritten only when the log grows past a compaction threshold or on sync().
 """
 
 import json
@@ -15,6 +24,21 @@ from pathlib import Path
 
 logger = logging.getLogger("ninova")
 
+CONTENT_KEY_PREFIX = "sha256:"
+
+
+def content_key(digest: str) -> str:
+    """
+    Build the cache key of a file content hash.
+
+    Args:
+        digest: Hex SHA-256 digest of the file bytes
+
+    Returns:
+        Cache key for the content index
+    """
+    return f"{CONTENT_KEY_PREFIX}{digest}"
+
 
 class CacheManager:
     """
@@ -24,6 +48,7 @@ class CacheManager:
     - Bounded cache (LRU eviction when full)
     - TTL-based expiration for entries
     - Atomic file persistence
+    - Write-behind persistence (debounced append-only log + compaction)
     - Thread-safe operations with locking
     - Statistics and monitoring
     """
@@ -32,12 +57,18 @@ class CacheManager:
     DEFAULT_MAX_ENTRIES = 10000  # Max cached file IDs
     DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # 7 days
     CACHE_FILE = Path("data") / "file_cache.json"
+    DEFAULT_FLUSH_INTERVAL = 2.0  # Seconds a dirty entry waits before being logged
+    DEFAULT_FLUSH_THRESHOLD = 100  # Dirty entries that trigger an immediate log append
+    DEFAULT_COMPACT_THRESHOLD = 1000  # Log entries that trigger a snapshot rewrite
 
     def __init__(
         self,
         cache_file: Path = CACHE_FILE,
         max_entries: int = DEFAULT_MAX_ENTRIES,
         ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_threshold: int = DEFAULT_FLUSH_THRESHOLD,
+        compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
     ):
         """
         Initialize CacheManager.
@@ -46,19 +77,33 @@ class CacheManager:
             cache_file: Path to persistent cache file
             max_entries: Maximum number of entries to keep (LRU eviction)
             ttl_seconds: Time-to-live for cache entries (seconds)
+            flush_interval: Debounce delay before dirty entries are logged (seconds)
+            flush_threshold: Dirty entry count that triggers an immediate flush
+            compact_threshold: Log entry count that triggers a snapshot rewrite
         """
         self._cache: OrderedDict = OrderedDict()  # {url: (file_id, timestamp)}
         self._lock = threading.Lock()
         self._cache_file = Path(cache_file)
+        self._log_file = self._cache_file.with_suffix(".log")
         self._max_entries = max_entries
         self._ttl_seconds = ttl_seconds
-        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._flush_interval = flush_interval
+        self._flush_threshold = max(1, flush_threshold)
+        self._compact_threshold = max(1, compact_threshold)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "flushes": 0, "compactions": 0}
+
+        # Write-behind state
+        self._dirty: dict[str, tuple] = {}  # {key: (file_id, timestamp)} not yet logged
+        self._log_entries = 0  # Entries in the log since the last compaction
+        self._io_lock = threading.Lock()  # Serializes log appends and compactions
+        self._timer: threading.Timer | None = None
 
         # Create cache directory if needed
         self._cache_file.parent.mkdir(parents=True, exist_ok=True)
 
-        # Load existing cache from file
+        # Load existing cache from file (snapshot + log)
         self._load_from_file()
+        self._replay_log()
         logger.info(
             f"CacheManager initialized: max={max_entries}, ttl={ttl_seconds}s, "
             f"file={self._cache_file}, loaded={len(self._cache)} entries"
@@ -120,8 +165,29 @@ class CacheManager:
 
             # Add new entry
             self._cache[key] = (file_id, current_time)
+            self._dirty[key] = (file_id, current_time)
             logger.debug(f"Cache set: {key[:50]}... (size: {len(self._cache)})")
 
+            flush_now = len(self._dirty) >= self._flush_threshold
+            if not flush_now:
+                self._schedule_flush()
+
+        if flush_now:
+            self.flush()
+
+    def _schedule_flush(self) -> None:
+        """Start the debounce timer if it is not running (caller holds the lock)."""
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self._flush_interval, self._timer_flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _timer_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+        self.flush()
+
     def clear_expired(self) -> int:
         """
         Remove all expired entries from cache.
@@ -147,11 +213,13 @@ class CacheManager:
 
     def clear_all(self) -> None:
         """
-        Clear entire cache.
+        Clear entire cache (persisted immediately).
         """
         with self._lock:
             self._cache.clear()
+            self._dirty.clear()
             logger.info("Cache cleared")
+        self.compact()
 
     def _load_from_file(self) -> None:
         """
@@ -184,17 +252,134 @@ class CacheManager:
             logger.error(f"Error loading cache: {e}")
             self._cache.clear()
 
-    def _save_to_file(self) -> None:
+    def _replay_log(self) -> None:
         """
-        Save cache to persistent file (called by sync).
+        Apply entries appended to the log since the last compaction.
 
-        Uses atomic write with temp file to prevent corruption.
+        A partially written last line (crash during append) is cut off the file,
+        so the next append starts on a fresh line; an entry older than the
+        snapshot's value for the same key is skipped.
         """
+        if not self._log_file.exists():
+            return
+
         try:
-            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with self._log_file.open("rb") as f:
+                raw = f.read()
+            complete = raw.rfind(b"\n") + 1
+            torn = raw[complete:]
+            for line in raw[:complete].splitlines():
+                self._apply_log_line(line)
+            if torn:
+                if self._apply_log_line(torn):
+                    # Satır tam yazılmış, yalnızca satır sonu eksik
+                    with self._log_file.open("ab") as f:
+                        f.write(b"\n")
+                else:
+                    with self._log_file.open("r+b") as f:
+                        f.truncate(complete)
+                    logger.warning(f"Dropped a partially written line from {self._log_file}")
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+            logger.info(f"Replayed {self._log_entries} entries from cache log")
+        except Exception as e:
+            logger.error(f"Error replaying cache log: {e}")
+
+    def _apply_log_line(self, line: bytes) -> bool:
+        """
+        Apply one log line to the in-memory cache.
+
+        Args:
+            line: Raw JSON line [key, file_id, timestamp]
+
+        Returns:
+            True if the line was valid
+        """
+        try:
+            key, file_id, timestamp = json.loads(line)
+        except (ValueError, TypeError):
+            return False
+        self._log_entries += 1
+        current = self._cache.get(key)
+        if current is None or current[1] <= timestamp:
+            self._cache.pop(key, None)
+            self._cache[key] = (file_id, timestamp)
+        return True
+
+    def flush(self) -> int:
+        """
+        Append dirty entries to the log (compacts if the log is large).
+
+        Returns:
+            Number of entries written
+        """
+        with self._io_lock:
+            written = self._append_dirty()
+            if written and self._log_entries >= self._compact_threshold:
+                self._compact()
+            return written
+
+    def _append_dirty(self) -> int:
+        """Append dirty entries to the log (caller holds the I/O lock)."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not dirty:
+            return 0
+
+        try:
+            self._log_file.parent.mkdir(parents=True, exist_ok=True)
+            with self._log_file.open("a", encoding="utf-8") as f:
+                f.writelines(
+                    json.dumps([key, file_id, timestamp]) + "\n"
+                    for key, (file_id, timestamp) in dirty.items()
+                )
+        except Exception as e:
+            logger.error(f"Error appending cache log: {e}")
+            with self._lock:
+                # Yazılamayanlar bir sonraki flush'ta tekrar denenir
+                self._dirty = {**dirty, **self._dirty}
+            return 0
+
+        self._log_entries += len(dirty)
+        with self._lock:
+            self._stats["flushes"] += 1
+        return len(dirty)
+
+    def compact(self) -> None:
+        """
+        Rewrite the snapshot file and truncate the log.
+        """
+        with self._io_lock:
+            self._compact()
 
-            # Convert to JSON-serializable format
+    def _compact(self) -> None:
+        """Snapshot + log truncation (caller holds the I/O lock)."""
+        with self._lock:
             data = {k: list(v) for k, v in self._cache.items()}
+        if self._save_to_file(data):
+            # Snapshot'taki her şey logda da var; log artık gereksiz
+            self._log_file.unlink(missing_ok=True)
+            self._log_entries = 0
+            with self._lock:
+                self._stats["compactions"] += 1
+
+    def _save_to_file(self, data: dict) -> bool:
+        """
+        Save cache snapshot to persistent file (called by compaction).
+
+        Uses atomic write with temp file to prevent corruption.
+
+        Args:
+            data: JSON-serializable snapshot {key: [file_id, timestamp]}
+
+        Returns:
+            True if the snapshot was written
+        """
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
 
             # Write with temp file (atomic)
             temp_file = self._cache_file.with_suffix(".tmp")
@@ -204,17 +389,21 @@ class CacheManager:
             # Atomic move
             temp_file.replace(self._cache_file)
             logger.debug(f"Cache saved to file: {self._cache_file}")
+            return True
         except Exception as e:
             logger.error(f"Error saving cache: {e}")
+            return False
 
     def sync(self) -> None:
         """
-        Synchronize cache to persistent file.
+        Synchronize cache to persistent file (flush dirty entries and compact).
 
-        Should be called periodically or when important entries are cached.
+        Not needed after set(); used on shutdown to leave a single snapshot.
         """
-        with self._lock:
-            self._save_to_file()
+        with self._io_lock:
+            # Önce loga yazılır: snapshot yazılamazsa son set() çağrıları logda kalır
+            self._append_dirty()
+            self._compact()
 
     def stats(self) -> dict:
         """
@@ -235,6 +424,10 @@ class CacheManager:
                 "misses": self._stats["misses"],
                 "hit_rate_percent": hit_rate,
                 "evictions": self._stats["evictions"],
+                "dirty": len(self._dirty),
+                "log_entries": self._log_entries,
+                "flushes": self._stats["flushes"],
+                "compactions": self._stats["compactions"],
             }
 
 
@@ -1,3 +1,4 @@
+import atexit
 import contextlib
 import json
 import logging
@@ -12,6 +13,8 @@ from rich.console import Console
 
 from common.cache_manager import get_cache_manager
 from common.session import get_session_manager
+from common.storage import create_storage
+from common.user_repository import UserRepository
 
 load_dotenv(Path("secrets") / ".env")
 console = Console()
@@ -29,8 +32,11 @@ Path(SECRETS_DIR).mkdir(parents=True, exist_ok=True)
 USERS_FILE = str(Path(DATA_DIR) / "users.json")
 DATA_FILE = str(Path(DATA_DIR) / "ninova_data.json")
 
-# Thread-safe dosya erişimi için lock'lar
-_users_lock = threading.Lock()
+# Kalıcı veri katmanı: "json" (varsayılan, eski dosyalar) veya "sqlite" (WAL, satır bazlı yazma)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").strip().lower()
+SQLITE_DB_FILE = os.getenv("SQLITE_DB_FILE", str(Path(DATA_DIR) / "ninova.db"))
+
+# Thread-safe dosya erişimi için lock
 _data_lock = threading.Lock()
 
 # Şifreleme anahtarı (ENV'den veya varsayılan)
@@ -77,32 +83,118 @@ def atomic_json_write(filepath, data):
     _atomic_json_write(filepath, data)
 
 
+_storage = create_storage(
+    STORAGE_BACKEND,
+    users_file=USERS_FILE,
+    data_file=DATA_FILE,
+    db_file=SQLITE_DB_FILE,
+    writer=_atomic_json_write,
+)
+
+
+def get_storage():
+    """Yapılandırılmış kalıcı veri katmanını döndürür (JsonStorage / SqliteStorage)."""
+    return _storage
+
+
+def load_state(state_file, default=None):
+    """
+    Küçük durum belgelerini (ari24_state, sks_state, ...) veri katmanından okur.
+
+    :param state_file: Eski JSON durum dosyasının yolu (SQLite'ta anahtar olarak kullanılır)
+    :param default: Kayıt yoksa dönecek değer
+    :return: Durum verisi veya default
+    """
+    return _storage.load_state(state_file, default)
+
+
+def save_state(state_file, data):
+    """
+    Küçük durum belgelerini veri katmanına yazar.
+
+    :param state_file: Eski JSON durum dosyasının yolu
+    :param data: JSON-serializable durum verisi
+    """
+    _storage.save_state(state_file, data)
+
+
+# Süreç genelinde tek kullanıcı deposu: okumalar bellekten, yazmalar gecikmeli (write-behind)
+_user_repository = UserRepository(_storage)
+atexit.register(_user_repository.flush)
+
+
 def load_all_users():
     """
-    Tüm kullanıcı verilerini users.json dosyasından yükler (thread-safe).
+    Tüm kullanıcı verilerini bellekteki kullanıcı deposundan döndürür (thread-safe).
+
+    users.json yalnızca ilk erişimde (veya dosya dışarıdan değiştirildiğinde) okunur.
+    Dönen sözlük bir kopyadır; değişiklikler update_user_fields / remove_user_fields
+    ile kullanıcı bazında kaydedilmelidir.
 
     :return: Kullanıcı sözlüğü (chat_id: user_data) veya boş dict
     """
-    with _users_lock:
-        if Path(USERS_FILE).exists():
-            try:
-                with Path(USERS_FILE).open(encoding="utf-8") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.error(f"{USERS_FILE} dosyası bozuk!")
-                console.print(f"[red]⚠️ {USERS_FILE} dosyası bozuk! Boş dict döndürülüyor.")
-                return {}
-        return {}
+    return _user_repository.all()
 
 
 def save_all_users(users):
     """
-    Tüm kullanıcı verilerini users.json dosyasına kaydeder (thread-safe, atomik).
+    Tüm kullanıcı verilerini depoya yazar; diske gecikmeli ve atomik olarak aktarılır.
 
     :param users: Kaydedilecek kullanıcı sözlüğü
     """
-    with _users_lock:
-        _atomic_json_write(USERS_FILE, users)
+    _user_repository.replace_all(users)
+
+
+def get_user_data(chat_id):
+    """
+    Tek bir kullanıcının verisini bellekten döndürür (kopya).
+
+    :param chat_id: Kullanıcı chat ID
+    :return: Kullanıcı verisi veya None
+    """
+    return _user_repository.get(chat_id)
+
+
+def update_user_fields(chat_id, **fields):
+    """
+    Tek bir kullanıcının alanlarını günceller; dosyanın tamamını yeniden yazmaz.
+
+    :param chat_id: Kullanıcı chat ID
+    :param fields: Güncellenecek alanlar
+    :return: Güncellenmiş kullanıcı verisi (kopya)
+    """
+    return _user_repository.update(chat_id, **fields)
+
+
+def remove_user_fields(chat_id, *keys) -> bool:
+    """
+    Tek bir kullanıcıdan alanları siler.
+
+    :param chat_id: Kullanıcı chat ID
+    :param keys: Silinecek alan adları
+    :return: En az bir alan silindiyse True
+    """
+    return _user_repository.remove_fields(chat_id, *keys)
+
+
+def delete_user(chat_id) -> bool:
+    """
+    Kullanıcıyı depodan siler.
+
+    :param chat_id: Kullanıcı chat ID
+    :return: Kullanıcı bulunduysa True
+    """
+    return _user_repository.delete(chat_id)
+
+
+def get_user_count() -> int:
+    """Kayıtlı kullanıcı sayısını bellekten döndürür."""
+    return _user_repository.count()
+
+
+def flush_users() -> bool:
+    """Bekleyen kullanıcı değişikliklerini hemen diske yazar (shutdown için)."""
+    return _user_repository.flush()
 
 
 CHECK_INTERVAL = 300
@@ -197,7 +289,7 @@ def get_cache_stats() -> dict:
 
 
 def sync_cache_to_disk() -> None:
-    """Flush in-memory cache entries to disk safely."""
+    """Flush pending file ID cache entries and write a compact snapshot (shutdown)."""
     _cache_manager.sync()
 
 
@@ -214,6 +306,126 @@ MAX_SKS_MENU = 100  # SKS menüsü cache sınırı
 REQUEST_TIMEOUT = 15  # requests.get() timeout (saniye)
 REQUEST_TIMEOUT_LONG = 30  # Uzun işlemler için timeout
 
+# Tarama Zamanlayıcısı (tüm kullanıcıların ders işleri tek havuzda, adil sırayla)
+SCAN_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", "16"))  # Toplam eşzamanlı ders taraması
+SCAN_PER_USER_CONCURRENCY = int(os.getenv("SCAN_PER_USER_CONCURRENCY", "3"))  # Kullanıcı başı sınır
+
+# Tarama motoru: "threads" (ScanScheduler iş parçacıkları) veya "asyncio" (tek olay döngüsü,
+# aiohttp gerekir; kurulu değilse threads kullanılır)
+SCAN_ENGINE = os.getenv("SCAN_ENGINE", "threads").strip().lower()
+ASYNC_MAX_IN_FLIGHT = int(os.getenv("ASYNC_MAX_IN_FLIGHT", "1000"))  # Eşzamanlı HTTP isteği
+
+# Çok süreçli tarama: >1 ise kullanıcılar chat_id hash aralıklarına göre bu kadar shard
+# sürecine bölünür; bot ve bildirimler koordinatör süreçte kalır (STORAGE_BACKEND=sqlite gerekir)
+SCAN_SHARDS = int(os.getenv("SCAN_SHARDS", "0"))
+
+# Çok düğümlü tarama: JOB_QUEUE_BACKEND ayarlanırsa ders taramaları iş kuyruğuna yazılır ve
+# scan_node.py düğümleri tarafından kiralanıp çalıştırılır ("sqlite": tek makine, "redis")
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "").strip().lower()
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL", str(Path(DATA_DIR) / "jobs.db"))  # redis://... veya yol
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))  # Kiralama süresi (sn)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # İş başı en fazla deneme
+SCAN_NODE_CONCURRENCY = int(os.getenv("SCAN_NODE_CONCURRENCY", "16"))  # Düğüm başı eşzamanlı iş
+
+# Bildirim dağıtıcısı: tarama/duyuru mesajları kalıcı bir kuyruğa (outbox) yazılır ve arka plan
+# işçileri Telegram hız sınırlarına uyarak gönderir (NOTIFY_WORKERS=0: doğrudan gönderim)
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "4"))
+NOTIFY_RATE_PER_SECOND = float(os.getenv("NOTIFY_RATE_PER_SECOND", "30"))  # Toplam mesaj/sn
+NOTIFY_PER_CHAT_INTERVAL = float(os.getenv("NOTIFY_PER_CHAT_INTERVAL", "1"))  # Aynı sohbete (sn)
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))  # Geçici hatada deneme sayısı
+NOTIFY_OUTBOX_FILE = os.getenv("NOTIFY_OUTBOX_FILE", str(Path(DATA_DIR) / "outbox.db"))
+
+# Toplu gönderimler (SKS menüsü, Arı24, günlük bülten, admin duyurusu): kaldığı yerden devam
+# edebilen işler; alıcı başı ilerleme outbox veritabanında tutulur
+BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "8"))  # Eşzamanlı gönderim (0: satır içi)
+BROADCAST_PROGRESS_INTERVAL = int(
+    os.getenv("BROADCAST_PROGRESS_INTERVAL", "15")
+)  # Admin raporu (sn)
+
+# Dosya ön ısıtma: PREWARM_CHAT_ID ayarlanırsa yeni tespit edilen ders dosyaları bildirimden önce
+# bir kez indirilip bu sohbete yüklenir; file_id önbelleğe yazılır, ilk "İndir" anında cevaplanır
+PREWARM_CHAT_ID = os.getenv("PREWARM_CHAT_ID", "").strip()
+PREWARM_WORKERS = int(os.getenv("PREWARM_WORKERS", "2"))  # Eşzamanlı indirme/yükleme
+PREWARM_WAIT_SECONDS = float(
+    os.getenv("PREWARM_WAIT_SECONDS", "60")
+)  # Bildirim için en fazla bekleme
+
+# Dosya indirme ("İndir" butonu): indirmeler ayrı bir kuyrukta çalışır; aynı dosyanın
+# eşzamanlı istekleri tek aktarımı bekler
+DOWNLOAD_MAX_CONCURRENCY = int(os.getenv("DOWNLOAD_MAX_CONCURRENCY", "4"))  # Toplam eşzamanlı
+DOWNLOAD_PER_USER_LIMIT = int(os.getenv("DOWNLOAD_PER_USER_LIMIT", "1"))  # Kullanıcı başı
+# İndirilen dosya bellekte en fazla bu kadar tutulur, büyükse geçici dosyaya taşar; tüm
+# eşzamanlı indirmelerin bellekteki toplamı DOWNLOAD_MEMORY_BUDGET_BYTES ile sınırlıdır
+DOWNLOAD_SPOOL_MAX_BYTES = int(os.getenv("DOWNLOAD_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+DOWNLOAD_MEMORY_BUDGET_BYTES = int(os.getenv("DOWNLOAD_MEMORY_BUDGET_BYTES", str(64 * 1024 * 1024)))
+
+# Not verisi toplu kayıt: tarama döngüsünde bu kadar değişen kullanıcıda bir checkpoint
+GRADES_CHECKPOINT_USERS = int(os.getenv("GRADES_CHECKPOINT_USERS", "50"))
+
+# Sayfa önbelleği: gövde hash'i değişmeyen Ninova sayfaları yeniden parse edilmez
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000"))
+
+# Sınıf düzeyindeki içerik (dosyalar, duyurular) aynı dersi alan kullanıcılar arasında
+# bu kadar saniye paylaşılır; 0 = kapalı
+SHARED_CONTENT_TTL = int(os.getenv("SHARED_CONTENT_TTL", "120"))
+
+# Duyuru detayları: en fazla bu kadar eşzamanlı istek; içerik duyuru sürümü başına
+# (tüm kullanıcılar için) bu kadar saniye önbellekte tutulur
+ANNOUNCEMENT_DETAIL_WORKERS = int(os.getenv("ANNOUNCEMENT_DETAIL_WORKERS", "4"))
+ANNOUNCEMENT_DETAIL_TTL = int(os.getenv("ANNOUNCEMENT_DETAIL_TTL", str(24 * 3600)))
+
+# Dosya ağacı: oturum başı eşzamanlı klasör listesi isteği
+FILE_WALK_CONCURRENCY = int(os.getenv("FILE_WALK_CONCURRENCY", "4"))
+
+# Dosya listesi ve duyuru detayı istekleri için süreç boyu tek, kalıcı iş parçacığı havuzu
+NINOVA_IO_WORKERS = int(os.getenv("NINOVA_IO_WORKERS", "32"))
+
+# Sayfa parse işlemleri bu kadar ayrı süreçte yapılır (GIL'i aşmak için); 0 = tarama iş
+# parçacığında parse et
+PARSE_PROCESSES = int(os.getenv("PARSE_PROCESSES", "0"))
+
+# Dosya ağacı: klasör satırındaki tarih değişmediyse alt ağaç yeniden gezilmez
+# (en geç FOLDER_MEMO_MAX_AGE saniyede bir yine de gezilir)
+FOLDER_MEMO_MAX_ENTRIES = int(os.getenv("FOLDER_MEMO_MAX_ENTRIES", "5000"))
+FOLDER_MEMO_MAX_AGE = int(os.getenv("FOLDER_MEMO_MAX_AGE", str(6 * 3600)))
+
+# Uyarlanabilir ders tarama aralığı: değişen dersler sık, durgun dersler seyrek taranır
+ADAPTIVE_POLLING = os.getenv("ADAPTIVE_POLLING", "1").lower() in ("1", "true", "yes")
+POLL_MIN_INTERVAL = int(os.getenv("POLL_MIN_INTERVAL", str(CHECK_INTERVAL)))  # Değişiklik sonrası
+POLL_MAX_INTERVAL = int(os.getenv("POLL_MAX_INTERVAL", "3600"))  # Durgun ders üst sınırı
+POLL_BACKOFF_FACTOR = float(os.getenv("POLL_BACKOFF_FACTOR", "1.5"))  # Değişmeyen tarama çarpanı
+POLL_DEADLINE_WINDOW = 24 * 3600  # Teslim tarihi bu kadar yakınsa ders her döngü taranır
+POLL_STATE_FILE = Path(DATA_DIR) / "poll_state.json"
+
+
+def _parse_section_intervals(raw: str) -> dict[str, int]:
+    """
+    "files=3600,announcements=0" biçimindeki bölüm tarama aralıklarını okur.
+
+    :param raw: Virgülle ayrılmış bolum=saniye çiftleri
+    :return: {bölüm: saniye} sözlüğü (hatalı çiftler atlanır)
+    """
+    intervals = {}
+    for item in raw.split(","):
+        name, sep, value = item.partition("=")
+        if not sep:
+            continue
+        try:
+            intervals[name.strip()] = int(value)
+        except ValueError:
+            logger.warning(f"Geçersiz SCAN_SECTION_INTERVALS değeri: {item}")
+    return intervals
+
+
+# Ders içi bölüm tarama sıklığı (saniye, 0 = her taramada). Notlar her taramada çekilir;
+# dosya ağacı varsayılan olarak saatte bir (veya üst klasör listesi değişince) taranır.
+SCAN_SECTION_INTERVALS = {
+    "assignments": 0,
+    "announcements": 0,
+    "files": 3600,
+    **_parse_section_intervals(os.getenv("SCAN_SECTION_INTERVALS", "")),
+}
+
 # Session Temizlik
 SESSION_CLEANUP_INTERVAL = 5 * 60  # 5 dakikada bir temizlik
 SESSION_TTL = 15 * 60  # 15 dakika
@@ -14,7 +14,7 @@ import threading
 from datetime import datetime
 from pathlib import Path
 
-from common.config import ADMIN_TELEGRAM_IDS, DATA_DIR, atomic_json_write, load_all_users
+from common.config import ADMIN_TELEGRAM_IDS, DATA_DIR, load_all_users, load_state, save_state
 from common.log_context import log_with_context
 from common.utils import send_telegram_message
 
@@ -46,22 +46,13 @@ def _empty_entry() -> dict:
 
 def load(known_user_ids: set[str] | None = None) -> None:
     """
-    error_tracker.json'dan yükler.
+    error_tracker durumunu veri katmanından yükler.
 
     known_user_ids verilirse, artık sistemde bulunmayan kullanıcıların
     kayıtları temizlenir.
     """
     global _tracker
-    if _ERROR_TRACKER_FILE.exists():
-        import json
-
-        try:
-            with _ERROR_TRACKER_FILE.open(encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, OSError):
-            data = {}
-    else:
-        data = {}
+    data = load_state(_ERROR_TRACKER_FILE, {})
 
     if known_user_ids is not None:
         data = {k: v for k, v in data.items() if k in known_user_ids}
@@ -71,7 +62,7 @@ def load(known_user_ids: set[str] | None = None) -> None:
 
 def _save() -> None:
     with _error_tracker_lock:
-        atomic_json_write(_ERROR_TRACKER_FILE, _tracker)
+        save_state(_ERROR_TRACKER_FILE, _tracker)
 
 
 def record_error(
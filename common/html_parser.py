@@ -0,0 +1,52 @@
+"""HTML parsing helpers: fastest available BeautifulSoup backend and targeted parsing."""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger("ninova")
+
+# Backends BeautifulSoup can use, mapped to the module they need
+_BACKEND_MODULES = {"lxml": "lxml", "html.parser": None}
+
+
+def _select_backend(requested: str) -> str:
+    """Resolve HTML_PARSER ("auto", "lxml", "html.parser") to an installed backend."""
+    requested = requested.strip().lower() or "auto"
+    if requested == "auto":
+        return "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+    if requested not in _BACKEND_MODULES:
+        logger.warning(f"Unknown HTML_PARSER={requested!r}, using html.parser")
+        return "html.parser"
+    module = _BACKEND_MODULES[requested]
+    if module and not importlib.util.find_spec(module):
+        logger.warning(f"HTML_PARSER={requested} is not installed, using html.parser")
+        return "html.parser"
+    return requested
+
+
+PARSER_BACKEND = _select_backend(os.getenv("HTML_PARSER", "auto"))
+
+# Targeted parsing: build the tree only for the parts a scraper reads.
+# Set HTML_STRAINERS=0 to always parse full documents.
+USE_STRAINERS = os.getenv("HTML_STRAINERS", "1").lower() in ("1", "true", "yes")
+
+DATA_TABLE = SoupStrainer("table", class_="data")
+TABLES = SoupStrainer("table")
+ANNOUNCEMENTS = SoupStrainer("div", class_="duyuruGoruntule")
+COURSE_TREE = SoupStrainer("div", class_="menuErisimAgaci")
+
+
+def make_soup(markup, parse_only: SoupStrainer | None = None) -> BeautifulSoup:
+    """
+    Parse markup with the configured backend.
+
+    :param markup: HTML text or bytes
+    :param parse_only: Optional strainer (e.g. DATA_TABLE); only matching elements are built
+    :return: BeautifulSoup document
+    """
+    return BeautifulSoup(markup, PARSER_BACKEND, parse_only=parse_only if USE_STRAINERS else None)
@@ -10,6 +10,36 @@ import requests
 from common.log_context import log_with_context
 
 
+def _log_completed(logger, response, start, method, url, chat_id, action, retry_count) -> None:
+    log_with_context(
+        logger,
+        "info",
+        "HTTP request completed",
+        chat_id=chat_id,
+        action=action,
+        http_method=method,
+        http_url=url,
+        http_status=response.status_code,
+        http_elapsed_ms=int((time.perf_counter() - start) * 1000),
+        retry_count=retry_count,
+    )
+
+
+def _log_failed(logger, start, method, url, chat_id, action, retry_count, error_stage) -> None:
+    log_with_context(
+        logger,
+        "warning",
+        "HTTP request failed",
+        chat_id=chat_id,
+        action=action,
+        http_method=method,
+        http_url=url,
+        http_elapsed_ms=int((time.perf_counter() - start) * 1000),
+        retry_count=retry_count,
+        error_stage=error_stage,
+    )
+
+
 def http_request(
     logger,
     session,
@@ -26,32 +56,31 @@ def http_request(
     start = time.perf_counter()
     try:
         response = session.request(method, url, **kwargs)
-        elapsed_ms = int((time.perf_counter() - start) * 1000)
-        log_with_context(
-            logger,
-            "info",
-            "HTTP request completed",
-            chat_id=chat_id,
-            action=action,
-            http_method=method,
-            http_url=url,
-            http_status=response.status_code,
-            http_elapsed_ms=elapsed_ms,
-            retry_count=retry_count,
-        )
+        _log_completed(logger, response, start, method, url, chat_id, action, retry_count)
+        return response
+    except requests.RequestException as exc:
+        _log_failed(logger, start, method, url, chat_id, action, retry_count, error_stage)
+        raise exc
+
+
+async def async_http_request(
+    logger,
+    session,
+    method: str,
+    url: str,
+    *,
+    action: str | None = None,
+    chat_id: str | None = None,
+    retry_count: int | None = None,
+    error_stage: str | None = None,
+    **kwargs: Any,
+):
+    """Await session.request (asyncio engine) and emit the same structured logs."""
+    start = time.perf_counter()
+    try:
+        response = await session.request(method, url, **kwargs)
+        _log_completed(logger, response, start, method, url, chat_id, action, retry_count)
         return response
     except requests.RequestException as exc:
-        elapsed_ms = int((time.perf_counter() - start) * 1000)
-        log_with_context(
-            logger,
-            "warning",
-            "HTTP request failed",
-            chat_id=chat_id,
-            action=action,
-            http_method=method,
-            http_url=url,
-            http_elapsed_ms=elapsed_ms,
-            retry_count=retry_count,
-            error_stage=error_stage,
-        )
+        _log_failed(logger, start, method, url, chat_id, action, retry_count, error_stage)
         raise exc
@@ -0,0 +1,549 @@
+"""
+Job queues for distributing scan jobs across processes and nodes.
+
+Two interchangeable backends:
+- SqliteJobQueue: a jobs table in a SQLite (WAL) database; processes on one host
+- RedisJobQueue: Redis (or any client with the same commands); stateless nodes on many hosts
+
+Jobs are leased, not popped. A leased job is invisible to other workers for
+visibility_timeout seconds. The worker either completes it (writing a result
+back for the publisher) or fails it (retried after retry_delay). If the worker
+crashes, the lease expires and the job is handed to another worker. After
+max_attempts leases the job is dead and reported to the publisher as an error.
+
+Jobs and results are plain dicts:
+- job: {"id", "kind", "key", "payload", "attempts"}
+- result: {"id", "kind", "key", "result", "error"}
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from common.storage import _Transaction
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+logger = logging.getLogger("ninova")
+
+JOB_QUEUE_BACKENDS = ("sqlite", "redis")
+
+
+class SqliteJobQueue:
+    """
+    SQLite (WAL) job queue shared by the processes of one host.
+
+    Leases run in BEGIN IMMEDIATE transactions, so two processes never lease
+    the same job. Completed and dead jobs stay in the table until the
+    publisher collects them with fetch_results().
+    """
+
+    backend = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            key TEXT,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            visible_at REAL NOT NULL,
+            leased_by TEXT,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, visible_at);
+        CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_key ON jobs (key)
+            WHERE state IN ('pending', 'leased');
+    """
+
+    def __init__(
+        self,
+        db_file: str | Path,
+        visibility_timeout: float = 300,
+        max_attempts: int = 3,
+        retry_delay: float = 5,
+    ):
+        """
+        Open (and create if needed) the queue database.
+
+        Args:
+            db_file: SQLite database path
+            visibility_timeout: Seconds a leased job stays invisible to other workers
+            max_attempts: Leases per job before it is reported as dead
+            retry_delay: Seconds before a failed job becomes visible again
+        """
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_file), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def publish(self, kind: str, payload: dict, key: str | None = None) -> str:
+        """
+        Add a job to the queue.
+
+        Args:
+            kind: Job type (workers dispatch on it)
+            payload: JSON-serializable job arguments
+            key: Optional deduplication key; while a job with the same key is
+                pending or leased, its id is returned instead of adding a new job
+
+        Returns:
+            Job id
+        """
+        now = time.time()
+        with self._lock, _Transaction(self._conn):
+            if key is not None:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE key = ? AND state IN ('pending', 'leased')",
+                    (key,),
+                ).fetchone()
+                if row:
+                    return row[0]
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, key, payload, state, visible_at, created_at) "
+                "VALUES (?, ?, ?, ?, 'pending', ?, ?)",
+                (job_id, kind, key, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            return job_id
+
+    def lease(self, worker_id: str, limit: int = 1) -> list[dict]:
+        """
+        Lease up to limit visible jobs (pending, or leased with an expired lease).
+
+        Args:
+            worker_id: Leasing worker (for diagnostics)
+            limit: Maximum number of jobs
+
+        Returns:
+            Leased jobs, oldest first
+        """
+        now = time.time()
+        jobs = []
+        with self._lock, _Transaction(self._conn):
+            rows = self._conn.execute(
+                "SELECT id, kind, key, payload, attempts FROM jobs "
+                "WHERE state IN ('pending', 'leased') AND visible_at <= ? "
+                "ORDER BY created_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            for job_id, kind, key, payload, attempts in rows:
+                if attempts >= self.max_attempts:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'dead', error = ? WHERE id = ?",
+                        (f"lease expired {attempts} times", job_id),
+                    )
+                    continue
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'leased', attempts = ?, visible_at = ?, "
+                    "leased_by = ? WHERE id = ?",
+                    (attempts + 1, now + self.visibility_timeout, worker_id, job_id),
+                )
+                jobs.append(
+                    {
+                        "id": job_id,
+                        "kind": kind,
+                        "key": key,
+                        "payload": json.loads(payload),
+                        "attempts": attempts + 1,
+                    }
+                )
+        return jobs
+
+    def complete(self, job: dict, result) -> bool:
+        """
+        Write a job's result back for the publisher.
+
+        Args:
+            job: Leased job
+            result: JSON-serializable result
+
+        Returns:
+            False if the job was already completed, cancelled or dead
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = 'done', result = ? "
+                "WHERE id = ? AND state IN ('pending', 'leased')",
+                (json.dumps(result, ensure_ascii=False), job["id"]),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job: dict, error: str) -> bool:
+        """
+        Report a failed attempt; the job is retried or, after max_attempts, dead.
+
+        Args:
+            job: Leased job
+            error: Error description
+
+        Returns:
+            False if the job was already completed, cancelled or dead
+        """
+        dead = job["attempts"] >= self.max_attempts
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET state = ?, visible_at = ?, error = ? "
+                "WHERE id = ? AND state IN ('pending', 'leased')",
+                (
+                    "dead" if dead else "pending",
+                    time.time() + self.retry_delay,
+                    str(error),
+                    job["id"],
+                ),
+            )
+            return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Drop a job that is no longer wanted (a late result is ignored).
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            True if the job was pending or leased
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE id = ? AND state IN ('pending', 'leased')", (job_id,)
+            )
+            return cursor.rowcount == 1
+
+    def fetch_results(self, limit: int = 100) -> list[dict]:
+        """
+        Collect (and remove) results of completed and dead jobs.
+
+        Args:
+            limit: Maximum number of results
+
+        Returns:
+            Results; "error" is set for dead jobs
+        """
+        with self._lock, _Transaction(self._conn):
+            rows = self._conn.execute(
+                "SELECT id, kind, key, state, result, error FROM jobs "
+                "WHERE state IN ('done', 'dead') LIMIT ?",
+                (limit,),
+            ).fetchall()
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(row[0],) for row in rows])
+        return [
+            {
+                "id": job_id,
+                "kind": kind,
+                "key": key,
+                "result": json.loads(result) if state == "done" else None,
+                "error": None if state == "done" else error,
+            }
+            for job_id, kind, key, state, result, error in rows
+        ]
+
+    def stats(self) -> dict:
+        """
+        Get job counts by state.
+
+        Returns:
+            Dictionary with pending, leased, done and dead counts
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "dead": 0}
+        counts.update(dict(rows))
+        return {"backend": self.backend, **counts}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class RedisJobQueue:
+    """
+    Redis job queue for scanner nodes on several hosts.
+
+    Keys (under prefix):
+    - {prefix}:job:{id}  hash with kind, key, payload, attempts
+    - {prefix}:ready     sorted set id -> visible_at
+    - {prefix}:leased    sorted set id -> lease deadline
+    - {prefix}:keys      hash dedupe key -> id
+    - {prefix}:results   list of result JSON documents
+
+    Ownership changes are claimed with single commands (ZADD NX, ZREM) whose
+    return value tells exactly one caller that it won, so no scripting or
+    transactions are needed and any Redis-compatible server works. A job is
+    always in ready or leased while it is active; a crash between two steps
+    can leave it in both, which the next lease expiry repairs.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "ninova:jobs",
+        visibility_timeout: float = 300,
+        max_attempts: int = 3,
+        retry_delay: float = 5,
+    ):
+        """
+        Initialize RedisJobQueue.
+
+        Args:
+            client: Redis client created with decode_responses=True (or a compatible object)
+            prefix: Key prefix
+            visibility_timeout: Seconds a leased job stays invisible to other workers
+            max_attempts: Leases per job before it is reported as dead
+            retry_delay: Seconds before a failed job becomes visible again
+        """
+        self._redis = client
+        self._prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._ready = f"{prefix}:ready"
+        self._leased = f"{prefix}:leased"
+        self._keys = f"{prefix}:keys"
+        self._results = f"{prefix}:results"
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisJobQueue":
+        """
+        Connect with redis-py.
+
+        Args:
+            url: Redis URL (redis://host:port/db)
+            **kwargs: RedisJobQueue options
+
+        Raises:
+            RuntimeError: If the redis package is not installed
+        """
+        if redis is None:
+            raise RuntimeError("JOB_QUEUE_BACKEND=redis için redis paketi kurulu değil")
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self._prefix}:job:{job_id}"
+
+    def publish(self, kind: str, payload: dict, key: str | None = None) -> str:
+        """
+        Add a job to the queue (see SqliteJobQueue.publish).
+
+        Returns:
+            Job id
+        """
+        job_id = uuid.uuid4().hex
+        if key is not None and not self._redis.hsetnx(self._keys, key, job_id):
+            existing = self._redis.hget(self._keys, key)
+            if existing and self._redis.exists(self._job_key(existing)):
+                return existing
+            self._redis.hset(self._keys, key, job_id)
+        self._redis.hset(
+            self._job_key(job_id),
+            mapping={
+                "kind": kind,
+                "key": key or "",
+                "payload": json.dumps(payload, ensure_ascii=False),
+                "attempts": 0,
+            },
+        )
+        self._redis.zadd(self._ready, {job_id: time.time()})
+        return job_id
+
+    def _reclaim_expired(self, now: float) -> None:
+        # Süresi dolan kiralamalar tekrar görünür olur (önce ready, sonra leased'den çıkar)
+        for job_id in self._redis.zrangebyscore(self._leased, "-inf", now):
+            self._redis.zadd(self._ready, {job_id: now})
+            self._redis.zrem(self._leased, job_id)
+
+    def lease(self, worker_id: str, limit: int = 1) -> list[dict]:
+        """
+        Lease up to limit visible jobs (see SqliteJobQueue.lease).
+
+        Returns:
+            Leased jobs, oldest first
+        """
+        now = time.time()
+        self._reclaim_expired(now)
+        jobs = []
+        for job_id in self._redis.zrangebyscore(self._ready, "-inf", now, start=0, num=limit * 2):
+            if len(jobs) >= limit:
+                break
+            # ZADD NX: sadece bir işçi kiralamayı kazanır
+            if not self._redis.zadd(self._leased, {job_id: now + self.visibility_timeout}, nx=True):
+                continue
+            if not self._redis.zrem(self._ready, job_id):
+                self._redis.zrem(self._leased, job_id)  # Başka işçi tamamladı/iptal etti
+                continue
+            data = self._redis.hgetall(self._job_key(job_id))
+            if not data:
+                self._redis.zrem(self._leased, job_id)
+                continue
+            if int(data.get("attempts", 0)) >= self.max_attempts:
+                self._finish(job_id, data, None, f"lease expired {data['attempts']} times")
+                continue
+            attempts = self._redis.hincrby(self._job_key(job_id), "attempts", 1)
+            self._redis.hset(self._job_key(job_id), "leased_by", worker_id)
+            jobs.append(
+                {
+                    "id": job_id,
+                    "kind": data["kind"],
+                    "key": data.get("key") or None,
+                    "payload": json.loads(data["payload"]),
+                    "attempts": int(attempts),
+                }
+            )
+        return jobs
+
+    def _finish(self, job_id: str, data: dict, result, error: str | None) -> None:
+        key = data.get("key") or None
+        self._redis.lpush(
+            self._results,
+            json.dumps(
+                {
+                    "id": job_id,
+                    "kind": data.get("kind"),
+                    "key": key,
+                    "result": result,
+                    "error": error,
+                },
+                ensure_ascii=False,
+            ),
+        )
+        self._drop(job_id, key)
+
+    def _drop(self, job_id: str, key: str | None) -> None:
+        self._redis.zrem(self._leased, job_id)
+        self._redis.delete(self._job_key(job_id))
+        if key and self._redis.hget(self._keys, key) == job_id:
+            self._redis.hdel(self._keys, key)
+
+    def _claim_active(self, job_id: str) -> dict | None:
+        # leased veya ready'den çıkarabilen çağıran işin sahibidir
+        if not (self._redis.zrem(self._leased, job_id) or self._redis.zrem(self._ready, job_id)):
+            return None
+        return self._redis.hgetall(self._job_key(job_id)) or None
+
+    def complete(self, job: dict, result) -> bool:
+        """
+        Write a job's result back for the publisher (see SqliteJobQueue.complete).
+
+        Returns:
+            False if the job was already completed, cancelled or dead
+        """
+        data = self._claim_active(job["id"])
+        if data is None:
+            return False
+        self._finish(job["id"], data, result, None)
+        return True
+
+    def fail(self, job: dict, error: str) -> bool:
+        """
+        Report a failed attempt (see SqliteJobQueue.fail).
+
+        Returns:
+            False if the job was already completed, cancelled or dead
+        """
+        data = self._claim_active(job["id"])
+        if data is None:
+            return False
+        if int(data.get("attempts", 0)) >= self.max_attempts:
+            self._finish(job["id"], data, None, str(error))
+        else:
+            self._redis.zadd(self._ready, {job["id"]: time.time() + self.retry_delay})
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Drop a job that is no longer wanted (see SqliteJobQueue.cancel).
+
+        Returns:
+            True if the job was pending or leased
+        """
+        data = self._claim_active(job_id)
+        if data is None:
+            return False
+        self._drop(job_id, data.get("key") or None)
+        return True
+
+    def fetch_results(self, limit: int = 100) -> list[dict]:
+        """
+        Collect (and remove) results of completed and dead jobs.
+
+        Returns:
+            Results; "error" is set for dead jobs
+        """
+        results = []
+        while len(results) < limit:
+            raw = self._redis.rpop(self._results)
+            if raw is None:
+                break
+            results.append(json.loads(raw))
+        return results
+
+    def stats(self) -> dict:
+        """
+        Get job counts.
+
+        Returns:
+            Dictionary with pending, leased and finished (uncollected) counts
+        """
+        return {
+            "backend": self.backend,
+            "pending": self._redis.zcard(self._ready),
+            "leased": self._redis.zcard(self._leased),
+            "finished": self._redis.llen(self._results),
+        }
+
+    def close(self) -> None:
+        """Close the client connection."""
+        close = getattr(self._redis, "close", None)
+        if close:
+            close()
+
+
+def create_job_queue(
+    backend: str,
+    *,
+    url: str,
+    visibility_timeout: float = 300,
+    max_attempts: int = 3,
+):
+    """
+    Create the configured job queue backend.
+
+    Args:
+        backend: "sqlite" or "redis"
+        url: SQLite database path (sqlite) or Redis URL (redis)
+        visibility_timeout: Seconds a leased job stays invisible to other workers
+        max_attempts: Leases per job before it is reported as dead
+
+    Returns:
+        SqliteJobQueue or RedisJobQueue instance
+
+    Raises:
+        ValueError: If backend is unknown
+    """
+    options = {"visibility_timeout": visibility_timeout, "max_attempts": max_attempts}
+    if backend == "sqlite":
+        return SqliteJobQueue(url, **options)
+    if backend == "redis":
+        return RedisJobQueue.from_url(url, **options)
+    raise ValueError(f"Bilinmeyen JOB_QUEUE_BACKEND: {backend} (geçerli: {JOB_QUEUE_BACKENDS})")
@@ -0,0 +1,530 @@
+"""
+NotificationDispatcher: Durable, rate-limited delivery of outgoing Telegram messages.
+
+Scan and announcement code enqueues messages instead of calling the Bot API
+inline and sleeping between sends:
+- Durable outbox (SQLite): queued messages survive restarts and are resent
+- Global token bucket (NOTIFY_RATE_PER_SECOND, Telegram allows ~30 msg/s)
+- Per-chat spacing (NOTIFY_PER_CHAT_INTERVAL) with per-chat FIFO order
+- 429 handling: retry_after pauses the whole bucket and requeues the message
+- Transient errors (network, 5xx) are retried with exponential backoff;
+  permanent errors (blocked bot, chat not found) drop the message
+- Worker threads deliver in the background, so callers never block
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+import requests
+
+from common.config import (
+    NOTIFY_MAX_ATTEMPTS,
+    NOTIFY_OUTBOX_FILE,
+    NOTIFY_PER_CHAT_INTERVAL,
+    NOTIFY_RATE_PER_SECOND,
+    NOTIFY_WORKERS,
+    TELEGRAM_TOKEN,
+)
+from common.http_logging import http_request
+from common.log_context import log_with_context
+
+logger = logging.getLogger("ninova")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all senders.
+
+    pause() blocks every acquirer until the pause ends (Telegram's retry_after
+    applies to the bot, not to a single chat).
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        """
+        Initialize TokenBucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity (defaults to rate)
+        """
+        self.rate = max(rate, 0.001)
+        self.capacity = burst if burst is not None else max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_time(self, now: float) -> float:
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self, stop: threading.Event | None = None) -> bool:
+        """
+        Take one token, waiting as needed.
+
+        Args:
+            stop: Optional event that aborts the wait
+
+        Returns:
+            False if stop was set while waiting
+        """
+        while True:
+            with self._lock:
+                wait = self._wait_time(time.monotonic())
+            if wait <= 0:
+                return True
+            if stop is not None:
+                if stop.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Block all acquirers for the given time (e.g. Telegram retry_after).
+
+        Args:
+            seconds: Pause length
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class TelegramApiError(Exception):
+    """
+    Bot API call failed.
+
+    Args:
+        status: HTTP status (None for network errors)
+        description: Telegram error description
+        retry_after: Seconds to wait (429 responses)
+    """
+
+    def __init__(self, status, description, retry_after=None):
+        self.status = status
+        self.description = description
+        self.retry_after = retry_after
+        super().__init__(f"{status}: {description}")
+
+    @property
+    def transient(self) -> bool:
+        """Network errors, rate limits and server errors are worth retrying."""
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+def telegram_api(method: str, payload: dict, chat_id=None) -> dict:
+    """
+    Call a Bot API method with a JSON body.
+
+    Args:
+        method: API method (sendMessage, sendPhoto, sendDocument, ...)
+        payload: Method parameters
+        chat_id: Chat ID for logging
+
+    Returns:
+        API "result" object
+
+    Raises:
+        TelegramApiError: On network errors and non-OK responses
+    """
+    url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/{method}"
+    try:
+        response = http_request(
+            logger,
+            requests,
+            "POST",
+            url,
+            action="telegram_send",
+            chat_id=str(chat_id) if chat_id is not None else None,
+            json=payload,
+            timeout=10,
+        )
+    except requests.RequestException as e:
+        raise TelegramApiError(None, str(e)) from e
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    if response.status_code == 200 and body.get("ok", True):
+        return body.get("result") or {}
+    parameters = body.get("parameters") or {}
+    raise TelegramApiError(
+        response.status_code,
+        body.get("description") or response.text,
+        parameters.get("retry_after"),
+    )
+
+
+class NotificationDispatcher:
+    """
+    Background delivery of queued Bot API calls.
+
+    Features:
+    - SQLite outbox: a message is deleted only after delivery (or a permanent error)
+    - One in-flight message per chat, chats interleaved by readiness time
+    - Shared TokenBucket for the global rate, retry_after-aware backoff
+    - flush() for graceful shutdown and stats() for monitoring
+    """
+
+    # Class constants
+    MAX_BACKOFF = 300  # Seconds between retries of a transient error
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT NOT NULL,
+            method TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_at REAL NOT NULL,
+            created_at REAL NOT NULL
+        );
+    """
+
+    def __init__(
+        self,
+        outbox_file: str | Path,
+        sender: Callable = telegram_api,
+        workers: int = 4,
+        rate: float = 30,
+        per_chat_interval: float = 1.0,
+        max_attempts: int = 5,
+        bucket: TokenBucket | None = None,
+    ):
+        """
+        Initialize NotificationDispatcher (queued messages are loaded from the outbox).
+
+        Args:
+            outbox_file: SQLite outbox path
+            sender: sender(method, payload, chat_id) calling the Bot API
+            workers: Delivery threads
+            rate: Global messages per second
+            per_chat_interval: Minimum seconds between messages to one chat
+            max_attempts: Attempts for transient errors before dropping
+            bucket: Shared TokenBucket (created from rate if None)
+        """
+        self._sender = sender
+        self._workers = max(1, workers)
+        self._per_chat_interval = per_chat_interval
+        self._max_attempts = max_attempts
+        self.bucket = bucket or TokenBucket(rate)
+
+        path = Path(outbox_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque] = {}  # chat_id -> deque of [id, method, payload, attempts]
+        self._heap: list[tuple[float, int, str]] = []  # (ready_at, seq, chat_id)
+        self._scheduled: set[str] = set()
+        self._in_flight: set[str] = set()
+        self._chat_ready_at: dict[str, float] = {}
+        self._seq = itertools.count()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._stats = {"enqueued": 0, "sent": 0, "retried": 0, "rate_limited": 0, "dropped": 0}
+        self._load()
+
+    def _load(self) -> None:
+        rows = self._conn.execute(
+            "SELECT id, chat_id, method, payload, attempts, next_at FROM outbox ORDER BY id"
+        ).fetchall()
+        now = time.time()
+        with self._cond:
+            for row_id, chat_id, method, payload, attempts, next_at in rows:
+                self._queues.setdefault(chat_id, deque()).append(
+                    [row_id, method, json.loads(payload), attempts]
+                )
+                self._chat_ready_at[chat_id] = max(self._chat_ready_at.get(chat_id, 0), next_at)
+            for chat_id in self._queues:
+                self._schedule(chat_id, max(now, self._chat_ready_at[chat_id]))
+        if rows:
+            logger.info(f"[Notifier] {len(rows)} queued messages restored from outbox")
+
+    def _schedule(self, chat_id: str, ready_at: float) -> None:
+        # _cond tutulurken çağrılır
+        if chat_id in self._scheduled or chat_id in self._in_flight:
+            return
+        self._scheduled.add(chat_id)
+        heapq.heappush(self._heap, (ready_at, next(self._seq), chat_id))
+        self._cond.notify()
+
+    def start(self) -> None:
+        """Start the delivery threads."""
+        with self._cond:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"notify-{i}", daemon=True)
+                for i in range(self._workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def running(self) -> bool:
+        """True while delivery threads are running."""
+        return bool(self._threads) and not self._stop.is_set()
+
+    def enqueue(self, chat_id, method: str, payload: dict) -> int:
+        """
+        Queue a Bot API call for background delivery.
+
+        Args:
+            chat_id: Target chat (also set as payload["chat_id"])
+            method: API method (sendMessage, sendPhoto, ...)
+            payload: Method parameters (JSON-serializable)
+
+        Returns:
+            Outbox row id
+        """
+        chat_id = str(chat_id)
+        payload = {**payload, "chat_id": chat_id}
+        now = time.time()
+        with self._db_lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (chat_id, method, payload, next_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chat_id, method, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+        row_id = cursor.lastrowid
+        with self._cond:
+            self._queues.setdefault(chat_id, deque()).append([row_id, method, payload, 0])
+            self._stats["enqueued"] += 1
+            self._schedule(chat_id, max(now, self._chat_ready_at.get(chat_id, 0)))
+        return row_id
+
+    def _next_chat(self) -> str | None:
+        with self._cond:
+            while not self._stop.is_set():
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    _, _, chat_id = heapq.heappop(self._heap)
+                    self._scheduled.discard(chat_id)
+                    self._in_flight.add(chat_id)
+                    return chat_id
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+        return None
+
+    def _deliver(self, chat_id: str, entry: list) -> tuple[str, float]:
+        """Send one message; returns (outcome, delay before the chat's next message)."""
+        _, method, payload, attempts = entry
+        try:
+            self._sender(method, payload, chat_id)
+            return "sent", self._per_chat_interval
+        except TelegramApiError as e:
+            error = e
+        except Exception as e:  # Gönderici hatası: geçici say
+            error = TelegramApiError(None, str(e))
+
+        if error.retry_after:
+            self.bucket.pause(error.retry_after)
+            logger.warning(f"[Notifier] 429 from Telegram, pausing {error.retry_after}s")
+            return "rate_limited", float(error.retry_after)
+        attempts += 1
+        if error.transient and attempts < self._max_attempts:
+            entry[3] = attempts
+            return "retried", min(2**attempts, self.MAX_BACKOFF)
+        log_with_context(
+            logger,
+            "error",
+            f"Telegram mesajı gönderilemedi ({method}, deneme {attempts}): {error.description}",
+            chat_id=chat_id,
+            action="telegram_send",
+            http_status=error.status,
+        )
+        return "dropped", self._per_chat_interval
+
+    def _worker(self) -> None:
+        while True:
+            chat_id = self._next_chat()
+            if chat_id is None:
+                return
+            with self._cond:
+                entry = self._queues[chat_id][0]
+            if not self.bucket.acquire(self._stop):
+                with self._cond:
+                    self._in_flight.discard(chat_id)
+                return
+            outcome, delay = self._deliver(chat_id, entry)
+            ready_at = time.time() + delay
+
+            with self._db_lock:
+                if outcome in ("sent", "dropped"):
+                    self._conn.execute("DELETE FROM outbox WHERE id = ?", (entry[0],))
+                else:
+                    self._conn.execute(
+                        "UPDATE outbox SET attempts = ?, next_at = ? WHERE id = ?",
+                        (entry[3], ready_at, entry[0]),
+                    )
+            with self._cond:
+                self._stats[outcome] += 1
+                queue = self._queues[chat_id]
+                if outcome in ("sent", "dropped"):
+                    queue.popleft()
+                self._in_flight.discard(chat_id)
+                self._chat_ready_at[chat_id] = ready_at
+                if queue:
+                    self._schedule(chat_id, ready_at)
+                else:
+                    del self._queues[chat_id]
+                self._cond.notify_all()
+
+    def pending(self) -> int:
+        """Number of queued (undelivered) messages."""
+        with self._cond:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait until the queue is empty.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if every queued message was handled
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queues:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stop(self, timeout: float = 15) -> None:
+        """
+        Stop delivery threads; undelivered messages stay in the outbox.
+
+        Args:
+            timeout: Seconds to wait for in-progress sends
+        """
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        """
+        Get dispatcher statistics.
+
+        Returns:
+            Dictionary with dispatcher stats
+        """
+        with self._cond:
+            return {
+                "pending": sum(len(queue) for queue in self._queues.values()),
+                "chats": len(self._queues),
+                **self._stats,
+            }
+
+
+# Global singleton instance
+_dispatcher: NotificationDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+# Telegram sınırı bot başınadır: dağıtıcı ve toplu gönderimler aynı kovayı paylaşır
+_rate_limiter = TokenBucket(NOTIFY_RATE_PER_SECOND)
+
+
+def get_rate_limiter() -> TokenBucket:
+    """Get the global TokenBucket shared by every background sender."""
+    return _rate_limiter
+
+
+def start_notification_dispatcher() -> NotificationDispatcher | None:
+    """
+    Create and start the global NotificationDispatcher (if NOTIFY_WORKERS > 0).
+
+    Returns:
+        Running dispatcher, or None when messages are sent directly
+    """
+    global _dispatcher
+    if NOTIFY_WORKERS <= 0:
+        return None
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher(
+                NOTIFY_OUTBOX_FILE,
+                workers=NOTIFY_WORKERS,
+                rate=NOTIFY_RATE_PER_SECOND,
+                per_chat_interval=NOTIFY_PER_CHAT_INTERVAL,
+                max_attempts=NOTIFY_MAX_ATTEMPTS,
+                bucket=_rate_limiter,
+            )
+            _dispatcher.start()
+        return _dispatcher
+
+
+def get_notification_dispatcher() -> NotificationDispatcher | None:
+    """Get the running global NotificationDispatcher, or None if it is not started."""
+    dispatcher = _dispatcher
+    return dispatcher if dispatcher is not None and dispatcher.running else None
+
+
+def shutdown_notification_dispatcher(flush_timeout: float = 5) -> None:
+    """
+    Deliver what can be delivered within flush_timeout, then stop the dispatcher.
+
+    Args:
+        flush_timeout: Seconds to keep sending queued messages
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.flush(flush_timeout)
+        dispatcher.stop()
+
+
+def enqueue_notification(chat_id, method: str, payload: dict) -> bool:
+    """
+    Queue a Bot API call on the running dispatcher.
+
+    Args:
+        chat_id: Target chat
+        method: API method (sendMessage, sendPhoto, ...)
+        payload: Method parameters
+
+    Returns:
+        False if no dispatcher is running (the caller sends directly)
+    """
+    dispatcher = get_notification_dispatcher()
+    if dispatcher is None:
+        return False
+    dispatcher.enqueue(chat_id, method, payload)
+    return True
+
+
+def pace_direct_send(seconds: float) -> None:
+    """
+    Sleep between direct sends; a no-op when the dispatcher paces delivery.
+
+    Args:
+        seconds: Delay used when messages are sent inline
+    """
+    if get_notification_dispatcher() is None:
+        time.sleep(seconds)
@@ -0,0 +1,223 @@
+"""
+CoursePollScheduler: Adaptive per-course polling intervals.
+
+Learns how often each (user, course) pair changes from scan results:
+- A detected change snaps the course back to the minimum interval
+- Every unchanged scan multiplies the interval by a backoff factor (up to a maximum)
+- Callers can force a scan (e.g. an assignment deadline is near)
+- A course that falls due within the tolerance (e.g. half a scan cycle) is
+  scanned now rather than a full cycle late
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger("ninova")
+
+
+class CoursePollScheduler:
+    """
+    Thread-safe adaptive poll scheduler keyed by (chat_id, course_url).
+
+    Features:
+    - Exponential backoff for idle courses within [min_interval, max_interval]
+    - Instant snap-back to fast polling on change
+    - JSON-serializable state (export_state / load_state) for persistence
+    - Statistics and monitoring
+    """
+
+    # Class constants
+    DEFAULT_MIN_INTERVAL = 300
+    DEFAULT_MAX_INTERVAL = 3600
+    DEFAULT_BACKOFF = 1.5
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF,
+        tolerance: float = 0,
+    ):
+        """
+        Initialize CoursePollScheduler.
+
+        Args:
+            min_interval: Polling interval for active courses (seconds)
+            max_interval: Upper bound for idle courses (seconds)
+            backoff: Interval multiplier applied after each unchanged scan
+            tolerance: A course is due when next_due is at most this far away
+                (seconds); half the scan cycle keeps jittered cycles from
+                skipping a course that is due a few seconds later
+        """
+        self._min_interval = max(1.0, float(min_interval))
+        self._max_interval = max(self._min_interval, float(max_interval))
+        self._backoff = max(1.0, float(backoff))
+        self._tolerance = max(0.0, float(tolerance))
+        self._courses: dict[str, dict[str, dict]] = {}  # {chat_id: {url: entry}}
+        self._lock = threading.Lock()
+        self._stats = {"due": 0, "skipped": 0, "forced": 0}
+
+    def _entry(self, chat_id: str, url: str) -> dict | None:
+        return self._courses.get(chat_id, {}).get(url)
+
+    def is_due(self, chat_id, url: str, now: float | None = None, force: bool = False) -> bool:
+        """
+        Check whether a course should be scanned in this cycle.
+
+        Args:
+            chat_id: User chat ID
+            url: Course URL
+            now: Current timestamp (defaults to time.time())
+            force: Scan regardless of the learned interval
+
+        Returns:
+            True if the course is due (unknown courses are always due)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entry(str(chat_id), url)
+            due = entry is None or entry["next_due"] - now <= self._tolerance
+            if force and not due:
+                self._stats["forced"] += 1
+                due = True
+            self._stats["due" if due else "skipped"] += 1
+            return due
+
+    def record_result(self, chat_id, url: str, changed: bool, now: float | None = None) -> float:
+        """
+        Update a course's interval from a completed scan.
+
+        Args:
+            chat_id: User chat ID
+            url: Course URL
+            changed: Whether the scan detected any change
+            now: Current timestamp (defaults to time.time())
+
+        Returns:
+            New polling interval (seconds)
+        """
+        now = time.time() if now is None else now
+        chat_id = str(chat_id)
+        with self._lock:
+            entry = self._entry(chat_id, url)
+            if changed or entry is None:
+                interval = self._min_interval
+            else:
+                interval = min(self._max_interval, entry["interval"] * self._backoff)
+            self._courses.setdefault(chat_id, {})[url] = {
+                "interval": interval,
+                "next_due": now + interval,
+                "last_change": now if changed else (entry or {}).get("last_change"),
+            }
+            return interval
+
+    def prune(self, active: dict[str, list[str]]) -> int:
+        """
+        Drop state for users/courses that are no longer tracked.
+
+        Args:
+            active: {chat_id: [course_url, ...]} of tracked courses
+
+        Returns:
+            Number of removed course entries
+        """
+        removed = 0
+        with self._lock:
+            for chat_id in list(self._courses):
+                urls = set(active.get(chat_id, ()))
+                courses = self._courses[chat_id]
+                for url in [u for u in courses if u not in urls]:
+                    del courses[url]
+                    removed += 1
+                if not courses:
+                    del self._courses[chat_id]
+        return removed
+
+    def export_state(self) -> dict:
+        """Get a JSON-serializable copy of the learned intervals."""
+        with self._lock:
+            return {
+                chat_id: {url: dict(entry) for url, entry in courses.items()}
+                for chat_id, courses in self._courses.items()
+            }
+
+    def load_state(self, state: dict | None) -> None:
+        """
+        Restore learned intervals (invalid entries are ignored).
+
+        Args:
+            state: Output of export_state()
+        """
+        courses: dict[str, dict[str, dict]] = {}
+        for chat_id, entries in (state or {}).items():
+            if not isinstance(entries, dict):
+                continue
+            for url, entry in entries.items():
+                try:
+                    interval = float(entry["interval"])
+                    next_due = float(entry["next_due"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                interval = min(self._max_interval, max(self._min_interval, interval))
+                courses.setdefault(str(chat_id), {})[url] = {
+                    "interval": interval,
+                    "next_due": next_due,
+                    "last_change": entry.get("last_change"),
+                }
+        with self._lock:
+            self._courses = courses
+
+    def reset_stats(self) -> None:
+        """Reset due/skipped counters (e.g. at the start of a scan cycle)."""
+        with self._lock:
+            self._stats = {"due": 0, "skipped": 0, "forced": 0}
+
+    def stats(self) -> dict:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dictionary with scheduler stats
+        """
+        with self._lock:
+            intervals = [e["interval"] for c in self._courses.values() for e in c.values()]
+            return {
+                "courses": len(intervals),
+                "due": self._stats["due"],
+                "skipped": self._stats["skipped"],
+                "forced": self._stats["forced"],
+                "min_interval": self._min_interval,
+                "max_interval": self._max_interval,
+                "avg_interval": round(sum(intervals) / len(intervals)) if intervals else 0,
+            }
+
+
+# Global singleton instance
+_poll_scheduler: CoursePollScheduler | None = None
+_poll_scheduler_lock = threading.Lock()
+
+
+def get_poll_scheduler(
+    min_interval: float = CoursePollScheduler.DEFAULT_MIN_INTERVAL,
+    max_interval: float = CoursePollScheduler.DEFAULT_MAX_INTERVAL,
+    backoff: float = CoursePollScheduler.DEFAULT_BACKOFF,
+    tolerance: float = 0,
+) -> CoursePollScheduler:
+    """
+    Get or create global CoursePollScheduler instance.
+
+    Args:
+        min_interval: Fast polling interval (only used if creating new instance)
+        max_interval: Idle polling bound (only used if creating new instance)
+        backoff: Idle backoff multiplier (only used if creating new instance)
+        tolerance: Due-time tolerance in seconds (only used if creating new instance)
+
+    Returns:
+        Global CoursePollScheduler instance
+    """
+    global _poll_scheduler
+    with _poll_scheduler_lock:
+        if _poll_scheduler is None:
+            _poll_scheduler = CoursePollScheduler(min_interval, max_interval, backoff, tolerance)
+        return _poll_scheduler
@@ -0,0 +1,289 @@
+"""
+ScanScheduler: Long-lived, fair work scheduler for cross-user scan jobs.
+
+Interleaves (user, course) jobs from all users on a single worker pool:
+- Global concurrency limit (total worker threads)
+- Per-user concurrency cap (one user cannot monopolize the pool)
+- Round-robin dispatch across users with pending jobs
+"""
+
+import contextvars
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger("ninova")
+
+
+class ScanScheduler:
+    """
+    Thread-safe round-robin job scheduler with per-owner concurrency caps.
+
+    Features:
+    - Persistent worker threads (no pool creation per user/cycle)
+    - Fair interleaving across owners (usually chat_id)
+    - Per-owner in-flight limit
+    - concurrent.futures.Future results (works with as_completed)
+    - Statistics and monitoring
+    """
+
+    # Class constants
+    DEFAULT_MAX_WORKERS = 16
+    DEFAULT_PER_USER_LIMIT = 3
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        per_user_limit: int = DEFAULT_PER_USER_LIMIT,
+        thread_name_prefix: str = "scan",
+    ):
+        """
+        Initialize ScanScheduler and start worker threads.
+
+        Args:
+            max_workers: Total number of worker threads
+            per_user_limit: Maximum concurrently running jobs per owner
+            thread_name_prefix: Worker thread name prefix
+        """
+        self._max_workers = max(1, max_workers)
+        self._per_user_limit = max(1, per_user_limit)
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque] = {}  # {owner: deque[(future, ctx, func, args, kwargs)]}
+        self._ready: deque[str] = deque()  # Round-robin order of owners with pending jobs
+        self._in_flight: dict[str, int] = {}
+        self._shutdown = False
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+        self._workers = [
+            threading.Thread(
+                target=self._worker_loop, name=f"{thread_name_prefix}-{i}", daemon=True
+            )
+            for i in range(self._max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        logger.info(
+            f"ScanScheduler initialized: workers={self._max_workers}, "
+            f"per_user_limit={self._per_user_limit}"
+        )
+
+    def submit(self, owner, func, *args, **kwargs) -> Future:
+        """
+        Queue a job for an owner.
+
+        Args:
+            owner: Fairness key (usually chat_id)
+            func: Callable to execute
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Future resolved with func's result or exception
+
+        Raises:
+            RuntimeError: If scheduler has been shut down
+        """
+        owner = str(owner)
+        future: Future = Future()
+        # Caller's log context (chat_id, request_id...) is carried into the worker
+        ctx = contextvars.copy_context()
+
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("ScanScheduler is shut down")
+
+            queue = self._queues.get(owner)
+            if queue is None:
+                queue = deque()
+                self._queues[owner] = queue
+                self._ready.append(owner)
+            queue.append((future, ctx, func, args, kwargs))
+            self._stats["submitted"] += 1
+            self._cond.notify()
+
+        return future
+
+    def _next_job(self):
+        """
+        Pick the next runnable job in round-robin order (caller holds the lock).
+
+        Returns:
+            (owner, job) tuple or None if every pending owner is at its cap
+        """
+        for _ in range(len(self._ready)):
+            owner = self._ready.popleft()
+            if self._in_flight.get(owner, 0) >= self._per_user_limit:
+                self._ready.append(owner)
+                continue
+
+            queue = self._queues[owner]
+            job = queue.popleft()
+            if queue:
+                self._ready.append(owner)
+            else:
+                del self._queues[owner]
+
+            self._in_flight[owner] = self._in_flight.get(owner, 0) + 1
+            return owner, job
+        return None
+
+    def _worker_loop(self) -> None:
+        """Worker thread body: run jobs until shutdown."""
+        while True:
+            with self._cond:
+                picked = self._next_job()
+                while picked is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    picked = self._next_job()
+
+            owner, (future, ctx, func, args, kwargs) = picked
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        result = ctx.run(func, *args, **kwargs)
+                    except BaseException as e:
+                        future.set_exception(e)
+                        with self._cond:
+                            self._stats["failed"] += 1
+                    else:
+                        future.set_result(result)
+            finally:
+                with self._cond:
+                    self._stats["completed"] += 1
+                    remaining = self._in_flight[owner] - 1
+                    if remaining:
+                        self._in_flight[owner] = remaining
+                    else:
+                        del self._in_flight[owner]
+                    # Owner may be runnable again; wake idle workers
+                    self._cond.notify_all()
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = True) -> None:
+        """
+        Stop accepting jobs and stop worker threads.
+
+        Args:
+            wait: Join worker threads before returning
+            cancel_pending: Cancel jobs that have not started yet
+        """
+        with self._cond:
+            self._shutdown = True
+            if cancel_pending:
+                for queue in self._queues.values():
+                    for future, *_ in queue:
+                        future.cancel()
+                self._queues.clear()
+                self._ready.clear()
+            self._cond.notify_all()
+
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def stats(self) -> dict:
+        """
+        Get scheduler statistics.
+
+        Returns:
+            Dictionary with scheduler stats
+        """
+        with self._cond:
+            return {
+                "max_workers": self._max_workers,
+                "per_user_limit": self._per_user_limit,
+                "pending": sum(len(q) for q in self._queues.values()),
+                "in_flight": sum(self._in_flight.values()),
+                "submitted": self._stats["submitted"],
+                "completed": self._stats["completed"],
+                "failed": self._stats["failed"],
+            }
+
+
+# Global singleton instance
+_scan_scheduler: ScanScheduler | None = None
+_scan_scheduler_lock = threading.Lock()
+
+
+def get_scan_scheduler(
+    max_workers: int = ScanScheduler.DEFAULT_MAX_WORKERS,
+    per_user_limit: int = ScanScheduler.DEFAULT_PER_USER_LIMIT,
+) -> ScanScheduler:
+    """
+    Get or create global ScanScheduler instance.
+
+    Args:
+        max_workers: Total worker threads (only used if creating new instance)
+        per_user_limit: Per-user cap (only used if creating new instance)
+
+    Returns:
+        Global ScanScheduler instance
+    """
+    global _scan_scheduler
+    with _scan_scheduler_lock:
+        if _scan_scheduler is None:
+            _scan_scheduler = ScanScheduler(max_workers=max_workers, per_user_limit=per_user_limit)
+        return _scan_scheduler
+
+
+def shutdown_scan_scheduler(wait: bool = False) -> None:
+    """
+    Shut down the global ScanScheduler if it was created.
+
+    Args:
+        wait: Join worker threads before returning
+    """
+    global _scan_scheduler
+    with _scan_scheduler_lock:
+        scheduler, _scan_scheduler = _scan_scheduler, None
+    if scheduler is not None:
+        scheduler.shutdown(wait=wait)
+
+
+# Global download scheduler instance
+_download_scheduler: ScanScheduler | None = None
+
+
+def get_download_scheduler(
+    max_workers: int = 4,
+    per_user_limit: int = 1,
+) -> ScanScheduler:
+    """
+    Get or create the global file download scheduler.
+
+    Requests beyond the global or per-user limit wait in the queue instead of
+    blocking the bot's handler threads.
+
+    Args:
+        max_workers: Concurrent downloads (only used if creating new instance)
+        per_user_limit: Concurrent downloads per chat (only used if creating new instance)
+
+    Returns:
+        Global download ScanScheduler instance
+    """
+    global _download_scheduler
+    with _scan_scheduler_lock:
+        if _download_scheduler is None:
+            _download_scheduler = ScanScheduler(
+                max_workers=max_workers,
+                per_user_limit=per_user_limit,
+                thread_name_prefix="download",
+            )
+        return _download_scheduler
+
+
+def shutdown_download_scheduler(wait: bool = False) -> None:
+    """
+    Shut down the global download scheduler if it was created.
+
+    Args:
+        wait: Join worker threads before returning
+    """
+    global _download_scheduler
+    with _scan_scheduler_lock:
+        scheduler, _download_scheduler = _download_scheduler, None
+    if scheduler is not None:
+        scheduler.shutdown(wait=wait)
@@ -0,0 +1,178 @@
+"""
+ShardCoordinator: Run the scan pipeline in worker processes, one per chat_id shard.
+
+Each shard process owns a contiguous range of the crc32 hash space of chat_ids
+and runs the scan/diff pipeline only for those users, so a single node's cores
+are all used. Shards do not talk to Telegram or write user records themselves:
+they put messages on a local queue (the outbox), and the coordinator process,
+which owns Telegram polling, drains it on a dispatcher thread. A slow shard
+therefore cannot stall the bot, and crashed shards are restarted by supervise().
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import zlib
+from collections.abc import Callable
+
+logger = logging.getLogger("ninova")
+
+
+def shard_of(chat_id, shards: int) -> int:
+    """
+    Get the shard that owns a chat_id.
+
+    Args:
+        chat_id: Telegram chat ID
+        shards: Number of shards
+
+    Returns:
+        Shard index in [0, shards)
+    """
+    if shards <= 1:
+        return 0
+    return (zlib.crc32(str(chat_id).encode()) * shards) >> 32
+
+
+class ShardCoordinator:
+    """
+    Starts, supervises and stops shard processes and dispatches their messages.
+
+    Features:
+    - forkserver/spawn shard processes (safe with the bot's threads)
+    - Single outbox queue drained on a coordinator thread
+    - Per-shard wake events (run a scan now) and a shared stop event
+    - Automatic restart of dead shards
+    """
+
+    # Class constants
+    DISPATCH_POLL = 1.0  # Seconds between stop checks while the outbox is empty
+
+    def __init__(self, shards: int, worker: Callable, dispatch: Callable):
+        """
+        Initialize ShardCoordinator.
+
+        Args:
+            shards: Number of shard processes
+            worker: Module-level function worker(index, shards, outbox, wake, stop)
+                run in each shard process
+            dispatch: dispatch(message) called in the coordinator for each outbox message
+        """
+        self._shards = max(1, shards)
+        self._worker = worker
+        self._dispatch = dispatch
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        self._outbox = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._wake = [self._ctx.Event() for _ in range(self._shards)]
+        self._processes: list = [None] * self._shards
+        self._dispatcher: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {"dispatched": 0, "dispatch_errors": 0, "restarts": 0}
+
+    @property
+    def shards(self) -> int:
+        """Number of shard processes."""
+        return self._shards
+
+    def _start_shard(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=self._worker,
+            args=(index, self._shards, self._outbox, self._wake[index], self._stop),
+            name=f"scan-shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[index] = process
+
+    def start(self) -> None:
+        """Start all shard processes and the dispatcher thread."""
+        with self._lock:
+            for index in range(self._shards):
+                self._start_shard(index)
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop, name="shard-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+        logger.info(f"[Shards] {self._shards} scan shard processes started")
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            try:
+                message = self._outbox.get(timeout=self.DISPATCH_POLL)
+            except queue.Empty:
+                if self._stop.is_set() and not any(p and p.is_alive() for p in self._processes):
+                    return
+                continue
+            try:
+                self._dispatch(message)
+                key = "dispatched"
+            except Exception as e:
+                logger.exception(f"[Shards] Dispatch failed for {message.get('type')}: {e}")
+                key = "dispatch_errors"
+            with self._lock:
+                self._stats[key] += 1
+
+    def supervise(self) -> int:
+        """
+        Restart shard processes that exited unexpectedly.
+
+        Returns:
+            Number of restarted shards
+        """
+        if self._stop.is_set():
+            return 0
+        restarted = 0
+        with self._lock:
+            for index, process in enumerate(self._processes):
+                if process is not None and not process.is_alive():
+                    logger.warning(
+                        f"[Shards] Shard {index} exited (code {process.exitcode}), restarting"
+                    )
+                    self._start_shard(index)
+                    self._stats["restarts"] += 1
+                    restarted += 1
+        return restarted
+
+    def trigger(self) -> None:
+        """Ask every shard to start a scan now instead of waiting for its interval."""
+        for event in self._wake:
+            event.set()
+
+    def stop(self, timeout: float = 30) -> None:
+        """
+        Stop shards (finishing their current scan) and drain the outbox.
+
+        Args:
+            timeout: Seconds to wait for each shard before terminating it
+        """
+        self._stop.set()
+        self.trigger()
+        for index, process in enumerate(self._processes):
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"[Shards] Shard {index} did not stop in {timeout}s, terminating")
+                process.terminate()
+                process.join(5)
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+
+    def stats(self) -> dict:
+        """
+        Get coordinator statistics.
+
+        Returns:
+            Dictionary with shard stats
+        """
+        with self._lock:
+            return {
+                "shards": self._shards,
+                "alive": sum(1 for p in self._processes if p is not None and p.is_alive()),
+                **self._stats,
+            }
@@ -0,0 +1,78 @@
+"""
+SingleFlight: Coalesce concurrent requests for the same key into one operation.
+
+Used for file transfers: when several users ask for the same Ninova file at
+once, only the first request starts a download; the others wait on the same
+Future and reuse its result (the Telegram file_id).
+"""
+
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Thread-safe registry of in-flight operations keyed by a string.
+
+    Features:
+    - At most one running operation per key
+    - Followers share the leader's Future (result or exception)
+    - Keys are released as soon as the operation finishes
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._stats = {"started": 0, "coalesced": 0}
+
+    def submit(self, key: str, start: Callable[[], Future]) -> tuple[Future, bool]:
+        """
+        Join the in-flight operation for key or start a new one.
+
+        Args:
+            key: Operation key (e.g. file URL)
+            start: Called (under the registry lock) to start the operation
+
+        Returns:
+            (future, leader) tuple; leader is True if this call started it
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = start()
+            self._in_flight[key] = future
+            self._stats["started"] += 1
+        future.add_done_callback(lambda _f: self._release(key, future))
+        return future, True
+
+    def get(self, key: str) -> Future | None:
+        """
+        Get the in-flight operation for key.
+
+        Args:
+            key: Operation key
+
+        Returns:
+            Future of the running operation or None
+        """
+        with self._lock:
+            return self._in_flight.get(key)
+
+    def _release(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def stats(self) -> dict:
+        """
+        Get registry statistics.
+
+        Returns:
+            Dictionary with in_flight, started and coalesced counts
+        """
+        with self._lock:
+            return {"in_flight": len(self._in_flight), **self._stats}
@@ -0,0 +1,523 @@
+"""
+Storage backends for durable bot state (users, course snapshots, small state blobs).
+
+Two interchangeable implementations:
+- JsonStorage: legacy monolithic JSON files (users.json, ninova_data.json, *_state.json)
+- SqliteStorage: single SQLite database in WAL mode with per-user and per-course rows
+
+SqliteStorage only writes rows whose content changed, so the cost of a save scales
+with the size of the change instead of the total amount of stored data.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+logger = logging.getLogger("ninova")
+
+STORAGE_BACKENDS = ("json", "sqlite")
+
+
+def _dumps(data) -> str:
+    """Serialize a row payload (key order is preserved; it drives display order)."""
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _state_name(path: str | Path) -> str:
+    """State key for a legacy state file path (e.g. data/sks_state.json -> sks_state)."""
+    return Path(path).stem
+
+
+class JsonStorage:
+    """
+    Legacy JSON file storage.
+
+    Every save rewrites the whole file atomically; kept as the default backend
+    and as the migration source for SqliteStorage.
+    """
+
+    backend = "json"
+
+    def __init__(
+        self,
+        users_file: str | Path,
+        data_file: str | Path,
+        writer: Callable[[str | Path, dict], None],
+    ):
+        """
+        Initialize JsonStorage.
+
+        Args:
+            users_file: Path to users.json
+            data_file: Path to ninova_data.json
+            writer: Atomic JSON writer, called as writer(path, data)
+        """
+        self.users_file = Path(users_file)
+        self.data_file = Path(data_file)
+        self._writer = writer
+
+    @staticmethod
+    def _read(path: Path) -> dict:
+        if not path.exists():
+            return {}
+        try:
+            with path.open(encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.error(f"{path} dosyası bozuk! Boş dict döndürülüyor.")
+            return {}
+
+    @staticmethod
+    def _file_stamp(path: Path):
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    # Users ---------------------------------------------------------------
+
+    def load_users(self) -> dict:
+        """Load all users as {chat_id: user_data}."""
+        return self._read(self.users_file)
+
+    def save_users(self, users: dict) -> None:
+        """Persist the complete user snapshot."""
+        self._writer(self.users_file, users)
+
+    def users_stamp(self):
+        """Opaque value that changes when users were modified outside this process."""
+        return self._file_stamp(self.users_file)
+
+    # Course snapshots ----------------------------------------------------
+
+    def load_grades(self) -> dict:
+        """Load all course snapshots as {chat_id: {course_url: course_data}}."""
+        return self._read(self.data_file)
+
+    def load_user_grades(self, chat_id) -> dict:
+        """Load course snapshots of a single user."""
+        return self.load_grades().get(str(chat_id), {})
+
+    def save_grades(self, all_grades: dict) -> None:
+        """Replace all course snapshots."""
+        self._writer(self.data_file, all_grades)
+
+    def save_user_grades(self, user_grades_by_chat: dict) -> None:
+        """Replace course snapshots of the given users, keeping the others."""
+        all_grades = self.load_grades()
+        for chat_id, user_grades in user_grades_by_chat.items():
+            all_grades[str(chat_id)] = user_grades
+        self._writer(self.data_file, all_grades)
+
+    def grades_stamp(self):
+        """Opaque value that changes when course snapshots were modified on disk."""
+        return self._file_stamp(self.data_file)
+
+    # State blobs ---------------------------------------------------------
+
+    def load_state(self, path: str | Path, default=None):
+        """
+        Load a small state document (ari24_state.json, sks_state.json, ...).
+
+        Args:
+            path: Legacy state file path
+            default: Returned when the state does not exist or is unreadable
+        """
+        path = Path(path)
+        if not path.exists():
+            return default
+        try:
+            with path.open(encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"State dosyası okunamadı: {path} - {e}")
+            return default
+
+    def save_state(self, path: str | Path, data) -> None:
+        """Persist a small state document."""
+        self._writer(path, data)
+
+    def close(self) -> None:
+        """No-op (files are not kept open)."""
+
+
+class SqliteStorage:
+    """
+    SQLite (WAL) storage with row-level, diff-based writes.
+
+    Tables:
+    - users(chat_id PK, data)
+    - courses(chat_id, course_url, position, data) with PK (chat_id, course_url)
+    - state(name PK, data)
+    - meta(name PK, version): per-table write counters, bumped inside each write
+      transaction that changed rows; they back users_stamp()/grades_stamp()
+
+    A single connection is shared between threads and guarded by a lock. Row
+    fingerprints of the last known contents are kept in memory so unchanged
+    users/courses are never rewritten.
+    """
+
+    backend = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            chat_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS courses (
+            chat_id TEXT NOT NULL,
+            course_url TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (chat_id, course_url)
+        );
+        CREATE TABLE IF NOT EXISTS state (
+            name TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, db_file: str | Path):
+        """
+        Open (and create if needed) the database.
+
+        Args:
+            db_file: SQLite database path
+        """
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_file), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        # Fingerprints of persisted rows: {chat_id: hash} / {chat_id: {url: (position, hash)}}
+        self._user_rows: dict[str, int] | None = None
+        self._course_rows: dict[str, dict[str, tuple[int, int]]] = {}
+        self._stats = {"rows_written": 0, "rows_deleted": 0, "rows_skipped": 0}
+
+    def _transaction(self):
+        """Context manager running a write transaction on the shared connection."""
+        return _Transaction(self._conn)
+
+    def _bump_version(self, table: str) -> None:
+        """Increment a table's write counter (caller holds lock + transaction)."""
+        self._conn.execute(
+            "INSERT INTO meta (name, version) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+            (table,),
+        )
+
+    def _table_version(self, table: str) -> int:
+        row = self._conn.execute("SELECT version FROM meta WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+    # Users ---------------------------------------------------------------
+
+    def load_users(self) -> dict:
+        """Load all users as {chat_id: user_data} in registration order."""
+        with self._lock:
+            rows = self._conn.execute("SELECT chat_id, data FROM users ORDER BY rowid").fetchall()
+            users = {chat_id: json.loads(data) for chat_id, data in rows}
+            self._user_rows = {chat_id: hash(data) for chat_id, data in rows}
+            return users
+
+    def save_users(self, users: dict) -> None:
+        """Persist a user snapshot, writing only added/changed/removed rows."""
+        with self._lock:
+            if self._user_rows is None:
+                self.load_users()
+            known = self._user_rows
+            now = time.time()
+            upserts = []
+            for chat_id, user_data in users.items():
+                data = _dumps(user_data)
+                if known.get(str(chat_id)) != hash(data):
+                    upserts.append((str(chat_id), data, now))
+            current = {str(chat_id) for chat_id in users}
+            removed = [chat_id for chat_id in known if chat_id not in current]
+
+            with self._transaction():
+                self._conn.executemany(
+                    "INSERT INTO users (chat_id, data, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(chat_id) DO UPDATE SET "
+                    "data = excluded.data, updated_at = excluded.updated_at",
+                    upserts,
+                )
+                self._conn.executemany(
+                    "DELETE FROM users WHERE chat_id = ?", [(c,) for c in removed]
+                )
+                if upserts or removed:
+                    self._bump_version("users")
+
+            for chat_id, data, _ in upserts:
+                known[chat_id] = hash(data)
+            for chat_id in removed:
+                known.pop(chat_id, None)
+            self._count(len(upserts), len(removed), len(users) - len(upserts))
+
+    def users_stamp(self):
+        """Changes whenever users rows were written (by any connection)."""
+        with self._lock:
+            return self._table_version("users")
+
+    # Course snapshots ----------------------------------------------------
+
+    def load_grades(self) -> dict:
+        """Load all course snapshots as {chat_id: {course_url: course_data}}."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chat_id, course_url, position, data FROM courses ORDER BY chat_id, position"
+            ).fetchall()
+            all_grades: dict[str, dict] = {}
+            fingerprints: dict[str, dict[str, tuple[int, int]]] = {}
+            for chat_id, course_url, position, data in rows:
+                all_grades.setdefault(chat_id, {})[course_url] = json.loads(data)
+                fingerprints.setdefault(chat_id, {})[course_url] = (position, hash(data))
+            self._course_rows = fingerprints
+            return all_grades
+
+    def load_user_grades(self, chat_id) -> dict:
+        """Load course snapshots of a single user (indexed lookup)."""
+        chat_id = str(chat_id)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT course_url, position, data FROM courses WHERE chat_id = ? "
+                "ORDER BY position",
+                (chat_id,),
+            ).fetchall()
+            self._course_rows[chat_id] = {url: (pos, hash(data)) for url, pos, data in rows}
+            return {url: json.loads(data) for url, _pos, data in rows}
+
+    def _known_courses(self, chat_id: str) -> dict[str, tuple[int, int]]:
+        """Fingerprints of a user's persisted courses (loaded lazily)."""
+        known = self._course_rows.get(chat_id)
+        if known is None:
+            rows = self._conn.execute(
+                "SELECT course_url, position, data FROM courses WHERE chat_id = ?", (chat_id,)
+            ).fetchall()
+            known = {url: (pos, hash(data)) for url, pos, data in rows}
+            self._course_rows[chat_id] = known
+        return known
+
+    def _write_user_courses(self, chat_id: str, user_grades: dict, now: float) -> bool:
+        """
+        Diff one user's courses against persisted rows (caller holds lock + transaction).
+
+        Returns:
+            True if any row was written or deleted
+        """
+        known = self._known_courses(chat_id)
+        upserts = []
+        for position, (course_url, course_data) in enumerate(user_grades.items()):
+            data = _dumps(course_data)
+            fingerprint = (position, hash(data))
+            if known.get(course_url) != fingerprint:
+                upserts.append((chat_id, course_url, position, data, now, fingerprint))
+        removed = [url for url in known if url not in user_grades]
+
+        self._conn.executemany(
+            "INSERT INTO courses (chat_id, course_url, position, data, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT(chat_id, course_url) DO UPDATE SET "
+            "position = excluded.position, data = excluded.data, "
+            "updated_at = excluded.updated_at",
+            [row[:5] for row in upserts],
+        )
+        self._conn.executemany(
+            "DELETE FROM courses WHERE chat_id = ? AND course_url = ?",
+            [(chat_id, url) for url in removed],
+        )
+
+        for _, course_url, _, _, _, fingerprint in upserts:
+            known[course_url] = fingerprint
+        for course_url in removed:
+            known.pop(course_url, None)
+        self._count(len(upserts), len(removed), len(user_grades) - len(upserts))
+        return bool(upserts or removed)
+
+    def save_user_grades(self, user_grades_by_chat: dict) -> None:
+        """Persist course snapshots of the given users (only changed rows)."""
+        with self._lock:
+            now = time.time()
+            with self._transaction():
+                changed = [
+                    self._write_user_courses(str(chat_id), user_grades, now)
+                    for chat_id, user_grades in user_grades_by_chat.items()
+                ]
+                if any(changed):
+                    self._bump_version("courses")
+
+    def save_grades(self, all_grades: dict) -> None:
+        """
+        Replace all course snapshots.
+
+        Users missing from all_grades are removed only if this connection had
+        loaded them; rows another process (e.g. a scan shard) inserted since the
+        caller's load are not in the caller's snapshot and are kept.
+        """
+        with self._lock:
+            now = time.time()
+            kept = {str(chat_id) for chat_id in all_grades}
+            removed_chats = [
+                chat_id
+                for chat_id, known in self._course_rows.items()
+                if known and chat_id not in kept
+            ]
+            with self._transaction():
+                changed = [
+                    self._write_user_courses(str(chat_id), user_grades, now)
+                    for chat_id, user_grades in all_grades.items()
+                ]
+                for chat_id in removed_chats:
+                    self._conn.execute("DELETE FROM courses WHERE chat_id = ?", (chat_id,))
+                if any(changed) or removed_chats:
+                    self._bump_version("courses")
+            for chat_id in removed_chats:
+                self._course_rows.pop(chat_id, None)
+
+    def grades_stamp(self):
+        """Changes whenever course rows were written (by any connection)."""
+        with self._lock:
+            return self._table_version("courses")
+
+    # State blobs ---------------------------------------------------------
+
+    def load_state(self, path: str | Path, default=None):
+        """Load a small state document by its legacy file name."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM state WHERE name = ?", (_state_name(path),)
+            ).fetchone()
+        if row is None:
+            return default
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            logger.error(f"State kaydı bozuk: {_state_name(path)}")
+            return default
+
+    def save_state(self, path: str | Path, data) -> None:
+        """Persist a small state document by its legacy file name."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO state (name, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                (_state_name(path), json.dumps(data, ensure_ascii=False), time.time()),
+            )
+
+    # Maintenance ---------------------------------------------------------
+
+    def _count(self, written: int, deleted: int, skipped: int) -> None:
+        self._stats["rows_written"] += written
+        self._stats["rows_deleted"] += deleted
+        self._stats["rows_skipped"] += max(0, skipped)
+
+    def stats(self) -> dict:
+        """
+        Get write statistics.
+
+        Returns:
+            Dictionary with row counters
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE / COMMIT / ROLLBACK around a block (autocommit connection)."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def create_storage(
+    backend: str,
+    *,
+    users_file: str | Path,
+    data_file: str | Path,
+    db_file: str | Path,
+    writer: Callable[[str | Path, dict], None],
+):
+    """
+    Create the configured storage backend.
+
+    Args:
+        backend: "json" or "sqlite"
+        users_file: users.json path (json backend)
+        data_file: ninova_data.json path (json backend)
+        db_file: SQLite database path (sqlite backend)
+        writer: Atomic JSON writer (json backend)
+
+    Returns:
+        JsonStorage or SqliteStorage instance
+
+    Raises:
+        ValueError: If backend is unknown
+    """
+    if backend == "json":
+        return JsonStorage(users_file, data_file, writer)
+    if backend == "sqlite":
+        return SqliteStorage(db_file)
+    raise ValueError(f"Bilinmeyen STORAGE_BACKEND: {backend} (geçerli: {STORAGE_BACKENDS})")
+
+
+def migrate_json_to_sqlite(source: JsonStorage, target: SqliteStorage, state_files=()) -> dict:
+    """
+    Copy users, course snapshots and state documents from JSON files into SQLite.
+
+    Safe to run repeatedly: rows are upserted and unchanged rows are skipped.
+
+    Args:
+        source: JsonStorage reading the legacy files
+        target: SqliteStorage to fill
+        state_files: Legacy state file paths to import (missing files are skipped)
+
+    Returns:
+        {"users": n, "courses": n, "states": n} counts of imported records
+    """
+    users = source.load_users()
+    target.save_users(users)
+
+    all_grades = source.load_grades()
+    target.save_grades(all_grades)
+
+    states = 0
+    for path in state_files:
+        state = source.load_state(path)
+        if state is not None:
+            target.save_state(path, state)
+            states += 1
+
+    return {
+        "users": len(users),
+        "courses": sum(len(courses) for courses in all_grades.values()),
+        "states": states,
+    }
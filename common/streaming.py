@@ -0,0 +1,215 @@
+"""
+Streaming helpers for file transfers (Ninova download -> Telegram upload).
+
+Keeps peak memory per transfer bounded instead of holding whole files in RAM:
+- ByteBudget: process-wide cap on file bytes held in memory by all transfers
+- BudgetedSpool: SpooledTemporaryFile that rolls over to disk when it grows
+  past max_size or when the shared budget is exhausted; computes the SHA-256
+  of the written data on the fly
+- MultipartStream: multipart/form-data body read from a file in chunks, so
+  uploads do not build the whole request body in memory
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import uuid
+
+
+class ByteBudget:
+    """
+    Thread-safe counter of in-memory bytes shared by concurrent transfers.
+
+    Features:
+    - Non-blocking try_acquire (callers spill to disk instead of waiting)
+    - Statistics for monitoring
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize ByteBudget.
+
+        Args:
+            capacity: Maximum bytes held in memory at once (0 disables memory buffering)
+        """
+        self._capacity = max(0, capacity)
+        self._used = 0
+        self._peak = 0
+        self._denied = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, size: int) -> bool:
+        """
+        Reserve bytes if the budget allows it.
+
+        Args:
+            size: Number of bytes
+
+        Returns:
+            True if reserved, False if the budget is exhausted
+        """
+        with self._lock:
+            if self._used + size > self._capacity:
+                self._denied += 1
+                return False
+            self._used += size
+            self._peak = max(self._peak, self._used)
+            return True
+
+    def release(self, size: int) -> None:
+        """
+        Return reserved bytes to the budget.
+
+        Args:
+            size: Number of bytes previously reserved
+        """
+        with self._lock:
+            self._used = max(0, self._used - size)
+
+    def stats(self) -> dict:
+        """
+        Get budget statistics.
+
+        Returns:
+            Dictionary with capacity, used, peak and denied counts
+        """
+        with self._lock:
+            return {
+                "capacity": self._capacity,
+                "used": self._used,
+                "peak": self._peak,
+                "denied": self._denied,
+            }
+
+
+class BudgetedSpool(tempfile.SpooledTemporaryFile):
+    """
+    SpooledTemporaryFile whose in-memory part is charged to a ByteBudget.
+
+    Data stays in memory up to max_size while the budget allows it; otherwise
+    the spool rolls over to an anonymous temporary file on disk. The SHA-256 of
+    everything written is available as sha256 (content-addressed caching).
+    """
+
+    def __init__(self, budget: ByteBudget, max_size: int):
+        """
+        Initialize BudgetedSpool.
+
+        Args:
+            budget: Shared in-memory byte budget
+            max_size: In-memory limit of this spool before rolling over to disk
+        """
+        super().__init__(max_size=max_size, mode="w+b")
+        self._budget = budget
+        self._reserved = 0
+        self._on_disk = False
+        self._hash = hashlib.sha256()
+
+    @property
+    def on_disk(self) -> bool:
+        """True once the data has been moved to a temporary file."""
+        return self._on_disk
+
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 digest of the data written so far."""
+        return self._hash.hexdigest()
+
+    def write(self, s) -> int:
+        """Write a chunk, rolling over to disk if the budget is exhausted."""
+        self._hash.update(s)
+        if not self._on_disk:
+            if self._budget.try_acquire(len(s)):
+                self._reserved += len(s)
+            else:
+                self.rollover()
+        return super().write(s)
+
+    def rollover(self) -> None:
+        """Move the data to disk and return the reserved bytes to the budget."""
+        if self._on_disk:
+            return
+        super().rollover()
+        self._on_disk = True
+        self._budget.release(self._reserved)
+        self._reserved = 0
+
+    def close(self) -> None:
+        """Close the spool (the temporary file is deleted) and release the budget."""
+        super().close()
+        self._budget.release(self._reserved)
+        self._reserved = 0
+
+
+class MultipartStream:
+    """
+    File-like multipart/form-data request body.
+
+    requests sends objects with read() and __len__ as a streamed body with a
+    Content-Length header, reading it in small blocks.
+    """
+
+    def __init__(self, fields: dict, file_field: str, filename: str, fileobj):
+        """
+        Initialize MultipartStream.
+
+        Args:
+            fields: Plain form fields (values are converted to str)
+            file_field: Form field name of the file (e.g. "document")
+            filename: File name sent to the server
+            fileobj: Seekable binary file object (read from its start)
+        """
+        self.boundary = uuid.uuid4().hex
+        head = b"".join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+            + str(value).encode()
+            + b"\r\n"
+            for name, value in fields.items()
+            if value is not None
+        )
+        # HTML5 tarzı dosya adı: UTF-8 korunur, tırnak ve satır sonları kaçışlanır
+        safe_name = filename.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+        head += (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{safe_name}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        self._head = head
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode()
+
+        fileobj.seek(0, os.SEEK_END)
+        self._file_size = fileobj.tell()
+        fileobj.seek(0)
+        self._file = fileobj
+        self._stage = 0  # 0: başlık, 1: dosya, 2: kapanış, 3: bitti
+        self._offset = 0
+
+    @property
+    def content_type(self) -> str:
+        """Content-Type header value including the boundary."""
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the body (the whole rest if size < 0)."""
+        if size is None or size < 0:
+            size = len(self)
+        out = bytearray()
+        while len(out) < size and self._stage < 3:
+            if self._stage == 1:
+                chunk = self._file.read(size - len(out))
+                if chunk:
+                    out += chunk
+                    continue
+                self._stage, self._offset = 2, 0
+                continue
+            part = self._head if self._stage == 0 else self._tail
+            chunk = part[self._offset : self._offset + size - len(out)]
+            out += chunk
+            self._offset += len(chunk)
+            if self._offset >= len(part):
+                self._stage, self._offset = self._stage + 1, 0
+        return bytes(out)
@@ -0,0 +1,265 @@
+"""
+UserRepository: Process-wide in-memory user store with write-behind persistence.
+
+Serves user reads from memory instead of re-reading storage per call:
+- Reads return copies (callers may mutate them freely)
+- Field-level updates applied atomically in memory (no whole-file read-modify-write)
+- Debounced write-behind: many updates coalesce into a single file write
+- External changes (storage stamp) are picked up when there are no pending writes
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger("ninova")
+
+
+def _copy_user(user_data: dict) -> dict:
+    """Copy a user record one level deep (lists/dicts such as urls, subscriptions)."""
+    return {
+        key: value.copy() if isinstance(value, (list, dict)) else value
+        for key, value in user_data.items()
+    }
+
+
+class UserRepository:
+    """
+    Thread-safe in-memory repository for user records.
+
+    Features:
+    - Lazy load on first access, then memory-only reads
+    - Atomic field-level updates (short critical sections, no I/O under the lock)
+    - Debounced write-behind (single timer, coalesced writes)
+    - Explicit flush for shutdown
+    - Statistics and monitoring
+    """
+
+    # Class constants
+    DEFAULT_FLUSH_DELAY_SECONDS = 2.0
+
+    def __init__(
+        self,
+        storage,
+        flush_delay: float = DEFAULT_FLUSH_DELAY_SECONDS,
+    ):
+        """
+        Initialize UserRepository.
+
+        Args:
+            storage: Storage backend (common.storage.JsonStorage / SqliteStorage)
+            flush_delay: Debounce delay for write-behind (seconds, must be > 0)
+        """
+        self._storage = storage
+        self._flush_delay = flush_delay
+        self._users: dict[str, dict] = {}
+        self._loaded = False
+        self._stamp = None
+        self._dirty = False
+        self._flushing = False
+        self._timer: threading.Timer | None = None
+        self._lock = threading.RLock()  # Guards snapshot structure and dirty state
+        self._io_lock = threading.Lock()  # Serializes disk writes
+        self._stats = {"loads": 0, "flushes": 0, "updates": 0}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        """Load from storage on first use or when it was changed externally."""
+        if self._loaded and (
+            self._dirty or self._flushing or self._storage.users_stamp() == self._stamp
+        ):
+            return
+
+        stamp = self._storage.users_stamp()
+        users = self._storage.load_users()
+
+        self._users = users
+        self._stamp = stamp
+        self._loaded = True
+        self._stats["loads"] += 1
+        logger.debug(f"UserRepository loaded {len(users)} users ({self._storage.backend})")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def all(self) -> dict:
+        """
+        Get a copy of all users.
+
+        Returns:
+            {chat_id: user_data} dictionary (safe to mutate)
+        """
+        with self._lock:
+            self._ensure_loaded()
+            return {chat_id: _copy_user(data) for chat_id, data in self._users.items()}
+
+    def get(self, chat_id) -> dict | None:
+        """
+        Get a copy of a single user.
+
+        Args:
+            chat_id: User chat ID
+
+        Returns:
+            User data copy or None if not found
+        """
+        with self._lock:
+            self._ensure_loaded()
+            data = self._users.get(str(chat_id))
+            return _copy_user(data) if data is not None else None
+
+    def ids(self) -> list[str]:
+        """Get all user chat IDs."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._users.keys())
+
+    def count(self) -> int:
+        """Get number of users."""
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._users)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def update(self, chat_id, **fields) -> dict:
+        """
+        Update fields of a single user (creates the user if missing).
+
+        Args:
+            chat_id: User chat ID
+            **fields: Field values to set
+
+        Returns:
+            Copy of the updated user data
+        """
+        chat_id = str(chat_id)
+        with self._lock:
+            self._ensure_loaded()
+            user = self._users.setdefault(chat_id, {"username": "", "password": "", "urls": []})
+            for key, value in fields.items():
+                user[key] = value.copy() if isinstance(value, (list, dict)) else value
+            self._stats["updates"] += 1
+            self._mark_dirty()
+            return _copy_user(user)
+
+    def remove_fields(self, chat_id, *keys) -> bool:
+        """
+        Remove fields from a single user.
+
+        Args:
+            chat_id: User chat ID
+            *keys: Field names to remove
+
+        Returns:
+            True if any field was removed
+        """
+        chat_id = str(chat_id)
+        with self._lock:
+            self._ensure_loaded()
+            user = self._users.get(chat_id)
+            if user is None:
+                return False
+            removed = [key for key in keys if key in user]
+            for key in removed:
+                del user[key]
+            if removed:
+                self._mark_dirty()
+            return bool(removed)
+
+    def delete(self, chat_id) -> bool:
+        """
+        Remove a user.
+
+        Args:
+            chat_id: User chat ID
+
+        Returns:
+            True if user existed
+        """
+        chat_id = str(chat_id)
+        with self._lock:
+            self._ensure_loaded()
+            existed = self._users.pop(chat_id, None) is not None
+            if existed:
+                self._mark_dirty()
+            return existed
+
+    def replace_all(self, users: dict) -> None:
+        """
+        Replace the whole snapshot (legacy save_all_users semantics).
+
+        Args:
+            users: {chat_id: user_data} dictionary
+        """
+        with self._lock:
+            self._users = {str(k): _copy_user(v) for k, v in users.items()}
+            self._loaded = True
+            self._mark_dirty()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _mark_dirty(self) -> None:
+        """Mark snapshot dirty and arm the debounce timer (caller holds the lock)."""
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self._flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """
+        Write pending changes to storage.
+
+        Returns:
+            True if a write happened
+        """
+        with self._io_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return False
+                snapshot = {chat_id: _copy_user(data) for chat_id, data in self._users.items()}
+                self._dirty = False
+                self._flushing = True
+
+            try:
+                self._storage.save_users(snapshot)
+            except Exception as e:
+                logger.error(f"UserRepository flush failed: {e}")
+                with self._lock:
+                    self._flushing = False
+                    self._mark_dirty()
+                return False
+
+            with self._lock:
+                self._stamp = self._storage.users_stamp()
+                self._flushing = False
+                self._stats["flushes"] += 1
+            return True
+
+    def stats(self) -> dict:
+        """
+        Get repository statistics.
+
+        Returns:
+            Dictionary with repository stats
+        """
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "dirty": self._dirty,
+                "loads": self._stats["loads"],
+                "flushes": self._stats["flushes"],
+                "updates": self._stats["updates"],
+                "flush_delay_seconds": self._flush_delay,
+            }
@@ -1,5 +1,5 @@
 import contextlib
-import json
+import functools
 import logging
 import re
 from datetime import datetime
@@ -9,17 +9,17 @@ import requests
 from bs4 import BeautifulSoup, NavigableString, Tag
 
 from common.config import (
-    DATA_FILE,
     TELEGRAM_TOKEN,
-    _atomic_json_write,
     _data_lock,
     cipher_suite,
     console,
-    load_all_users,
-    save_all_users,
+    get_storage,
+    update_user_fields,
 )
 from common.http_logging import http_request
 from common.log_context import log_with_context
+from common.notifier import enqueue_notification
+from common.streaming import MultipartStream
 
 logger = logging.getLogger("ninova")
 
@@ -100,16 +100,9 @@ def update_user_data(chat_id, key, value):
     :param value: Yeni değer
     :return: Güncellenmiş kullanıcı verisi
     """
-    users = load_all_users()
-    chat_id = str(chat_id)
-    if chat_id not in users:
-        users[chat_id] = {"username": "", "password": "", "urls": []}
-
     if key == "password":
         value = encrypt_password(value)
-    users[chat_id][key] = value
-    save_all_users(users)
-    return users[chat_id]
+    return update_user_fields(chat_id, **{key: value})
 
 
 def escape_html(text):
@@ -122,11 +115,13 @@ def escape_html(text):
     return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
 
+@functools.lru_cache(maxsize=1024)
 def sanitize_html_for_telegram(html_content):
     """
     Parses HTML content and returns a Telegram-safe version.
     Supports <b>, <i>, <a>, <code>, <pre>.
     Converts <p>, <div>, <br> and lists to appropriate spacing/bullet points.
+    Results are memoized (the same announcement body is sanitized once).
 
     :param html_content: Raw HTML string
     :return: Telegram-safe HTML string
@@ -392,6 +387,21 @@ def get_assignment_status(assignment_dict):
     return "🟡", True
 
 
+# Ayarlanırsa send_telegram_message mesajları göndermek yerine buraya iletir
+# (tarama shard süreçleri mesajlarını koordinatör sürecine yollar)
+_message_sink = None
+
+
+def set_message_sink(sink):
+    """
+    send_telegram_message çağrılarını yönlendirir.
+
+    :param sink: sink(chat_id, message, is_error) çağrılabilir nesnesi; None ise doğrudan gönderim
+    """
+    global _message_sink
+    _message_sink = sink
+
+
 def send_telegram_message(chat_id, message, is_error=False):
     """
     Telegram botu üzerinden belirli bir kullanıcıya mesaj gönderir.
@@ -401,6 +411,9 @@ def send_telegram_message(chat_id, message, is_error=False):
     :param message: Gönderilecek mesaj metni (HTML formatında olabilir)
     :param is_error: Hata mesajı ise True, ön ek olarak uyarı ekler
     """
+    if _message_sink is not None:
+        _message_sink(chat_id, message, is_error)
+        return
     if not TELEGRAM_TOKEN or not chat_id:
         return
 
@@ -446,6 +459,9 @@ def send_telegram_message(chat_id, message, is_error=False):
             "text": msg,
             "parse_mode": "HTML",
         }
+        # Dağıtıcı çalışıyorsa kuyruğa yaz; gönderim hız sınırlarına uyularak arka planda
+        if enqueue_notification(chat_id, "sendMessage", payload):
+            continue
         try:
             response = http_request(
                 logger,
@@ -482,16 +498,48 @@ def send_telegram_message(chat_id, message, is_error=False):
             console.print(f"[red][Telegram] Gönderim hatası ({chat_id}): {e}")
 
 
+def _post_document_stream(url, chat_id, fileobj, filename, caption):
+    """
+    sendDocument isteğini dosyayı parça parça okuyarak gönderir (gövde bellekte kurulmaz).
+
+    :param url: sendDocument URL'i
+    :param chat_id: Telegram chat ID
+    :param fileobj: Aranabilir (seekable) ikili dosya nesnesi
+    :param filename: Dosya adı
+    :param caption: Dosya açıklaması
+    :return: requests.Response
+    """
+    body = MultipartStream(
+        {"chat_id": chat_id, "caption": caption, "parse_mode": "HTML"},
+        "document",
+        filename,
+        fileobj,
+    )
+    return http_request(
+        logger,
+        requests,
+        "POST",
+        url,
+        action="telegram_send_document",
+        chat_id=str(chat_id),
+        data=body,
+        headers={"Content-Type": body.content_type},
+        timeout=60,
+    )
+
+
 def send_telegram_document(
     chat_id, document, caption="", filename="document.pdf", is_file_id=False
 ):
     """
-    Telegram üzerinden dosya gönderir. Path, BytesIO veya File ID destekler.
+    Telegram üzerinden dosya gönderir. Path, dosya nesnesi (BytesIO, spool) veya File ID destekler.
+
+    Dosyalar multipart gövdesi bellekte kurulmadan, parça parça okunarak yüklenir.
 
     :param chat_id: Telegram chat ID
-    :param document: Dosya yolu (str), BytesIO nesnesi veya File ID (str)
+    :param document: Dosya yolu (str), dosya nesnesi veya File ID (str)
     :param caption: Dosya açıklaması
-    :param filename: Dosya adı (BytesIO kullanılıyorsa gereklidir)
+    :param filename: Dosya adı (dosya nesnesi kullanılıyorsa gereklidir)
     :param is_file_id: True ise document parametresi File ID olarak işlenir
     :return: Gönderilen dosyanın file_id'si veya None
     """
@@ -525,42 +573,15 @@ def send_telegram_document(
         elif isinstance(document, str) and Path(document).exists():
             filename = Path(document).name
             with Path(document).open("rb") as f:
-                files = {"document": (filename, f)}
-                data = {"chat_id": chat_id, "caption": caption, "parse_mode": "HTML"}
-                response = http_request(
-                    logger,
-                    requests,
-                    "POST",
-                    url,
-                    action="telegram_send_document",
-                    chat_id=str(chat_id),
-                    data=data,
-                    files=files,
-                    timeout=60,
-                )
+                response = _post_document_stream(url, chat_id, f, filename, caption)
 
             # Delete temp file if it was a path
             with contextlib.suppress(OSError):
                 Path(document).unlink()
 
-        # 3. Send by BytesIO / Buffer
+        # 3. Send by file object (BytesIO / spool)
         else:
-            # Assume document is a file-like object (BytesIO)
-            if hasattr(document, "seek"):
-                document.seek(0)
-            files = {"document": (filename, document)}
-            data = {"chat_id": chat_id, "caption": caption, "parse_mode": "HTML"}
-            response = http_request(
-                logger,
-                requests,
-                "POST",
-                url,
-                action="telegram_send_document",
-                chat_id=str(chat_id),
-                data=data,
-                files=files,
-                timeout=60,
-            )
+            response = _post_document_stream(url, chat_id, document, filename, caption)
 
         if response.status_code == 200:
             resp_json = response.json()
@@ -595,32 +616,96 @@ def send_telegram_document(
     return sent_file_id
 
 
+# Kayıtlı ders verisi için salt-okunur önbellek: bot callback'leri her tıklamada
+# tüm veriyi okumak yerine bellekteki görünümü kullanır.
+# Veri katmanının damgası değiştiğinde (JSON: yol/mtime/boyut, SQLite: courses tablosunun
+# yazma sayacı) veya bu süreç veriyi yazdığında geçersizleşir.
+_grades_view = {"stamp": None, "version": 0, "data": {}}
+
+
+def _invalidate_grades_view():
+    """Önbelleği geçersiz kılar (çağıran _data_lock'u tutar)."""
+    _grades_view["stamp"] = None
+    _grades_view["version"] += 1
+
+
+def _get_grades_view():
+    """
+    Önbellekteki tüm not verisini döndürür; gerekirse veri katmanından yeniden yükler.
+
+    :return: Paylaşılan (salt-okunur) {chat_id: grades} sözlüğü
+    """
+    with _data_lock:
+        storage = get_storage()
+        stamp = storage.grades_stamp()
+        if stamp is not None and stamp == _grades_view["stamp"]:
+            return _grades_view["data"]
+
+        data = storage.load_grades()
+        _grades_view["data"] = data
+        _grades_view["stamp"] = stamp
+        _grades_view["version"] += 1
+        return data
+
+
+def get_user_grades_view(chat_id):
+    """
+    Bir kullanıcının kayıtlı ders verisini önbellekten döndürür.
+
+    Dönen sözlük paylaşılır ve DEĞİŞTİRİLMEMELİDİR; değişiklik yapılacaksa
+    load_saved_grades() ile taze bir kopya alınmalıdır.
+
+    :param chat_id: Kullanıcı chat ID
+    :return: {course_url: course_data} sözlüğü (kayıt yoksa boş dict)
+    """
+    return _get_grades_view().get(str(chat_id), {})
+
+
+def get_grades_view_version():
+    """Önbellek sürümünü döndürür (her yeniden yükleme/yazmada artar)."""
+    return _grades_view["version"]
+
+
 def load_saved_grades():
     """
-    Kaydedilmiş notları ninova_data.json dosyasından okur (thread-safe).
+    Kaydedilmiş notları veri katmanından okur (thread-safe).
 
     :return: Not verileri sözlüğü (chat_id: grades) veya boş dict
     """
     with _data_lock:
-        if Path(DATA_FILE).exists():
-            try:
-                with Path(DATA_FILE).open(encoding="utf-8") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.error(f"{DATA_FILE} dosyası bozuk!")
-                console.print(f"[red]⚠️ {DATA_FILE} dosyası bozuk! Boş dict döndürülüyor.")
-                return {}
-        return {}
+        return get_storage().load_grades()
 
 
 def save_grades(grades):
     """
-    Notları ninova_data.json dosyasına kaydeder (thread-safe, atomik).
+    Notları veri katmanına kaydeder (thread-safe, atomik).
 
     :param grades: Kaydedilecek not verileri sözlüğü
     """
     with _data_lock:
-        _atomic_json_write(DATA_FILE, grades)
+        get_storage().save_grades(grades)
+        _invalidate_grades_view()
+
+
+def save_user_grades_batch(user_grades_by_chat):
+    """
+    Birden fazla kullanıcının not verisini tek bir atomik yazma ile kaydeder.
+
+    Yalnızca verilen kullanıcıların kayıtları değiştirilir (JSON'da dosya bir kez
+    yazılır, SQLite'ta sadece değişen ders satırları). Tarama döngüsü her değişen
+    kullanıcı için tüm veriyi yeniden yazmak yerine bu fonksiyonla toplu kaydeder;
+    bu sırada bot handler'larının yaptığı diğer kullanıcı değişiklikleri korunur.
+
+    :param user_grades_by_chat: {chat_id: user_grades} sözlüğü
+    :return: Kaydedilen kullanıcı sayısı
+    """
+    if not user_grades_by_chat:
+        return 0
+
+    with _data_lock:
+        get_storage().save_user_grades(user_grades_by_chat)
+        _invalidate_grades_view()
+    return len(user_grades_by_chat)
 
 
 def split_long_message(text, limit=4000):
@@ -669,7 +754,7 @@ def split_long_message(text, limit=4000):
 
 def delete_course_data(chat_id, course_url):
     """
-    Belirli bir dersin verilerini (not, ödev vb.) ninova_data.json dosyasından siler.
+    Belirli bir dersin verilerini (not, ödev vb.) veri katmanından siler.
 
     :param chat_id: Kullanıcı ID
     :param course_url: Silinecek dersin URL'i
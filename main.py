@@ -1,11 +1,11 @@
-import json
 import logging
 import random
 import signal
 import threading
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
+from concurrent.futures import wait as wait_futures
 from datetime import datetime
 from pathlib import Path
 
@@ -22,33 +22,84 @@ from rich.table import Table
 
 import common.error_tracker as error_tracker
 from bot import bot, set_check_callback, update_last_check_time
+from common.broadcast import broadcast, shutdown_broadcast_engine, start_broadcast_engine
+from common.cache_manager import get_cache_manager
 from common.config import (
+    ADAPTIVE_POLLING,
+    ASYNC_MAX_IN_FLIGHT,
     CHECK_INTERVAL,
     DATA_DIR,
+    GRADES_CHECKPOINT_USERS,
+    JOB_QUEUE_BACKEND,
     LOGS_DIR,
+    PAGE_CACHE_MAX_ENTRIES,
+    POLL_BACKOFF_FACTOR,
+    POLL_DEADLINE_WINDOW,
+    POLL_MAX_INTERVAL,
+    POLL_MIN_INTERVAL,
+    POLL_STATE_FILE,
+    PREWARM_WAIT_SECONDS,
+    SCAN_ENGINE,
+    SCAN_MAX_WORKERS,
+    SCAN_PER_USER_CONCURRENCY,
+    SCAN_SHARDS,
     SESSION_CLEANUP_INTERVAL,
-    atomic_json_write,
+    SHARED_CONTENT_TTL,
+    STORAGE_BACKEND,
     cleanup_inactive_sessions,
     console,
+    flush_users,
     get_cache_stats,
+    get_user_count,
+    get_user_data,
     get_user_session,
     load_all_users,
-    save_all_users,
+    load_state,
+    save_state,
     sync_cache_to_disk,
+    update_user_fields,
 )
 from common.log_context import clear_log_context, set_log_context
 from common.logging_setup import setup_logging
+from common.notifier import (
+    enqueue_notification,
+    pace_direct_send,
+    shutdown_notification_dispatcher,
+    start_notification_dispatcher,
+)
+from common.poll_scheduler import get_poll_scheduler
+from common.scan_scheduler import (
+    get_scan_scheduler,
+    shutdown_download_scheduler,
+    shutdown_scan_scheduler,
+)
+from common.sharding import ShardCoordinator, shard_of
 from common.utils import (
     decrypt_password,
     escape_html,
     get_file_icon,
     load_saved_grades,
     parse_turkish_date,
-    save_grades,
+    save_user_grades_batch,
     send_telegram_message,
+    set_message_sink,
 )
 from services.ari24.client import Ari24Client
-from services.ninova import LoginFailedError, get_announcement_detail, get_grades
+from services.ninova import (
+    LoginFailedError,
+    announcement_version,
+    get_announcement_details,
+    get_grades,
+)
+from services.ninova.async_engine import get_async_engine, shutdown_async_engine
+from services.ninova.async_engine import is_available as async_engine_available
+from services.ninova.fetch_plan import SECTIONS
+from services.ninova.job_engine import get_queue_scan_client, shutdown_queue_scan_client
+from services.ninova.page_cache import get_page_cache
+from services.ninova.parse_pool import shutdown_parse_pool
+from services.ninova.prewarm import get_file_prewarmer, shutdown_file_prewarmer
+from services.ninova.scraper import shutdown_io_pools
+from services.ninova.shared_cache import get_shared_cache
 from services.sks.announcer import check_and_announce_sks_menu
 
 # Logging yapılandırması
@@ -74,6 +125,32 @@ _SHUTDOWN_LOCK = threading.Lock()
 
 # error_tracker: yükle ve artık var olmayan kullanıcıları temizle
 error_tracker.load(known_user_ids=set(load_all_users().keys()))
+
+# Ders bazlı uyarlanabilir tarama aralıkları: önceki çalışmadan öğrenilenleri yükle.
+# next_due tarama bitiminden ölçülür ve döngü ±30 sn sapar; yarım döngü tolerans
+# tanınmazsa yeni değişen bir ders her iki döngüden birinde atlanır.
+poll_scheduler = get_poll_scheduler(
+    POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_BACKOFF_FACTOR, tolerance=CHECK_INTERVAL / 2
+)
+poll_scheduler.load_state(load_state(POLL_STATE_FILE, {}))
+
+# Tarama motoru: SCAN_ENGINE=asyncio ise ders taramaları tek olay döngüsünde yapılır
+USE_ASYNC_ENGINE = SCAN_ENGINE == "asyncio" and async_engine_available()
+if SCAN_ENGINE == "asyncio" and not USE_ASYNC_ENGINE:
+    logger.warning("SCAN_ENGINE=asyncio için aiohttp kurulu değil; thread motoru kullanılıyor.")
+
+# Çok süreçli tarama: SCAN_SHARDS > 1 ise kullanıcılar chat_id hash aralıklarına bölünür,
+# her shard ayrı bir süreçte taranır (süreçler ortak veriye SQLite üzerinden erişir)
+USE_SHARDS = SCAN_SHARDS > 1 and STORAGE_BACKEND == "sqlite"
+if SCAN_SHARDS > 1 and not USE_SHARDS:
+    logger.warning("SCAN_SHARDS için STORAGE_BACKEND=sqlite gerekir; tek süreçte taranıyor.")
+SHARD_COORDINATOR: ShardCoordinator | None = None
+
+# Çok düğümlü tarama: ders taramaları iş kuyruğuna yazılır, scan_node.py düğümleri çalıştırır
+USE_JOB_QUEUE = bool(JOB_QUEUE_BACKEND)
+# Shard sürecinde (index, shards) ve koordinatöre giden kuyruk; ana süreçte None
+_SHARD = None
+_SHARD_OUTBOX = None
 _SHUTDOWN_DONE = False
 
 
@@ -111,6 +188,59 @@ def graceful_shutdown(reason: str) -> None:
     if POLLING_THREAD and POLLING_THREAD.is_alive():
         POLLING_THREAD.join(timeout=5)
 
+    if SHARD_COORDINATOR is not None:
+        try:
+            SHARD_COORDINATOR.stop()
+        except Exception as e:
+            logger.exception(f"Shutdown shard coordinator stop failed: {e}")
+
+    try:
+        shutdown_scan_scheduler(wait=False)
+    except Exception as e:
+        logger.exception(f"Shutdown scan scheduler stop failed: {e}")
+
+    try:
+        shutdown_download_scheduler(wait=False)
+    except Exception as e:
+        logger.exception(f"Shutdown download scheduler stop failed: {e}")
+
+    try:
+        shutdown_async_engine(wait=False)
+    except Exception as e:
+        logger.exception(f"Shutdown async scan engine stop failed: {e}")
+
+    try:
+        shutdown_queue_scan_client(wait=False)
+    except Exception as e:
+        logger.exception(f"Shutdown job queue client stop failed: {e}")
+
+    try:
+        shutdown_file_prewarmer(wait=False)
+    except Exception as e:
+        logger.exception(f"Shutdown file prewarmer stop failed: {e}")
+
+    try:
+        shutdown_parse_pool(wait=False)
+    except Exception as e:
+        logger.exception(f"Shutdown parse pool stop failed: {e}")
+
+    try:
+        shutdown_io_pools(wait=False)
+    except Exception as e:
+        logger.exception(f"Shutdown scraper I/O pools stop failed: {e}")
+
+    try:
+        # Kuyruktaki bildirimler kısa süre gönderilir; kalanlar outbox'ta bir sonraki açılışı bekler
+        shutdown_notification_dispatcher(flush_timeout=5)
+    except Exception as e:
+        logger.exception(f"Shutdown notification dispatcher stop failed: {e}")
+
+    try:
+        # Gönderilmemiş alıcılar kaydedilir; toplu gönderim bir sonraki açılışta devam eder
+        shutdown_broadcast_engine()
+    except Exception as e:
+        logger.exception(f"Shutdown broadcast engine stop failed: {e}")
+
     try:
         closed = cleanup_inactive_sessions(force=True)
         logger.info(f"Shutdown session cleanup: {closed} closed")
@@ -118,10 +248,16 @@ def graceful_shutdown(reason: str) -> None:
         logger.exception(f"Shutdown session cleanup failed: {e}")
 
     try:
+        # file_id önbelleği yazma-arkası çalışır: bekleyen kayıtlar burada diske yazılır
         sync_cache_to_disk()
     except Exception as e:
         logger.exception(f"Shutdown cache sync failed: {e}")
 
+    try:
+        flush_users()
+    except Exception as e:
+        logger.exception(f"Shutdown user flush failed: {e}")
+
 
 def _start_polling_thread() -> None:
     """Start Telegram polling in a daemon thread with resilient defaults."""
@@ -178,21 +314,26 @@ def show_users_table():
 # Dashboard layout - Future için hazırlanmış, şu an kullanılmıyor
 
 
+def _ari24_message(image_url, caption):
+    """
+    Arı24 bildirimi için Bot API metodunu ve parametrelerini belirler.
+
+    :param image_url: Görsel adresi (yoksa düz mesaj gönderilir)
+    :param caption: HTML bildirim metni
+    :return: (method, payload)
+    """
+    if image_url:
+        return "sendPhoto", {"photo": image_url, "caption": caption, "parse_mode": "HTML"}
+    return "sendMessage", {"text": caption, "parse_mode": "HTML"}
+
+
 def check_ari24_updates():
     """
     Checks Arı24 events and notifies subscribed users.
     """
     state_file = Path(DATA_DIR) / "ari24_state.json"
     try:
-        if Path(state_file).exists():
-            try:
-                with Path(state_file).open() as f:
-                    state = json.load(f)
-            except json.JSONDecodeError as e:
-                logger.error(f"Arı24 state file corrupted: {state_file} - {e}")
-                state = {"notified_urls": []}
-        else:
-            state = {"notified_urls": []}
+        state = load_state(state_file, {"notified_urls": []})
     except Exception as e:
         logger.exception(f"Error loading Arı24 state: {e}")
         state = {"notified_urls": []}
@@ -225,27 +366,23 @@ def check_ari24_updates():
             new_urls.append(url)
 
             # Notify subscribers
-            for chat_id, user_data in users.items():
-                subs = user_data.get("subscriptions", [])
-                # Partial match or exact match?
-                # Scraper returns full name. Handlers use full name.
-                # So exact match check is fine.
-                if club in subs:
-                    caption = (
-                        f"🔔 <b>Yeni Etkinlik: {club}</b>\n\n"
-                        f"📅 <b>{event['title']}</b>\n"
-                        f"🕒 {event['date_str']}\n"
-                        f"🔗 <a href='{url}'>Detaylar</a>"
-                    )
-                    try:
-                        if event["image_url"]:
-                            bot.send_photo(
-                                chat_id, event["image_url"], caption=caption, parse_mode="HTML"
-                            )
-                        else:
-                            bot.send_message(chat_id, caption, parse_mode="HTML")
-                    except Exception as e:
-                        logger.error(f"Failed to send ari24 notification to {chat_id}: {e}")
+            # Scraper returns full name. Handlers use full name, so exact match is fine.
+            subscribers = [
+                chat_id
+                for chat_id, user_data in users.items()
+                if club in user_data.get("subscriptions", [])
+            ]
+            if subscribers:
+                caption = (
+                    f"🔔 <b>Yeni Etkinlik: {club}</b>\n\n"
+                    f"📅 <b>{event['title']}</b>\n"
+                    f"🕒 {event['date_str']}\n"
+                    f"🔗 <a href='{url}'>Detaylar</a>"
+                )
+                method, payload = _ari24_message(event["image_url"], caption)
+                broadcast(
+                    f"ari24:event:{url}", method, payload, subscribers, title="Arı24 Etkinlik"
+                )
 
         if new_urls:
             state["notified_urls"] = list(notified_urls.union(new_urls))[-500:]  # Keep last 500
@@ -263,22 +400,14 @@ def check_ari24_updates():
                     f"📰 <b>Yeni Haber: {item['title']}</b>\n"
                     f"🔗 <a href='{item['link']}'>Haberi Oku</a>"
                 )
-                for chat_id in users:
-                    try:
-                        if item.get("image_url"):
-                            bot.send_photo(
-                                chat_id, item["image_url"], caption=caption, parse_mode="HTML"
-                            )
-                        else:
-                            bot.send_message(chat_id, caption, parse_mode="HTML")
-                    except Exception as e:
-                        logger.error(f"Failed to send news to {chat_id}: {e}")
+                method, payload = _ari24_message(item.get("image_url"), caption)
+                broadcast(f"ari24:news:{item['link']}", method, payload, users, title="Arı24 Haber")
 
                 notified_news.add(item["link"])
 
             state["notified_news"] = list(notified_news)[-200:]  # Keep last 200
 
-        atomic_json_write(state_file, state)
+        save_state(state_file, state)
 
     except Exception as e:
         logger.error(f"Ari24 check error: {e}")
@@ -299,11 +428,7 @@ def check_daily_bulletin():
     today_str = now.strftime("%Y-%m-%d")
 
     try:
-        if Path(state_file).exists():
-            with Path(state_file).open() as f:
-                state = json.load(f)
-        else:
-            state = {"last_sent_date": ""}
+        state = load_state(state_file, {"last_sent_date": ""})
 
         if state.get("last_sent_date") == today_str:
             return  # Already sent today
@@ -331,7 +456,7 @@ def check_daily_bulletin():
             # Nothing at all?
             # Mark sent and return
             state["last_sent_date"] = today_str
-            atomic_json_write(state_file, state)
+            save_state(state_file, state)
             return
 
         date_formatted = now.strftime("%d.%m.%Y")
@@ -365,23 +490,153 @@ def check_daily_bulletin():
         )
 
         users = load_all_users()
-        for chat_id, user_data in users.items():
-            if user_data.get("daily_subscription", False):
-                try:
-                    bot.send_message(
-                        chat_id, bulletin_message, parse_mode="HTML", disable_web_page_preview=True
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to send daily bulletin to {chat_id}: {e}")
+        subscribers = [
+            chat_id
+            for chat_id, user_data in users.items()
+            if user_data.get("daily_subscription", False)
+        ]
+        broadcast(
+            f"bulletin:{today_str}",
+            "sendMessage",
+            {"text": bulletin_message, "parse_mode": "HTML", "disable_web_page_preview": True},
+            subscribers,
+            title="Günlük Bülten",
+        )
 
         # Update state
         state["last_sent_date"] = today_str
-        atomic_json_write(state_file, state)
+        save_state(state_file, state)
 
     except Exception as e:
         logger.error(f"Daily bulletin error: {e}")
 
 
+def _assignment_reminder(assign, due_date, sent_reminders):
+    """
+    Bir ödev için şu an gönderilmesi gereken hatırlatmayı belirler.
+
+    :param assign: Ödev verisi
+    :param due_date: Teslim bitiş zamanı (datetime)
+    :param sent_reminders: Daha önce gönderilmiş hatırlatma etiketleri
+    :return: (reminder_tag, mesaj) veya None
+    """
+    hours_left = (due_date - datetime.now()).total_seconds() / 3600
+    e_assign_name = escape_html(assign["name"])
+    if 0 < hours_left <= 3 and "3h" not in sent_reminders:
+        reminder_tag = "3h"
+        reminder_msg = f"🚨 <b>SON 3 SAAT!</b> ({e_assign_name})"
+    elif 3 < hours_left <= 24 and "24h" not in sent_reminders:
+        reminder_tag = "24h"
+        reminder_msg = f"⏳ <b>SON 24 SAAT!</b> ({e_assign_name})"
+    else:
+        return None
+    return reminder_tag, (
+        f"{reminder_msg}\nBitiş: {assign['end_date']}\n<a href='{assign['url']}'>Ödeve Git</a>"
+    )
+
+
+def _is_course_unchanged(current_data, saved_data):
+    """
+    Çekilen bölümlerin içerik hash'leri son kayıtla aynı mı?
+
+    Aynıysa parse edilen veri kayıtlı veriyle birebir aynıdır; diff atlanabilir.
+    """
+    section_hashes = current_data.get("section_hashes")
+    if not section_hashes or not isinstance(saved_data, dict):
+        return False
+    saved_hashes = saved_data.get("section_hashes") or {}
+    return all(saved_hashes.get(section) == h for section, h in section_hashes.items())
+
+
+def _build_saved_course(current_data, saved_data):
+    """
+    Kaydedilecek ders verisini oluşturur.
+
+    Bu taramada çekilmeyen bölümler (bkz. "fetched_sections") ve hash'leri
+    kayıtlı veriden korunur.
+
+    :param current_data: Ninova'dan çekilen güncel ders verisi
+    :param saved_data: Daha önce kaydedilmiş ders verisi
+    :return: Kaydedilecek ders dict'i
+    """
+    if not isinstance(saved_data, dict):
+        saved_data = {}
+    fetched = set(current_data.get("fetched_sections", SECTIONS))
+    course = {"course_name": current_data.get("course_name", "Bilinmeyen Ders")}
+    for section in SECTIONS:
+        source = current_data if section in fetched else saved_data
+        course[section] = source.get(section, {} if section == "grades" else [])
+    course["section_hashes"] = {
+        **{s: h for s, h in (saved_data.get("section_hashes") or {}).items() if s not in fetched},
+        **(current_data.get("section_hashes") or {}),
+    }
+    return course
+
+
+def _has_upcoming_deadline(saved_data):
+    """
+    Kayıtlı derste teslim tarihi yaklaşan (POLL_DEADLINE_WINDOW) açık ödev var mı?
+
+    Böyle dersler öğrenilen tarama aralığından bağımsız olarak her döngüde taranır.
+
+    :param saved_data: Kayıtlı ders verisi
+    :return: True/False
+    """
+    if not isinstance(saved_data, dict):
+        return False
+    now = datetime.now()
+    for assign in saved_data.get("assignments", []):
+        if assign.get("is_submitted", False) or not assign.get("end_date"):
+            continue
+        due_date = parse_turkish_date(assign["end_date"])
+        if due_date and 0 < (due_date - now).total_seconds() <= POLL_DEADLINE_WINDOW:
+            return True
+    return False
+
+
+def _check_assignment_reminders(saved_data):
+    """
+    İçeriği değişmeyen bir ders için yalnızca ödev hatırlatmalarını kontrol eder.
+
+    Gönderilen hatırlatmalar kayıtlı ödevlerin "reminders_sent" alanına işlenir.
+
+    :param saved_data: Kayıtlı ders verisi (yerinde güncellenir)
+    :return: (sections_changes, changes) tuple
+    """
+    sections_changes = []
+    changes = []
+    for assign in saved_data.get("assignments", []):
+        if assign.get("is_submitted", False) or not assign.get("end_date"):
+            continue
+        due_date = parse_turkish_date(assign["end_date"])
+        if not due_date:
+            continue
+        sent_reminders = assign.get("reminders_sent", [])
+        reminder = _assignment_reminder(assign, due_date, sent_reminders)
+        if reminder:
+            reminder_tag, reminder_text = reminder
+            sections_changes.append(reminder_text)
+            changes.append(f"HATIRLATMA ({reminder_tag}): {assign['name']}")
+            assign["reminders_sent"] = [*sent_reminders, reminder_tag]
+    return sections_changes, changes
+
+
+def _announcement_changed(ann, saved_ann):
+    """Duyurunun liste bilgileri (başlık, yazar, tarih) kayıtlıdan farklı mı?"""
+    return (
+        ann["title"] != saved_ann.get("title")
+        or ann.get("author") != saved_ann.get("author")
+        or ann.get("date") != saved_ann.get("date")
+    )
+
+
+def _known_announcements(saved_data):
+    """Kayıtlı ders verisindeki duyuruların {id: sürüm} eşlemesi (tarama işleri için)."""
+    if not isinstance(saved_data, dict):
+        return {}
+    return {ann.get("id"): announcement_version(ann) for ann in saved_data.get("announcements", [])}
+
+
 def _compare_course_data(
     current_data,
     saved_data,
@@ -510,28 +765,16 @@ def _compare_course_data(
         if include_reminders and not assign.get("is_submitted", False) and assign.get("end_date"):
             due_date = parse_turkish_date(assign["end_date"])
             if due_date:
-                time_left = due_date - datetime.now()
-                hours_left = time_left.total_seconds() / 3600
                 sent_reminders = []
                 if saved_assign and "reminders_sent" in saved_assign:
                     sent_reminders = saved_assign["reminders_sent"]
                 elif saved_assign:
                     saved_assign["reminders_sent"] = []
 
-                reminder_tag = None
-                reminder_msg = ""
-                if 0 < hours_left <= 3 and "3h" not in sent_reminders:
-                    reminder_tag = "3h"
-                    reminder_msg = f"🚨 <b>SON 3 SAAT!</b> ({e_assign_name})"
-                elif 3 < hours_left <= 24 and "24h" not in sent_reminders:
-                    reminder_tag = "24h"
-                    reminder_msg = f"⏳ <b>SON 24 SAAT!</b> ({e_assign_name})"
-
-                if reminder_tag:
-                    sections_changes.append(
-                        f"{reminder_msg}\nBitiş: {assign['end_date']}\n"
-                        f"<a href='{assign['url']}'>Ödeve Git</a>"
-                    )
+                reminder = _assignment_reminder(assign, due_date, sent_reminders)
+                if reminder:
+                    reminder_tag, reminder_text = reminder
+                    sections_changes.append(reminder_text)
                     changes.append(f"HATIRLATMA ({reminder_tag}): {assign['name']}")
                     assign["reminders_sent"] = [*sent_reminders, reminder_tag]
                 else:
@@ -566,13 +809,32 @@ def _compare_course_data(
     saved_ann_map = {a.get("id"): a for a in saved_announcements}
     current_ann_ids = {a.get("id") for a in current_announcements}
 
+    # Yeni veya düzenlenmiş duyuruların içerikleri tek seferde, eşzamanlı çekilir.
+    # İş kuyruğu modunda tarama düğümü bunları sonuçla birlikte getirmiştir.
+    prefetched = current_data.get("announcement_details") or {}
+    details = {
+        **prefetched,
+        **get_announcement_details(
+            user_session,
+            [
+                ann
+                for ann in current_announcements
+                if ann.get("url") not in prefetched
+                and (
+                    ann.get("id") not in saved_ann_map
+                    or _announcement_changed(ann, saved_ann_map[ann.get("id")])
+                )
+            ],
+        ),
+    }
+
     for ann in current_announcements:
         ann_id = ann.get("id")
         e_ann_title = escape_html(ann["title"])
         e_ann_author = escape_html(ann.get("author", ""))
 
         if ann_id not in saved_ann_map:
-            full_content = get_announcement_detail(user_session, ann["url"])
+            full_content = details.get(ann["url"], "")
             ann["content"] = full_content
             ann_msg = f"📣 <b>YENİ DUYURU:</b> <a href='{ann['url']}'>{e_ann_title}</a>"
             if include_reminders and e_ann_author:
@@ -583,13 +845,8 @@ def _compare_course_data(
                 changes_table.add_row(username, course_name, f"📣 Yeni Duyuru: {ann['title']}")
         else:
             saved_ann = saved_ann_map[ann_id]
-            changed = (
-                ann["title"] != saved_ann.get("title")
-                or ann.get("author") != saved_ann.get("author")
-                or ann.get("date") != saved_ann.get("date")
-            )
-            if changed:
-                full_content = get_announcement_detail(user_session, ann["url"])
+            if _announcement_changed(ann, saved_ann):
+                full_content = details.get(ann["url"], "")
                 ann["content"] = full_content
                 sections_changes.append(
                     f"🔄 <b>DUYURU GÜNCELLENDİ:</b> <a href='{ann['url']}'>{e_ann_title}</a>"
@@ -600,30 +857,32 @@ def _compare_course_data(
                 ann["content"] = saved_ann.get("content", "")
 
     # --- 5. SİLİNMİŞ VERİLERİ KONTROL ET ---
+    # Yalnızca bu taramada çekilen bölümler için (atlanan bölümler boş listedir)
     if current_data.get("fetch_success", True):
+        fetched = set(current_data.get("fetched_sections", SECTIONS))
         current_grade_keys = set(current_grades.keys())
-        for saved_key in saved_grades:
+        for saved_key in saved_grades if "grades" in fetched else ():
             if saved_key not in current_grade_keys:
                 e_saved_key = escape_html(saved_key)
                 sections_changes.append(f"🗑️ <b>NOT SİLİNDİ:</b> {e_saved_key}")
                 changes.append(f"NOT SİLİNDİ: {saved_key}")
 
         current_assign_ids = {a.get("id") for a in current_assignments}
-        for sa in saved_assignments:
+        for sa in saved_assignments if "assignments" in fetched else ():
             if sa.get("id") not in current_assign_ids:
                 e_name = escape_html(sa.get("name", "Bilinmeyen Ödev"))
                 sections_changes.append(f"🗑️ <b>ÖDEV SİLİNDİ:</b> {e_name}")
                 changes.append(f"ÖDEV SİLİNDİ: {sa.get('name')}")
 
         current_file_urls = {f.get("url") for f in current_files}
-        for sf in saved_files:
+        for sf in saved_files if "files" in fetched else ():
             if sf.get("url") not in current_file_urls:
                 e_name = escape_html(sf.get("name", "Bilinmeyen Dosya"))
                 icon = get_file_icon(sf.get("name", "").split("/")[-1])
                 sections_changes.append(f"{icon} <b>DOSYA SİLİNDİ:</b> {e_name}")
                 changes.append(f"DOSYA SİLİNDİ: {sf.get('name')}")
 
-        for s_ann_id, s_ann in saved_ann_map.items():
+        for s_ann_id, s_ann in saved_ann_map.items() if "announcements" in fetched else ():
             if s_ann_id not in current_ann_ids:
                 e_title = escape_html(s_ann.get("title", "Bilinmeyen Duyuru"))
                 sections_changes.append(f"🗑️ <b>DUYURU SİLİNDİ:</b> {e_title}")
@@ -652,8 +911,7 @@ def check_user_updates(
     """
     request_id = request_id or f"chk-{chat_id}-{int(time.time())}"
     set_log_context(chat_id=str(chat_id), action="check_user_updates", request_id=request_id)
-    users = load_all_users()
-    user_data = users.get(chat_id)
+    user_data = get_user_data(chat_id)
     logger.info(
         "[user] actor=%s | action=check_user_updates | status=started | request_id=%s | "
         "details=course_idx=%s;silent=%s",
@@ -672,8 +930,8 @@ def check_user_updates(
         clear_log_context()
         return {"success": False, "message": "Kullanıcı bilgileri bulunamadı."}
 
-    # Son kontrol zamanını güncelle
-    user_data["last_check"] = datetime.now().isoformat()
+    # Son kontrol zamanını güncelle (sadece bu kullanıcının kaydı yazılır)
+    update_user_fields(chat_id, last_check=datetime.now().isoformat())
     all_urls = user_data.get("urls", [])
 
     if not all_urls:
@@ -782,17 +1040,25 @@ def check_user_updates(
 
     # Değişiklikleri kontrol et — ortak fonksiyon kullan
     new_file_notifications = []  # (course_url, course_name, file_idx, file_name)
+    content_refreshed = False  # Yeni içerik hash'i kaydedilmeli mi
 
     for url, current_data in all_current_grades.items():
         course_name = current_data.get("course_name", "Bilinmeyen Ders")
         saved_data = user_saved_grades.get(url, {})
         e_course = escape_html(course_name)
 
+        if _is_course_unchanged(current_data, saved_data):
+            continue
+        if current_data.get("section_hashes"):
+            content_refreshed = True
+
         sections_changes, changes, new_file_entries = _compare_course_data(
             current_data, saved_data, user_session, course_name
         )
 
         all_changes.extend(changes)
+        if changes:
+            poll_scheduler.record_result(chat_id, url, changed=True)
 
         for file_idx, file_name in new_file_entries:
             new_file_notifications.append((url, course_name, file_idx, file_name))
@@ -802,13 +1068,7 @@ def check_user_updates(
             telegram_messages.append(msg)
 
         # Kaydet
-        user_saved_grades[url] = {
-            "course_name": course_name,
-            "grades": current_data.get("grades", {}),
-            "assignments": current_data.get("assignments", []),
-            "files": current_data.get("files", []),
-            "announcements": current_data.get("announcements", []),
-        }
+        user_saved_grades[url] = _build_saved_course(current_data, saved_data)
 
     # Başarılı veri çekimi - hata sayacını sıfırla
     if all_current_grades:
@@ -816,16 +1076,18 @@ def check_user_updates(
         error_tracker.record_success(chat_id, username, last_url=last_url)
 
     # Verileri kaydet
+    if all_changes or content_refreshed:
+        # Yalnızca bu kullanıcının satırları yazılır; diğer kullanıcılar korunur
+        save_user_grades_batch({chat_id: user_saved_grades})
     if all_changes:
-        saved_grades[chat_id] = user_saved_grades
-        save_grades(saved_grades)
         urls_list = list(user_saved_grades.keys())
         for t_msg in telegram_messages:
             send_telegram_message(chat_id, t_msg)
-            time.sleep(1)
+            _pace_send(1)
         if not silent and new_file_notifications:
-            from telebot import types as tg_types
-
+            _prewarm_new_files(
+                chat_id, user_session, username, password, user_saved_grades, new_file_notifications
+            )
             for course_url, file_course_name, file_idx, file_name in new_file_notifications:
                 try:
                     url_idx = urls_list.index(course_url)
@@ -833,30 +1095,15 @@ def check_user_updates(
                     continue
                 basename = file_name.split("/")[-1]
                 icon = get_file_icon(basename)
-                markup = tg_types.InlineKeyboardMarkup()
-                markup.add(
-                    tg_types.InlineKeyboardButton(
-                        "📥 İndir", callback_data=f"dl_{url_idx}_{file_idx}"
-                    )
-                )
                 text = (
                     f"📚 <b>{escape_html(file_course_name)}</b>\n"
                     f"{icon} <b>YENİ DOSYA:</b> {escape_html(basename)}"
                 )
                 try:
-                    bot.send_message(
-                        chat_id,
-                        text,
-                        reply_markup=markup,
-                        parse_mode="HTML",
-                        disable_web_page_preview=True,
-                    )
+                    _send_file_notification(chat_id, text, f"dl_{url_idx}_{file_idx}")
                 except Exception as e:
                     logger.error(f"File notification send error for {chat_id}: {e}")
-                time.sleep(1)
-
-    # Kullanıcı verilerini kaydet
-    save_all_users(users)
+                _pace_send(1)
 
     # Son kontrol zamanını güncelle
     global LAST_CHECK_DISPLAY_TIME
@@ -877,6 +1124,264 @@ def check_user_updates(
     return {"success": True, "message": result_msg, "changes": len(all_changes)}
 
 
+def _forward_to_coordinator(message_type, **payload):
+    """
+    Shard sürecindeyse mesajı koordinatör sürecine iletir.
+
+    :param message_type: Mesaj türü (telegram, file, user_fields, track_error, ...)
+    :param payload: Mesaj alanları (pickle edilebilir olmalı)
+    :return: Mesaj iletildiyse True, tek süreçli çalışmada False
+    """
+    if _SHARD_OUTBOX is None:
+        return False
+    _SHARD_OUTBOX.put({"type": message_type, **payload})
+    return True
+
+
+def _update_user(chat_id, **fields):
+    """Kullanıcı alanlarını günceller (shard'da koordinatör üzerinden)."""
+    if not _forward_to_coordinator("user_fields", chat_id=chat_id, fields=fields):
+        update_user_fields(chat_id, **fields)
+
+
+def _track_error(*args, **kwargs):
+    """error_tracker.record_error çağrısı (shard'da koordinatör üzerinden)."""
+    if not _forward_to_coordinator("track_error", args=args, kwargs=kwargs):
+        error_tracker.record_error(*args, **kwargs)
+
+
+def _track_success(*args, **kwargs):
+    """error_tracker.record_success çağrısı (shard'da koordinatör üzerinden)."""
+    if not _forward_to_coordinator("track_success", args=args, kwargs=kwargs):
+        error_tracker.record_success(*args, **kwargs)
+
+
+def _send_file_notification(chat_id, text, callback_data):
+    """
+    Yeni dosya bildirimini "İndir" butonuyla gönderir (shard'da koordinatör üzerinden).
+
+    :param chat_id: Kullanıcı chat ID
+    :param text: Bildirim metni (HTML)
+    :param callback_data: İndir butonunun callback verisi (dl_<ders>_<dosya>)
+    """
+    if _forward_to_coordinator("file", chat_id=chat_id, text=text, callback_data=callback_data):
+        return
+    payload = {
+        "text": text,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        "reply_markup": {
+            "inline_keyboard": [[{"text": "📥 İndir", "callback_data": callback_data}]]
+        },
+    }
+    if enqueue_notification(chat_id, "sendMessage", payload):
+        return
+    from telebot import types as tg_types
+
+    markup = tg_types.InlineKeyboardMarkup()
+    markup.add(tg_types.InlineKeyboardButton("📥 İndir", callback_data=callback_data))
+    bot.send_message(
+        chat_id,
+        text,
+        reply_markup=markup,
+        parse_mode="HTML",
+        disable_web_page_preview=True,
+    )
+
+
+def _store_file_id(file_url, file_id):
+    """
+    Ön ısıtılan dosyanın file_id'sini önbelleğe yazar (shard'da koordinatör üzerinden).
+
+    :param file_url: Ninova dosya URL'i (önbellek anahtarı)
+    :param file_id: Telegram file_id
+    """
+    if _forward_to_coordinator("file_cache", file_url=file_url, file_id=file_id):
+        return
+    get_cache_manager().set(file_url, file_id)
+
+
+def _prewarm_new_files(
+    chat_id, user_session, username, password, user_saved_grades, new_file_notifications
+):
+    """
+    Yeni dosyaları bildirimden önce Telegram'a bir kez yükler (PREWARM_CHAT_ID ayarlıysa).
+
+    Aynı dosyayı tespit eden diğer kullanıcılar aynı aktarımı bekler; en fazla
+    PREWARM_WAIT_SECONDS beklenir, aktarım arka planda sürmeye devam eder.
+    Shard sürecinde aktarım koordinatörde başlatılır: önbellek ve "İndir"
+    dokunuşlarının katıldığı aktarımlar koordinatör sürecindedir.
+
+    :param chat_id: Kullanıcı chat ID
+    :param user_session: Kullanıcının Ninova oturumu
+    :param username: Ninova kullanıcı adı
+    :param password: Ninova şifresi
+    :param user_saved_grades: Kullanıcının güncel ders verisi (dosya URL'leri için)
+    :param new_file_notifications: (course_url, course_name, file_idx, file_name) listesi
+    """
+    targets = []
+    for course_url, _course_name, file_idx, file_name in new_file_notifications:
+        files = user_saved_grades.get(course_url, {}).get("files", [])
+        if file_idx >= len(files) or not files[file_idx].get("url"):
+            continue
+        targets.append((files[file_idx]["url"], file_name.split("/")[-1]))
+    if not targets:
+        return
+    # Şifre kuyruğa yazılmaz; koordinatör kullanıcı kaydından çözer
+    if _forward_to_coordinator("prewarm", chat_id=chat_id, files=targets):
+        return
+    futures = _start_prewarm(chat_id, user_session, username, password, targets)
+    if futures:
+        wait_futures(futures, timeout=PREWARM_WAIT_SECONDS)
+
+
+def _start_prewarm(chat_id, user_session, username, password, targets):
+    """
+    Dosya aktarımlarını bu süreçteki ön ısıtıcıda başlatır (beklemez).
+
+    :param chat_id: Kullanıcı chat ID
+    :param user_session: Kullanıcının Ninova oturumu
+    :param username: Ninova kullanıcı adı
+    :param password: Ninova şifresi
+    :param targets: (file_url, file_name) listesi
+    :return: Aktarım Future listesi
+    """
+    prewarmer = get_file_prewarmer(_store_file_id, lookup=get_cache_manager().get)
+    if prewarmer is None:
+        return []
+    futures = []
+    for file_url, file_name in targets:
+        try:
+            futures.append(
+                prewarmer.prewarm(
+                    file_url,
+                    file_name,
+                    user_session,
+                    chat_id=chat_id,
+                    username=username,
+                    password=password,
+                )
+            )
+        except RuntimeError:  # Kapanış sırasında havuz yeni iş kabul etmez
+            break
+    return futures
+
+
+def _prewarm_for_shard(chat_id, targets):
+    """
+    Shard'ın tespit ettiği yeni dosyaları koordinatörün ön ısıtıcısında başlatır.
+
+    Dağıtım döngüsü bekletilmez; kullanıcının "İndir" dokunuşu süren aktarıma katılır.
+
+    :param chat_id: Dosyaları tespit eden kullanıcının chat ID'si
+    :param targets: (file_url, file_name) listesi
+    """
+    user = get_user_data(chat_id)
+    if not user:
+        return
+    password = decrypt_password(user.get("password", ""))
+    if not password:
+        return
+    _start_prewarm(chat_id, get_user_session(chat_id), user.get("username"), password, targets)
+
+
+def _pace_send(seconds):
+    """
+    Doğrudan gönderimde mesajlar arasında bekler (dağıtıcı ve shard modunda beklemez).
+
+    :param seconds: Bekleme süresi
+    """
+    if _SHARD_OUTBOX is None:
+        pace_direct_send(seconds)
+
+
+def _poll_state_path():
+    """
+    Tarama aralıkları durum dosyası; her shard kendi kullanıcılarının durumunu ayrı tutar.
+
+    :return: Durum dosyası yolu
+    """
+    if _SHARD is None:
+        return POLL_STATE_FILE
+    index, shards = _SHARD
+    path = Path(POLL_STATE_FILE)
+    return str(path.with_name(f"{path.stem}.shard{index}-of-{shards}{path.suffix}"))
+
+
+def _collect_user_scan_results(chat_id, username, future_to_url, progress, task, deadline=None):
+    """
+    Bir kullanıcının zamanlayıcıya gönderilmiş ders işlerinin sonuçlarını toplar.
+
+    :param chat_id: Kullanıcı chat ID
+    :param username: Kullanıcı adı (log için)
+    :param future_to_url: {Future: course_url} eşlemesi
+    :param progress: Rich Progress nesnesi
+    :param task: Progress task ID
+    :param deadline: time.monotonic() sınırı; o ana kadar bitmeyen dersler bu döngüde atlanır
+    :return: {course_url: grades} sözlüğü
+    """
+    all_current_grades = {}
+    login_error_sent = False
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    try:
+        for future in as_completed(future_to_url, timeout=timeout):
+            url = future_to_url[future]
+            try:
+                grades = future.result()
+                if grades:
+                    all_current_grades[url] = grades
+            except LoginFailedError as e:
+                if not login_error_sent:
+                    logger.error(
+                        "[%s] %s - LoginFailedError: type=%s, details=%s",
+                        chat_id,
+                        username,
+                        e.error_type,
+                        e.message,
+                    )
+                    _track_error(
+                        chat_id,
+                        e.error_type,
+                        str(e.message),
+                        username,
+                        error_stage="login",
+                        last_url=url,
+                    )
+                    login_error_sent = True
+                else:
+                    logger.debug("[%s] %s - Login error on %s: %s", chat_id, username, url, e)
+            except Exception as e:
+                logger.error(f"[{chat_id}] Ders tarama hatası ({url}): {e}")
+            finally:
+                progress.update(task, advance=1)
+    except TimeoutError:
+        # İşler kuyrukta kalır; ders kaydı güncellenmediği için sonraki döngüde yine
+        # zamanı gelmiş sayılır ve aynı anahtarla gönderilen iş bekleyen işe katılır
+        pending = sum(1 for future in future_to_url if not future.done())
+        logger.warning(f"[{chat_id}] {pending} ders taraması bu döngüde bitmedi, ertelendi")
+        progress.update(task, advance=pending)
+
+    # Zamanlayıcının iş sırasına göre değil, kullanıcının ders sırasına göre döndür
+    order = {url: idx for idx, url in enumerate(future_to_url.values())}
+    return dict(sorted(all_current_grades.items(), key=lambda item: order[item[0]]))
+
+
+def _flush_dirty_grades(dirty_grades):
+    """
+    Bellekte biriken (dirty) kullanıcı not verilerini tek yazma ile diske aktarır.
+
+    :param dirty_grades: {chat_id: user_grades} sözlüğü; başarılı kayıttan sonra boşaltılır
+    """
+    if not dirty_grades:
+        return
+    try:
+        flushed = save_user_grades_batch(dirty_grades)
+        logger.info(f"Not verileri kaydedildi: {flushed} kullanıcı (toplu yazma)")
+        dirty_grades.clear()
+    except Exception as e:
+        logger.exception(f"Not verileri toplu kaydedilemedi: {e}")
+
+
 def check_for_updates():
     """
     Tüm kullanıcılar için ders verilerini tarar ve güncellemeleri kontrol eder.
@@ -888,10 +1393,18 @@ def check_for_updates():
     - Duyuruları kontrol eder
     - Ödev hatırlatmaları gönderir
 
+    Tüm kullanıcıların (kullanıcı, ders) işleri tek bir kalıcı zamanlayıcıya
+    (ScanScheduler) gönderilir; işler kullanıcılar arasında adil sırayla,
+    toplam ve kullanıcı başı eşzamanlılık sınırları içinde çalıştırılır.
+
     Yeni veya güncellenmiş içerik varsa Telegram bildirim gönderir.
     """
     update_last_check_time()
-    msg = f"Kontrol Başlatıldı - {len(load_all_users())} kullanıcı"
+    users = load_all_users()
+    if _SHARD is not None:
+        index, shards = _SHARD
+        users = {c: u for c, u in users.items() if shard_of(c, shards) == index}
+    msg = f"Kontrol Başlatıldı - {len(users)} kullanıcı"
     logger.info(msg)
     console.rule(f"[bold cyan][{time.strftime('%H:%M:%S')}] {msg}")
 
@@ -901,16 +1414,32 @@ def check_for_updates():
     changes_table.add_column("Ders", style="bold green")
     changes_table.add_column("Değişiklik", style="yellow")
 
-    users = load_all_users()
     saved_grades = load_saved_grades()
     changed_usernames = set()
     total_changes_count = 0
+    unchanged_courses = 0  # İçerik hash'i aynı olduğu için diff'i atlanan dersler
+    compared_courses = 0
+    page_cache = get_page_cache(PAGE_CACHE_MAX_ENTRIES)
+    page_cache.reset_stats()
+    shared_cache = get_shared_cache(SHARED_CONTENT_TTL)
+    shared_cache.reset_stats()
+    poll_scheduler.reset_stats()
+
+    # --- 1. AŞAMA: Tüm kullanıcıların ders işlerini zamanlayıcıya gönder ---
+    scheduler = get_scan_scheduler(
+        max_workers=SCAN_MAX_WORKERS, per_user_limit=SCAN_PER_USER_CONCURRENCY
+    )
+    queue_client = get_queue_scan_client() if USE_JOB_QUEUE else None
+    async_engine = (
+        get_async_engine(ASYNC_MAX_IN_FLIGHT) if USE_ASYNC_ENGINE and not queue_client else None
+    )
+    scan_jobs = []  # (chat_id, username, password, user_session, request_id, {Future: url})
 
     for chat_id, user_data in users.items():
         request_id = f"auto-{chat_id}-{int(time.time())}"
         set_log_context(chat_id=str(chat_id), action="check_for_updates", request_id=request_id)
         # Son kontrol zamanını güncelle
-        user_data["last_check"] = datetime.now().isoformat()
+        _update_user(chat_id, last_check=datetime.now().isoformat())
         urls = user_data.get("urls", [])
         if not urls:
             clear_log_context()
@@ -927,7 +1456,7 @@ def check_for_updates():
         password = decrypt_password(encrypted_password)
         if password is None:
             logger.error(f"Şifre çözülemedi ({chat_id}), pas geçiliyor.")
-            error_tracker.record_error(
+            _track_error(
                 chat_id,
                 "DECRYPT_ERROR",
                 "Şifre çözülemedi",
@@ -937,13 +1466,60 @@ def check_for_updates():
             clear_log_context()
             continue
 
-        if SHOW_VERBOSE_TERMINAL:
-            console.print(f"[bold cyan]Kullanıcı kontrol ediliyor: {chat_id}")
+        # Sadece zamanı gelen dersler taranır; diğerleri kayıtlı verisiyle kalır
+        user_saved = saved_grades.get(chat_id, {})
+        due_urls = [
+            url
+            for url in urls
+            if not ADAPTIVE_POLLING
+            or poll_scheduler.is_due(
+                chat_id, url, force=_has_upcoming_deadline(user_saved.get(url))
+            )
+        ]
+        if not due_urls:
+            clear_log_context()
+            continue
 
         # Get user session (managed by SessionManager)
         user_session = get_user_session(chat_id)
+        if queue_client is not None:
+            # Tarama düğümleri şifreyi ortak anahtarla kendileri çözer
+            future_to_url = {
+                queue_client.submit(
+                    chat_id,
+                    url,
+                    username,
+                    encrypted_password,
+                    known_announcements=_known_announcements(user_saved.get(url)),
+                ): url
+                for url in due_urls
+            }
+        elif async_engine is not None:
+            future_to_url = {
+                async_engine.submit(chat_id, user_session, url, username, password): url
+                for url in due_urls
+            }
+        else:
+            future_to_url = {
+                scheduler.submit(
+                    chat_id, get_grades, user_session, url, chat_id, username, password
+                ): url
+                for url in due_urls
+            }
+        scan_jobs.append((chat_id, username, password, user_session, request_id, future_to_url))
+        clear_log_context()
+
+    total_jobs = sum(len(job[5]) for job in scan_jobs)
+    # Tarama düğümü çalışmıyorsa ana döngü (SKS, Arı24, duyurular) en fazla bir döngü
+    # süresi bekler; bitmeyen kuyruk işleri sonraki döngüye devredilir
+    collect_deadline = time.monotonic() + CHECK_INTERVAL if queue_client is not None else None
 
-        all_current_grades = {}
+    # Değişen kullanıcıların verileri bellekte biriktirilir; ninova_data.json her
+    # kullanıcıda değil, checkpoint'lerde ve döngü sonunda bir kez yazılır.
+    dirty_grades = {}
+
+    # --- 2. AŞAMA: Sonuçları kullanıcı sırasıyla topla, karşılaştır ve bildir ---
+    try:
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
@@ -954,156 +1530,157 @@ def check_for_updates():
             transient=True,
         ) as progress:
             task = progress.add_task(
-                f"[yellow]{username} ({len(urls)} ders) taranıyor...",
-                total=len(urls),
+                f"[yellow]{len(scan_jobs)} kullanıcı ({total_jobs} ders) taranıyor...",
+                total=total_jobs,
             )
 
-            # Paralel tarama için ThreadPoolExecutor kullan
-            with ThreadPoolExecutor(max_workers=5) as executor:
-                future_to_url = {
-                    executor.submit(get_grades, user_session, url, chat_id, username, password): url
-                    for url in urls
-                }
-
-                login_error_sent = False
-                for future in as_completed(future_to_url):
-                    url = future_to_url[future]
-                    try:
-                        grades = future.result()
-                        if grades:
-                            all_current_grades[url] = grades
-                    except LoginFailedError as e:
-                        if not login_error_sent:
-                            logger.error(
-                                "[%s] %s - LoginFailedError: type=%s, details=%s",
-                                chat_id,
-                                username,
-                                e.error_type,
-                                e.message,
-                            )
-                            error_tracker.record_error(
-                                chat_id,
-                                e.error_type,
-                                str(e.message),
-                                username,
-                                error_stage="login",
-                                last_url=url,
-                            )
-                            login_error_sent = True
-                        else:
-                            logger.debug(
-                                "[%s] %s - Login error on %s: %s", chat_id, username, url, e
-                            )
-                    except Exception as e:
-                        logger.error(f"[{chat_id}] Ders tarama hatası ({url}): {e}")
-                    finally:
-                        progress.update(task, advance=1)
-
-        user_saved_grades = saved_grades.get(chat_id, {})
-        all_changes = []
-        telegram_messages = []
-
-        # Başarılı veri çekimi → hata sayacını sıfırla, düzeldi mesajı gönder
-        if all_current_grades:
-            last_url = next(iter(all_current_grades.keys()), None)
-            error_tracker.record_success(chat_id, username, last_url=last_url)
-
-        # Ortak fonksiyon ile değişiklikleri kontrol et
-        new_file_notifications = []  # (course_url, course_name, file_idx, file_name)
-        for url, current_data in all_current_grades.items():
-            course_name = current_data.get("course_name", "Bilinmeyen Ders")
-            saved_data = user_saved_grades.get(url, {})
-            e_course = escape_html(course_name)
-
-            sections_changes, changes, new_file_entries = _compare_course_data(
-                current_data,
-                saved_data,
-                user_session,
-                course_name,
-                include_reminders=True,
-                include_console_log=True,
-                username=username,
-                changes_table=changes_table,
-            )
-
-            all_changes.extend(changes)
+            for chat_id, username, password, user_session, request_id, future_to_url in scan_jobs:
+                set_log_context(
+                    chat_id=str(chat_id), action="check_for_updates", request_id=request_id
+                )
+                if SHOW_VERBOSE_TERMINAL:
+                    console.print(f"[bold cyan]Kullanıcı kontrol ediliyor: {chat_id}")
 
-            for file_idx, file_name in new_file_entries:
-                new_file_notifications.append((url, course_name, file_idx, file_name))
+                all_current_grades = _collect_user_scan_results(
+                    chat_id, username, future_to_url, progress, task, deadline=collect_deadline
+                )
 
-            if sections_changes:
-                msg = f"📚 <b>{e_course}</b>\n\n" + "\n\n".join(sections_changes)
-                telegram_messages.append(msg)
+                user_saved_grades = saved_grades.get(chat_id, {})
+                all_changes = []
+                telegram_messages = []
+
+                # Başarılı veri çekimi → hata sayacını sıfırla, düzeldi mesajı gönder
+                if all_current_grades:
+                    last_url = next(iter(all_current_grades.keys()), None)
+                    _track_success(chat_id, username, last_url=last_url)
+
+                # Ortak fonksiyon ile değişiklikleri kontrol et
+                new_file_notifications = []  # (course_url, course_name, file_idx, file_name)
+                content_refreshed = False  # Yeni içerik hash'i kaydedilmeli mi
+                for url, current_data in all_current_grades.items():
+                    course_name = current_data.get("course_name", "Bilinmeyen Ders")
+                    saved_data = user_saved_grades.get(url, {})
+                    e_course = escape_html(course_name)
+
+                    if _is_course_unchanged(current_data, saved_data):
+                        # Sayfalar değişmedi: diff atlanır, sadece hatırlatmalar kontrol edilir
+                        unchanged_courses += 1
+                        poll_scheduler.record_result(chat_id, url, changed=False)
+                        sections_changes, changes = _check_assignment_reminders(saved_data)
+                        all_changes.extend(changes)
+                        if sections_changes:
+                            msg = f"📚 <b>{e_course}</b>\n\n" + "\n\n".join(sections_changes)
+                            telegram_messages.append(msg)
+                        continue
+                    compared_courses += 1
+                    if current_data.get("section_hashes"):
+                        content_refreshed = True
+
+                    sections_changes, changes, new_file_entries = _compare_course_data(
+                        current_data,
+                        saved_data,
+                        user_session,
+                        course_name,
+                        include_reminders=True,
+                        include_console_log=True,
+                        username=username,
+                        changes_table=changes_table,
+                    )
 
-            # Kaydet
-            user_saved_grades[url] = {
-                "course_name": course_name,
-                "grades": current_data.get("grades", {}),
-                "assignments": current_data.get("assignments", []),
-                "files": current_data.get("files", []),
-                "announcements": current_data.get("announcements", []),
-            }
+                    all_changes.extend(changes)
+                    poll_scheduler.record_result(chat_id, url, changed=bool(changes))
 
-        if all_changes:
-            logger.info(f"Değişiklik tespit edildi: {chat_id} - {len(all_changes)} öğe")
-            changed_usernames.add(username or str(chat_id))
-            total_changes_count += len(all_changes)
-            if SHOW_VERBOSE_TERMINAL:
-                console.print(
-                    Panel(
-                        "\n".join(all_changes),
-                        title=f"[bold magenta]DEĞİŞİKLİK ({chat_id})",
-                        border_style="magenta",
-                    )
-                )
-            for t_msg in telegram_messages:
-                send_telegram_message(chat_id, t_msg)
-                time.sleep(1)
+                    for file_idx, file_name in new_file_entries:
+                        new_file_notifications.append((url, course_name, file_idx, file_name))
 
-            saved_grades[chat_id] = user_saved_grades
-            save_grades(saved_grades)
+                    if sections_changes:
+                        msg = f"📚 <b>{e_course}</b>\n\n" + "\n\n".join(sections_changes)
+                        telegram_messages.append(msg)
 
-            if new_file_notifications:
-                from telebot import types as tg_types
+                    # Kaydet
+                    user_saved_grades[url] = _build_saved_course(current_data, saved_data)
 
-                urls_list = list(user_saved_grades.keys())
-                for course_url, file_course_name, file_idx, file_name in new_file_notifications:
-                    try:
-                        url_idx = urls_list.index(course_url)
-                    except ValueError:
-                        continue
-                    basename = file_name.split("/")[-1]
-                    icon = get_file_icon(basename)
-                    markup = tg_types.InlineKeyboardMarkup()
-                    markup.add(
-                        tg_types.InlineKeyboardButton(
-                            "📥 İndir", callback_data=f"dl_{url_idx}_{file_idx}"
+                    if "assignments" not in current_data.get("fetched_sections", SECTIONS):
+                        # Ödevler bu taramada çekilmedi: hatırlatmalar kayıtlı ödevlerden
+                        sections_changes, changes = _check_assignment_reminders(
+                            user_saved_grades[url]
                         )
-                    )
-                    text = (
-                        f"📚 <b>{escape_html(file_course_name)}</b>\n"
-                        f"{icon} <b>YENİ DOSYA:</b> {escape_html(basename)}"
-                    )
-                    try:
-                        bot.send_message(
-                            chat_id,
-                            text,
-                            reply_markup=markup,
-                            parse_mode="HTML",
-                            disable_web_page_preview=True,
+                        all_changes.extend(changes)
+                        if sections_changes:
+                            msg = f"📚 <b>{e_course}</b>\n\n" + "\n\n".join(sections_changes)
+                            telegram_messages.append(msg)
+
+                if all_changes or content_refreshed:
+                    saved_grades[chat_id] = user_saved_grades
+                    dirty_grades[chat_id] = user_saved_grades
+                    if len(dirty_grades) >= GRADES_CHECKPOINT_USERS:
+                        _flush_dirty_grades(dirty_grades)
+
+                if all_changes:
+                    logger.info(f"Değişiklik tespit edildi: {chat_id} - {len(all_changes)} öğe")
+                    changed_usernames.add(username or str(chat_id))
+                    total_changes_count += len(all_changes)
+                    if SHOW_VERBOSE_TERMINAL:
+                        console.print(
+                            Panel(
+                                "\n".join(all_changes),
+                                title=f"[bold magenta]DEĞİŞİKLİK ({chat_id})",
+                                border_style="magenta",
+                            )
                         )
-                    except Exception as e:
-                        logger.error(f"File notification send error for {chat_id}: {e}")
-                    time.sleep(1)
+                    for t_msg in telegram_messages:
+                        send_telegram_message(chat_id, t_msg)
+                        _pace_send(1)
 
+                    if new_file_notifications:
+                        _prewarm_new_files(
+                            chat_id,
+                            user_session,
+                            username,
+                            password,
+                            user_saved_grades,
+                            new_file_notifications,
+                        )
+                        urls_list = list(user_saved_grades.keys())
+                        for (
+                            course_url,
+                            file_course_name,
+                            file_idx,
+                            file_name,
+                        ) in new_file_notifications:
+                            try:
+                                url_idx = urls_list.index(course_url)
+                            except ValueError:
+                                continue
+                            basename = file_name.split("/")[-1]
+                            icon = get_file_icon(basename)
+                            text = (
+                                f"📚 <b>{escape_html(file_course_name)}</b>\n"
+                                f"{icon} <b>YENİ DOSYA:</b> {escape_html(basename)}"
+                            )
+                            try:
+                                _send_file_notification(chat_id, text, f"dl_{url_idx}_{file_idx}")
+                            except Exception as e:
+                                logger.error(f"File notification send error for {chat_id}: {e}")
+                            _pace_send(1)
+
+                elif SHOW_VERBOSE_TERMINAL:
+                    console.print(f"[dim]Değişiklik yok ({chat_id})")
                 clear_log_context()
-        elif SHOW_VERBOSE_TERMINAL:
-            console.print(f"[dim]Değişiklik yok ({chat_id})")
+    finally:
+        # Son değişiklikleri tek seferde kaydet (hata durumunda da)
+        _flush_dirty_grades(dirty_grades)
 
     logger.info("Kontrol tamamlandı.")
 
-    # Kullanıcı verilerini kaydet (last_check güncellemeleri için)
-    save_all_users(users)
+    # last_check güncellemeleri kullanıcı deposunda birikir; diske tek seferde yazılır
+    flush_users()
+    poll_scheduler.prune(
+        {chat_id: user_data.get("urls", []) for chat_id, user_data in users.items()}
+    )
+    save_state(_poll_state_path(), poll_scheduler.export_state())
+    if async_engine is not None:
+        async_engine.prune(chat_id for chat_id, user_data in users.items() if user_data.get("urls"))
     logger.info("Veriler kaydedildi.")
 
     # Değişiklikler tablosunu göster (eğer değişiklik varsa)
@@ -1112,10 +1689,40 @@ def check_for_updates():
         console.print(changes_table)
 
     changed_users = len(changed_usernames)
+    sched_stats = scheduler.stats()
+    if queue_client is not None:
+        queue_stats = queue_client.stats()
+        engine_desc = (
+            f"iş kuyruğu ({queue_stats['backend']}): {queue_stats['completed']} tamamlandı, "
+            f"{queue_stats['failed']} hatalı, {queue_stats['timed_out']} zaman aşımı"
+        )
+    elif async_engine is not None:
+        engine_desc = f"asyncio motoru: en fazla {ASYNC_MAX_IN_FLIGHT} eşzamanlı istek"
+    else:
+        engine_desc = (
+            f"zamanlayıcı: {sched_stats['max_workers']} işçi, "
+            f"kullanıcı başı {sched_stats['per_user_limit']}"
+        )
+    page_stats = page_cache.stats()
+    poll_stats = poll_scheduler.stats()
+    shared_stats = shared_cache.stats()
+    scanned_courses = unchanged_courses + compared_courses
+    unchanged_rate = round(unchanged_courses / scanned_courses * 100, 1) if scanned_courses else 0.0
     summary = (
         f"Kontrol özeti: {len(users)} kullanıcı tarandı, "
-        f"{total_changes_count} değişiklik, {changed_users} kullanıcı etkilendi"
+        f"{total_changes_count} değişiklik, {changed_users} kullanıcı etkilendi "
+        f"({engine_desc}; "
+        f"sayfa önbelleği: %{page_stats['hit_rate']} isabet "
+        f"({page_stats['hits']}/{page_stats['hits'] + page_stats['misses']}); "
+        f"diff atlanan ders: {unchanged_courses}/{scanned_courses} (%{unchanged_rate}); "
+        f"paylaşılan içerik: %{shared_stats['hit_rate']} isabet "
+        f"({shared_stats['hits'] + shared_stats['coalesced']}/"
+        f"{shared_stats['hits'] + shared_stats['coalesced'] + shared_stats['misses']}); "
+        f"zamanı gelmeyen ders: {poll_stats['skipped']}, "
+        f"ort. aralık {poll_stats['avg_interval']} sn)"
     )
+    if _forward_to_coordinator("summary", shard=_SHARD[0] if _SHARD else None, text=summary):
+        return
     emit_terminal_and_log(summary, level="info")
 
     # Son kontrol zamanını güncelle (Live display'de kullanmak için)
@@ -1123,8 +1730,102 @@ def check_for_updates():
     LAST_CHECK_DISPLAY_TIME = datetime.now().strftime("%H:%M:%S")
 
 
+def _dispatch_shard_message(message):
+    """
+    Shard süreçlerinden gelen bir mesajı koordinatör sürecinde uygular.
+
+    :param message: {"type": ..., ...} sözlüğü
+    """
+    kind = message["type"]
+    if kind == "telegram":
+        send_telegram_message(message["chat_id"], message["text"], message["is_error"])
+    elif kind == "file":
+        try:
+            _send_file_notification(message["chat_id"], message["text"], message["callback_data"])
+        except Exception as e:
+            logger.error(f"File notification send error for {message['chat_id']}: {e}")
+    elif kind == "file_cache":
+        _store_file_id(message["file_url"], message["file_id"])
+    elif kind == "prewarm":
+        try:
+            _prewarm_for_shard(message["chat_id"], message["files"])
+        except Exception as e:
+            logger.error(f"Prewarm error for {message['chat_id']}: {e}")
+    elif kind == "user_fields":
+        update_user_fields(message["chat_id"], **message["fields"])
+    elif kind == "track_error":
+        error_tracker.record_error(*message["args"], **message["kwargs"])
+    elif kind == "track_success":
+        error_tracker.record_success(*message["args"], **message["kwargs"])
+    elif kind == "summary":
+        # Shard'ın döngüsü bitti: last_check güncellemelerini diske yaz
+        flush_users()
+        update_last_check_time()
+        emit_terminal_and_log(f"[Shard {message['shard']}] {message['text']}", level="info")
+        global LAST_CHECK_DISPLAY_TIME
+        LAST_CHECK_DISPLAY_TIME = datetime.now().strftime("%H:%M:%S")
+    else:
+        logger.warning(f"[Shards] Bilinmeyen mesaj türü: {kind}")
+
+
+def run_scan_shard(index, shards, outbox, wake, stop):
+    """
+    Tarama shard süreci: sadece bu shard'a düşen kullanıcıları periyodik olarak tarar.
+
+    Telegram mesajları, kullanıcı alanları ve hata takibi güncellemeleri outbox
+    kuyruğu üzerinden koordinatör sürecine iletilir; bot tek süreçte kalır.
+
+    :param index: Shard numarası
+    :param shards: Toplam shard sayısı
+    :param outbox: Koordinatöre giden mesaj kuyruğu
+    :param wake: Ayarlandığında beklemeden tarama başlatan olay
+    :param stop: Ayarlandığında süreci durduran olay
+    """
+    global _SHARD, _SHARD_OUTBOX
+    # Ctrl+C koordinatörde ele alınır; shard mevcut taramayı bitirip stop ile çıkar
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _SHARD = (index, shards)
+    _SHARD_OUTBOX = outbox
+    console.quiet = True  # Terminal koordinatörün Live panelinde
+    set_message_sink(
+        lambda chat_id, text, is_error: _forward_to_coordinator(
+            "telegram", chat_id=chat_id, text=text, is_error=is_error
+        )
+    )
+    # İlk çalışmada tek süreçli durum dosyasından başla; prune diğer shard'ları ayıklar
+    poll_scheduler.load_state(
+        load_state(_poll_state_path(), None) or load_state(POLL_STATE_FILE, {})
+    )
+    logger.info(f"[Shards] Shard {index}/{shards} başlatıldı")
+
+    try:
+        while not stop.is_set():
+            wake.wait(CHECK_INTERVAL + random.randint(-30, 30))
+            wake.clear()
+            if stop.is_set():
+                break
+            try:
+                check_for_updates()
+            except Exception as e:
+                logger.exception(f"[Shards] Shard {index} tarama hatası: {e}")
+    finally:
+        shutdown_scan_scheduler(wait=True)
+        shutdown_async_engine(wait=True)
+        shutdown_file_prewarmer(wait=True)
+        shutdown_parse_pool(wait=True)
+        cleanup_inactive_sessions(force=True)
+
+
 if __name__ == "__main__":
-    set_check_callback(check_for_updates)
+    start_notification_dispatcher()
+    start_broadcast_engine()
+    if USE_SHARDS:
+        SHARD_COORDINATOR = ShardCoordinator(SCAN_SHARDS, run_scan_shard, _dispatch_shard_message)
+        SHARD_COORDINATOR.start()
+        # Zorla kontrol: tüm shard'lar beklemeden taramaya başlar
+        set_check_callback(SHARD_COORDINATOR.trigger)
+    else:
+        set_check_callback(check_for_updates)
 
     users = load_all_users()
     logger.info(f"Uygulama başlatıldı. Kayıtlı kullanıcı: {len(users)}")
@@ -1176,7 +1877,7 @@ if __name__ == "__main__":
 
             current_wait = CHECK_INTERVAL + random.randint(-30, 30)
             # Bekleme sırasında Live display
-            users_count = len(load_all_users())  # Disk I/O'yu 1 kere yap
+            users_count = get_user_count()  # Bellekteki kullanıcı deposundan
             with Live(console=console, refresh_per_second=LIVE_REFRESH_PER_SECOND) as live:
                 for i in range(current_wait):
                     if SHUTDOWN_EVENT.is_set():
@@ -1202,7 +1903,11 @@ if __name__ == "__main__":
             check_and_announce_sks_menu()
             check_ari24_updates()
             check_daily_bulletin()
-            check_for_updates()
+            if SHARD_COORDINATOR is not None:
+                # Ders taramaları shard süreçlerinde kendi döngüleriyle çalışır
+                SHARD_COORDINATOR.supervise()
+            else:
+                check_for_updates()
 
             # Session cleanup (every SESSION_CLEANUP_INTERVAL seconds)
             checks_since_cleanup += 1
@@ -0,0 +1,75 @@
+"""
+Tarama düğümü: iş kuyruğundan ders tarama işlerini kiralar ve sonuçları geri yazar.
+
+main.py JOB_QUEUE_BACKEND ayarlıyken dersleri kendisi taramaz, kuyruğa yazar. Bu
+süreç aynı veya farklı makinelerde istenen sayıda çalıştırılabilir; Telegram'a
+bağlanmaz ve kalıcı veri tutmaz (JOB_QUEUE_*, ENCRYPTION_KEY ortak olmalı).
+
+Kullanım: python scan_node.py
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+from pathlib import Path
+
+from common.config import (
+    JOB_MAX_ATTEMPTS,
+    JOB_QUEUE_BACKEND,
+    JOB_QUEUE_URL,
+    JOB_VISIBILITY_TIMEOUT,
+    LOGS_DIR,
+    SCAN_NODE_CONCURRENCY,
+    cleanup_inactive_sessions,
+    console,
+)
+from common.job_queue import create_job_queue
+from common.logging_setup import setup_logging
+from services.ninova.job_engine import ScanNode
+from services.ninova.parse_pool import shutdown_parse_pool
+
+logger = logging.getLogger("ninova")
+
+
+def main():
+    """Düğümü SIGINT/SIGTERM gelene kadar çalıştırır."""
+    setup_logging(Path(LOGS_DIR))
+    if not JOB_QUEUE_BACKEND:
+        console.print("[bold red]JOB_QUEUE_BACKEND ayarlı değil (sqlite veya redis).")
+        return 1
+
+    queue = create_job_queue(
+        JOB_QUEUE_BACKEND,
+        url=JOB_QUEUE_URL,
+        visibility_timeout=JOB_VISIBILITY_TIMEOUT,
+        max_attempts=JOB_MAX_ATTEMPTS,
+    )
+    node = ScanNode(queue, f"{socket.gethostname()}-{os.getpid()}", SCAN_NODE_CONCURRENCY)
+    stop = threading.Event()
+
+    def _signal_handler(signum, _frame):
+        logger.info(f"[ScanNode] signal {signum}: mevcut işler bitince duruluyor")
+        stop.set()
+
+    signal.signal(signal.SIGINT, _signal_handler)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, _signal_handler)
+
+    console.print(
+        f"[bold green]Tarama düğümü başlatıldı[/bold green] "
+        f"({JOB_QUEUE_BACKEND}, {SCAN_NODE_CONCURRENCY} işçi)"
+    )
+    try:
+        node.run(stop)
+    finally:
+        shutdown_parse_pool(wait=True)
+        cleanup_inactive_sessions(force=True)
+        queue.close()
+        logger.info(f"[ScanNode] Durdu: {node.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
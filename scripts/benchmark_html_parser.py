@@ -0,0 +1,146 @@
+"""Measure HTML parsing CPU per scan cycle: html.parser full documents vs current settings."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common import html_parser
+from services.ninova import scraper
+
+# Ninova page chrome (menus, scripts, footer) surrounding the content we read
+_CHROME = (
+    "<html><head><title>Ninova</title>"
+    + "".join(f'<script src="/js/{i}.js"></script>' for i in range(15))
+    + "<style>"
+    + ".x{color:red}" * 200
+    + "</style></head><body>"
+    + '<div class="ust"><ul>'
+    + "".join(f'<li><a href="/Kampus/{i}">Menü {i}</a></li>' for i in range(80))
+    + "</ul></div>"
+    + '<div class="menuErisimAgaci"><ul>'
+    + "".join(
+        f'<li><a href="/Sinif/{i}.{i}">BLG {100 + i}</a><ul>'
+        f'<li><a href="/Sinif/{i}.{i}/Notlar">Notlar</a></li></ul></li>'
+        for i in range(8)
+    )
+    + '</ul></div><div class="yol"><a href="/Sinif/1.2">BLG 101</a></div>'
+    + "<h1>BLG 101</h1><div class='icerik'>{content}</div>"
+    + '<div class="alt">'
+    + "<p>İTÜ Bilgi İşlem</p>" * 40
+    + "</div></body></html>"
+)
+
+
+def _page(content: str) -> str:
+    return _CHROME.replace("{content}", content)
+
+
+def _file_listing(rows: int) -> str:
+    body = "".join(
+        f'<tr><td><img src="/ikon-pdf.png"/><a href="/f/{i}">dosya{i}.pdf</a></td>'
+        f"<td>1 MB</td><td>0{i % 9 + 1} Ocak 2025 10:00</td></tr>"
+        for i in range(rows)
+    )
+    return _page(
+        f'<table class="data"><tr><th>Ad</th><th>Boyut</th><th>Tarih</th></tr>{body}</table>'
+    )
+
+
+def _announcements(count: int) -> str:
+    return _page(
+        "".join(
+            f'<div class="duyuruGoruntule"><h2><a href="/Sinif/1.2/Duyuru/{i}">Duyuru {i}</a></h2>'
+            f'<div class="tarih"><span class="tarih">03 Ocak 2026 16:53</span></div>'
+            f'<div class="icerik">{"Metin " * 60}</div></div>'
+            for i in range(count)
+        )
+    )
+
+
+def _assignments(count: int) -> str:
+    body = "".join(
+        f'<tr><td><h2><a href="/Sinif/1.2/Odev/{i}">Ödev {i}</a></h2>'
+        f"<span>Teslim Bitişi: 10 Ocak 2026 23:59</span></td></tr>"
+        for i in range(count)
+    )
+    return _page(f'<table id="ctl00_gvOdevListesi" class="data">{body}</table>')
+
+
+def _grades(count: int) -> str:
+    body = "".join(
+        f"<tr><td>Sınav {i}</td><td>{70 + i}</td><td>%10</td><td>65</td><td>9.1</td></tr>"
+        for i in range(count)
+    )
+    header = (
+        "<tr><th>Değerlendirme</th><th>Not</th><th>Ağırlık</th><th>Ortalama</th><th>Std</th></tr>"
+    )
+    return _page(f'<table class="data">{header}{body}</table>')
+
+
+# (name, parser, html, pages per course per scan cycle)
+PAGES = [
+    ("grades", scraper._parse_grades_page, _grades(8), 1),
+    ("assignments", scraper._parse_assignments, _assignments(6), 1),
+    (
+        "files",
+        lambda html: scraper._parse_file_listing(
+            html, "https://ninova.itu.edu.tr/Sinif/1.2/SinifDosyalari"
+        ),
+        _file_listing(25),
+        4,
+    ),
+    ("announcements", scraper._parse_announcements, _announcements(10), 1),
+]
+
+
+def _time_page(parser, html: str, repeat: int, rounds: int = 5) -> float:
+    """Milliseconds per parse (best of several rounds to filter out scheduler noise)."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parser(html)
+        best = min(best, time.perf_counter() - start)
+    return best / repeat * 1000
+
+
+def _run(backend: str, strainers: bool, repeat: int) -> dict[str, float]:
+    html_parser.PARSER_BACKEND = backend
+    html_parser.USE_STRAINERS = strainers
+    return {name: _time_page(parser, html, repeat) for name, parser, html, _ in PAGES}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100, help="Users per scan cycle")
+    parser.add_argument("--courses", type=int, default=6, help="Courses per user")
+    parser.add_argument("--repeat", type=int, default=50, help="Parses per round")
+    args = parser.parse_args()
+
+    backend, strainers = html_parser.PARSER_BACKEND, html_parser.USE_STRAINERS
+    baseline = _run("html.parser", False, args.repeat)
+    current = _run(backend, strainers, args.repeat)
+
+    print(f"Backend: {backend}, strainers: {'on' if strainers else 'off'}")
+    print(f"{'page':<14}{'baseline ms':>13}{'current ms':>13}{'saved':>9}")
+    for name, *_ in PAGES:
+        saved = (1 - current[name] / baseline[name]) * 100
+        print(f"{name:<14}{baseline[name]:>13.3f}{current[name]:>13.3f}{saved:>8.1f}%")
+
+    pages = args.users * args.courses
+    base_cycle = sum(baseline[name] * per for name, _, _, per in PAGES) * pages / 1000
+    cur_cycle = sum(current[name] * per for name, _, _, per in PAGES) * pages / 1000
+    print(
+        f"Per scan cycle ({args.users} users x {args.courses} courses): "
+        f"{base_cycle:.2f}s -> {cur_cycle:.2f}s CPU, {base_cycle - cur_cycle:.2f}s saved."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
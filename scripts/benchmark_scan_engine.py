@@ -0,0 +1,140 @@
+"""Benchmark the threaded and asyncio scan engines against a local fake Ninova server."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+from common.config import ASYNC_MAX_IN_FLIGHT, SCAN_MAX_WORKERS, SCAN_PER_USER_CONCURRENCY
+from common.scan_scheduler import ScanScheduler
+from services.ninova import get_grades
+from services.ninova.async_engine import AsyncScanEngine, is_available
+
+# Course pages by path suffix (folder links are relative, so the walk stays local)
+PAGES = {
+    "/Notlar": (
+        '<div class="yol"><a href="/Sinif/1.2">BLG 101</a></div><table class="data">'
+        "<tr><th>Ad</th><th>Not</th></tr><tr><td>Vize</td><td>85</td></tr></table>"
+    ),
+    "/Odevler": (
+        '<table class="data"><tr><td><h2><a href="/Sinif/1.2/Odev/5">Ödev 1</a></h2>'
+        "Teslim Bitişi : 10 Ocak 2026 23:59</td></tr></table>"
+    ),
+    "/SinifDosyalari": (
+        '<table class="data"><tr><td><img src="/images/ds/folder.png"/><a href="?g1">Hafta1</a>'
+        "</td><td></td><td>01 Ocak 2025</td></tr></table>"
+    ),
+    "/SinifDosyalari?g1": (
+        '<table class="data"><tr><td><img src="/ikon-pdf.png"/><a href="/f/1">a.pdf</a></td>'
+        "<td>1 MB</td><td>01 Ocak 2025 10:00</td></tr></table>"
+    ),
+    "/DersDosyalari": '<table class="data"></table>',
+    "/Duyurular": (
+        '<div class="duyuruGoruntule"><h2><a href="/Sinif/1.2/Duyuru/7">Sınav</a></h2>'
+        '<div class="tarih"><span class="tarih">03 Ocak 2026 16:53</span></div></div>'
+    ),
+}
+
+
+def _start_server(latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            suffix = next((s for s in PAGES if self.path.endswith(s)), None)
+            body = PAGES[suffix].encode() if suffix else b""
+            self.send_response(200 if suffix else 404)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 4096
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _jobs(port: int, engine: str, users: int, courses: int) -> list[tuple[str, str]]:
+    # Distinct course URLs per engine and user: no cache or shared-content hits
+    return [
+        (str(user), f"http://127.0.0.1:{port}/{engine}/Sinif/{user}.{course}")
+        for user in range(users)
+        for course in range(courses)
+    ]
+
+
+def _run_threads(jobs) -> float:
+    scheduler = ScanScheduler(
+        max_workers=SCAN_MAX_WORKERS, per_user_limit=SCAN_PER_USER_CONCURRENCY
+    )
+    sessions = {chat_id: requests.Session() for chat_id, _ in jobs}
+    start = time.perf_counter()
+    futures = [
+        scheduler.submit(chat_id, get_grades, sessions[chat_id], url, chat_id, "user", "pw")
+        for chat_id, url in jobs
+    ]
+    failed = sum(not future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+    scheduler.shutdown(wait=True)
+    if failed:
+        print(f"  threads: {failed} failed scans")
+    return elapsed
+
+
+def _run_asyncio(jobs, max_in_flight: int) -> float:
+    engine = AsyncScanEngine(max_in_flight=max_in_flight)
+    start = time.perf_counter()
+    futures = [engine.submit(chat_id, None, url, "user", "pw") for chat_id, url in jobs]
+    failed = sum(not future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+    engine.shutdown(wait=True)
+    if failed:
+        print(f"  asyncio: {failed} failed scans")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50, help="Users per scan cycle")
+    parser.add_argument("--courses", type=int, default=6, help="Courses per user")
+    parser.add_argument("--latency", type=float, default=0.1, help="Server latency (s)")
+    parser.add_argument("--max-in-flight", type=int, default=ASYNC_MAX_IN_FLIGHT)
+    args = parser.parse_args()
+
+    server = _start_server(args.latency)
+    port = server.server_address[1]
+    scans = args.users * args.courses
+    requests_per_scan = len(PAGES)
+    print(
+        f"{scans} course scans ({scans * requests_per_scan} requests), "
+        f"{args.latency * 1000:.0f} ms server latency"
+    )
+
+    results = {"threads": _run_threads(_jobs(port, "threads", args.users, args.courses))}
+    if is_available():
+        results["asyncio"] = _run_asyncio(
+            _jobs(port, "asyncio", args.users, args.courses), args.max_in_flight
+        )
+    else:
+        print("asyncio engine skipped: aiohttp is not installed")
+    server.shutdown()
+
+    for engine, elapsed in results.items():
+        print(f"{engine:<8} {elapsed:8.2f}s  {scans / elapsed:8.1f} scans/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Import legacy JSON data files into the SQLite (WAL) storage backend."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.config import (
+    DATA_DIR,
+    DATA_FILE,
+    SQLITE_DB_FILE,
+    USERS_FILE,
+    _atomic_json_write,
+)
+from common.storage import JsonStorage, SqliteStorage, migrate_json_to_sqlite
+
+STATE_FILES = (
+    "error_tracker.json",
+    "ari24_state.json",
+    "sks_state.json",
+    "daily_bulletin_state.json",
+    "poll_state.json",
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default=SQLITE_DB_FILE, help="SQLite database path")
+    parser.add_argument("--users-file", default=USERS_FILE, help="users.json path")
+    parser.add_argument("--data-file", default=DATA_FILE, help="ninova_data.json path")
+    args = parser.parse_args()
+
+    source = JsonStorage(args.users_file, args.data_file, _atomic_json_write)
+    target = SqliteStorage(args.db)
+    try:
+        counts = migrate_json_to_sqlite(
+            source, target, [Path(DATA_DIR) / name for name in STATE_FILES]
+        )
+    finally:
+        target.close()
+
+    print(
+        f"{args.db}: {counts['users']} users, {counts['courses']} courses, "
+        f"{counts['states']} state documents imported."
+    )
+    print("Set STORAGE_BACKEND=sqlite to use the database.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
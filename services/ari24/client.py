@@ -5,7 +5,8 @@ from datetime import datetime, timedelta
 from pathlib import Path
 
 import requests
-from bs4 import BeautifulSoup
+
+from common.html_parser import make_soup
 
 _CLUBS_FILE = Path("data") / "ari24_clubs.json"
 
@@ -61,7 +62,7 @@ class Ari24Client:
         try:
             response = requests.get(self.EVENTS_URL, headers=self.headers, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+            soup = make_soup(response.content)
 
             events = []
             event_items = soup.find_all("a", class_="etkinlik")
@@ -221,7 +222,7 @@ class Ari24Client:
         try:
             response = requests.get(self.NEWS_URL, headers=self.headers, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
+            soup = make_soup(response.content)
 
             news = []
             # News items are links containing h2 tags
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 
 import requests
-from bs4 import BeautifulSoup
+
+from common.html_parser import make_soup
 
 
 @dataclass
@@ -28,7 +29,7 @@ class ITUCalendarService:
             response.raise_for_status()
             response.encoding = "utf-8"  # Ensure correct encoding for Turkish chars
 
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = make_soup(response.text)
             table = soup.find("table", class_="table table-bordered table-striped table-hover")
 
             if not table:
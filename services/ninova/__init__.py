@@ -2,8 +2,10 @@
 from .auth import LoginFailedError, login_to_ninova
 from .file_utils import download_file
 from .scraper import (
+    announcement_version,
     get_all_files,
     get_announcement_detail,
+    get_announcement_details,
     get_announcements,
     get_assignment_detail,
     get_assignments,
@@ -15,9 +17,11 @@ from .scraper import (
 
 __all__ = [
     "LoginFailedError",
+    "announcement_version",
     "download_file",
     "get_all_files",
     "get_announcement_detail",
+    "get_announcement_details",
     "get_announcements",
     "get_assignment_detail",
     "get_assignments",
@@ -0,0 +1,628 @@
+"""
+AsyncScanEngine: Scan Ninova courses for many users on one asyncio event loop.
+
+The threaded engine runs every (user, course) job on a ScanScheduler thread
+with blocking requests calls, so in-flight requests are capped by the thread
+count. This engine runs the same scan (login, grades page, assignments, file
+tree, announcements) as coroutines on a single background event loop:
+- Each user gets an aiohttp session with its own cookie jar, seeded from the
+  user's requests.Session and synced back after each scan so threaded code
+  paths (commands, downloads) stay logged in
+- All sessions share one connector capped at ASYNC_MAX_IN_FLIGHT requests
+- Parsers, page cache, fetch plan, folder memo and shared cache are the ones
+  the threaded scraper uses, so get_grades_async returns the same data
+- submit() returns a concurrent.futures.Future, like ScanScheduler.submit()
+
+aiohttp is optional (SCAN_ENGINE=asyncio); is_available() reports whether the
+default sessions can be created.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Future
+
+import requests
+
+from common.config import (
+    ASYNC_MAX_IN_FLIGHT,
+    FILE_WALK_CONCURRENCY,
+    FOLDER_MEMO_MAX_AGE,
+    FOLDER_MEMO_MAX_ENTRIES,
+    HEADERS,
+    SCAN_SECTION_INTERVALS,
+    SHARED_CONTENT_TTL,
+    console,
+)
+from common.http_logging import async_http_request
+from common.log_context import log_with_context
+
+from .auth import LoginFailedError, async_login_to_ninova
+from .fetch_plan import SECTIONS, get_fetch_plan
+from .folder_memo import get_folder_memo
+from .scraper import (
+    _FILE_ROOTS,
+    _SHARED_SECTIONS,
+    _apply_assignment_detail,
+    _assemble_file_tree,
+    _expand_folder,
+    _file_root_page,
+    _file_root_urls,
+    _file_roots_changed,
+    _finish_course_scan,
+    _known_listing_hashes,
+    _looks_like_login_page,
+    _merge_file_sources,
+    _needs_assignment_detail,
+    _new_course_data,
+    _parse_announcements,
+    _parse_assignment_detail,
+    _parse_assignments,
+    _parse_file_listing,
+    _parse_grades_page,
+    _parse_page,
+    _scan_pages,
+    _take_prefetched_body,
+)
+from .shared_cache import get_shared_cache
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:  # optional dependency
+    aiohttp = None
+
+logger = logging.getLogger("ninova")
+
+NINOVA_URL = "https://ninova.itu.edu.tr"
+
+# Oturum başı eşzamanlı dosya listesi istekleri (thread motorundaki _session_slots karşılığı)
+_walk_slots_map: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def is_available() -> bool:
+    """Whether aiohttp is installed (needed for the default engine sessions)."""
+    return aiohttp is not None
+
+
+class AsyncResponse:
+    """Response fields the scraper reads (status_code, url, text)."""
+
+    def __init__(self, status_code: int, url: str, text: str):
+        self.status_code = status_code
+        self.url = url
+        self.text = text
+
+
+class AsyncNinovaSession:
+    """
+    aiohttp session of one user (own cookie jar, shared connector).
+
+    Network errors are raised as requests exceptions so retry and logging code
+    handles both engines the same way.
+    """
+
+    def __init__(self, connector, headers: dict | None = None, cookies: dict | None = None):
+        """
+        Initialize AsyncNinovaSession (must be called on the engine's event loop).
+
+        Args:
+            connector: Shared aiohttp connector
+            headers: Default request headers
+            cookies: Initial Ninova cookies ({name: value})
+        """
+        self._jar = aiohttp.CookieJar()
+        if cookies:
+            self._jar.update_cookies(cookies, URL(NINOVA_URL))
+        self._session = aiohttp.ClientSession(
+            connector=connector, connector_owner=False, cookie_jar=self._jar, headers=headers
+        )
+
+    async def request(self, method, url, *, timeout=20, allow_redirects=True, data=None, **_kw):
+        """
+        Send a request and read its body.
+
+        Returns:
+            AsyncResponse
+        """
+        try:
+            async with self._session.request(
+                method,
+                url,
+                data=data,
+                allow_redirects=allow_redirects,
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            ) as resp:
+                text = await resp.text(errors="replace")
+                return AsyncResponse(resp.status, str(resp.url), text)
+        except TimeoutError as e:
+            raise requests.exceptions.Timeout(f"{method} {url} timed out") from e
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def cookie_dict(self) -> dict:
+        """Current Ninova cookies ({name: value})."""
+        return {
+            name: morsel.value for name, morsel in self._jar.filter_cookies(URL(NINOVA_URL)).items()
+        }
+
+    async def close(self) -> None:
+        """Close the session (the shared connector stays open)."""
+        await self._session.close()
+
+
+# --- Scraper coroutines (services/ninova/scraper.py karşılıkları) ---
+
+
+def _walk_slots(session):
+    """Oturum başı eşzamanlı dosya listesi isteği sınırı (FILE_WALK_CONCURRENCY)."""
+    slots = _walk_slots_map.get(session)
+    if slots is None:
+        slots = _walk_slots_map[session] = asyncio.Semaphore(FILE_WALK_CONCURRENCY)
+    return slots
+
+
+async def _parse(url, html, parser, section):
+    """_parse_page'i iş parçacığında çalıştırır; olay döngüsü parse sırasında bloklanmaz."""
+    return await asyncio.to_thread(_parse_page, url, html, parser, section)
+
+
+async def _fetch_page(session, url, action, what=None):
+    """
+    Sayfayı çeker; 200 dönmezse veya login sayfası geldiyse None döner.
+
+    :param what: Login sayfası uyarısında geçen sayfa adı (None ise kontrol edilmez)
+    """
+    response = await async_http_request(logger, session, "GET", url, action=action, timeout=20)
+    if response.status_code != 200:
+        return None
+    if what and _looks_like_login_page(response.text, response.url):
+        log_with_context(
+            logger,
+            "warning",
+            f"{what} için login sayfası döndü; oturum muhtemelen düşmüş.",
+            action=action,
+        )
+        return None
+    return response
+
+
+async def get_announcements_async(session, base_url):
+    """get_announcements karşılığı."""
+    url = f"{base_url}/Duyurular"
+    try:
+        response = await _fetch_page(session, url, "ninova_fetch_announcements", "Duyuru listesi")
+        if response is None:
+            return None
+        return await _parse(url, response.text, _parse_announcements, "announcements")
+    except Exception as e:
+        logger.error(f"Duyuru çekme hatası: {e}")
+        console.print(f"[bold red]Duyuru çekme hatası: {e}")
+        return None
+
+
+async def get_assignment_detail_async(session, url):
+    """get_assignment_detail karşılığı."""
+    try:
+        response = await _fetch_page(session, url, "ninova_fetch_assignment_detail")
+        if response is None:
+            return None
+        return await _parse(url, response.text, _parse_assignment_detail, "assignments")
+    except Exception as e:
+        logger.debug(f"Ödev detay hatası: {e}")
+        return None
+
+
+async def get_assignments_async(session, base_url):
+    """get_assignments karşılığı; eksik ödev detayları eşzamanlı çekilir."""
+    url = f"{base_url}/Odevler"
+    try:
+        response = await _fetch_page(session, url, "ninova_fetch_assignments", "Ödev listesi")
+        if response is None:
+            return None
+        assignments = await _parse(url, response.text, _parse_assignments, "assignments")
+
+        pending = [assign for assign in assignments if _needs_assignment_detail(assign)]
+        details = await asyncio.gather(
+            *(get_assignment_detail_async(session, assign["url"]) for assign in pending)
+        )
+        for assign, detail in zip(pending, details, strict=True):
+            _apply_assignment_detail(assign, detail)
+        return assignments
+    except Exception as e:
+        logger.error(f"Ödev çekme hatası: {e}")
+        console.print(f"[bold red]Ödev çekme hatası: {e}")
+        return None
+
+
+async def _fetch_file_listing_async(session, url):
+    """_fetch_file_listing karşılığı."""
+    body = _take_prefetched_body(url)
+    if body is None:
+        async with _walk_slots(session):
+            response = await _fetch_page(session, url, "ninova_fetch_files", "Dosya listesi")
+        if response is None:
+            return None
+        body = response.text
+    parser = functools.partial(_parse_file_listing, url=url)
+    return await _parse(url, body, parser, "files")
+
+
+async def get_class_files_async(session, base_url, file_type="SinifDosyalari"):
+    """get_class_files karşılığı (aynı seviye klasörler eşzamanlı, sonuç sırası aynı)."""
+    url = f"{base_url}/{file_type}"
+    try:
+        memo = get_folder_memo(FOLDER_MEMO_MAX_ENTRIES, FOLDER_MEMO_MAX_AGE)
+        scan = _scan_pages.get()
+        pages = scan["pages"].setdefault("files", {}) if scan is not None else {}
+
+        root = {"url": url, "date": ""}
+        level = [root]
+        walked = []
+        while level:
+            results = await asyncio.gather(
+                *(_fetch_file_listing_async(session, node["url"]) for node in level)
+            )
+            next_level = []
+            for node, entries in zip(level, results, strict=True):
+                if entries is None:
+                    return None
+                next_level.extend(_expand_folder(node, entries, walked, memo, pages))
+            level = next_level
+
+        _assemble_file_tree(walked, memo, pages)
+        return root["files"]
+    except Exception as e:
+        logger.error(f"Dosya listesi çekme hatası: {e}")
+        console.print(f"[bold red]Dosya listesi çekme hatası: {e}")
+        return None
+
+
+async def get_all_files_async(session, base_url):
+    """get_all_files karşılığı."""
+    sinif_files, ders_files = await asyncio.gather(
+        get_class_files_async(session, base_url, "SinifDosyalari"),
+        get_class_files_async(session, base_url, "DersDosyalari"),
+    )
+    return _merge_file_sources(sinif_files, ders_files)
+
+
+async def _fetch_file_roots_async(session, base_url):
+    """_fetch_file_roots karşılığı."""
+    roots = {}
+    for url in _file_root_urls(base_url):
+        try:
+            response = await async_http_request(
+                logger, session, "GET", url, action="ninova_check_files", timeout=20
+            )
+        except Exception as e:
+            logger.debug(f"Dosya listesi kontrol hatası: {e}")
+            return None
+        root = _file_root_page(response)
+        if root is None:
+            return None
+        roots[url] = root
+    return roots
+
+
+async def _file_listings_changed_async(session, base_url, owner):
+    """_file_listings_changed karşılığı (kök listeler ders başına paylaşılır)."""
+    known = _known_listing_hashes(base_url, owner)
+    if known is None:
+        return True
+
+    async def fetch():
+        return await _fetch_file_roots_async(session, base_url)
+
+    roots = await get_shared_cache(SHARED_CONTENT_TTL).get_or_fetch_async(
+        base_url, _FILE_ROOTS, fetch
+    )
+    return _file_roots_changed(roots, known)
+
+
+async def _fetch_section_async(session, base_url, section, fetcher):
+    """_fetch_section karşılığı; sınıf düzeyindeki bölümler kullanıcılar arası paylaşılır."""
+    scan = _scan_pages.get()
+    if section not in _SHARED_SECTIONS:
+        return await fetcher(session, base_url)
+
+    async def fetch():
+        data = await fetcher(session, base_url)
+        if data is None:
+            return None
+        pages = dict(scan["pages"].get(section, {})) if scan is not None else {}
+        return {"data": data, "pages": pages}
+
+    shared = await get_shared_cache(SHARED_CONTENT_TTL).get_or_fetch_async(base_url, section, fetch)
+    if shared is None:
+        return None
+    if scan is not None:
+        scan["pages"].setdefault(section, {}).update(shared["pages"])
+    return shared["data"]
+
+
+async def _fetch_course_data_async(session, base_url, chat_id, username, password, sections):
+    """_fetch_course_data karşılığı; planlanan bölümler eşzamanlı çekilir."""
+    sections = set(sections)
+    url = f"{base_url}/Notlar"
+
+    async def fetch_grades_page():
+        return await async_http_request(
+            logger,
+            session,
+            "GET",
+            url,
+            action="ninova_fetch_grades",
+            chat_id=str(chat_id),
+            timeout=20,
+            allow_redirects=False,
+        )
+
+    try:
+        response = await fetch_grades_page()
+        if response.status_code == 302:
+            console.print(f"[cyan]Oturum yenileniyor... ({chat_id})")
+            if await async_login_to_ninova(session, chat_id, username, password, quiet=True):
+                response = await fetch_grades_page()
+                if response.status_code == 302:
+                    raise LoginFailedError(
+                        "SESSION_ERROR",
+                        "Oturum yenilendikten sonra hala giriş yapılamadı",
+                        username=username,
+                        chat_id=chat_id,
+                    )
+
+        if response.status_code != 200:
+            return None
+        if _looks_like_login_page(response.text, response.url):
+            log_with_context(
+                logger,
+                "warning",
+                "Not listesi için login sayfası döndü; oturum muhtemelen düşmüş.",
+                chat_id=str(chat_id),
+                action="ninova_fetch_grades",
+            )
+            return None
+        page = await _parse(url, response.text, _parse_grades_page, "grades")
+        grades_data = _new_course_data(page)
+
+        if "files" not in sections and await _file_listings_changed_async(
+            session, base_url, str(chat_id)
+        ):
+            sections.add("files")
+
+        fetchers = {
+            "assignments": get_assignments_async,
+            "files": get_all_files_async,
+            "announcements": get_announcements_async,
+        }
+        planned = [section for section in fetchers if section in sections]
+        results = await asyncio.gather(
+            *(
+                _fetch_section_async(session, base_url, section, fetchers[section])
+                for section in planned
+            )
+        )
+        for section, result in zip(planned, results, strict=True):
+            if result is None:
+                grades_data["fetch_success"] = False
+                result = []
+            grades_data[section] = result
+
+        grades_data["fetched_sections"] = [section for section in SECTIONS if section in sections]
+        return grades_data
+    except LoginFailedError:
+        raise
+    except Exception as e:
+        logger.error(f"Veri çekme hatası (Notlar vs.): {e}")
+        console.print(f"[bold red]Veri çekme hatası: {e}")
+        return None
+
+
+async def get_grades_async(session, base_url, chat_id, username, password):
+    """get_grades karşılığı (aynı dönüş verisi, bölüm hash'leri ve FetchPlan güncellemesi)."""
+    owner = str(chat_id)
+    plan = get_fetch_plan(SCAN_SECTION_INTERVALS)
+    sections = plan.due_sections(owner, base_url)
+    token = _scan_pages.set({"owner": owner, "section": "grades", "pages": {}})
+    try:
+        grades_data = await _fetch_course_data_async(
+            session, base_url, chat_id, username, password, sections
+        )
+        _finish_course_scan(plan, owner, base_url, grades_data, _scan_pages.get()["pages"])
+        return grades_data
+    finally:
+        _scan_pages.reset(token)
+
+
+class AsyncScanEngine:
+    """
+    Background event loop that runs course scans as coroutines.
+
+    Features:
+    - Lazy loop thread start (nothing runs until the first submit)
+    - Per-user sessions and cookie jars, synced with the users' requests sessions
+    - Global in-flight request cap (shared connector)
+    - ScanScheduler-compatible futures and statistics
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = ASYNC_MAX_IN_FLIGHT,
+        session_factory: Callable | None = None,
+    ):
+        """
+        Initialize AsyncScanEngine.
+
+        Args:
+            max_in_flight: Maximum concurrent HTTP requests across all users
+            session_factory: cookies -> session with request()/cookie_dict()/close()
+                coroutines; defaults to AsyncNinovaSession (requires aiohttp)
+        """
+        self._max_in_flight = max(1, max_in_flight)
+        self._session_factory = session_factory or self._default_session
+        self._connector = None
+        self._sessions: dict[str, object] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0}
+
+    def _default_session(self, cookies: dict):
+        if self._connector is None:
+            self._connector = aiohttp.TCPConnector(limit=self._max_in_flight)
+        return AsyncNinovaSession(self._connector, headers=HEADERS, cookies=cookies)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="async-scan", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def submit(self, chat_id, requests_session, base_url, username, password) -> Future:
+        """
+        Schedule a course scan (get_grades equivalent).
+
+        Args:
+            chat_id: User's chat ID
+            requests_session: User's requests.Session (cookie source and sync target)
+            base_url: Course base URL
+            username: Ninova username
+            password: Ninova password
+
+        Returns:
+            Future resolving to the course data (or raising LoginFailedError)
+        """
+        loop = self._ensure_loop()
+        with self._lock:
+            self._stats["submitted"] += 1
+        future = asyncio.run_coroutine_threadsafe(
+            self._scan(chat_id, requests_session, base_url, username, password), loop
+        )
+        future.add_done_callback(self._record_done)
+        return future
+
+    def _record_done(self, future: Future) -> None:
+        with self._lock:
+            failed = future.cancelled() or future.exception() is not None
+            self._stats["failed" if failed else "completed"] += 1
+
+    async def _scan(self, chat_id, requests_session, base_url, username, password):
+        key = str(chat_id)
+        session = self._sessions.get(key)
+        if session is None:
+            cookies = (
+                requests.utils.dict_from_cookiejar(requests_session.cookies)
+                if requests_session is not None
+                else {}
+            )
+            session = self._sessions[key] = self._session_factory(cookies)
+        try:
+            return await get_grades_async(session, base_url, chat_id, username, password)
+        finally:
+            if requests_session is not None:
+                for name, value in session.cookie_dict().items():
+                    requests_session.cookies.set(name, value, domain="ninova.itu.edu.tr", path="/")
+
+    def prune(self, active_chat_ids) -> None:
+        """
+        Close sessions of users that are no longer scanned.
+
+        Args:
+            active_chat_ids: Chat IDs that still have courses
+        """
+        if self._loop is None:
+            return
+        active = {str(chat_id) for chat_id in active_chat_ids}
+
+        async def close_inactive():
+            for key in [key for key in self._sessions if key not in active]:
+                await self._sessions.pop(key).close()
+
+        asyncio.run_coroutine_threadsafe(close_inactive(), self._loop).result()
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Close all sessions and stop the event loop.
+
+        Args:
+            wait: Join the loop thread before returning
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is None:
+            return
+
+        async def close_all():
+            for session in self._sessions.values():
+                await session.close()
+            self._sessions.clear()
+            if self._connector is not None:
+                await self._connector.close()
+                self._connector = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_all(), loop).result(timeout=10)
+        except Exception as e:
+            logger.debug(f"[AsyncScanEngine] Session close failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if wait and thread is not None:
+            thread.join(timeout=10)
+
+    def stats(self) -> dict:
+        """
+        Get engine statistics.
+
+        Returns:
+            Dictionary with engine stats
+        """
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_in_flight": self._max_in_flight,
+                **self._stats,
+            }
+
+
+# Global singleton instance
+_async_engine: AsyncScanEngine | None = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_engine(max_in_flight: int = ASYNC_MAX_IN_FLIGHT) -> AsyncScanEngine:
+    """
+    Get or create global AsyncScanEngine instance.
+
+    Args:
+        max_in_flight: Request cap (only used if creating new instance)
+
+    Returns:
+        Global AsyncScanEngine instance
+    """
+    global _async_engine
+    with _async_engine_lock:
+        if _async_engine is None:
+            _async_engine = AsyncScanEngine(max_in_flight=max_in_flight)
+        return _async_engine
+
+
+def shutdown_async_engine(wait: bool = False) -> None:
+    """
+    Shut down the global AsyncScanEngine if it was created.
+
+    Args:
+        wait: Join the loop thread before returning
+    """
+    global _async_engine
+    with _async_engine_lock:
+        engine, _async_engine = _async_engine, None
+    if engine is not None:
+        engine.shutdown(wait=wait)
@@ -1,16 +1,17 @@
+import asyncio
 import logging
 import threading
 import time
 
 import requests
-from bs4 import BeautifulSoup
 
 from common.config import (
     MAX_LOGIN_RETRIES,
     RETRY_BACKOFF_BASE,
     RETRY_BACKOFF_MAX,
 )
-from common.http_logging import http_request
+from common.html_parser import make_soup
+from common.http_logging import async_http_request, http_request
 from common.log_context import log_with_context
 
 logger = logging.getLogger("ninova")
@@ -18,6 +19,9 @@ logger = logging.getLogger("ninova")
 _LOGIN_LOCKS: dict[str, threading.Lock] = {}
 _GLOBAL_LOCK = threading.Lock()
 
+# Asyncio tarama motoru için (tek olay döngüsünde kullanılır)
+_ASYNC_LOGIN_LOCKS: dict[str, asyncio.Lock] = {}
+
 
 def get_user_lock(chat_id):
     with _GLOBAL_LOCK:
@@ -44,6 +48,38 @@ class LoginFailedError(Exception):
         super().__init__(message)
 
 
+def login_form_data(html, username, password):
+    """
+    Giriş sayfasının gizli ASP.NET alanlarıyla birlikte giriş formu verisini hazırlar.
+
+    :param html: Login.aspx sayfası
+    :param username: Ninova kullanıcı adı
+    :param password: Ninova şifresi
+    :return: POST verisi (dict)
+    """
+    soup = make_soup(html)
+
+    data = {}
+    for hidden in ["__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION"]:
+        tag = soup.find("input", {"name": hidden})
+        if tag:
+            data[hidden] = tag["value"]
+
+    data.update(
+        {
+            "ctl00$ContentPlaceHolder1$tbUserName": username,
+            "ctl00$ContentPlaceHolder1$tbPassword": password,
+            "ctl00$ContentPlaceHolder1$btnLogin": "Giriş",
+        }
+    )
+    return data
+
+
+def login_rejected(resp):
+    """Giriş formu gönderiminden sonra hâlâ giriş sayfasındaysak kimlik bilgileri yanlıştır."""
+    return "Hatalı" in resp.text or "Login.aspx" in resp.url
+
+
 def login_to_ninova(session, chat_id, username, password, quiet=False):
     """
     Belirli bir kullanıcı için Ninova'ya giriş yapar (exponential backoff retry ile).
@@ -118,22 +154,6 @@ def login_to_ninova(session, chat_id, username, password, quiet=False):
                     allow_redirects=True,
                     retry_count=attempt - 1,
                 )
-                soup = BeautifulSoup(resp.text, "html.parser")
-
-                data = {}
-                for hidden in ["__VIEWSTATE", "__VIEWSTATEGENERATOR", "__EVENTVALIDATION"]:
-                    tag = soup.find("input", {"name": hidden})
-                    if tag:
-                        data[hidden] = tag["value"]
-
-                data.update(
-                    {
-                        "ctl00$ContentPlaceHolder1$tbUserName": username,
-                        "ctl00$ContentPlaceHolder1$tbPassword": password,
-                        "ctl00$ContentPlaceHolder1$btnLogin": "Giriş",
-                    }
-                )
-
                 resp = http_request(
                     logger,
                     session,
@@ -141,13 +161,13 @@ def login_to_ninova(session, chat_id, username, password, quiet=False):
                     resp.url,
                     action="ninova_login_submit",
                     chat_id=str(chat_id),
-                    data=data,
+                    data=login_form_data(resp.text, username, password),
                     allow_redirects=True,
                     timeout=20,
                     retry_count=attempt - 1,
                 )
 
-                if "Hatalı" in resp.text or "Login.aspx" in resp.url:
+                if login_rejected(resp):
                     log_with_context(
                         logger,
                         "warning",
@@ -227,3 +247,166 @@ def login_to_ninova(session, chat_id, username, password, quiet=False):
                 ) from e
 
         return False
+
+
+async def async_login_to_ninova(session, chat_id, username, password, quiet=False):
+    """
+    login_to_ninova'nın asyncio tarama motoru için karşılığı.
+
+    Aynı kontrolleri, retry/backoff davranışını ve log alanlarını kullanır;
+    bekleme sırasında olay döngüsünü bloklamaz.
+
+    :param session: request() coroutine'i olan oturum (async_engine.AsyncNinovaSession)
+    :param chat_id: Kullanıcının Telegram chat ID'si
+    :param username: Ninova kullanıcı adı
+    :param password: Ninova şifresi
+    :param quiet: True ise başarılı girişte log yazılmaz
+    :return: Başarılıysa True, değilse LoginFailedError fırlatır
+    :raises LoginFailedError: Giriş başarısız olursa
+    """
+    lock = _ASYNC_LOGIN_LOCKS.setdefault(str(chat_id), asyncio.Lock())
+    async with lock:
+        if not username or not password:
+            log_with_context(
+                logger,
+                "error",
+                "Login failed: missing username or password",
+                chat_id=str(chat_id),
+                action="ninova_login",
+            )
+            raise LoginFailedError(
+                "SESSION_ERROR",
+                "Kullanıcı adı veya şifre eksik",
+                username=username,
+                chat_id=chat_id,
+            )
+
+        for attempt in range(1, MAX_LOGIN_RETRIES + 1):
+            try:
+                try:
+                    check_resp = await async_http_request(
+                        logger,
+                        session,
+                        "GET",
+                        "https://ninova.itu.edu.tr/Kampus",
+                        action="ninova_login_check",
+                        chat_id=str(chat_id),
+                        timeout=10,
+                        allow_redirects=False,
+                        retry_count=attempt - 1,
+                    )
+                    if check_resp.status_code == 200:
+                        return True
+                except Exception as e:
+                    log_with_context(
+                        logger,
+                        "debug",
+                        f"Session check failed (attempt {attempt}): {e}",
+                        chat_id=str(chat_id),
+                        action="ninova_login_check",
+                        retry_count=attempt - 1,
+                        error_stage="http",
+                    )
+
+                resp = await async_http_request(
+                    logger,
+                    session,
+                    "GET",
+                    "https://ninova.itu.edu.tr/Login.aspx",
+                    action="ninova_login_page",
+                    chat_id=str(chat_id),
+                    timeout=20,
+                    allow_redirects=True,
+                    retry_count=attempt - 1,
+                )
+                form = await asyncio.to_thread(login_form_data, resp.text, username, password)
+                resp = await async_http_request(
+                    logger,
+                    session,
+                    "POST",
+                    resp.url,
+                    action="ninova_login_submit",
+                    chat_id=str(chat_id),
+                    data=form,
+                    allow_redirects=True,
+                    timeout=20,
+                    retry_count=attempt - 1,
+                )
+
+                if login_rejected(resp):
+                    log_with_context(
+                        logger,
+                        "warning",
+                        f"Login failed: invalid credentials (attempt {attempt}/{MAX_LOGIN_RETRIES})",
+                        chat_id=str(chat_id),
+                        action="ninova_login",
+                        retry_count=attempt - 1,
+                    )
+                    raise LoginFailedError(
+                        "INVALID_CREDENTIALS",
+                        "Ninova kullanıcı adı veya şifresi yanlış",
+                        username=username,
+                        chat_id=chat_id,
+                    )
+
+                if not quiet:
+                    log_with_context(
+                        logger,
+                        "info",
+                        "Login successful",
+                        chat_id=str(chat_id),
+                        action="ninova_login",
+                        retry_count=attempt - 1,
+                    )
+                return True
+
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt < MAX_LOGIN_RETRIES:
+                    backoff = min(RETRY_BACKOFF_BASE**attempt, RETRY_BACKOFF_MAX)
+                    log_with_context(
+                        logger,
+                        "warning",
+                        f"Network error (attempt {attempt}/{MAX_LOGIN_RETRIES}): {e}. Retrying in {backoff}s...",
+                        chat_id=str(chat_id),
+                        action="ninova_login",
+                        retry_count=attempt - 1,
+                        error_stage="http",
+                    )
+                    await asyncio.sleep(backoff)
+                else:
+                    log_with_context(
+                        logger,
+                        "error",
+                        f"Login failed after {MAX_LOGIN_RETRIES} attempts: {e}",
+                        chat_id=str(chat_id),
+                        action="ninova_login",
+                        retry_count=attempt - 1,
+                        error_stage="http",
+                    )
+                    raise LoginFailedError(
+                        "NETWORK_TIMEOUT",
+                        f"{MAX_LOGIN_RETRIES} deneme sonucu başarısız: {str(e)[:100]}",
+                        username=username,
+                        chat_id=chat_id,
+                    ) from e
+
+            except LoginFailedError:
+                raise
+
+            except Exception as e:
+                log_with_context(
+                    logger,
+                    "error",
+                    f"Unexpected error during login: {e}",
+                    chat_id=str(chat_id),
+                    action="ninova_login",
+                    exc_info=True,
+                )
+                raise LoginFailedError(
+                    "UNKNOWN",
+                    f"Bilinmeyen hata: {str(e)[:100]}",
+                    username=username,
+                    chat_id=chat_id,
+                ) from e
+
+        return False
@@ -0,0 +1,138 @@
+"""
+FetchPlan: Per-section scan cadence for Ninova course pages.
+
+A course scan covers four sections with different freshness needs:
+- grades (always fetched: it also validates the session and yields the course name)
+- assignments, announcements (cheap, usually fetched every scan)
+- files (deep folder walk; refreshed on its own interval, or sooner when a
+  top-level listing changes)
+
+The plan remembers, per (owner, course), when each section was last fetched
+and the body hash of each top-level file listing.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger("ninova")
+
+SECTIONS = ("grades", "assignments", "files", "announcements")
+
+
+class FetchPlan:
+    """
+    Thread-safe per-course section scheduler.
+
+    Features:
+    - Per-section refresh intervals (0 = every scan)
+    - Top-level file listing hashes (to detect changes without a deep walk)
+    - Statistics and monitoring
+    """
+
+    def __init__(self, intervals: dict[str, float] | None = None):
+        """
+        Initialize FetchPlan.
+
+        Args:
+            intervals: {section: seconds}; missing sections are fetched every scan
+        """
+        self._intervals = {
+            section: float((intervals or {}).get(section, 0)) for section in SECTIONS
+        }
+        self._intervals["grades"] = 0.0
+        self._last_fetch: dict[tuple[str, str, str], float] = {}
+        self._listing_hashes: dict[tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._stats = {"planned": 0, "skipped": 0}
+
+    def due_sections(self, owner: str, course_url: str, now: float | None = None) -> set[str]:
+        """
+        Get the sections that should be fetched in this scan.
+
+        Args:
+            owner: Scanning user (chat_id)
+            course_url: Course base URL
+            now: Current timestamp (defaults to time.time())
+
+        Returns:
+            Set of section names
+        """
+        now = time.time() if now is None else now
+        due = set()
+        with self._lock:
+            for section in SECTIONS:
+                last = self._last_fetch.get((owner, course_url, section))
+                interval = self._intervals[section]
+                if interval <= 0 or last is None or now - last >= interval:
+                    due.add(section)
+            self._stats["planned"] += 1
+            self._stats["skipped"] += len(SECTIONS) - len(due)
+        return due
+
+    def mark_fetched(self, owner: str, course_url: str, sections, now: float | None = None) -> None:
+        """
+        Record successfully fetched sections.
+
+        Args:
+            owner: Scanning user (chat_id)
+            course_url: Course base URL
+            sections: Iterable of fetched section names
+            now: Current timestamp (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for section in sections:
+                self._last_fetch[(owner, course_url, section)] = now
+
+    def listing_hash(self, owner: str, url: str) -> str | None:
+        """Get the last known body hash of a top-level file listing."""
+        with self._lock:
+            return self._listing_hashes.get((owner, url))
+
+    def remember_listing(self, owner: str, url: str, body_hash: str) -> None:
+        """Store the body hash of a top-level file listing."""
+        with self._lock:
+            self._listing_hashes[(owner, url)] = body_hash
+
+    def clear(self) -> None:
+        """Forget all fetch times and listing hashes (next scans are full)."""
+        with self._lock:
+            self._last_fetch.clear()
+            self._listing_hashes.clear()
+
+    def stats(self) -> dict:
+        """
+        Get plan statistics.
+
+        Returns:
+            Dictionary with plan stats
+        """
+        with self._lock:
+            return {
+                "intervals": dict(self._intervals),
+                "planned_scans": self._stats["planned"],
+                "skipped_sections": self._stats["skipped"],
+            }
+
+
+# Global singleton instance
+_fetch_plan: FetchPlan | None = None
+_fetch_plan_lock = threading.Lock()
+
+
+def get_fetch_plan(intervals: dict[str, float] | None = None) -> FetchPlan:
+    """
+    Get or create global FetchPlan instance.
+
+    Args:
+        intervals: Section intervals (only used if creating new instance)
+
+    Returns:
+        Global FetchPlan instance
+    """
+    global _fetch_plan
+    with _fetch_plan_lock:
+        if _fetch_plan is None:
+            _fetch_plan = FetchPlan(intervals)
+        return _fetch_plan
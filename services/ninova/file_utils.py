@@ -1,14 +1,19 @@
-import io
 import logging
 from pathlib import Path
 
+from common.config import DOWNLOAD_MEMORY_BUDGET_BYTES, DOWNLOAD_SPOOL_MAX_BYTES
 from common.http_logging import http_request
 from common.log_context import log_with_context
+from common.streaming import BudgetedSpool, ByteBudget
 
 from .auth import login_to_ninova
 
 logger = logging.getLogger("ninova")
 
+# Tüm eşzamanlı indirmelerin bellekte tuttuğu toplam bayt; aşılırsa dosya diske taşar
+DOWNLOAD_BUDGET = ByteBudget(DOWNLOAD_MEMORY_BUDGET_BYTES)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 def download_file(
     session, url, filename, chat_id=None, username=None, password=None, to_buffer=False
@@ -22,8 +27,10 @@ def download_file(
     :param chat_id: Kullanıcı ID
     :param username: Ninova kullanıcı adı
     :param password: Ninova şifresi
-    :param to_buffer: True ise (BytesIO, filename) döner, değilse dosya yolu döner.
-    :return: (BytesIO, filename) veya filepath veya None
+    :param to_buffer: True ise (BudgetedSpool, filename) döner, değilse dosya yolu döner.
+        Spool en fazla DOWNLOAD_SPOOL_MAX_BYTES bellekte tutar, fazlası geçici dosyaya yazılır;
+        çağıran close() ile kapatmalıdır.
+    :return: (BudgetedSpool, filename) veya filepath veya None
     """
     try:
         response = http_request(
@@ -75,9 +82,15 @@ def download_file(
                 filename = "document.bin"
 
             if to_buffer:
-                buffer = io.BytesIO()
-                for chunk in response.iter_content(chunk_size=8192):
-                    buffer.write(chunk)
+                buffer = BudgetedSpool(DOWNLOAD_BUDGET, DOWNLOAD_SPOOL_MAX_BYTES)
+                try:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        buffer.write(chunk)
+                except Exception:
+                    buffer.close()
+                    raise
+                finally:
+                    response.close()
                 buffer.seek(0)
                 return buffer, filename
             filepath = Path.cwd() / filename
@@ -0,0 +1,142 @@
+"""
+FolderMemo: Remember walked Ninova file subtrees by their folder row date.
+
+A folder row in a file listing carries a date that changes when the folder's
+contents change. When a folder shows up with the same date as last time, its
+previously walked subtree (files and page hashes) is reused and no request is
+made for it or any of its subfolders. Entries also expire after max_age so a
+missed date update cannot hide changes forever.
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("ninova")
+
+
+class FolderMemo:
+    """
+    Thread-safe LRU memo of file subtrees keyed by folder URL.
+
+    Features:
+    - Folder-date validation (changed folders are walked again)
+    - Max age and LRU eviction
+    - Deep-copied results (callers may mutate them freely)
+    - Hit/miss statistics
+    """
+
+    # Class constants
+    DEFAULT_MAX_ENTRIES = 5000
+    DEFAULT_MAX_AGE = 6 * 3600
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_age: float = DEFAULT_MAX_AGE):
+        """
+        Initialize FolderMemo.
+
+        Args:
+            max_entries: Maximum number of remembered folders
+            max_age: Seconds after which a folder is walked again regardless of its date
+        """
+        self._max_entries = max(1, max_entries)
+        self._max_age = max_age
+        self._entries: OrderedDict[str, tuple[str, float, list, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get(self, folder_url: str, folder_date: str) -> tuple[list, dict] | None:
+        """
+        Get a remembered subtree if the folder row is unchanged.
+
+        Args:
+            folder_url: Folder URL
+            folder_date: Date column of the folder row
+
+        Returns:
+            (files, page_hashes) copies, or None if the folder must be walked
+        """
+        with self._lock:
+            entry = self._entries.get(folder_url)
+            if (
+                folder_date
+                and entry is not None
+                and entry[0] == folder_date
+                and time.monotonic() - entry[1] < self._max_age
+            ):
+                self._entries.move_to_end(folder_url)
+                self._stats["hits"] += 1
+                return copy.deepcopy(entry[2]), dict(entry[3])
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, folder_url: str, folder_date: str, files: list, page_hashes: dict) -> None:
+        """
+        Remember a walked subtree.
+
+        Args:
+            folder_url: Folder URL
+            folder_date: Date column of the folder row (empty dates are not remembered)
+            files: Files of the subtree (names relative to the folder)
+            page_hashes: {url: body hash} of every listing page in the subtree
+        """
+        if not folder_date:
+            return
+        with self._lock:
+            self._entries[folder_url] = (
+                folder_date,
+                time.monotonic(),
+                copy.deepcopy(files),
+                dict(page_hashes),
+            )
+            self._entries.move_to_end(folder_url)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget all folders."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Get memo statistics.
+
+        Returns:
+            Dictionary with memo stats
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate": round(self._stats["hits"] / lookups * 100, 1) if lookups else 0.0,
+            }
+
+
+# Global singleton instance
+_folder_memo: FolderMemo | None = None
+_folder_memo_lock = threading.Lock()
+
+
+def get_folder_memo(
+    max_entries: int = FolderMemo.DEFAULT_MAX_ENTRIES,
+    max_age: float = FolderMemo.DEFAULT_MAX_AGE,
+) -> FolderMemo:
+    """
+    Get or create global FolderMemo instance.
+
+    Args:
+        max_entries: Memo size (only used if creating new instance)
+        max_age: Entry max age (only used if creating new instance)
+
+    Returns:
+        Global FolderMemo instance
+    """
+    global _folder_memo
+    with _folder_memo_lock:
+        if _folder_memo is None:
+            _folder_memo = FolderMemo(max_entries=max_entries, max_age=max_age)
+        return _folder_memo
@@ -0,0 +1,349 @@
+"""
+Distributed scan engine: Ninova course scans as jobs on a shared job queue.
+
+The coordinator (main.py) publishes one job per (user, course) instead of
+running get_grades itself; stateless scanner nodes (scan_node.py) lease the
+jobs, run the same scraper and write the result back:
+- QueueScanClient.submit() returns a concurrent.futures.Future, like
+  ScanScheduler.submit(), so result collection and the diff pipeline are unchanged
+- Jobs carry the encrypted password; nodes decrypt it with the shared ENCRYPTION_KEY
+- Nodes also fetch the bodies of new or edited announcements (the coordinator
+  sends the versions it already has), since only nodes hold logged-in sessions
+- Login errors are results (the coordinator reports them as LoginFailedError);
+  other errors fail the attempt and the queue retries the job on any node
+- A job whose node crashed is leased again after its visibility timeout
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from common.config import (
+    JOB_MAX_ATTEMPTS,
+    JOB_QUEUE_BACKEND,
+    JOB_QUEUE_URL,
+    JOB_VISIBILITY_TIMEOUT,
+    get_user_session,
+)
+from common.job_queue import create_job_queue
+from common.utils import decrypt_password
+
+from .auth import LoginFailedError
+from .scraper import announcement_version, get_announcement_details, get_grades
+
+logger = logging.getLogger("ninova")
+
+SCAN_COURSE_JOB = "ninova.scan_course"
+
+
+def scan_job_key(chat_id, url: str) -> str:
+    """Deduplication key of a course scan job (one active job per user and course)."""
+    return f"{chat_id}|{url}"
+
+
+def run_scan_job(job: dict) -> dict:
+    """
+    Run one course scan job on a scanner node.
+
+    Args:
+        job: Leased job with payload {"chat_id", "url", "username", "password",
+            "known_announcements"}
+
+    Returns:
+        {"grades": ...} or {"login_error": {"error_type", "message"}}. Contents of
+        announcements missing from known_announcements ({id: version}) or edited
+        since are returned in grades["announcement_details"] ({url: content}).
+
+    Raises:
+        Exception: Scan errors other than login errors (the job is retried)
+    """
+    payload = job["payload"]
+    chat_id = payload["chat_id"]
+    password = decrypt_password(payload["password"])
+    if password is None:
+        return {"login_error": {"error_type": "DECRYPT_ERROR", "message": "Şifre çözülemedi"}}
+    session = get_user_session(chat_id)
+    try:
+        grades = get_grades(session, payload["url"], chat_id, payload["username"], password)
+    except LoginFailedError as e:
+        return {"login_error": {"error_type": e.error_type, "message": str(e.message)}}
+    if grades:
+        # Koordinatörün oturumu giriş yapmamıştır; duyuru içerikleri burada çekilir
+        known = payload.get("known_announcements") or {}
+        pending = [
+            ann
+            for ann in grades.get("announcements", [])
+            if known.get(ann.get("id")) != announcement_version(ann)
+        ]
+        if pending:
+            grades["announcement_details"] = get_announcement_details(session, pending)
+    return {"grades": grades}
+
+
+class QueueScanClient:
+    """
+    Publishes course scans to a job queue and resolves their futures from results.
+
+    A background thread polls queue.fetch_results(). Jobs without a result
+    within job_timeout seconds (e.g. no scanner node running) are cancelled and
+    their futures fail with TimeoutError. The coordinator waits at most one
+    cycle for results; submitting the same course again while its job is still
+    queued returns the same future, so unfinished jobs carry over to the next cycle.
+    """
+
+    # Class constants
+    RESULT_POLL = 0.5  # Seconds between result polls when idle
+    RESULT_BATCH = 200  # Results fetched per poll
+
+    def __init__(self, queue, job_timeout: float = 900):
+        """
+        Initialize QueueScanClient.
+
+        Args:
+            queue: SqliteJobQueue or RedisJobQueue
+            job_timeout: Seconds to wait for a job's result
+        """
+        self._queue = queue
+        self._job_timeout = job_timeout
+        self._pending: dict[str, tuple[Future, float, str, str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stats = {"published": 0, "completed": 0, "failed": 0, "timed_out": 0}
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll_loop, name="job-results", daemon=True)
+            self._thread.start()
+
+    def submit(
+        self,
+        chat_id,
+        url: str,
+        username: str,
+        encrypted_password: str,
+        known_announcements: dict | None = None,
+    ) -> Future:
+        """
+        Publish a course scan job.
+
+        Args:
+            chat_id: Telegram chat ID
+            url: Course URL
+            username: Ninova username
+            encrypted_password: Password as stored in the user record
+            known_announcements: {announcement id: version} already saved for the
+                course; the node fetches the contents of the others
+
+        Returns:
+            Future resolving to get_grades() result (raises LoginFailedError on login errors)
+        """
+        payload = {
+            "chat_id": str(chat_id),
+            "url": url,
+            "username": username,
+            "password": encrypted_password,
+            "known_announcements": known_announcements or {},
+        }
+        job_id = self._queue.publish(SCAN_COURSE_JOB, payload, key=scan_job_key(chat_id, url))
+        with self._lock:
+            entry = self._pending.get(job_id)
+            if entry is None:
+                entry = (Future(), time.monotonic() + self._job_timeout, str(chat_id), username)
+                self._pending[job_id] = entry
+                self._stats["published"] += 1
+            self._ensure_thread()
+        return entry[0]
+
+    def _resolve(self, result: dict) -> None:
+        with self._lock:
+            entry = self._pending.pop(result["id"], None)
+        if entry is None:
+            return  # Önceki çalışmadan veya iptal edilmiş iş
+        future, _, chat_id, username = entry
+        value = result.get("result") or {}
+        if result.get("error"):
+            future.set_exception(RuntimeError(f"Tarama işi başarısız: {result['error']}"))
+        elif "login_error" in value:
+            error = value["login_error"]
+            future.set_exception(
+                LoginFailedError(error["error_type"], error["message"], username, chat_id)
+            )
+        else:
+            future.set_result(value.get("grades"))
+        with self._lock:
+            self._stats["failed" if future.exception() else "completed"] += 1
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [job_id for job_id, entry in self._pending.items() if entry[1] <= now]
+            entries = [self._pending.pop(job_id) for job_id in expired]
+            self._stats["timed_out"] += len(expired)
+        for job_id, (future, *_rest) in zip(expired, entries, strict=True):
+            self._queue.cancel(job_id)
+            future.set_exception(TimeoutError(f"Tarama işi {self._job_timeout} sn içinde bitmedi"))
+
+    def _poll_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                results = self._queue.fetch_results(self.RESULT_BATCH)
+                for result in results:
+                    self._resolve(result)
+                self._expire()
+            except Exception as e:
+                logger.exception(f"[JobQueue] Result poll failed: {e}")
+                results = []
+            if len(results) < self.RESULT_BATCH:
+                self._stop.wait(self.RESULT_POLL)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop polling; pending futures are cancelled.
+
+        Args:
+            wait: Join the poll thread before returning
+        """
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join(timeout=10)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, *_rest in pending.values():
+            future.cancel()
+
+    def stats(self) -> dict:
+        """
+        Get client statistics.
+
+        Returns:
+            Dictionary with client stats
+        """
+        with self._lock:
+            return {"in_flight": len(self._pending), **self._stats, **self._queue.stats()}
+
+
+class ScanNode:
+    """
+    Stateless scanner node: leases course scan jobs and writes results back.
+
+    Runs `concurrency` worker threads, each leasing one job at a time, so a
+    node never holds more leases than it can work on.
+    """
+
+    # Class constants
+    IDLE_POLL = 1.0  # Seconds to wait when the queue is empty
+
+    def __init__(self, queue, node_id: str, concurrency: int = 16, handler=run_scan_job):
+        """
+        Initialize ScanNode.
+
+        Args:
+            queue: SqliteJobQueue or RedisJobQueue
+            node_id: Worker id recorded on leases
+            concurrency: Worker threads
+            handler: Job handler (returns the result, raises to retry)
+        """
+        self._queue = queue
+        self._node_id = node_id
+        self._concurrency = max(1, concurrency)
+        self._handler = handler
+        self._lock = threading.Lock()
+        self._stats = {"completed": 0, "failed": 0}
+
+    def _worker(self, index: int, stop: threading.Event) -> None:
+        worker_id = f"{self._node_id}/{index}"
+        while not stop.is_set():
+            try:
+                jobs = self._queue.lease(worker_id, 1)
+            except Exception as e:
+                logger.exception(f"[ScanNode] Lease failed: {e}")
+                jobs = []
+            if not jobs:
+                stop.wait(self.IDLE_POLL)
+                continue
+            job = jobs[0]
+            try:
+                self._queue.complete(job, self._handler(job))
+                key = "completed"
+            except Exception as e:
+                logger.warning(
+                    f"[ScanNode] Job {job['id']} failed (attempt {job['attempts']}): {e}"
+                )
+                self._queue.fail(job, str(e))
+                key = "failed"
+            with self._lock:
+                self._stats[key] += 1
+
+    def run(self, stop: threading.Event) -> None:
+        """
+        Work on jobs until stop is set (in-progress jobs are finished first).
+
+        Args:
+            stop: Stop event
+        """
+        threads = [
+            threading.Thread(
+                target=self._worker, args=(i, stop), name=f"scan-node-{i}", daemon=True
+            )
+            for i in range(self._concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info(f"[ScanNode] {self._node_id}: {self._concurrency} workers started")
+        for thread in threads:
+            thread.join()
+
+    def stats(self) -> dict:
+        """
+        Get node statistics.
+
+        Returns:
+            Dictionary with node stats
+        """
+        with self._lock:
+            return {"node_id": self._node_id, "concurrency": self._concurrency, **self._stats}
+
+
+# Global singleton instance
+_queue_client: QueueScanClient | None = None
+_queue_client_lock = threading.Lock()
+
+
+def get_queue_scan_client() -> QueueScanClient:
+    """
+    Get or create the global QueueScanClient for the configured job queue.
+
+    Returns:
+        Global QueueScanClient instance
+    """
+    global _queue_client
+    with _queue_client_lock:
+        if _queue_client is None:
+            queue = create_job_queue(
+                JOB_QUEUE_BACKEND,
+                url=JOB_QUEUE_URL,
+                visibility_timeout=JOB_VISIBILITY_TIMEOUT,
+                max_attempts=JOB_MAX_ATTEMPTS,
+            )
+            # Tüm denemeler ve kuyrukta bekleme için bir kiralama süresi pay; döngü bu
+            # kadar beklemez, bitmeyen işler sonraki döngülerde toplanır
+            _queue_client = QueueScanClient(
+                queue, job_timeout=JOB_VISIBILITY_TIMEOUT * (JOB_MAX_ATTEMPTS + 1)
+            )
+        return _queue_client
+
+
+def shutdown_queue_scan_client(wait: bool = False) -> None:
+    """
+    Shut down the global QueueScanClient if it was created.
+
+    Args:
+        wait: Join the poll thread before returning
+    """
+    global _queue_client
+    with _queue_client_lock:
+        client, _queue_client = _queue_client, None
+    if client is not None:
+        client.shutdown(wait=wait)
@@ -0,0 +1,145 @@
+"""
+PageCache: Reuse parsed Ninova pages whose body did not change since the last scan.
+
+Each fetched page is hashed and stored per (owner, url), where owner is the
+scanning user's chat_id. When the same page returns with the same hash, the
+previously parsed result is returned (as a deep copy) and parsing is skipped.
+"""
+
+import copy
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+
+logger = logging.getLogger("ninova")
+
+# ASP.NET hidden fields whose values can vary between requests without content changes
+_VOLATILE_FIELDS_RE = re.compile(
+    r'(<input[^>]+name="__(?:VIEWSTATE|VIEWSTATEGENERATOR|EVENTVALIDATION)"[^>]*value=")[^"]*"',
+    re.IGNORECASE,
+)
+
+
+def page_hash(html: str) -> str:
+    """
+    Hash a page body, ignoring volatile ASP.NET state fields.
+
+    Args:
+        html: Raw response body
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    normalized = _VOLATILE_FIELDS_RE.sub(r'\1"', html)
+    return hashlib.sha256(normalized.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache of parsed pages keyed by (owner, url).
+
+    Features:
+    - Body-hash validation (stale entries are simply re-parsed)
+    - LRU eviction when max_entries is exceeded
+    - Deep-copied results (callers may mutate them freely)
+    - Hit/miss statistics
+    """
+
+    # Class constants
+    DEFAULT_MAX_ENTRIES = 5000
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize PageCache.
+
+        Args:
+            max_entries: Maximum number of cached pages
+        """
+        self._max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple[str, str], tuple[str, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def get_or_parse(self, owner: str, url: str, body_hash: str, parser: Callable, html: str):
+        """
+        Return the parsed result for a page, parsing only when its hash changed.
+
+        Args:
+            owner: Cache owner (usually chat_id)
+            url: Page URL
+            body_hash: page_hash() of the body
+            parser: Pure function html -> parsed result
+            html: Page body
+
+        Returns:
+            Parsed result (a private copy)
+        """
+        key = (owner, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == body_hash:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return copy.deepcopy(entry[1])
+            self._stats["misses"] += 1
+
+        parsed = parser(html)
+
+        with self._lock:
+            self._entries[key] = (body_hash, copy.deepcopy(parsed))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def clear(self) -> None:
+        """Drop all cached pages."""
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self) -> None:
+        """Reset hit/miss counters (e.g. at the start of a scan cycle)."""
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0}
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with cache stats
+        """
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate": round(self._stats["hits"] / lookups * 100, 1) if lookups else 0.0,
+            }
+
+
+# Global singleton instance
+_page_cache: PageCache | None = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache(max_entries: int = PageCache.DEFAULT_MAX_ENTRIES) -> PageCache:
+    """
+    Get or create global PageCache instance.
+
+    Args:
+        max_entries: Cache size (only used if creating new instance)
+
+    Returns:
+        Global PageCache instance
+    """
+    global _page_cache
+    with _page_cache_lock:
+        if _page_cache is None:
+            _page_cache = PageCache(max_entries=max_entries)
+        return _page_cache
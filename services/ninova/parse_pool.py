@@ -0,0 +1,169 @@
+"""
+ParsePool: Run CPU-bound Ninova page parsers in worker processes.
+
+Scan threads spend most of their CPU time in BeautifulSoup, and under the GIL
+that work is serialized no matter how many fetch threads are running. With a
+pool enabled, fetch threads send the page body to a process pool and wait for
+the plain parsed records (lists/dicts), so parsing scales with CPU cores while
+the threads keep doing I/O.
+
+Parsers must be picklable module-level functions (or functools.partial of
+one). Anything the pool cannot run is parsed in the calling thread instead.
+"""
+
+import logging
+import multiprocessing
+import pickle
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger("ninova")
+
+
+class ParsePool:
+    """
+    Process pool for page parsers with in-thread fallback.
+
+    Features:
+    - Lazy worker start (no processes until the first parse)
+    - forkserver/spawn workers (safe with the bot's many threads)
+    - Restart after a crashed worker, in-thread parse on any pool failure
+    - Offload/inline statistics
+    """
+
+    def __init__(self, max_workers: int):
+        """
+        Initialize ParsePool.
+
+        Args:
+            max_workers: Number of parser processes (0 disables offloading)
+        """
+        self._max_workers = max(0, max_workers)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._stats = {"offloaded": 0, "inline": 0, "failures": 0}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether parsers run in worker processes."""
+        return self._max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                method = "forkserver" if "forkserver" in methods else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context(method),
+                )
+                logger.info(f"[ParsePool] {self._max_workers} parser processes ({method})")
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def parse(self, parser: Callable, html: str):
+        """
+        Run parser(html), in a worker process when the pool is enabled.
+
+        Args:
+            parser: Picklable pure function html -> parsed result
+            html: Page body
+
+        Returns:
+            Parsed result
+
+        Raises:
+            Exception: Whatever the parser raises (not retried in the thread)
+        """
+        if not self.enabled:
+            self._count("inline")
+            return parser(html)
+
+        try:
+            # Tasks are pickled in a feeder thread, so a serialization error would
+            # only surface from result() alongside the parser's own exceptions
+            pickle.dumps(parser)
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            logger.debug(f"[ParsePool] Parsing in thread: {e}")
+            self._count("failures")
+            return parser(html)
+
+        executor = self._get_executor()
+        try:
+            result = executor.submit(parser, html).result()
+        except BrokenProcessPool:
+            logger.warning("[ParsePool] Worker process died, restarting pool")
+            self._discard_executor(executor)
+            self._count("failures")
+            return parser(html)
+        self._count("offloaded")
+        return result
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop worker processes (they are started again on the next parse).
+
+        Args:
+            wait: Wait for running parses to finish
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Get pool statistics.
+
+        Returns:
+            Dictionary with pool stats
+        """
+        with self._lock:
+            return {"workers": self._max_workers, **self._stats}
+
+
+# Global singleton instance
+_parse_pool: ParsePool | None = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool(max_workers: int = 0) -> ParsePool:
+    """
+    Get or create global ParsePool instance.
+
+    Args:
+        max_workers: Parser processes (only used if creating new instance)
+
+    Returns:
+        Global ParsePool instance
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ParsePool(max_workers=max_workers)
+        return _parse_pool
+
+
+def shutdown_parse_pool(wait: bool = False) -> None:
+    """
+    Shut down the global ParsePool if it was created.
+
+    Args:
+        wait: Wait for running parses to finish
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        pool, _parse_pool = _parse_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
@@ -0,0 +1,236 @@
+"""
+FilePrewarmer: Upload newly detected Ninova files to Telegram before users ask.
+
+When a scan detects a new course file, every interested student taps the
+"İndir" button shortly after the notification. Without a warm cache each tap
+downloads from Ninova and re-uploads to Telegram. The prewarmer:
+- Downloads the file once and uploads it once to a storage chat (PREWARM_CHAT_ID)
+- Stores the returned file_id under the file URL (the CacheManager key used
+  by the download handler), so the first tap is served from the cache
+- Coalesces concurrent requests for the same URL into one transfer
+- Skips the upload when the downloaded bytes are already known (content hash)
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from common.cache_manager import content_key
+from common.config import PREWARM_CHAT_ID, PREWARM_WORKERS
+from common.utils import get_file_icon, send_telegram_document
+from services.ninova.file_utils import download_file
+
+logger = logging.getLogger("ninova")
+
+
+class FilePrewarmer:
+    """
+    Background download + upload of new files into the file ID cache.
+
+    Features:
+    - Bounded worker pool (downloads never block the scan threads)
+    - Single transfer per file URL (concurrent callers share one Future)
+    - Statistics for monitoring
+    """
+
+    def __init__(
+        self,
+        upload_chat_id: str,
+        store: Callable[[str, str], None],
+        lookup: Callable[[str], str | None] | None = None,
+        workers: int = 2,
+    ):
+        """
+        Initialize FilePrewarmer.
+
+        Args:
+            upload_chat_id: Chat the files are uploaded to (admin or storage chat)
+            store: store(key, file_id) persisting a warmed file ID (URL or content key)
+            lookup: lookup(key) returning a cached file ID (skips the transfer)
+            workers: Concurrent download/upload threads
+        """
+        self._upload_chat_id = upload_chat_id
+        self._store = store
+        self._lookup = lookup
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="prewarm"
+        )
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+        self._stats = {"warmed": 0, "cached": 0, "coalesced": 0, "deduplicated": 0, "failed": 0}
+
+    def prewarm(
+        self, file_url, file_name, session, chat_id=None, username=None, password=None
+    ) -> Future:
+        """
+        Start (or join) the transfer of one file.
+
+        Args:
+            file_url: Ninova file URL (cache key)
+            file_name: Fallback file name
+            session: Logged-in Ninova session used for the download
+            chat_id: User whose session is used (for re-login and logs)
+            username: Ninova username (re-login on redirect)
+            password: Ninova password (re-login on redirect)
+
+        Returns:
+            Future resolving to the file ID, or None if the transfer failed
+        """
+        with self._lock:
+            future = self._in_flight.get(file_url)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future
+            cached_id = self._lookup(file_url) if self._lookup else None
+            if cached_id:
+                self._stats["cached"] += 1
+                future = Future()
+                future.set_result(cached_id)
+                return future
+            future = self._executor.submit(
+                self._transfer, file_url, file_name, session, chat_id, username, password
+            )
+            self._in_flight[file_url] = future
+        future.add_done_callback(lambda _f: self._forget(file_url))
+        return future
+
+    def in_flight(self, file_url: str) -> Future | None:
+        """
+        Get the running transfer of a file, if any.
+
+        Args:
+            file_url: Ninova file URL
+
+        Returns:
+            Future of the running transfer or None
+        """
+        with self._lock:
+            return self._in_flight.get(file_url)
+
+    def _forget(self, file_url: str) -> None:
+        with self._lock:
+            self._in_flight.pop(file_url, None)
+
+    def _transfer(self, file_url, file_name, session, chat_id, username, password) -> str | None:
+        result = download_file(
+            session,
+            file_url,
+            file_name,
+            chat_id=chat_id,
+            username=username,
+            password=password,
+            to_buffer=True,
+        )
+        if not result:
+            self._record("failed")
+            logger.warning(f"[Prewarm] Download failed: {file_name}")
+            return None
+
+        file_buffer, final_filename = result
+        digest = getattr(file_buffer, "sha256", None)
+        try:
+            # Aynı içerik başka bir URL'den yüklendiyse Telegram aktarımı atlanır
+            file_id = self._lookup(content_key(digest)) if digest and self._lookup else None
+            if file_id:
+                self._record("deduplicated")
+            else:
+                file_id = send_telegram_document(
+                    self._upload_chat_id,
+                    file_buffer,
+                    caption=f"{get_file_icon(final_filename)} {final_filename}",
+                    filename=final_filename,
+                )
+        finally:
+            file_buffer.close()
+        if not file_id:
+            self._record("failed")
+            logger.warning(f"[Prewarm] Upload failed: {final_filename}")
+            return None
+
+        self._store(file_url, file_id)
+        if digest:
+            self._store(content_key(digest), file_id)
+        self._record("warmed")
+        logger.info(f"[Prewarm] Cached file ID for {final_filename}")
+        return file_id
+
+    def _record(self, outcome: str) -> None:
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def stats(self) -> dict:
+        """
+        Get prewarm statistics.
+
+        Returns:
+            Dictionary with in_flight, warmed, cached, coalesced, deduplicated and failed counts
+        """
+        with self._lock:
+            return {"in_flight": len(self._in_flight), **self._stats}
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop accepting transfers.
+
+        Args:
+            wait: Wait for running transfers to finish
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global singleton instance
+_prewarmer: FilePrewarmer | None = None
+_prewarmer_lock = threading.Lock()
+
+
+def get_file_prewarmer(
+    store: Callable[[str, str], None], lookup: Callable[[str], str | None] | None = None
+) -> FilePrewarmer | None:
+    """
+    Get or create the global FilePrewarmer.
+
+    Args:
+        store: store(file_url, file_id) (only used if creating new instance)
+        lookup: Cached file ID lookup (only used if creating new instance)
+
+    Returns:
+        Global FilePrewarmer, or None when PREWARM_CHAT_ID is not set
+    """
+    global _prewarmer
+    if not PREWARM_CHAT_ID:
+        return None
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            _prewarmer = FilePrewarmer(
+                PREWARM_CHAT_ID, store=store, lookup=lookup, workers=PREWARM_WORKERS
+            )
+        return _prewarmer
+
+
+def shutdown_file_prewarmer(wait: bool = False) -> None:
+    """
+    Shut down the global FilePrewarmer if it was created.
+
+    Args:
+        wait: Wait for running transfers to finish
+    """
+    global _prewarmer
+    with _prewarmer_lock:
+        prewarmer, _prewarmer = _prewarmer, None
+    if prewarmer is not None:
+        prewarmer.shutdown(wait=wait)
+
+
+def get_prewarm_transfer(file_url: str) -> Future | None:
+    """
+    Get the running prewarm transfer of a file (without creating the prewarmer).
+
+    Args:
+        file_url: Ninova file URL
+
+    Returns:
+        Future resolving to the file ID, or None if the file is not being prewarmed
+    """
+    prewarmer = _prewarmer
+    return prewarmer.in_flight(file_url) if prewarmer is not None else None
@@ -1,17 +1,139 @@
+import contextlib
+import contextvars
+import functools
+import hashlib
 import logging
 import re
-
-from bs4 import BeautifulSoup
-
-from common.config import console
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from common.config import (
+    ANNOUNCEMENT_DETAIL_TTL,
+    ANNOUNCEMENT_DETAIL_WORKERS,
+    FILE_WALK_CONCURRENCY,
+    FOLDER_MEMO_MAX_AGE,
+    FOLDER_MEMO_MAX_ENTRIES,
+    NINOVA_IO_WORKERS,
+    PAGE_CACHE_MAX_ENTRIES,
+    PARSE_PROCESSES,
+    SCAN_MAX_WORKERS,
+    SCAN_SECTION_INTERVALS,
+    SHARED_CONTENT_TTL,
+    console,
+)
+from common.html_parser import ANNOUNCEMENTS, COURSE_TREE, DATA_TABLE, TABLES, make_soup
 from common.http_logging import http_request
 from common.log_context import log_with_context
 from common.utils import sanitize_html_for_telegram
 
 from .auth import LoginFailedError, login_to_ninova
+from .fetch_plan import SECTIONS, get_fetch_plan
+from .folder_memo import get_folder_memo
+from .page_cache import get_page_cache, page_hash
+from .parse_pool import get_parse_pool
+from .shared_cache import SharedContentCache, get_shared_cache
 
 logger = logging.getLogger("ninova")
 
+# get_grades süresince geçerli tarama bağlamı:
+# {"owner": chat_id, "section": çekilen bölüm, "pages": {bölüm: {url: gövde hash'i}}}
+# Sayfa önbelleği yalnızca bu bağlam içinde (periyodik/manuel ders taraması) kullanılır.
+_scan_pages: ContextVar[dict | None] = ContextVar("ninova_scan_pages", default=None)
+
+# Sınıftaki tüm öğrenciler için aynı olan bölümler; kullanıcılar arası paylaşılır
+_SHARED_SECTIONS = ("files", "announcements")
+
+# Paylaşılan önbellekte üst düzey dosya listelerinin (değişiklik kontrolü) anahtarı
+_FILE_ROOTS = "file_roots"
+
+# Oturum başı eşzamanlı dosya listesi istekleri (kök ve kardeş klasörler paralel gezilir)
+_session_slots_map: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_session_slots_lock = threading.Lock()
+
+# Duyuru içerikleri (temizlenmiş): duyuru sürümü başına bir kez çekilir, tüm kullanıcılara sunulur
+_announcement_details = SharedContentCache(ttl=ANNOUNCEMENT_DETAIL_TTL)
+
+# Kalıcı iş parçacığı havuzları (her çağrıda yeni havuz açılmaz):
+# - "ninova-io": dosya listesi ve duyuru detayı istekleri; yalnızca başka işi beklemeyen
+#   yaprak istekler gönderilir
+# - "file-roots": get_all_files'ın kök gezintileri (yaprak istekleri bekler; ayrı havuzda
+#   olduğu için yaprak havuzunu tıkayıp kilitlenmeye yol açamaz)
+_pools: dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(name, max_workers):
+    """Adı verilen süreç boyu havuzu döndürür (ilk kullanımda oluşturulur)."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ThreadPoolExecutor(
+                max_workers=max(1, max_workers), thread_name_prefix=name
+            )
+        return pool
+
+
+def shutdown_io_pools(wait: bool = False) -> None:
+    """
+    Tarayıcının kalıcı havuzlarını kapatır (oluşturulduysa).
+
+    :param wait: Çalışan isteklerin bitmesi beklensin mi
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _submit_bounded(fn, items, limit):
+    """
+    Öğeleri paylaşılan I/O havuzunda, bu çağrı için en fazla limit eşzamanlı işle çalıştırır.
+
+    :param fn: Tek argümanlı fonksiyon (çağıranın contextvars bağlamında çalışır)
+    :param items: Öğeler
+    :param limit: Bu çağrının aynı anda havuzda tutabileceği iş sayısı
+    :return: Öğelerle aynı sırada Future listesi
+    """
+    pool = _get_pool("ninova-io", NINOVA_IO_WORKERS)
+    slots = threading.BoundedSemaphore(max(1, limit))
+    futures = []
+    for item in items:
+        slots.acquire()
+        try:
+            future = pool.submit(contextvars.copy_context().run, fn, item)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _f: slots.release())
+        futures.append(future)
+    return futures
+
+
+def _parse_page(url, html, parser, section=None):
+    """
+    Sayfayı parse eder; tarama içindeyse gövde hash'i değişmemiş sayfalar için
+    önceki parse sonucunu yeniden kullanır.
+
+    :param url: Sayfa URL'i (önbellek anahtarı)
+    :param html: Sayfa gövdesi
+    :param parser: html -> sonuç dönüştüren saf fonksiyon (PARSE_PROCESSES > 0 ise
+        parse süreçlerine gönderilir; modül düzeyinde ya da functools.partial olmalı)
+    :param section: Sayfanın kaydedileceği bölüm (varsayılan: bağlamdaki güncel bölüm)
+    :return: Parse sonucu (çağıran değiştirebilir)
+    """
+    parser = functools.partial(get_parse_pool(PARSE_PROCESSES).parse, parser)
+    scan = _scan_pages.get()
+    if scan is None:
+        return parser(html)
+    body_hash = page_hash(html)
+    scan["pages"].setdefault(section or scan["section"], {})[url] = body_hash
+    return get_page_cache(PAGE_CACHE_MAX_ENTRIES).get_or_parse(
+        scan["owner"], url, body_hash, parser, html
+    )
+
 
 def _looks_like_login_page(html: str, url: str = "") -> bool:
     """Detect when Ninova returned the login form instead of course content."""
@@ -26,6 +148,65 @@ def _looks_like_login_page(html: str, url: str = "") -> bool:
     )
 
 
+def _parse_announcements(html):
+    """Duyuru listesi sayfasını parse eder (ağ erişimi yok)."""
+    soup = make_soup(html, ANNOUNCEMENTS)
+    announcements = []
+
+    # duyuruGoruntule div'lerini bul
+    ann_divs = soup.find_all("div", class_="duyuruGoruntule")
+
+    for ann_div in ann_divs:
+        try:
+            # Başlık ve link
+            h2 = ann_div.find("h2")
+            if not h2:
+                continue
+            a_tag = h2.find("a")
+            if not a_tag:
+                continue
+
+            title = a_tag.get_text(strip=True)
+            href = a_tag.get("href", "")
+            link = f"https://ninova.itu.edu.tr{href}" if href.startswith("/") else href
+            ann_id = href.split("/")[-1] if href else ""
+
+            # Tarih ve yazar (tarih div'leri)
+            tarih_divs = ann_div.find_all("div", class_="tarih")
+            date_str = ""
+            author = ""
+
+            if len(tarih_divs) >= 1:
+                date_span = tarih_divs[0].find("span", class_="tarih")
+                if date_span:
+                    date_str = date_span.get_text(strip=True)
+
+            if len(tarih_divs) >= 2:
+                author_span = tarih_divs[-1].find("span", class_="tarih")
+                if author_span:
+                    author = author_span.get_text(strip=True)
+
+            # İçerik önizlemesi
+            content_div = ann_div.find("div", class_="icerik")
+            content_preview = content_div.get_text(strip=True) if content_div else ""
+
+            announcements.append(
+                {
+                    "id": ann_id,
+                    "title": title,
+                    "url": link,
+                    "author": author,
+                    "date": date_str,
+                    "content": content_preview,
+                }
+            )
+        except Exception as e:
+            logger.debug(f"Duyuru parse hatası: {e}")
+            continue
+
+    return announcements
+
+
 def get_announcements(session, base_url):
     """
     Sınıf duyurularını çeker.
@@ -67,61 +248,7 @@ def get_announcements(session, base_url):
                 action="ninova_fetch_announcements",
             )
             return None
-        soup = BeautifulSoup(response.text, "html.parser")
-        announcements = []
-
-        # duyuruGoruntule div'lerini bul
-        ann_divs = soup.find_all("div", class_="duyuruGoruntule")
-
-        for ann_div in ann_divs:
-            try:
-                # Başlık ve link
-                h2 = ann_div.find("h2")
-                if not h2:
-                    continue
-                a_tag = h2.find("a")
-                if not a_tag:
-                    continue
-
-                title = a_tag.get_text(strip=True)
-                href = a_tag.get("href", "")
-                link = f"https://ninova.itu.edu.tr{href}" if href.startswith("/") else href
-                ann_id = href.split("/")[-1] if href else ""
-
-                # Tarih ve yazar (tarih div'leri)
-                tarih_divs = ann_div.find_all("div", class_="tarih")
-                date_str = ""
-                author = ""
-
-                if len(tarih_divs) >= 1:
-                    date_span = tarih_divs[0].find("span", class_="tarih")
-                    if date_span:
-                        date_str = date_span.get_text(strip=True)
-
-                if len(tarih_divs) >= 2:
-                    author_span = tarih_divs[-1].find("span", class_="tarih")
-                    if author_span:
-                        author = author_span.get_text(strip=True)
-
-                # İçerik önizlemesi
-                content_div = ann_div.find("div", class_="icerik")
-                content_preview = content_div.get_text(strip=True) if content_div else ""
-
-                announcements.append(
-                    {
-                        "id": ann_id,
-                        "title": title,
-                        "url": link,
-                        "author": author,
-                        "date": date_str,
-                        "content": content_preview,
-                    }
-                )
-            except Exception as e:
-                logger.debug(f"Duyuru parse hatası: {e}")
-                continue
-
-        return announcements
+        return _parse_page(url, response.text, _parse_announcements)
     except Exception as e:
         logger.error(f"Duyuru çekme hatası: {e}")
         console.print(f"[bold red]Duyuru çekme hatası: {e}")
@@ -153,7 +280,7 @@ def get_announcement_detail(session, url):
             timeout=20,
         )
         if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = make_soup(response.text)
 
             # Önce duyuruGoruntule içindeki icerik div'ini dene
             duyuru_div = soup.find("div", class_="duyuruGoruntule")
@@ -185,6 +312,97 @@ def get_announcement_detail(session, url):
     return ""
 
 
+def announcement_version(ann):
+    """Duyurunun liste bilgilerinden (başlık, yazar, tarih) sürüm anahtarı üretir."""
+    return f"{ann.get('title')}|{ann.get('author')}|{ann.get('date')}"
+
+
+def get_announcement_details(session, announcements):
+    """
+    Birden fazla duyurunun içeriğini sınırlı sayıda eşzamanlı istekle çeker.
+
+    İçerikler duyuru URL'i ve liste bilgileri (başlık, yazar, tarih) ile kullanıcılar
+    arası önbelleğe alınır; aynı duyuru kaç öğrenci takip ederse etsin bir kez indirilip
+    temizlenir. Düzenlenen duyurular (liste bilgisi değişen) yeniden çekilir.
+
+    :param session: requests.Session nesnesi
+    :param announcements: get_announcements() çıktısındaki duyuru dict'leri
+    :return: {duyuru_url: içerik} (hata durumunda boş string)
+    """
+    pending = {ann["url"]: ann for ann in announcements if ann.get("url")}
+    if not pending:
+        return {}
+
+    def fetch(ann):
+        content = _announcement_details.get_or_fetch(
+            ann["url"],
+            announcement_version(ann),
+            lambda: get_announcement_detail(session, ann["url"]) or None,
+        )
+        return content or ""
+
+    futures = _submit_bounded(fetch, pending.values(), ANNOUNCEMENT_DETAIL_WORKERS)
+    return {url: future.result() for url, future in zip(pending, futures, strict=True)}
+
+
+def _parse_assignment_detail(html):
+    """Ödev detay sayfasını parse eder (ağ erişimi yok)."""
+    soup = make_soup(html)
+    result = {
+        "start_date": "",
+        "end_date": "",
+        "is_submitted": False,
+    }
+
+    # Tarih bilgilerini çek
+    # title_field ve data_field span'larını bul
+    title_fields = soup.find_all("span", class_="title_field")
+    for title_span in title_fields:
+        title_text = title_span.get_text(strip=True).lower()
+        # Sonraki sibling data_field
+        data_span = title_span.find_next_sibling("span", class_="data_field")
+        if not data_span:
+            # Bazen aynı parent içinde değil
+            next_elem = title_span.find_next("span", class_="data_field")
+            if next_elem:
+                data_span = next_elem
+
+        if data_span:
+            value = data_span.get_text(strip=True)
+            if "başlangıç" in title_text or "start" in title_text:
+                result["start_date"] = value
+            elif "bitiş" in title_text or "end" in title_text or "due" in title_text:
+                result["end_date"] = value
+
+    # Teslim durumunu kontrol et
+    page_text = soup.get_text(" ", strip=True).lower()
+    page_html = str(soup)
+
+    # Teslim edilmiş göstergeleri
+    submitted_indicators = [
+        "lbOdevDosyalar" in page_html,  # İndirme linki var
+        "yüklediğiniz ödev" in page_text,
+        "dosyalarını indirin" in page_text,
+        "teslim edildi" in page_text,
+        "gönderildi" in page_text,
+    ]
+
+    # Teslim edilmemiş göstergeleri
+    not_submitted_indicators = [
+        "OdevGonder" in page_html,  # Yükleme butonu var
+        "ödevi yükle" in page_text,
+    ]
+
+    # Eğer submitted göstergesi varsa ve not_submitted yoksa -> submitted
+    if any(submitted_indicators) and not any(not_submitted_indicators):
+        result["is_submitted"] = True
+    # Eğer not_submitted göstergesi varsa -> not submitted
+    elif any(not_submitted_indicators) or any(not_submitted_indicators):
+        result["is_submitted"] = False
+
+    return result
+
+
 def get_assignment_detail(session, url):
     """
     Ödev detay sayfasından tarih ve teslim bilgilerini çeker.
@@ -212,65 +430,148 @@ def get_assignment_detail(session, url):
         if response.status_code != 200:
             return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        result = {
-            "start_date": "",
-            "end_date": "",
-            "is_submitted": False,
-        }
-
-        # Tarih bilgilerini çek
-        # title_field ve data_field span'larını bul
-        title_fields = soup.find_all("span", class_="title_field")
-        for title_span in title_fields:
-            title_text = title_span.get_text(strip=True).lower()
-            # Sonraki sibling data_field
-            data_span = title_span.find_next_sibling("span", class_="data_field")
-            if not data_span:
-                # Bazen aynı parent içinde değil
-                next_elem = title_span.find_next("span", class_="data_field")
-                if next_elem:
-                    data_span = next_elem
-
-            if data_span:
-                value = data_span.get_text(strip=True)
-                if "başlangıç" in title_text or "start" in title_text:
-                    result["start_date"] = value
-                elif "bitiş" in title_text or "end" in title_text or "due" in title_text:
-                    result["end_date"] = value
-
-        # Teslim durumunu kontrol et
-        page_text = soup.get_text(" ", strip=True).lower()
-        page_html = str(soup)
-
-        # Teslim edilmiş göstergeleri
-        submitted_indicators = [
-            "lbOdevDosyalar" in page_html,  # İndirme linki var
-            "yüklediğiniz ödev" in page_text,
-            "dosyalarını indirin" in page_text,
-            "teslim edildi" in page_text,
-            "gönderildi" in page_text,
-        ]
-
-        # Teslim edilmemiş göstergeleri
-        not_submitted_indicators = [
-            "OdevGonder" in page_html,  # Yükleme butonu var
-            "ödevi yükle" in page_text,
-        ]
-
-        # Eğer submitted göstergesi varsa ve not_submitted yoksa -> submitted
-        if any(submitted_indicators) and not any(not_submitted_indicators):
-            result["is_submitted"] = True
-        # Eğer not_submitted göstergesi varsa -> not submitted
-        elif any(not_submitted_indicators) or any(not_submitted_indicators):
-            result["is_submitted"] = False
-
-        return result
+        return _parse_page(url, response.text, _parse_assignment_detail)
     except Exception as e:
         logger.debug(f"Ödev detay hatası: {e}")
         return None
 
 
+def _parse_assignments(html):
+    """Ödev listesi sayfasını parse eder (ağ erişimi yok, detay sayfaları hariç)."""
+    soup = make_soup(html, TABLES)
+    assignments = []
+
+    # gvOdevListesi table'ını veya data class'lı table'ı bul
+    table = soup.find("table", id=re.compile(".*gvOdevListesi.*"))
+    if not table:
+        table = soup.find("table", class_="data")
+    if not table:
+        return []
+
+    rows = table.find_all("tr")
+    for row in rows:
+        try:
+            # Header satırını atla
+            if row.find("th"):
+                continue
+
+            cols = row.find_all("td")
+            if not cols:
+                continue
+
+            cell = cols[0]
+            cell_text = cell.get_text(" ", strip=True)
+            cell_html = str(cell)
+
+            # Ödev adını ve URL'ini bul - h2 içindeki a tag'den
+            name = ""
+            assign_url = ""
+            assign_id = ""
+
+            h2 = cell.find("h2")
+            if h2:
+                a_tag = h2.find("a", href=True)
+                if a_tag:
+                    href = a_tag.get("href", "")
+                    if "/Odev/" in href:
+                        name = a_tag.get_text(strip=True)
+                        assign_url = (
+                            f"https://ninova.itu.edu.tr{href}" if href.startswith("/") else href
+                        )
+                        assign_id = href.split("/")[-1] if href else ""
+
+            # h2'de bulunamadıysa tüm a tag'leri ara
+            if not assign_id:
+                for a_tag in cell.find_all("a", href=True):
+                    href = a_tag.get("href", "")
+                    if "/Odev/" in href and "/OdevGonder" not in href:
+                        text = a_tag.get_text(strip=True)
+                        if (
+                            text.lower()
+                            not in [
+                                "ödevi görüntüle",
+                                "görüntüle",
+                                "view",
+                                "detay",
+                            ]
+                            and not name
+                        ):
+                            name = text
+                        assign_url = (
+                            f"https://ninova.itu.edu.tr{href}" if href.startswith("/") else href
+                        )
+                        assign_id = href.split("/")[-1] if href else ""
+                        break
+
+            if not assign_id:
+                continue
+
+            # Tarih bilgilerini çek
+            start_date = ""
+            end_date = ""
+
+            # "Teslim Başlangıcı : 26 Aralık 2025 00:00"
+            start_match = re.search(
+                r"Teslim\s*Başlangıcı\s*:\s*(\d{1,2}\s+\w+\s+\d{4}\s+\d{2}:\d{2})",
+                cell_text,
+                re.IGNORECASE,
+            )
+            if start_match:
+                start_date = start_match.group(1)
+
+            # "Teslim Bitişi : 06 Ocak 2026 23:30"
+            end_match = re.search(
+                r"Teslim\s*Bitişi\s*:\s*(\d{1,2}\s+\w+\s+\d{4}\s+\d{2}:\d{2})",
+                cell_text,
+                re.IGNORECASE,
+            )
+            if end_match:
+                end_date = end_match.group(1)
+
+            # Teslim durumu - "X adedini sisteme yüklediniz"
+            is_submitted = False
+
+            # Pattern: "<strong class="uyari">N</strong> adedini sisteme yüklediniz"
+            # N > 0 ise teslim edilmiş
+            submitted_match = re.search(
+                r'<strong[^>]*class=["\']uyari["\'][^>]*>(\d+)</strong>\s*adedini\s*sisteme\s*yüklediniz',
+                cell_html,
+                re.IGNORECASE,
+            )
+            if submitted_match:
+                submitted_count = int(submitted_match.group(1))
+                is_submitted = submitted_count > 0
+            else:
+                # Alternatif kontroller
+                if "yüklediniz" in cell_text.lower() and "0 adedini" not in cell_text:
+                    # "sisteme yüklediniz" var ama "0 adedini" yok
+                    is_submitted = True
+                elif "teslim edildi" in cell_text.lower() or "gönderildi" in cell_text.lower():
+                    is_submitted = True
+
+            # OdevGonder linki varsa kontrol et (teslim edilmemiş olabilir)
+            if "OdevGonder" in cell_html and (
+                not submitted_match or (submitted_match and int(submitted_match.group(1)) == 0)
+            ):
+                is_submitted = False
+
+            assignments.append(
+                {
+                    "id": assign_id,
+                    "name": name or f"Ödev {assign_id}",
+                    "url": assign_url,
+                    "start_date": start_date or "-",
+                    "end_date": end_date or "-",
+                    "is_submitted": is_submitted,
+                }
+            )
+        except Exception as e:
+            logger.debug(f"Ödev parse hatası: {e}")
+            continue
+
+    return assignments
+
+
 def get_assignments(session, base_url):
     """Ödevleri çeker.
 
@@ -303,149 +604,12 @@ def get_assignments(session, base_url):
                 action="ninova_fetch_assignments",
             )
             return None
-        soup = BeautifulSoup(response.text, "html.parser")
-        assignments = []
-
-        # gvOdevListesi table'ını veya data class'lı table'ı bul
-        table = soup.find("table", id=re.compile(".*gvOdevListesi.*"))
-        if not table:
-            table = soup.find("table", class_="data")
-        if not table:
-            return []
-
-        rows = table.find_all("tr")
-        for row in rows:
-            try:
-                # Header satırını atla
-                if row.find("th"):
-                    continue
-
-                cols = row.find_all("td")
-                if not cols:
-                    continue
-
-                cell = cols[0]
-                cell_text = cell.get_text(" ", strip=True)
-                cell_html = str(cell)
-
-                # Ödev adını ve URL'ini bul - h2 içindeki a tag'den
-                name = ""
-                assign_url = ""
-                assign_id = ""
-
-                h2 = cell.find("h2")
-                if h2:
-                    a_tag = h2.find("a", href=True)
-                    if a_tag:
-                        href = a_tag.get("href", "")
-                        if "/Odev/" in href:
-                            name = a_tag.get_text(strip=True)
-                            assign_url = (
-                                f"https://ninova.itu.edu.tr{href}" if href.startswith("/") else href
-                            )
-                            assign_id = href.split("/")[-1] if href else ""
-
-                # h2'de bulunamadıysa tüm a tag'leri ara
-                if not assign_id:
-                    for a_tag in cell.find_all("a", href=True):
-                        href = a_tag.get("href", "")
-                        if "/Odev/" in href and "/OdevGonder" not in href:
-                            text = a_tag.get_text(strip=True)
-                            if (
-                                text.lower()
-                                not in [
-                                    "ödevi görüntüle",
-                                    "görüntüle",
-                                    "view",
-                                    "detay",
-                                ]
-                                and not name
-                            ):
-                                name = text
-                            assign_url = (
-                                f"https://ninova.itu.edu.tr{href}" if href.startswith("/") else href
-                            )
-                            assign_id = href.split("/")[-1] if href else ""
-                            break
-
-                if not assign_id:
-                    continue
-
-                # Tarih bilgilerini çek
-                start_date = ""
-                end_date = ""
-
-                # "Teslim Başlangıcı : 26 Aralık 2025 00:00"
-                start_match = re.search(
-                    r"Teslim\s*Başlangıcı\s*:\s*(\d{1,2}\s+\w+\s+\d{4}\s+\d{2}:\d{2})",
-                    cell_text,
-                    re.IGNORECASE,
-                )
-                if start_match:
-                    start_date = start_match.group(1)
-
-                # "Teslim Bitişi : 06 Ocak 2026 23:30"
-                end_match = re.search(
-                    r"Teslim\s*Bitişi\s*:\s*(\d{1,2}\s+\w+\s+\d{4}\s+\d{2}:\d{2})",
-                    cell_text,
-                    re.IGNORECASE,
-                )
-                if end_match:
-                    end_date = end_match.group(1)
-
-                # Teslim durumu - "X adedini sisteme yüklediniz"
-                is_submitted = False
-
-                # Pattern: "<strong class="uyari">N</strong> adedini sisteme yüklediniz"
-                # N > 0 ise teslim edilmiş
-                submitted_match = re.search(
-                    r'<strong[^>]*class=["\']uyari["\'][^>]*>(\d+)</strong>\s*adedini\s*sisteme\s*yüklediniz',
-                    cell_html,
-                    re.IGNORECASE,
-                )
-                if submitted_match:
-                    submitted_count = int(submitted_match.group(1))
-                    is_submitted = submitted_count > 0
-                else:
-                    # Alternatif kontroller
-                    if "yüklediniz" in cell_text.lower() and "0 adedini" not in cell_text:
-                        # "sisteme yüklediniz" var ama "0 adedini" yok
-                        is_submitted = True
-                    elif "teslim edildi" in cell_text.lower() or "gönderildi" in cell_text.lower():
-                        is_submitted = True
-
-                # OdevGonder linki varsa kontrol et (teslim edilmemiş olabilir)
-                if "OdevGonder" in cell_html and (
-                    not submitted_match or (submitted_match and int(submitted_match.group(1)) == 0)
-                ):
-                    is_submitted = False
-
-                assignments.append(
-                    {
-                        "id": assign_id,
-                        "name": name or f"Ödev {assign_id}",
-                        "url": assign_url,
-                        "start_date": start_date or "-",
-                        "end_date": end_date or "-",
-                        "is_submitted": is_submitted,
-                    }
-                )
-            except Exception as e:
-                logger.debug(f"Ödev parse hatası: {e}")
-                continue
+        assignments = _parse_page(url, response.text, _parse_assignments)
 
         # Detay sayfalarından eksik bilgileri tamamla
         for assign in assignments:
-            # Tarih veya teslim durumu eksikse detay sayfasını kontrol et
-            if not assign["end_date"] or assign["end_date"] == "-":
-                detail = get_assignment_detail(session, assign["url"])
-                if detail:
-                    if detail.get("start_date"):
-                        assign["start_date"] = detail["start_date"]
-                    if detail.get("end_date"):
-                        assign["end_date"] = detail["end_date"]
-                    # Teslim durumunu detay sayfasından al (daha güvenilir)
-                    assign["is_submitted"] = detail.get("is_submitted", False)
+            if _needs_assignment_detail(assign):
+                _apply_assignment_detail(assign, get_assignment_detail(session, assign["url"]))
 
         return assignments
     except Exception as e:
@@ -454,9 +618,156 @@ def get_assignments(session, base_url):
         return None
 
 
+def _needs_assignment_detail(assign):
+    """Tarih veya teslim durumu eksikse ödevin detay sayfası çekilmelidir."""
+    return not assign["end_date"] or assign["end_date"] == "-"
+
+
+def _apply_assignment_detail(assign, detail):
+    """Detay sayfasındaki tarih ve teslim durumunu ödeve işler (detail None olabilir)."""
+    if not detail:
+        return
+    if detail.get("start_date"):
+        assign["start_date"] = detail["start_date"]
+    if detail.get("end_date"):
+        assign["end_date"] = detail["end_date"]
+    # Teslim durumunu detay sayfasından al (daha güvenilir)
+    assign["is_submitted"] = detail.get("is_submitted", False)
+
+
+def _parse_file_listing(html, url):
+    """
+    Dosya listesi sayfasını parse eder (ağ erişimi yok, klasörlere girilmez).
+
+    :param html: Sayfa gövdesi
+    :param url: Sayfa URL'i (göreli linkleri çözmek için)
+    :return: [{"name", "url", "date", "size", "is_folder"}] listesi
+    """
+    soup = make_soup(html, DATA_TABLE)
+
+    # dosyaSistemi div içindeki table'ı bul
+    table = soup.find("table", class_="data")
+    if not table:
+        return []
+
+    entries = []
+    for row in table.find_all("tr"):
+        try:
+            # Header satırını atla
+            if row.find("th"):
+                continue
+
+            cols = row.find_all("td")
+            if len(cols) < 3:
+                continue
+
+            # İlk sütun: icon ve isim
+            first_col = cols[0]
+            img = first_col.find("img")
+            a_tag = first_col.find("a")
+
+            if not a_tag:
+                continue
+
+            file_name = a_tag.get_text(strip=True)
+            href = a_tag.get("href", "")
+
+            # Icon'dan klasör mü dosya mı anla
+            img_src = img.get("src", "").lower() if img else ""
+            is_folder = "folder.png" in img_src
+
+            # Boyut ve tarih
+            size = cols[1].get_text(strip=True) if len(cols) > 1 else ""
+            date_str = cols[2].get_text(strip=True) if len(cols) > 2 else ""
+
+            # URL oluştur
+            if href.startswith("/"):
+                file_url = f"https://ninova.itu.edu.tr{href}"
+            elif href.startswith("?"):
+                # Relative query string - mevcut URL'e ekle
+                base_page_url = url.split("?")[0]
+                file_url = f"{base_page_url}{href}"
+            else:
+                file_url = href
+
+            entries.append(
+                {
+                    "name": file_name,
+                    "url": file_url,
+                    "date": date_str,
+                    "size": size,
+                    "is_folder": is_folder,
+                }
+            )
+        except Exception as e:
+            logger.debug(f"Dosya parse hatası: {e}")
+            continue
+
+    return entries
+
+
+def _session_slots(session):
+    """
+    Oturum başı eşzamanlı dosya listesi isteği sınırı (FILE_WALK_CONCURRENCY).
+
+    :param session: requests.Session nesnesi
+    :return: Context manager (semaphore)
+    """
+    with _session_slots_lock:
+        try:
+            slots = _session_slots_map.get(session)
+            if slots is None:
+                slots = _session_slots_map[session] = threading.BoundedSemaphore(
+                    FILE_WALK_CONCURRENCY
+                )
+        except TypeError:  # weakref desteklemeyen oturum nesnesi
+            return contextlib.nullcontext()
+        return slots
+
+
+def _fetch_file_listing(session, url):
+    """
+    Tek bir dosya listesi sayfasını çeker ve parse eder (klasörlere girilmez).
+
+    Değişiklik kontrolünün tarama bağlamına bıraktığı kök gövdeleri yeniden çekilmez.
+
+    :param session: requests.Session nesnesi
+    :param url: Liste sayfası URL'i
+    :return: _parse_file_listing() girdileri veya None (hata)
+    """
+    body = _take_prefetched_body(url)
+    if body is None:
+        with _session_slots(session):
+            response = http_request(
+                logger,
+                session,
+                "GET",
+                url,
+                action="ninova_fetch_files",
+                timeout=20,
+            )
+        if response.status_code != 200:
+            return None
+        if _looks_like_login_page(response.text, response.url):
+            log_with_context(
+                logger,
+                "warning",
+                "Dosya listesi için login sayfası döndü; oturum muhtemelen düşmüş.",
+                action="ninova_fetch_files",
+            )
+            return None
+        body = response.text
+    return _parse_page(url, body, functools.partial(_parse_file_listing, url=url))
+
+
 def get_class_files(session, base_url, sub_url=None, folder_prefix="", file_type="SinifDosyalari"):
     """Sınıf veya ders dosyalarını çeker.
 
+    Klasör ağacı seviye seviye gezilir: aynı seviyedeki klasörler eşzamanlı çekilir
+    (oturum başı FILE_WALK_CONCURRENCY sınırıyla), sonuç sırası ise derinlik öncelikli
+    gezinti ile birebir aynıdır (dl_<url_idx>_<file_idx> indeksleri buna bağlıdır).
+    Satır tarihi değişmeyen klasörlerin alt ağacı FolderMemo'dan alınır.
+
     HTML yapısı:
     <table class="data">
         <tr>
@@ -474,119 +785,124 @@ def get_class_files(session, base_url, sub_url=None, folder_prefix="", file_type
     url = sub_url or f"{base_url}/{file_type}"
 
     try:
-        response = http_request(
-            logger,
-            session,
-            "GET",
-            url,
-            action="ninova_fetch_files",
-            timeout=20,
-        )
-        if response.status_code != 200:
-            return None
-        if _looks_like_login_page(response.text, response.url):
-            log_with_context(
-                logger,
-                "warning",
-                "Dosya listesi için login sayfası döndü; oturum muhtemelen düşmüş.",
-                action="ninova_fetch_files",
+        memo = get_folder_memo(FOLDER_MEMO_MAX_ENTRIES, FOLDER_MEMO_MAX_AGE)
+        scan = _scan_pages.get()
+        pages = scan["pages"].setdefault(scan["section"], {}) if scan is not None else {}
+
+        # Klasör düğümleri: kök + gezilmesi gereken klasör satırları (BFS sırasıyla)
+        root = {"url": url, "date": ""}
+        level = [root]
+        walked = []
+        while level:
+            # İstekler paylaşılan I/O havuzunda; bekleyen taraf bu iş parçacığıdır
+            futures = _submit_bounded(
+                functools.partial(_fetch_file_listing, session),
+                [n["url"] for n in level],
+                FILE_WALK_CONCURRENCY,
             )
-            return None
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # dosyaSistemi div içindeki table'ı bul
-        table = soup.find("table", class_="data")
-        if not table:
-            return []
-
-        files = []
-        rows = table.find_all("tr")
-
-        for row in rows:
-            try:
-                # Header satırını atla
-                if row.find("th"):
-                    continue
-
-                cols = row.find_all("td")
-                if len(cols) < 3:
-                    continue
-
-                # İlk sütun: icon ve isim
-                first_col = cols[0]
-                img = first_col.find("img")
-                a_tag = first_col.find("a")
-
-                if not a_tag:
-                    continue
-
-                file_name = a_tag.get_text(strip=True)
-                href = a_tag.get("href", "")
-
-                # Icon'dan klasör mü dosya mı anla
-                img_src = img.get("src", "").lower() if img else ""
-                is_folder = "folder.png" in img_src
-
-                # Boyut ve tarih
-                size = cols[1].get_text(strip=True) if len(cols) > 1 else ""
-                date_str = cols[2].get_text(strip=True) if len(cols) > 2 else ""
-
-                # URL oluştur
-                if href.startswith("/"):
-                    file_url = f"https://ninova.itu.edu.tr{href}"
-                elif href.startswith("?"):
-                    # Relative query string - mevcut URL'e ekle
-                    base_page_url = url.split("?")[0]
-                    file_url = f"{base_page_url}{href}"
-                else:
-                    file_url = href
-
-                if is_folder:
-                    # Klasöre recursive gir
-                    sub_files = get_class_files(
-                        session,
-                        base_url,
-                        file_url,
-                        folder_prefix=f"{folder_prefix}{file_name}/",
-                        file_type=file_type,
-                    )
-                    if sub_files is None:
-                        return None
-                    files.extend(sub_files)
-                else:
-                    # Dosya bilgisini ekle
-                    files.append(
-                        {
-                            "name": f"{folder_prefix}{file_name}",
-                            "url": file_url,
-                            "date": date_str,
-                            "size": size,
-                        }
-                    )
-            except Exception as e:
-                logger.debug(f"Dosya parse hatası: {e}")
-                continue
-
-        return files
+            next_level = []
+            for node, future in zip(level, futures, strict=True):
+                entries = future.result()
+                if entries is None:
+                    return None
+                next_level.extend(_expand_folder(node, entries, walked, memo, pages))
+            level = next_level
+
+        _assemble_file_tree(walked, memo, pages)
+        return [{**f, "name": f"{folder_prefix}{f['name']}"} for f in root["files"]]
     except Exception as e:
         logger.error(f"Dosya listesi çekme hatası: {e}")
         console.print(f"[bold red]Dosya listesi çekme hatası: {e}")
         return None
 
 
+def _expand_folder(node, entries, walked, memo, pages):
+    """
+    Gezilen klasörün girdilerini düğüme işler; satır tarihi değişmeyen alt klasörleri
+    FolderMemo'dan doldurur.
+
+    :param node: Klasör düğümü ({"url", "date", ...})
+    :param entries: _parse_file_listing() girdileri
+    :param walked: Gezilen düğümler listesi (BFS sırası; düğüm eklenir)
+    :param memo: FolderMemo
+    :param pages: Tarama bağlamındaki dosya sayfaları ({url: hash}; güncellenir)
+    :return: Gezilmesi gereken alt klasör girdileri
+    """
+    node["entries"] = entries
+    walked.append(node)
+    pending = []
+    for entry in entries:
+        if not entry["is_folder"]:
+            continue
+        remembered = memo.get(entry["url"], entry["date"])
+        if remembered is not None:
+            entry["files"], entry["pages"] = remembered
+            pages.update(entry["pages"])
+        else:
+            pending.append(entry)
+    return pending
+
+
+def _assemble_file_tree(walked, memo, pages):
+    """
+    Gezilen klasörlerin alt ağaçlarını derinden yükseğe birleştirir; her klasör kendi
+    listeleme sırasını korur. Kök dışındaki klasörler FolderMemo'ya yazılır.
+
+    :param walked: Gezilen düğümler (BFS sırası, ilk eleman kök)
+    :param memo: FolderMemo
+    :param pages: Tarama bağlamındaki dosya sayfaları ({url: hash})
+    """
+    root = walked[0]
+    for node in reversed(walked):
+        files = []
+        subtree_pages = {node["url"]: pages[node["url"]]} if node["url"] in pages else {}
+        for entry in node["entries"]:
+            if entry["is_folder"]:
+                prefix = f"{entry['name']}/"
+                files.extend({**f, "name": f"{prefix}{f['name']}"} for f in entry["files"])
+                subtree_pages.update(entry["pages"])
+            else:
+                files.append(
+                    {
+                        "name": entry["name"],
+                        "url": entry["url"],
+                        "date": entry["date"],
+                        "size": entry["size"],
+                    }
+                )
+        node["files"], node["pages"] = files, subtree_pages
+        if node is not root:
+            memo.put(node["url"], node["date"], files, subtree_pages)
+
+
 def get_all_files(session, base_url):
-    """Hem sınıf dosyalarını hem ders dosyalarını çeker."""
+    """Hem sınıf dosyalarını hem ders dosyalarını (eşzamanlı) çeker."""
+    # Sınıf dosyaları kök havuzunda, ders dosyaları bu iş parçacığında gezilir;
+    # sıra her zaman Sınıf, sonra Ders
+    sinif_future = _get_pool("file-roots", SCAN_MAX_WORKERS).submit(
+        contextvars.copy_context().run,
+        get_class_files,
+        session,
+        base_url,
+        file_type="SinifDosyalari",
+    )
+    ders_files = get_class_files(session, base_url, file_type="DersDosyalari")
+    sinif_files = sinif_future.result()
+
+    return _merge_file_sources(sinif_files, ders_files)
+
+
+def _merge_file_sources(sinif_files, ders_files):
+    """Sınıf ve ders dosyalarını kaynak etiketiyle birleştirir (ikisi de None ise None)."""
     all_files = []
 
     # Sınıf dosyaları
-    sinif_files = get_class_files(session, base_url, file_type="SinifDosyalari")
     if sinif_files is not None:
         for f in sinif_files:
             f["source"] = "Sınıf"
         all_files.extend(sinif_files)
 
     # Ders dosyaları
-    ders_files = get_class_files(session, base_url, file_type="DersDosyalari")
     if ders_files is not None:
         for f in ders_files:
             f["source"] = "Ders"
@@ -636,7 +952,7 @@ def get_user_courses(session):
                 action="ninova_fetch_courses",
             )
             return []
-        soup = BeautifulSoup(resp.text, "html.parser")
+        soup = make_soup(resp.text, COURSE_TREE)
 
         tree_div = soup.find("div", {"class": "menuErisimAgaci"})
 
@@ -717,7 +1033,154 @@ def get_user_courses(session):
 
 
 def get_grades(session, base_url, chat_id, username, password):
-    """Notları çeker. base_url artık /Notlar olmadan gelir.
+    """Bir dersin notlarını, ödevlerini, dosyalarını ve duyurularını çeker.
+
+    base_url /Notlar olmadan gelir. Hangi bölümlerin çekileceğine FetchPlan karar
+    verir (SCAN_SECTION_INTERVALS); çekilen bölümler "fetched_sections" alanında
+    döner, atlanan bölümler boş listedir ve kayıtlı veriden tamamlanmalıdır.
+
+    Tarama sırasında çekilen her sayfanın gövde hash'i kaydedilir; hash'i
+    değişmeyen sayfalar yeniden parse edilmez. Tüm çekilen bölümler başarılıysa
+    dönen veride bölüm başına "section_hashes" bulunur (bölüm içeriği
+    değişmediyse önceki taramayla aynıdır).
+    """
+    owner = str(chat_id)
+    plan = get_fetch_plan(SCAN_SECTION_INTERVALS)
+    sections = plan.due_sections(owner, base_url)
+    token = _scan_pages.set({"owner": owner, "section": "grades", "pages": {}})
+    try:
+        grades_data = _fetch_course_data(session, base_url, chat_id, username, password, sections)
+        _finish_course_scan(plan, owner, base_url, grades_data, _scan_pages.get()["pages"])
+        return grades_data
+    finally:
+        _scan_pages.reset(token)
+
+
+def _finish_course_scan(plan, owner, base_url, grades_data, pages):
+    """
+    Başarılı taramada bölüm hash'lerini veriye ekler ve FetchPlan'i günceller.
+
+    :param plan: FetchPlan
+    :param owner: Tarayan kullanıcı (chat_id)
+    :param base_url: Ders ana sayfa URL'i
+    :param grades_data: _fetch_course_data() sonucu (None olabilir)
+    :param pages: Tarama bağlamındaki sayfa hash'leri ({bölüm: {url: hash}})
+    """
+    if not grades_data or not grades_data.get("fetch_success"):
+        return
+    fetched = grades_data["fetched_sections"]
+    grades_data["section_hashes"] = {
+        section: _section_hash(pages.get(section, {})) for section in fetched
+    }
+    plan.mark_fetched(owner, base_url, fetched)
+    for url in _file_root_urls(base_url):
+        if url in pages.get("files", {}):
+            plan.remember_listing(owner, url, pages["files"][url])
+
+
+def _section_hash(page_hashes):
+    """Bir bölümün sayfa hash'lerinden (url -> hash) sıradan bağımsız özet üretir."""
+    lines = sorted(f"{url}\n{body_hash}" for url, body_hash in page_hashes.items())
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()
+
+
+def _file_root_urls(base_url):
+    """Dersin üst düzey dosya listesi URL'leri (sınıf ve ders dosyaları)."""
+    return [f"{base_url}/SinifDosyalari", f"{base_url}/DersDosyalari"]
+
+
+def _file_root_page(response):
+    """Kök dosya listesi yanıtından {"hash", "body"} üretir (hata/login sayfasında None)."""
+    if response.status_code != 200 or _looks_like_login_page(response.text, response.url):
+        return None
+    return {"hash": page_hash(response.text), "body": response.text}
+
+
+def _fetch_file_roots(session, base_url):
+    """
+    Üst düzey dosya listelerini çeker (klasörlere girilmez).
+
+    :param session: requests.Session nesnesi
+    :param base_url: Ders ana sayfa URL'i
+    :return: {url: {"hash", "body"}} veya None (herhangi biri çekilemedi)
+    """
+    roots = {}
+    for url in _file_root_urls(base_url):
+        try:
+            response = http_request(
+                logger,
+                session,
+                "GET",
+                url,
+                action="ninova_check_files",
+                timeout=20,
+            )
+        except Exception as e:
+            logger.debug(f"Dosya listesi kontrol hatası: {e}")
+            return None
+        root = _file_root_page(response)
+        if root is None:
+            return None
+        roots[url] = root
+    return roots
+
+
+def _known_listing_hashes(base_url, owner):
+    """Kullanıcının son derin taramadaki kök liste hash'leri ({url: hash}; eksikse None)."""
+    plan = get_fetch_plan(SCAN_SECTION_INTERVALS)
+    known = {url: plan.listing_hash(owner, url) for url in _file_root_urls(base_url)}
+    return None if None in known.values() else known
+
+
+def _file_roots_changed(roots, known):
+    """
+    Paylaşılan kök listeleri kullanıcının bilinen hash'leriyle karşılaştırır.
+
+    Değişiklik varsa gövdeler tarama bağlamına bırakılır; ardından gelen dosya
+    ağacı gezintisi kök sayfaları yeniden çekmez.
+    """
+    if roots is None:
+        return True
+    if all(roots[url]["hash"] == body_hash for url, body_hash in known.items()):
+        return False
+    scan = _scan_pages.get()
+    if scan is not None:
+        scan.setdefault("bodies", {}).update({url: root["body"] for url, root in roots.items()})
+    return True
+
+
+def _take_prefetched_body(url):
+    """Tarama bağlamına önceden bırakılmış sayfa gövdesini (bir kez) döndürür."""
+    scan = _scan_pages.get()
+    if scan is None or "bodies" not in scan:
+        return None
+    return scan["bodies"].pop(url, None)
+
+
+def _file_listings_changed(session, base_url, owner):
+    """
+    Üst düzey dosya listelerinden biri son derin taramadan beri değişti mi?
+
+    Kök sayfalar ders başına paylaşılan önbellek üzerinden çekilir; aynı dersi
+    takip eden öğrenciler bu kontrol için tekrar istek atmaz. Çekilemeyen veya daha
+    önce görülmemiş listeler değişmiş sayılır.
+
+    :param session: requests.Session nesnesi
+    :param base_url: Ders ana sayfa URL'i
+    :param owner: Tarayan kullanıcı (chat_id)
+    :return: True/False
+    """
+    known = _known_listing_hashes(base_url, owner)
+    if known is None:
+        return True
+    roots = get_shared_cache(SHARED_CONTENT_TTL).get_or_fetch(
+        base_url, _FILE_ROOTS, lambda: _fetch_file_roots(session, base_url)
+    )
+    return _file_roots_changed(roots, known)
+
+
+def _parse_grades_page(html):
+    """Not sayfasını parse eder (ağ erişimi yok).
 
     HTML yapısı (table.data):
     <table class="data">
@@ -736,7 +1199,181 @@ def get_grades(session, base_url, chat_id, username, password):
             <td>12.3</td>
         </tr>
     </table>
+
+    :return: {"course_name": str, "grades": {ad: {"not", "agirlik", "detaylar"}}}
     """
+    soup = make_soup(html)
+    course_name = "Bilinmeyen Ders"
+
+    # Ders adını yol div'inden veya başlıktan al
+    yol_div = soup.find("div", class_="yol")
+    if yol_div:
+        for link in yol_div.find_all("a"):
+            href = link.get("href", "")
+            if "/Sinif/" in href and "Notlar" not in href:
+                course_name = link.get_text(strip=True)
+                break
+
+    # Alternatif: h1 veya h2'den ders adı
+    if course_name == "Bilinmeyen Ders":
+        h1 = soup.find("h1")
+        if h1:
+            course_name = h1.get_text(strip=True)
+
+    grades_data = {"course_name": course_name, "grades": {}}
+
+    # Not tablosunu bul (table.data veya id'si rpGalileoNot olan spanların bulunduğu tablo)
+    tables = soup.find_all("table", class_="data")
+    if not tables:
+        # Table class='data' olmayabilir, belki de standart tablo yapısı farklıdır
+        # Tablo içindeki span id'leri 'ctl00_ContentPlaceHolder1_rpGalileoNot' ile başlıyor
+        pass
+
+    for table in tables:
+        # Header var mı kontrol et
+        header_row = table.find("tr")
+        if not header_row or not header_row.find("th"):
+            continue
+
+        rows = table.find_all("tr")
+        for row in rows:
+            cols = row.find_all(["td", "th"])
+
+            # Header satırını atla
+            if cols and cols[0].name == "th":
+                continue
+
+            if len(cols) < 2:
+                continue
+
+            # İlk kolon not adı (içinde span ve script olabilir)
+            name_col = cols[0]
+            # İkinci kolon not değeri
+            grade_col = cols[1]
+
+            # Not Adı
+            # <span id="eas109760">Midterm Exam</span>
+            name_span = name_col.find("span", id=re.compile(r"^eas\d+"))
+            key = name_span.get_text(strip=True) if name_span else name_col.get_text(strip=True)
+
+            # Not Değeri
+            value = grade_col.get_text(strip=True)
+
+            # Ağırlık ve diğer detaylar Script içinde olabilir
+            # new Tip(element, body, ... var body = '...' ... )
+            weight = ""
+            details = {}
+
+            script_tag = name_col.find("script")
+            if script_tag and script_tag.string:
+                js_content = script_tag.string
+                # body değişkenini parse et
+                # var body = '<strong>Not Yüzdesi </strong><span>%30,00</span><br style="clear:both;" />';
+                # body += '<strong>Ortalama </strong><span>41,29</span><br style="clear:both;" />';
+
+                # Regex ile değerleri çek
+                # Not Yüzdesi
+                w_match = re.search(
+                    r"Not Yüzdesi\s*</strong>\s*<span>%?([\d,.]+)</span>",
+                    js_content,
+                )
+                if w_match:
+                    weight = w_match.group(1).replace(",", ".")
+
+                # Ortalama
+                avg_match = re.search(r"Ortalama\s*</strong>\s*<span>([\d,.]+)</span>", js_content)
+                if avg_match:
+                    details["class_avg"] = avg_match.group(1)
+
+                # Standart Sapma
+                std_match = re.search(
+                    r"Standart Sapma\s*</strong>\s*<span>([\d,.]+)</span>",
+                    js_content,
+                )
+                if std_match:
+                    details["std_dev"] = std_match.group(1)
+
+                # Öğrenci Sayısı
+                count_match = re.search(
+                    r"Öğrenci Sayısı\s*</strong>\s*<span>(\d+)</span>", js_content
+                )
+                if count_match:
+                    details["student_count"] = count_match.group(1)
+
+                # Sıralamanız
+                rank_match = re.search(r"Sıralamanız\s*</strong>\s*<span>(\d+)</span>", js_content)
+                if rank_match:
+                    details["rank"] = rank_match.group(1)
+
+            # Skip keywords...
+            skip_keywords = ["ağırlıklı ortalamanız", "weighted average"]
+            if any(kw in key.lower() for kw in skip_keywords):
+                continue
+
+            if key and value:
+                grades_data["grades"][key] = {
+                    "not": value,
+                    "agirlik": weight,
+                    "detaylar": details,
+                }
+
+    return grades_data
+
+
+def _fetch_section(session, base_url, section, fetcher):
+    """
+    Bir ders bölümünü çeker; sınıf düzeyindeki bölümler kullanıcılar arası paylaşılır.
+
+    Paylaşılan bölümler (dosyalar, duyurular) ders URL'i ve bölüm adıyla kısa süre
+    önbelleğe alınır ve aynı anda gelen istekler tek bir çekimde birleştirilir.
+    Önbellekten dönen içeriğin sayfa hash'leri de tarama bağlamına işlenir.
+
+    :param session: requests.Session nesnesi
+    :param base_url: Ders ana sayfa URL'i
+    :param section: Bölüm adı
+    :param fetcher: (session, base_url) -> veri veya None
+    :return: Bölüm verisi veya None (hata)
+    """
+    scan = _scan_pages.get()
+    if scan is not None:
+        scan["section"] = section
+    if section not in _SHARED_SECTIONS:
+        return fetcher(session, base_url)
+
+    def fetch():
+        data = fetcher(session, base_url)
+        if data is None:
+            return None
+        pages = dict(scan["pages"].get(section, {})) if scan is not None else {}
+        return {"data": data, "pages": pages}
+
+    shared = get_shared_cache(SHARED_CONTENT_TTL).get_or_fetch(base_url, section, fetch)
+    if shared is None:
+        return None
+    if scan is not None:
+        scan["pages"].setdefault(section, {}).update(shared["pages"])
+    return shared["data"]
+
+
+def _new_course_data(page):
+    """Not sayfası parse sonucundan boş bölümlerle ders verisi oluşturur."""
+    return {
+        "course_name": page["course_name"],
+        "grades": page["grades"],
+        "assignments": [],
+        "files": [],
+        "announcements": [],
+        "fetch_success": True,  # Network hatalarında False yapılacak
+    }
+
+
+def _fetch_course_data(session, base_url, chat_id, username, password, sections=SECTIONS):
+    """Not sayfasını ve planlanan diğer bölümleri çeker (get_grades'in tarama bağlamı içinde).
+
+    Dosyalar planlanmamış olsa bile üst düzey dosya listelerinden biri değiştiyse
+    dosya ağacı bu taramada yeniden çekilir.
+    """
+    sections = set(sections)
     url = f"{base_url}/Notlar"
     try:
         response = http_request(
@@ -785,151 +1422,28 @@ def get_grades(session, base_url, chat_id, username, password):
                 action="ninova_fetch_grades",
             )
             return None
-        soup = BeautifulSoup(response.text, "html.parser")
-        course_name = "Bilinmeyen Ders"
-
-        # Ders adını yol div'inden veya başlıktan al
-        yol_div = soup.find("div", class_="yol")
-        if yol_div:
-            for link in yol_div.find_all("a"):
-                href = link.get("href", "")
-                if "/Sinif/" in href and "Notlar" not in href:
-                    course_name = link.get_text(strip=True)
-                    break
+        page = _parse_page(url, response.text, _parse_grades_page)
+        grades_data = _new_course_data(page)
 
-        # Alternatif: h1 veya h2'den ders adı
-        if course_name == "Bilinmeyen Ders":
-            h1 = soup.find("h1")
-            if h1:
-                course_name = h1.get_text(strip=True)
-
-        grades_data = {
-            "course_name": course_name,
-            "grades": {},
-            "assignments": [],
-            "files": [],
-            "announcements": [],
-            "fetch_success": True,  # Network hatalarında False yapılacak
-        }
+        if "files" not in sections and _file_listings_changed(session, base_url, str(chat_id)):
+            sections.add("files")
 
-        # Not tablosunu bul (table.data veya id'si rpGalileoNot olan spanların bulunduğu tablo)
-        tables = soup.find_all("table", class_="data")
-        if not tables:
-            # Table class='data' olmayabilir, belki de standart tablo yapısı farklıdır
-            # Tablo içindeki span id'leri 'ctl00_ContentPlaceHolder1_rpGalileoNot' ile başlıyor
-            pass
-
-        for table in tables:
-            # Header var mı kontrol et
-            header_row = table.find("tr")
-            if not header_row or not header_row.find("th"):
+        # Base URL ile planlanan diğer verileri çek
+        fetchers = {
+            "assignments": get_assignments,
+            "files": get_all_files,
+            "announcements": get_announcements,
+        }
+        for section, fetcher in fetchers.items():
+            if section not in sections:
                 continue
+            result = _fetch_section(session, base_url, section, fetcher)
+            if result is None:
+                grades_data["fetch_success"] = False
+                result = []
+            grades_data[section] = result
 
-            rows = table.find_all("tr")
-            for row in rows:
-                cols = row.find_all(["td", "th"])
-
-                # Header satırını atla
-                if cols and cols[0].name == "th":
-                    continue
-
-                if len(cols) < 2:
-                    continue
-
-                # İlk kolon not adı (içinde span ve script olabilir)
-                name_col = cols[0]
-                # İkinci kolon not değeri
-                grade_col = cols[1]
-
-                # Not Adı
-                # <span id="eas109760">Midterm Exam</span>
-                name_span = name_col.find("span", id=re.compile(r"^eas\d+"))
-                key = name_span.get_text(strip=True) if name_span else name_col.get_text(strip=True)
-
-                # Not Değeri
-                value = grade_col.get_text(strip=True)
-
-                # Ağırlık ve diğer detaylar Script içinde olabilir
-                # new Tip(element, body, ... var body = '...' ... )
-                weight = ""
-                details = {}
-
-                script_tag = name_col.find("script")
-                if script_tag and script_tag.string:
-                    js_content = script_tag.string
-                    # body değişkenini parse et
-                    # var body = '<strong>Not Yüzdesi </strong><span>%30,00</span><br style="clear:both;" />';
-                    # body += '<strong>Ortalama </strong><span>41,29</span><br style="clear:both;" />';
-
-                    # Regex ile değerleri çek
-                    # Not Yüzdesi
-                    w_match = re.search(
-                        r"Not Yüzdesi\s*</strong>\s*<span>%?([\d,.]+)</span>",
-                        js_content,
-                    )
-                    if w_match:
-                        weight = w_match.group(1).replace(",", ".")
-
-                    # Ortalama
-                    avg_match = re.search(
-                        r"Ortalama\s*</strong>\s*<span>([\d,.]+)</span>", js_content
-                    )
-                    if avg_match:
-                        details["class_avg"] = avg_match.group(1)
-
-                    # Standart Sapma
-                    std_match = re.search(
-                        r"Standart Sapma\s*</strong>\s*<span>([\d,.]+)</span>",
-                        js_content,
-                    )
-                    if std_match:
-                        details["std_dev"] = std_match.group(1)
-
-                    # Öğrenci Sayısı
-                    count_match = re.search(
-                        r"Öğrenci Sayısı\s*</strong>\s*<span>(\d+)</span>", js_content
-                    )
-                    if count_match:
-                        details["student_count"] = count_match.group(1)
-
-                    # Sıralamanız
-                    rank_match = re.search(
-                        r"Sıralamanız\s*</strong>\s*<span>(\d+)</span>", js_content
-                    )
-                    if rank_match:
-                        details["rank"] = rank_match.group(1)
-
-                # Skip keywords...
-                skip_keywords = ["ağırlıklı ortalamanız", "weighted average"]
-                if any(kw in key.lower() for kw in skip_keywords):
-                    continue
-
-                if key and value:
-                    grades_data["grades"][key] = {
-                        "not": value,
-                        "agirlik": weight,
-                        "detaylar": details,
-                    }
-
-        # Base URL ile diğer verileri çek
-        assignments = get_assignments(session, base_url)
-        if assignments is None:
-            grades_data["fetch_success"] = False
-            assignments = []
-
-        files = get_all_files(session, base_url)
-        if files is None:
-            grades_data["fetch_success"] = False
-            files = []
-
-        announcements = get_announcements(session, base_url)
-        if announcements is None:
-            grades_data["fetch_success"] = False
-            announcements = []
-
-        grades_data["assignments"] = assignments
-        grades_data["files"] = files
-        grades_data["announcements"] = announcements
+        grades_data["fetched_sections"] = [section for section in SECTIONS if section in sections]
         return grades_data
     except LoginFailedError:
         raise
@@ -962,7 +1476,7 @@ def get_class_info(session, class_url):
         if response.status_code != 200:
             return {}
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = make_soup(response.text)
         # "Bitiş Tarihi" metnini içeren hücreyi bul
         # Genelde <td>Başlangıç Tarihi</td><td>...</td> yapısında olabilir
         # veya <span>...
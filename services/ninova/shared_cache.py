@@ -0,0 +1,216 @@
+"""
+SharedContentCache: Cross-user cache for class-level Ninova content.
+
+Announcements and class/course files under a /Sinif/<id> URL are the same for
+every enrolled student, so one fetch can serve all subscribers of a course:
+- Entries are keyed by (course URL, section) and expire after a short TTL
+- Concurrent requests for the same key are coalesced (single-flight): one
+  caller fetches, the others wait for its result
+- Failed fetches (None) are never cached
+
+get_or_fetch serves scan threads; get_or_fetch_async serves the asyncio scan
+engine with the same entries and statistics.
+"""
+
+import asyncio
+import contextlib
+import copy
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+logger = logging.getLogger("ninova")
+
+
+class SharedContentCache:
+    """
+    Thread-safe TTL cache with single-flight request coalescing.
+
+    Features:
+    - Short TTL (one fetch per course per scan cycle)
+    - In-flight deduplication across users
+    - Deep-copied results (callers may mutate them freely)
+    - Hit/miss/coalesced statistics
+    """
+
+    # Class constants
+    DEFAULT_TTL = 120
+    WAIT_TIMEOUT = 60  # Max seconds a follower waits for the leader's fetch
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        """
+        Initialize SharedContentCache.
+
+        Args:
+            ttl: Entry lifetime in seconds (0 disables caching)
+        """
+        self._ttl = ttl
+        self._entries: dict[tuple[str, str], tuple[float, object]] = {}
+        self._in_flight: dict[tuple[str, str], threading.Event] = {}
+        self._async_in_flight: dict[tuple[str, str], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def _fresh(self, key: tuple[str, str], now: float):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] < self._ttl:
+            return entry[1]
+        return None
+
+    def get_or_fetch(self, course_url: str, section: str, fetcher: Callable):
+        """
+        Return cached content for a course section, fetching it at most once.
+
+        Args:
+            course_url: Course base URL
+            section: Section name (e.g. "files", "announcements")
+            fetcher: Zero-argument callable; returns content or None on failure
+
+        Returns:
+            Content (a private copy) or None if the fetch failed
+        """
+        if self._ttl <= 0:
+            return fetcher()
+
+        key = (course_url, section)
+        with self._lock:
+            cached = self._fresh(key, time.monotonic())
+            if cached is not None:
+                self._stats["hits"] += 1
+                return copy.deepcopy(cached)
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = threading.Event()
+                self._stats["misses"] += 1
+
+        if not leader:
+            flight.wait(self.WAIT_TIMEOUT)
+            with self._lock:
+                cached = self._fresh(key, time.monotonic())
+                if cached is not None:
+                    self._stats["coalesced"] += 1
+                    return copy.deepcopy(cached)
+                self._stats["misses"] += 1
+            # Leader failed or timed out: fetch with our own session
+            return fetcher()
+
+        result = None
+        try:
+            result = fetcher()
+        finally:
+            with self._lock:
+                self._store(key, result)
+                del self._in_flight[key]
+            flight.set()
+        return result
+
+    async def get_or_fetch_async(self, course_url: str, section: str, fetcher: Callable):
+        """
+        Async variant of get_or_fetch for callers on a single event loop.
+
+        Args:
+            course_url: Course base URL
+            section: Section name (e.g. "files", "announcements")
+            fetcher: Zero-argument coroutine function; returns content or None on failure
+
+        Returns:
+            Content (a private copy) or None if the fetch failed
+        """
+        if self._ttl <= 0:
+            return await fetcher()
+
+        key = (course_url, section)
+        with self._lock:
+            cached = self._fresh(key, time.monotonic())
+            if cached is not None:
+                self._stats["hits"] += 1
+                return copy.deepcopy(cached)
+            flight = self._async_in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = asyncio.get_running_loop().create_future()
+                self._async_in_flight[key] = flight
+                self._stats["misses"] += 1
+
+        if not leader:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(asyncio.shield(flight), self.WAIT_TIMEOUT)
+            with self._lock:
+                cached = self._fresh(key, time.monotonic())
+                if cached is not None:
+                    self._stats["coalesced"] += 1
+                    return copy.deepcopy(cached)
+                self._stats["misses"] += 1
+            # Leader failed or timed out: fetch with our own session
+            return await fetcher()
+
+        result = None
+        try:
+            result = await fetcher()
+        finally:
+            with self._lock:
+                self._store(key, result)
+                del self._async_in_flight[key]
+            flight.set_result(None)
+        return result
+
+    def _store(self, key: tuple[str, str], result) -> None:
+        """Cache a successful result and drop expired entries (caller holds the lock)."""
+        now = time.monotonic()
+        if result is not None:
+            self._entries[key] = (now, copy.deepcopy(result))
+        for stale in [k for k, (ts, _) in self._entries.items() if now - ts >= self._ttl]:
+            del self._entries[stale]
+
+    def clear(self) -> None:
+        """Drop all cached content."""
+        with self._lock:
+            self._entries.clear()
+
+    def reset_stats(self) -> None:
+        """Reset counters (e.g. at the start of a scan cycle)."""
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with cache stats
+        """
+        with self._lock:
+            served = self._stats["hits"] + self._stats["coalesced"]
+            lookups = served + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "ttl": self._ttl,
+                "hits": self._stats["hits"],
+                "coalesced": self._stats["coalesced"],
+                "misses": self._stats["misses"],
+                "hit_rate": round(served / lookups * 100, 1) if lookups else 0.0,
+            }
+
+
+# Global singleton instance
+_shared_cache: SharedContentCache | None = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache(ttl: float = SharedContentCache.DEFAULT_TTL) -> SharedContentCache:
+    """
+    Get or create global SharedContentCache instance.
+
+    Args:
+        ttl: Entry lifetime (only used if creating new instance)
+
+    Returns:
+        Global SharedContentCache instance
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SharedContentCache(ttl=ttl)
+        return _shared_cache
@@ -1,10 +1,10 @@
 import logging
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from common.html_parser import make_soup
 from common.http_logging import http_request
 from common.log_context import log_with_context
 
@@ -85,7 +85,7 @@ class RehberScraper:
                 )
                 return False
 
-            soup = BeautifulSoup(resp.text, "html.parser")
+            soup = make_soup(resp.text)
 
             # 2. Login formunun hidden field'larını al
             form_data = {}
@@ -169,7 +169,7 @@ class RehberScraper:
                 action="rehber_search_home",
                 timeout=10,
             )
-            soup = BeautifulSoup(res.text, "html.parser")
+            soup = make_soup(res.text)
 
             token_input = soup.find("input", {"name": "__RequestVerificationToken"})
             req_token = token_input["value"] if token_input else ""
@@ -235,7 +235,7 @@ class RehberScraper:
                 action="rehber_detail",
                 timeout=10,
             )
-            soup = BeautifulSoup(res.text, "html.parser")
+            soup = make_soup(res.text)
 
             detail = {"email": "", "phone": "", "extras": {}}
 
@@ -291,7 +291,7 @@ class RehberScraper:
         """
         Arama sonuç tablosunu parse eder.
         """
-        soup = BeautifulSoup(html, "html.parser")
+        soup = make_soup(html)
         results = []
 
         table = soup.find("table")
@@ -1,11 +1,9 @@
-import json
 import logging
-import time
 from datetime import datetime
 from pathlib import Path
 
-from common.config import DATA_DIR, atomic_json_write, load_all_users
-from common.utils import send_telegram_message
+from common.broadcast import broadcast
+from common.config import DATA_DIR, load_all_users, load_state, save_state
 from services.sks.scraper import get_meal_menu
 
 logger = logging.getLogger("ninova.sks")
@@ -13,17 +11,11 @@ STATE_FILE = Path(DATA_DIR) / "sks_state.json"
 
 
 def load_sks_state():
-    if Path(STATE_FILE).exists():
-        try:
-            with Path(STATE_FILE).open(encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return load_state(STATE_FILE, {})
 
 
 def save_sks_state(state):
-    atomic_json_write(STATE_FILE, state)
+    save_state(STATE_FILE, state)
 
 
 def check_and_announce_sks_menu():
@@ -80,9 +72,11 @@ def announce(date_str, slot):
         return
 
     logger.info(f"Broadcasting SKS menu to {len(users)} users.")
-    for chat_id in users:
-        try:
-            send_telegram_message(chat_id, menu_html)
-            time.sleep(0.5)  # Avoid hitting Telegram rate limits
-        except Exception as e:
-            logger.error(f"Failed to send SKS menu to {chat_id}: {e}")
+    # Aynı gün/öğün için iş kimliği sabit: yeniden başlatmada yalnızca kalan alıcılara gönderilir
+    broadcast(
+        f"sks:{date_str}:{slot}",
+        "sendMessage",
+        {"text": menu_html, "parse_mode": "HTML"},
+        users,
+        title="SKS Menü",
+    )
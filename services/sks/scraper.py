@@ -2,9 +2,9 @@ import logging
 from datetime import datetime
 
 import requests
-from bs4 import BeautifulSoup
 
 from common.config import HEADERS
+from common.html_parser import make_soup
 
 logger = logging.getLogger("ninova.sks")
 
@@ -32,7 +32,7 @@ def get_meal_menu(meal_type="lunch"):
         response = requests.get(SKS_API_URL, params=params, headers=HEADERS, timeout=15)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = make_soup(response.text)
 
         # The endpoint returns a direct HTML fragment with table rows
         menu_items = []
@@ -0,0 +1,206 @@
+"""Tests for services/ninova/async_engine.py (asyncio scan engine)."""
+
+import asyncio
+
+import pytest
+import requests
+
+from services.ninova import async_engine, auth, scraper
+from services.ninova.auth import LoginFailedError
+from services.ninova.fetch_plan import FetchPlan
+from services.ninova.folder_memo import FolderMemo
+from services.ninova.page_cache import PageCache
+from services.ninova.shared_cache import SharedContentCache
+
+BASE_URL = "https://ninova.itu.edu.tr/Sinif/1.2"
+
+PAGES = {
+    "/Notlar": (
+        '<div class="yol"><a href="/Sinif/1.2">BLG 101</a></div>'
+        '<table class="data"><tr><th>Ad</th><th>Not</th></tr>'
+        "<tr><td>Vize</td><td>85</td></tr></table>"
+    ),
+    "/Odevler": (
+        '<table class="data"><tr><td><h2><a href="/Sinif/1.2/Odev/5">Ödev 1</a></h2>'
+        "</td></tr></table>"
+    ),
+    "/Odev/5": (
+        '<span class="title_field">Teslim Bitişi</span>'
+        '<span class="data_field">10 Ocak 2026 23:59</span>'
+    ),
+    "/SinifDosyalari": (
+        '<table class="data"><tr><td><img src="/images/ds/folder.png"/>'
+        '<a href="?g1">Hafta1</a></td><td></td><td>01 Ocak 2025</td></tr>'
+        '<tr><td><img src="/ikon-pdf.png"/><a href="/f/0">giris.pdf</a></td>'
+        "<td>1 MB</td><td>01 Ocak 2025 09:00</td></tr></table>"
+    ),
+    "/SinifDosyalari?g1": (
+        '<table class="data"><tr><td><img src="/ikon-pdf.png"/>'
+        '<a href="/f/1">a.pdf</a></td><td>1 MB</td><td>01 Ocak 2025 10:00</td></tr></table>'
+    ),
+    "/DersDosyalari": "<p>yok</p>",
+    "/Duyurular": (
+        '<div class="duyuruGoruntule"><h2><a href="/Sinif/1.2/Duyuru/7">Sınav</a></h2>'
+        '<div class="tarih"><span class="tarih">03 Ocak 2026 16:53</span></div>'
+        '<div class="icerik">Yarın</div></div>'
+    ),
+}
+
+
+class _Response:
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+
+
+class _Session:
+    """Threaded engine session (requests-like)."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def request(self, _method, url, **_kwargs):
+        return _Response(url, self.pages[url.removeprefix(BASE_URL)])
+
+
+class _AsyncSession:
+    """Async engine session serving the same pages."""
+
+    def __init__(self, pages, cookies=None):
+        self.pages = pages
+        self.cookies = dict(cookies or {})
+        self.requested = []
+        self.closed = False
+
+    async def request(self, method, url, **kwargs):
+        self.requested.append((method, url))
+        await asyncio.sleep(0)
+        if url.startswith(BASE_URL):
+            return _Response(url, self.pages[url.removeprefix(BASE_URL)])
+        return await self.login_request(method, url, **kwargs)
+
+    async def login_request(self, _method, url, **_kwargs):
+        raise AssertionError(f"Unexpected request: {url}")
+
+    def cookie_dict(self):
+        return self.cookies
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    """Fresh fetch plan, page cache, folder memo and shared cache for one scan."""
+
+    def reset():
+        plan, cache, memo = FetchPlan(), PageCache(), FolderMemo()
+        shared = SharedContentCache(ttl=60)
+        monkeypatch.setattr(scraper, "get_page_cache", lambda *_args: cache)
+        monkeypatch.setattr(async_engine, "get_fetch_plan", lambda *_args: plan)
+        monkeypatch.setattr(async_engine, "get_folder_memo", lambda *_args: memo)
+        monkeypatch.setattr(async_engine, "get_shared_cache", lambda *_args: shared)
+        monkeypatch.setattr(scraper, "get_fetch_plan", lambda *_args: plan)
+        monkeypatch.setattr(scraper, "get_folder_memo", lambda *_args: memo)
+        monkeypatch.setattr(scraper, "get_shared_cache", lambda *_args: shared)
+        return shared
+
+    return reset
+
+
+class TestAsyncScraper:
+    def test_same_result_as_threaded_engine(self, fresh_caches):
+        fresh_caches()
+        threaded = scraper.get_grades(_Session(PAGES), BASE_URL, "1", "user", "pw")
+        fresh_caches()
+        session = _AsyncSession(PAGES)
+        result = asyncio.run(async_engine.get_grades_async(session, BASE_URL, "1", "user", "pw"))
+
+        assert result == threaded
+        assert [f["name"] for f in result["files"]] == ["Hafta1/a.pdf", "giris.pdf"]
+        assert result["assignments"][0]["end_date"] == "10 Ocak 2026 23:59"
+        assert set(result["section_hashes"]) == {"grades", "assignments", "files", "announcements"}
+
+    def test_class_sections_shared_between_concurrent_users(self, fresh_caches):
+        shared = fresh_caches()
+        sessions = [_AsyncSession(PAGES) for _ in range(3)]
+
+        async def scan_all():
+            return await asyncio.gather(
+                *(
+                    async_engine.get_grades_async(session, BASE_URL, str(i), "user", "pw")
+                    for i, session in enumerate(sessions)
+                )
+            )
+
+        results = asyncio.run(scan_all())
+
+        assert results[1]["files"] == results[0]["files"] == results[2]["files"]
+        announcement_fetches = sum(
+            url.endswith("/Duyurular") for session in sessions for _, url in session.requested
+        )
+        assert announcement_fetches == 1
+        stats = shared.stats()
+        assert stats["hits"] + stats["coalesced"] == 4  # files + announcements, two followers
+
+
+class TestAsyncLogin:
+    def test_invalid_credentials(self, monkeypatch):
+        monkeypatch.setattr(auth, "MAX_LOGIN_RETRIES", 1)
+
+        class LoginSession(_AsyncSession):
+            async def login_request(self, method, url, **_kwargs):
+                if url.endswith("/Kampus"):
+                    return _Response(url, "", status_code=302)
+                if method == "GET":
+                    return _Response(url, '<input name="__VIEWSTATE" value="x" />')
+                return _Response("https://ninova.itu.edu.tr/Login.aspx", "Hatalı")
+
+        with pytest.raises(LoginFailedError) as exc_info:
+            asyncio.run(auth.async_login_to_ninova(LoginSession({}), "1", "user", "pw"))
+
+        assert exc_info.value.error_type == "INVALID_CREDENTIALS"
+
+    def test_network_errors_retry_then_fail(self, monkeypatch):
+        monkeypatch.setattr(auth, "MAX_LOGIN_RETRIES", 2)
+        monkeypatch.setattr(auth, "RETRY_BACKOFF_BASE", 0)
+
+        class DownSession(_AsyncSession):
+            async def login_request(self, _method, _url, **_kwargs):
+                raise requests.exceptions.ConnectionError("down")
+
+        session = DownSession({})
+        with pytest.raises(LoginFailedError) as exc_info:
+            asyncio.run(auth.async_login_to_ninova(session, "1", "user", "pw"))
+
+        assert exc_info.value.error_type == "NETWORK_TIMEOUT"
+        assert len(session.requested) == 4  # session check + login page, twice
+
+
+class TestAsyncScanEngine:
+    def test_submit_returns_future_and_syncs_cookies(self, fresh_caches):
+        fresh_caches()
+        created = []
+
+        def factory(cookies):
+            session = _AsyncSession(PAGES, cookies)
+            session.cookies["ASP.NET_SessionId"] = "new"
+            created.append(session)
+            return session
+
+        engine = async_engine.AsyncScanEngine(session_factory=factory)
+        requests_session = requests.Session()
+        requests_session.cookies.set(".ASPXAUTH", "auth", domain="ninova.itu.edu.tr", path="/")
+        try:
+            future = engine.submit("1", requests_session, BASE_URL, "user", "pw")
+            result = future.result(timeout=10)
+            engine.prune([])
+        finally:
+            engine.shutdown(wait=True)
+
+        assert result["course_name"] == "BLG 101"
+        assert created[0].cookies[".ASPXAUTH"] == "auth"
+        assert requests_session.cookies.get("ASP.NET_SessionId") == "new"
+        assert created[0].closed
+        assert engine.stats()["completed"] == 1
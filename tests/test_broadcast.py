@@ -0,0 +1,167 @@
+"""Tests for common/broadcast.py (resumable broadcast jobs)."""
+
+import threading
+import time
+
+import pytest
+
+from common.broadcast import BroadcastEngine
+from common.cache_manager import CacheManager
+from common.notifier import TelegramApiError
+
+
+class _Sender:
+    """Records Bot API calls; failures maps chat_id -> list of errors to raise first."""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = failures or {}
+        self.lock = threading.Lock()
+
+    def __call__(self, method, payload, chat_id):
+        with self.lock:
+            errors = self.failures.get(chat_id)
+            if errors:
+                raise errors.pop(0)
+            self.calls.append((time.monotonic(), chat_id, method, payload))
+            return {"message_id": len(self.calls)}
+
+    def recipients(self, method="sendMessage", admin="99"):
+        return [call[1] for call in self.calls if call[2] == method and call[1] != admin]
+
+
+def _wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def make_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(BroadcastEngine, "MAX_BACKOFF", 0)
+    created = []
+
+    def make(sender, **kwargs):
+        options = {"workers": 4, "progress_interval": 0}
+        options.update(kwargs)
+        engine = BroadcastEngine(tmp_path / "outbox.db", sender=sender, **options)
+        created.append(engine)
+        return engine
+
+    yield make
+    for engine in created:
+        if not engine._stop.is_set():
+            engine.stop()
+
+
+class TestBroadcastEngine:
+    def test_drain_delivers_each_recipient_once(self, make_engine):
+        sender = _Sender()
+        engine = make_engine(sender)
+        chat_ids = [str(i) for i in range(20)]
+
+        assert engine.submit("job", "sendMessage", {"text": "x"}, [*chat_ids, "3"])
+        engine.drain("job")
+
+        assert sender.recipients() == chat_ids
+        assert sender.calls[0][3] == {"text": "x", "chat_id": "0"}
+        assert engine.progress("job") == {
+            "sent": 20,
+            "failed": 0,
+            "unknown": 0,
+            "pending": 0,
+            "total": 20,
+        }
+        assert engine.active_jobs() == []
+
+    def test_resubmitting_job_id_is_noop(self, make_engine):
+        sender = _Sender()
+        engine = make_engine(sender)
+        assert engine.submit("sks:2026-10-17:lunch", "sendMessage", {"text": "x"}, ["1"])
+        engine.drain()
+
+        assert not engine.submit("sks:2026-10-17:lunch", "sendMessage", {"text": "x"}, ["1"])
+        engine.drain("sks:2026-10-17:lunch")
+        assert sender.recipients() == ["1"]
+
+    def test_resume_skips_sent_and_in_flight_recipients(self, make_engine):
+        first = make_engine(_Sender())
+        first.submit("job", "sendMessage", {"text": "x"}, ["1", "2", "3", "4"])
+        first._process(*first._claim("job"))  # "1" gönderildi
+        first._claim("job")  # "2" gönderilirken çöktü
+        first.stop()
+
+        sender = _Sender()
+        second = make_engine(sender)
+        assert second.active_jobs() == ["job"]
+        second.start()
+
+        assert _wait_for(lambda: not second.active_jobs())
+        assert sorted(sender.recipients()) == ["3", "4"]
+        progress = second.progress("job")
+        assert (progress["sent"], progress["unknown"]) == (3, 1)
+
+    def test_errors_are_reported_to_admin(self, make_engine):
+        sender = _Sender(
+            {
+                "2": [TelegramApiError(403, "Forbidden: bot was blocked by the user")],
+                "3": [TelegramApiError(502, "Bad Gateway")],
+            }
+        )
+        engine = make_engine(sender)
+        engine.submit("job", "sendMessage", {"text": "x"}, ["1", "2", "3"], report_to="99")
+        engine.drain("job")
+
+        assert sorted(sender.recipients()) == ["1", "3"]
+        assert engine.progress("job")["failed"] == 1
+        assert _wait_for(
+            lambda: any("Gönderildi" in call[3].get("text", "") for call in sender.calls)
+        )
+        reports = [call for call in sender.calls if call[1] == "99"]
+        assert reports[0][2] == "sendMessage"
+        assert any(call[2] == "editMessageText" for call in reports)
+        final = reports[-1][3]["text"]
+        assert "✅ Başarılı: 2" in final
+        assert "<code>2</code> - Bot engellendi" in final
+
+    def test_retry_after_pauses_and_resends(self, make_engine):
+        sender = _Sender({"1": [TelegramApiError(429, "Too Many Requests", retry_after=0.2)]})
+        engine = make_engine(sender)
+        start = time.monotonic()
+        engine.submit("job", "sendPhoto", {"photo": "https://x/y.png"}, ["1", "2"])
+        engine.drain("job")
+
+        assert sender.recipients("sendPhoto") == ["1", "2"]
+        assert sender.calls[0][0] - start >= 0.18
+        assert engine.progress("job")["sent"] == 2
+
+    def test_remote_photo_is_uploaded_once_and_cached(self, make_engine, tmp_path):
+        class PhotoSender(_Sender):
+            def __call__(self, method, payload, chat_id):
+                result = super().__call__(method, payload, chat_id)
+                return {**result, "photo": [{"file_id": "small"}, {"file_id": "big"}]}
+
+        cache = CacheManager(cache_file=tmp_path / "file_cache.json")
+        sender = PhotoSender()
+        engine = make_engine(sender, media_cache=cache)
+        url = "https://ari24.com/img/event.png"
+        engine.submit("job", "sendPhoto", {"photo": url, "caption": "c"}, ["1", "2", "3", "4"])
+        engine.start()
+
+        assert _wait_for(lambda: not engine.active_jobs())
+        photos = [call[3]["photo"] for call in sender.calls]
+        assert photos.count(url) == 1
+        assert photos.count("big") == 3
+        assert cache.get(url) == "big"
+        cache.flush()  # Önbellek toplu yazar; kalıcılığı açıkça doğrula
+        assert CacheManager(cache_file=tmp_path / "file_cache.json").get(url) == "big"
+
+        # Yeni iş önbellekteki file_id ile başlar; rededilirse URL'ye döner
+        sender.failures["5"] = [TelegramApiError(400, "Bad Request: wrong file identifier")]
+        engine.submit("job-2", "sendPhoto", {"photo": url}, ["5", "6"])
+        assert _wait_for(lambda: not engine.active_jobs())
+        assert [call[3]["photo"] for call in sender.calls[4:]] in ([url, "big"], ["big", url])
+        assert engine.progress("job-2")["sent"] == 2
@@ -93,3 +93,120 @@ class TestCacheManagerStats:
         assert "misses" in stats
         assert "evictions" in stats
         assert "hit_rate_percent" in stats
+
+
+class TestCacheManagerWriteBehind:
+    def _make(self, tmp_path, **kwargs):
+        options = {"flush_interval": 60, "flush_threshold": 100, "compact_threshold": 1000}
+        options.update(kwargs)
+        return CacheManager(cache_file=tmp_path / "cache.json", **options)
+
+    def test_set_does_not_rewrite_snapshot(self, tmp_path):
+        cache = self._make(tmp_path)
+        for i in range(20):
+            cache.set(f"k{i}", f"v{i}")
+
+        assert not (tmp_path / "cache.json").exists()
+        assert not (tmp_path / "cache.log").exists()
+        assert cache.stats()["dirty"] == 20
+
+    def test_threshold_appends_to_log_and_reload_replays(self, tmp_path):
+        cache = self._make(tmp_path, flush_threshold=5)
+        for i in range(12):
+            cache.set(f"k{i}", f"v{i}")
+
+        lines = (tmp_path / "cache.log").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 10  # İki toplu ekleme; kalan 2 kayıt henüz kirli
+        assert cache.stats()["flushes"] == 2
+
+        cache.flush()
+        reloaded = self._make(tmp_path)
+        assert reloaded.get("k0") == "v0"
+        assert reloaded.get("k11") == "v11"
+        assert reloaded.stats()["log_entries"] == 12
+
+    def test_debounce_timer_flushes(self, tmp_path):
+        cache = self._make(tmp_path, flush_interval=0.05)
+        cache.set("k", "v")
+        deadline = time.monotonic() + 5
+        while cache.stats()["dirty"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert cache.stats()["dirty"] == 0
+        assert self._make(tmp_path).get("k") == "v"
+
+    def test_compaction_rewrites_snapshot_and_truncates_log(self, tmp_path):
+        cache = self._make(tmp_path, flush_threshold=1, compact_threshold=4)
+        for i in range(5):
+            cache.set("same", f"v{i}")
+
+        assert cache.stats()["compactions"] == 1
+        log_lines = (tmp_path / "cache.log").read_text(encoding="utf-8").splitlines()
+        assert len(log_lines) == 1
+        assert self._make(tmp_path).get("same") == "v4"
+
+    def test_sync_leaves_single_snapshot(self, tmp_path):
+        cache = self._make(tmp_path, flush_threshold=2)
+        for i in range(3):
+            cache.set(f"k{i}", f"v{i}")
+        cache.sync()
+
+        assert not (tmp_path / "cache.log").exists()
+        assert cache.stats()["dirty"] == 0
+        reloaded = self._make(tmp_path)
+        assert [reloaded.get(f"k{i}") for i in range(3)] == ["v0", "v1", "v2"]
+
+    def test_sync_keeps_entries_when_snapshot_write_fails(self, tmp_path, monkeypatch):
+        cache = self._make(tmp_path)
+        cache.set("k", "v")
+        monkeypatch.setattr(cache, "_save_to_file", lambda _data: False)
+        cache.sync()
+
+        assert (tmp_path / "cache.log").exists()
+        assert self._make(tmp_path).get("k") == "v"
+
+    def test_truncated_log_line_is_ignored(self, tmp_path):
+        cache = self._make(tmp_path, flush_threshold=1)
+        cache.set("a", "1")
+        with (tmp_path / "cache.log").open("a", encoding="utf-8") as f:
+            f.write('["b", "2", 17')  # Yazım sırasında çökme
+
+        reloaded = self._make(tmp_path)
+        assert reloaded.get("a") == "1"
+        assert reloaded.get("b") is None
+
+    def test_append_after_torn_line_survives_restart(self, tmp_path):
+        cache = self._make(tmp_path, flush_threshold=1)
+        cache.set("a", "1")
+        with (tmp_path / "cache.log").open("a", encoding="utf-8") as f:
+            f.write('["b", "2", 17')  # Yazım sırasında çökme
+
+        restarted = self._make(tmp_path, flush_threshold=1)
+        restarted.set("c", "3")
+
+        reloaded = self._make(tmp_path)
+        assert reloaded.get("a") == "1"
+        assert reloaded.get("b") is None
+        assert reloaded.get("c") == "3"
+
+    def test_line_missing_only_newline_is_kept(self, tmp_path):
+        log = tmp_path / "cache.log"
+        now = time.time()
+        log.write_text(f'["a", "1", {now}]\n["b", "2", {now}]', encoding="utf-8")
+
+        restarted = self._make(tmp_path, flush_threshold=1)
+        restarted.set("c", "3")
+
+        reloaded = self._make(tmp_path)
+        assert [reloaded.get(k) for k in "abc"] == ["1", "2", "3"]
+
+    def test_older_log_entry_does_not_override_snapshot(self, tmp_path):
+        cache = self._make(tmp_path, flush_threshold=1)
+        cache.set("k", "old")
+        cache.set("k", "new")
+        # Sıkıştırma ile log silme arasında çökme: eski log yeni snapshot'ın üzerine oynatılır
+        log = (tmp_path / "cache.log").read_text(encoding="utf-8")
+        cache.sync()
+        (tmp_path / "cache.log").write_text(log.splitlines()[0] + "\n", encoding="utf-8")
+
+        assert self._make(tmp_path).get("k") == "new"
@@ -0,0 +1,145 @@
+"""Tests for services/ninova/fetch_plan.py and per-section scans in the scraper."""
+
+import pytest
+
+from services.ninova import scraper
+from services.ninova.fetch_plan import FetchPlan
+from services.ninova.folder_memo import FolderMemo
+from services.ninova.page_cache import PageCache
+from services.ninova.shared_cache import SharedContentCache
+
+BASE_URL = "https://ninova.itu.edu.tr/Sinif/1.2"
+
+PAGES = {
+    "/Notlar": (
+        '<div class="yol"><a href="/Sinif/1.2">BLG 101</a></div>'
+        '<table class="data"><tr><td>Vize</td><td>85</td></tr></table>'
+    ),
+    "/Odevler": "<p>yok</p>",
+    "/SinifDosyalari": (
+        '<table class="data"><tr><td><img src="/images/ds/folder.png"/>'
+        '<a href="/Sinif/1.2/SinifDosyalari?g1">Hafta1</a></td><td></td><td>01 Ocak 2025</td>'
+        "</tr></table>"
+    ),
+    "/SinifDosyalari?g1": (
+        '<table class="data"><tr><td><img src="/ikon-pdf.png"/>'
+        '<a href="/f/1">a.pdf</a></td><td>1 MB</td><td>01 Ocak 2025 10:00</td></tr></table>'
+    ),
+    "/DersDosyalari": "<p>yok</p>",
+    "/Duyurular": "<p>yok</p>",
+}
+
+
+class _Response:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.status_code = 200
+
+
+class _Session:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def request(self, _method, url, **_kwargs):
+        path = url.removeprefix(BASE_URL)
+        self.requested.append(path)
+        return _Response(url, self.pages[path])
+
+
+@pytest.fixture
+def plan(monkeypatch):
+    """Fresh fetch plan (files every hour) and page cache used by the scraper."""
+    fetch_plan = FetchPlan({"files": 3600})
+    cache = PageCache()
+    monkeypatch.setattr(scraper, "get_fetch_plan", lambda *_args: fetch_plan)
+    monkeypatch.setattr(scraper, "get_page_cache", lambda *_args: cache)
+    # consecutive calls simulate separate scan cycles
+    monkeypatch.setattr(scraper, "get_shared_cache", lambda *_args: SharedContentCache(ttl=0))
+    monkeypatch.setattr(scraper, "get_folder_memo", lambda *_args: FolderMemo())
+    return fetch_plan
+
+
+class TestFetchPlan:
+    def test_sections_follow_their_intervals(self):
+        fetch_plan = FetchPlan({"files": 100, "announcements": 0})
+        assert fetch_plan.due_sections("1", BASE_URL, now=0) == {
+            "grades",
+            "assignments",
+            "files",
+            "announcements",
+        }
+        fetch_plan.mark_fetched("1", BASE_URL, ["grades", "files"], now=0)
+        assert "files" not in fetch_plan.due_sections("1", BASE_URL, now=99)
+        assert "files" in fetch_plan.due_sections("1", BASE_URL, now=100)
+        assert "files" in fetch_plan.due_sections("2", BASE_URL, now=99)
+
+    def test_grades_are_always_due(self):
+        fetch_plan = FetchPlan({"grades": 1000})
+        fetch_plan.mark_fetched("1", BASE_URL, ["grades"], now=0)
+        assert "grades" in fetch_plan.due_sections("1", BASE_URL, now=1)
+
+
+class TestScraperSectionCadence:
+    def test_deep_walk_skipped_while_listing_unchanged(self, plan):
+        session = _Session(dict(PAGES))
+        first = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+        session.requested.clear()
+        second = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        assert first["fetched_sections"] == ["grades", "assignments", "files", "announcements"]
+        assert first["files"][0]["name"] == "Hafta1/a.pdf"
+        assert second["fetched_sections"] == ["grades", "assignments", "announcements"]
+        assert second["files"] == []
+        assert "files" not in second["section_hashes"]
+        assert "/SinifDosyalari?g1" not in session.requested
+        assert plan.stats()["skipped_sections"] == 1
+
+    def test_listing_change_triggers_deep_walk(self, plan):
+        pages = dict(PAGES)
+        session = _Session(pages)
+        scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        pages["/DersDosyalari"] = (
+            '<table class="data"><tr><td><img src="/ikon-pdf.png"/>'
+            '<a href="/f/2">b.pdf</a></td><td>1 MB</td><td>02 Ocak 2025 10:00</td></tr></table>'
+        )
+        second = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        assert "files" in second["fetched_sections"]
+        assert [f["name"] for f in second["files"]] == ["Hafta1/a.pdf", "b.pdf"]
+        assert plan.stats()["skipped_sections"] == 1
+
+    @pytest.mark.usefixtures("plan")
+    def test_changed_root_listing_is_not_fetched_twice(self):
+        pages = dict(PAGES)
+        session = _Session(pages)
+        scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        pages["/DersDosyalari"] = (
+            '<table class="data"><tr><td><img src="/ikon-pdf.png"/>'
+            '<a href="/f/2">b.pdf</a></td><td>1 MB</td><td>02 Ocak 2025 10:00</td></tr></table>'
+        )
+        session.requested.clear()
+        second = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        assert [f["name"] for f in second["files"]] == ["Hafta1/a.pdf", "b.pdf"]
+        assert session.requested.count("/SinifDosyalari") == 1
+        assert session.requested.count("/DersDosyalari") == 1
+
+    @pytest.mark.usefixtures("plan")
+    def test_listing_check_is_shared_across_students(self, monkeypatch):
+        cycle = {"cache": SharedContentCache(ttl=60)}
+        monkeypatch.setattr(scraper, "get_shared_cache", lambda *_args: cycle["cache"])
+        for owner in ("1", "2"):
+            scraper.get_grades(_Session(dict(PAGES)), BASE_URL, owner, "user", "pw")
+
+        cycle["cache"] = SharedContentCache(ttl=60)  # Yeni tarama döngüsü
+        first, second = _Session(dict(PAGES)), _Session(dict(PAGES))
+        scraper.get_grades(first, BASE_URL, "1", "user", "pw")
+        scraper.get_grades(second, BASE_URL, "2", "user", "pw")
+
+        assert {"/SinifDosyalari", "/DersDosyalari"} <= set(first.requested)
+        assert "/SinifDosyalari" not in second.requested
+        assert "/DersDosyalari" not in second.requested
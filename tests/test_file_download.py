@@ -0,0 +1,85 @@
+"""Tests for shared file downloads in bot/handlers/user/callbacks.py."""
+
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from bot.handlers.user import callbacks
+from common.scan_scheduler import ScanScheduler
+from common.single_flight import SingleFlight
+
+FILE_URL = "https://ninova.itu.edu.tr/Sinif/1.2/DersDosyalari/3"
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Fake transfers keyed by chat ID; failing chats return None."""
+    scheduler = ScanScheduler(max_workers=4, per_user_limit=1)
+    state = {
+        "transfers": [],
+        "errors": [],
+        "failing": set(),
+        "release": threading.Event(),
+        "done": threading.Event(),
+    }
+
+    def fake_transfer(chat_id, _request_id, _file_url, _file_name):
+        state["transfers"].append(chat_id)
+        state["release"].wait(5)
+        if chat_id in state["failing"]:
+            return None
+        state["done"].set()
+        return f"id-{chat_id}"
+
+    def fake_send_message(chat_id, _text, **_kwargs):
+        state["errors"].append(chat_id)
+        state["done"].set()
+
+    monkeypatch.setattr(callbacks, "DOWNLOAD_FLIGHTS", SingleFlight())
+    monkeypatch.setattr(callbacks, "_download_scheduler", lambda: scheduler)
+    monkeypatch.setattr(callbacks, "_transfer_file", fake_transfer)
+    monkeypatch.setattr(callbacks.bot, "send_message", fake_send_message)
+    yield state
+    scheduler.shutdown(wait=True)
+
+
+def _join(chat_id, flight):
+    flight.add_done_callback(
+        lambda done: callbacks._queue_shared_send(chat_id, "r", done, "a.pdf", FILE_URL)
+    )
+
+
+def test_follower_downloads_with_own_session_when_shared_transfer_fails(downloads):
+    downloads["failing"].add("1")
+    flight, leader = callbacks._submit_download("1", "r", FILE_URL, "a.pdf")
+    follower, follower_leader = callbacks._submit_download("2", "r", FILE_URL, "a.pdf")
+    assert leader
+    assert not follower_leader
+    assert follower is flight
+    _join("2", follower)
+
+    downloads["release"].set()
+    assert downloads["done"].wait(5)
+    assert downloads["transfers"] == ["1", "2"]
+    assert downloads["errors"] == []
+
+
+def test_follower_of_failed_prewarm_downloads_itself(downloads):
+    prewarm = Future()
+    _join("2", prewarm)
+    downloads["release"].set()
+    prewarm.set_exception(ConnectionError("upload to storage chat failed"))
+
+    assert downloads["done"].wait(5)
+    assert downloads["transfers"] == ["2"]
+    assert downloads["errors"] == []
+
+
+def test_follower_retries_only_once(downloads):
+    failed = Future()
+    failed.set_result(None)
+
+    callbacks._send_shared_file("2", "r", failed, "a.pdf", FILE_URL, retry=False)
+    assert downloads["errors"] == ["2"]
+    assert downloads["transfers"] == []
@@ -0,0 +1,199 @@
+"""Tests for services/ninova/folder_memo.py and incremental, concurrent folder walks."""
+
+import threading
+import time
+
+import pytest
+
+from common.config import FILE_WALK_CONCURRENCY
+from services.ninova import scraper
+from services.ninova.fetch_plan import FetchPlan
+from services.ninova.folder_memo import FolderMemo
+from services.ninova.page_cache import PageCache
+from services.ninova.shared_cache import SharedContentCache
+
+BASE_URL = "https://ninova.itu.edu.tr/Sinif/1.2"
+
+
+def _folder_row(name, query, date):
+    return (
+        f'<tr><td><img src="/images/ds/folder.png"/><a href="/Sinif/1.2/SinifDosyalari?{query}">'
+        f"{name}</a></td><td></td><td>{date}</td></tr>"
+    )
+
+
+def _file_row(name, file_id):
+    return (
+        f'<tr><td><img src="/ikon-pdf.png"/><a href="/f/{file_id}">{name}</a></td>'
+        "<td>1 MB</td><td>01 Ocak 2025 10:00</td></tr>"
+    )
+
+
+def _listing(*rows):
+    return f'<table class="data">{"".join(rows)}</table>'
+
+
+class _Response:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.status_code = 200
+
+
+class _Session:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def request(self, _method, url, **_kwargs):
+        path = url.removeprefix(BASE_URL)
+        self.requested.append(path)
+        return _Response(url, self.pages[path])
+
+
+@pytest.fixture
+def pages():
+    return {
+        "/SinifDosyalari": _listing(
+            _folder_row("Lab", "g1", "01 Ocak 2025"), _file_row("a.pdf", 1)
+        ),
+        "/SinifDosyalari?g1": _listing(_folder_row("Hafta1", "g2", "01 Ocak 2025")),
+        "/SinifDosyalari?g2": _listing(_file_row("b.pdf", 2)),
+    }
+
+
+@pytest.fixture
+def memo(monkeypatch):
+    """Fresh folder memo and page cache used by the scraper."""
+    folder_memo = FolderMemo()
+    page_cache = PageCache()
+    monkeypatch.setattr(scraper, "get_folder_memo", lambda *_args: folder_memo)
+    monkeypatch.setattr(scraper, "get_page_cache", lambda *_args: page_cache)
+    return folder_memo
+
+
+class TestFolderMemo:
+    def test_same_date_returns_copy(self):
+        folder_memo = FolderMemo()
+        folder_memo.put("u", "d1", [{"name": "a"}], {"u": "h"})
+        files, page_hashes = folder_memo.get("u", "d1")
+        files[0]["name"] = "mutated"
+
+        assert folder_memo.get("u", "d1") == ([{"name": "a"}], {"u": "h"})
+        assert page_hashes == {"u": "h"}
+        assert folder_memo.get("u", "d2") is None
+
+    def test_expired_and_undated_entries_are_walked(self):
+        folder_memo = FolderMemo(max_age=0)
+        folder_memo.put("u", "d1", [], {})
+        assert folder_memo.get("u", "d1") is None
+
+        folder_memo = FolderMemo()
+        folder_memo.put("u", "", [], {})
+        assert folder_memo.get("u", "") is None
+
+
+class TestIncrementalFolderWalk:
+    def test_unchanged_folders_are_not_refetched(self, memo, pages):
+        session = _Session(pages)
+        first = scraper.get_class_files(session, BASE_URL)
+        session.requested.clear()
+        second = scraper.get_class_files(session, BASE_URL)
+
+        assert [f["name"] for f in first] == ["Lab/Hafta1/b.pdf", "a.pdf"]
+        assert second == first
+        assert session.requested == ["/SinifDosyalari"]
+        assert memo.stats()["hits"] == 1
+
+    def test_changed_folder_date_rewalks_subtree(self, memo, pages):
+        session = _Session(pages)
+        scraper.get_class_files(session, BASE_URL)
+
+        pages["/SinifDosyalari"] = pages["/SinifDosyalari"].replace(
+            "01 Ocak 2025</td></tr><tr>", "05 Ocak 2025</td></tr><tr>"
+        )
+        pages["/SinifDosyalari?g1"] = _listing(_folder_row("Hafta1", "g2", "05 Ocak 2025"))
+        pages["/SinifDosyalari?g2"] = _listing(_file_row("b.pdf", 2), _file_row("c.pdf", 3))
+        session.requested.clear()
+        files = scraper.get_class_files(session, BASE_URL)
+
+        assert [f["name"] for f in files] == ["Lab/Hafta1/b.pdf", "Lab/Hafta1/c.pdf", "a.pdf"]
+        assert session.requested == ["/SinifDosyalari", "/SinifDosyalari?g1", "/SinifDosyalari?g2"]
+        assert memo.stats()["hits"] == 0
+
+    def test_remembered_subtree_keeps_section_hash(self, memo, pages, monkeypatch):
+        plan = FetchPlan()
+        monkeypatch.setattr(scraper, "get_fetch_plan", lambda *_args: plan)
+        monkeypatch.setattr(scraper, "get_shared_cache", lambda *_args: SharedContentCache(ttl=0))
+        pages.update(
+            {
+                "/Notlar": '<div class="yol"><a href="/Sinif/1.2">BLG 101</a></div>',
+                "/Odevler": "<p>yok</p>",
+                "/DersDosyalari": "<p>yok</p>",
+                "/Duyurular": "<p>yok</p>",
+            }
+        )
+        session = _Session(pages)
+
+        first = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+        second = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        assert memo.stats()["hits"] == 1
+        assert second["section_hashes"]["files"] == first["section_hashes"]["files"]
+
+
+class _SlowSession(_Session):
+    """Session that records how many requests are in flight at once."""
+
+    def __init__(self, pages):
+        super().__init__(pages)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        try:
+            return super().request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestConcurrentFolderWalk:
+    @pytest.fixture
+    def tree(self):
+        folders = [_folder_row(f"Hafta{i}", f"g{i}", "") for i in range(1, 6)]
+        pages = {
+            "/SinifDosyalari": _listing(_file_row("giris.pdf", 100), *folders),
+            "/DersDosyalari": _listing(_file_row("syllabus.pdf", 200)),
+        }
+        for i in range(1, 6):
+            pages[f"/SinifDosyalari?g{i}"] = _listing(
+                _file_row(f"h{i}a.pdf", i * 10), _file_row(f"h{i}b.pdf", i * 10 + 1)
+            )
+        return pages
+
+    def test_siblings_fetched_concurrently_in_original_order(self, memo, tree):
+        session = _SlowSession(tree)
+        files = scraper.get_class_files(session, BASE_URL)
+
+        expected = ["giris.pdf"]
+        for i in range(1, 6):
+            expected += [f"Hafta{i}/h{i}a.pdf", f"Hafta{i}/h{i}b.pdf"]
+        assert [f["name"] for f in files] == expected
+        assert 1 < session.max_in_flight <= FILE_WALK_CONCURRENCY
+        assert memo.stats()["entries"] == 0  # undated folders are not remembered
+
+    @pytest.mark.usefixtures("memo")
+    def test_roots_fetched_concurrently_class_files_first(self, tree):
+        session = _SlowSession(tree)
+        files = scraper.get_all_files(session, BASE_URL)
+
+        assert files[0]["name"] == "giris.pdf"
+        assert files[0]["source"] == "Sınıf"
+        assert (files[-1]["name"], files[-1]["source"]) == ("syllabus.pdf", "Ders")
+        assert session.max_in_flight > 1
@@ -0,0 +1,85 @@
+"""Tests for common/html_parser.py and targeted parsing in the Ninova scraper."""
+
+import pytest
+
+from common import html_parser
+from services.ninova import scraper
+
+CHROME = (
+    '<html><body><div class="ust"><a href="/Kampus">Menü</a>'
+    "<table><tr><td>layout</td></tr></table></div>{content}</body></html>"
+)
+
+FILE_LISTING = CHROME.format(
+    content=(
+        '<table class="data"><tr><th>Ad</th></tr>'
+        '<tr><td><img src="/images/ds/folder.png"/><a href="/Sinif/1.2/SinifDosyalari?g1">H1</a>'
+        "</td><td></td><td>01 Ocak 2025</td></tr>"
+        '<tr><td><img src="/ikon-pdf.png"/><a href="/f/1">a.pdf</a></td>'
+        "<td>1 MB</td><td>01 Ocak 2025 10:00</td></tr></table>"
+    )
+)
+
+ANNOUNCEMENTS = CHROME.format(
+    content=(
+        '<div class="duyuruGoruntule"><h2><a href="/Sinif/1.2/Duyuru/7">Sınav</a></h2>'
+        '<div class="tarih"><span class="tarih">03 Ocak 2026 16:53</span></div>'
+        '<div class="icerik">Yarın</div></div>'
+    )
+)
+
+ASSIGNMENTS = CHROME.format(
+    content=(
+        '<table id="ctl00_gvOdevListesi"><tr><td><h2><a href="/Sinif/1.2/Odev/3">Ödev 1</a></h2>'
+        "<span>Teslim Bitişi: 10 Ocak 2026 23:59</span></td></tr></table>"
+    )
+)
+
+
+@pytest.fixture
+def strainers(monkeypatch):
+    """Toggle targeted parsing for a single call."""
+
+    def _set(enabled):
+        monkeypatch.setattr(html_parser, "USE_STRAINERS", enabled)
+
+    return _set
+
+
+class TestBackendSelection:
+    def test_html_parser_is_always_available(self):
+        assert html_parser._select_backend("html.parser") == "html.parser"
+
+    def test_unknown_backend_falls_back(self):
+        assert html_parser._select_backend("selectolax") == "html.parser"
+
+    def test_missing_backend_falls_back(self, monkeypatch):
+        monkeypatch.setattr(html_parser.importlib.util, "find_spec", lambda _name: None)
+        assert html_parser._select_backend("lxml") == "html.parser"
+        assert html_parser._select_backend("auto") == "html.parser"
+
+
+class TestTargetedParsing:
+    def test_strainer_skips_page_chrome(self, strainers):
+        strainers(True)
+        soup = html_parser.make_soup(FILE_LISTING, html_parser.DATA_TABLE)
+        assert soup.find("div", class_="ust") is None
+        assert len(soup.find_all("table")) == 1
+
+    @pytest.mark.parametrize(
+        ("parser", "html"),
+        [
+            (
+                lambda html: scraper._parse_file_listing(html, "https://ninova.itu.edu.tr/x"),
+                FILE_LISTING,
+            ),
+            (scraper._parse_announcements, ANNOUNCEMENTS),
+            (scraper._parse_assignments, ASSIGNMENTS),
+        ],
+    )
+    def test_results_match_full_parse(self, strainers, parser, html):
+        strainers(False)
+        full = parser(html)
+        strainers(True)
+        assert parser(html) == full
+        assert full
@@ -0,0 +1,297 @@
+"""Tests for common/job_queue.py and services/ninova/job_engine.py (distributed scan jobs)."""
+
+import threading
+import time
+
+import pytest
+
+from common.job_queue import RedisJobQueue, SqliteJobQueue
+from services.ninova import job_engine
+from services.ninova.auth import LoginFailedError
+from services.ninova.job_engine import SCAN_COURSE_JOB, QueueScanClient, ScanNode, run_scan_job
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands RedisJobQueue uses (decode_responses=True)."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.zsets = {}
+        self.lists = {}
+        self.lock = threading.Lock()
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        with self.lock:
+            target = self.hashes.setdefault(name, {})
+            items = dict(mapping or {})
+            if key is not None:
+                items[key] = value
+            target.update({k: str(v) for k, v in items.items()})
+            return len(items)
+
+    def hsetnx(self, name, key, value):
+        with self.lock:
+            target = self.hashes.setdefault(name, {})
+            if key in target:
+                return 0
+            target[key] = str(value)
+            return 1
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+    def hincrby(self, name, key, amount=1):
+        with self.lock:
+            target = self.hashes.setdefault(name, {})
+            target[key] = str(int(target.get(key, 0)) + amount)
+            return int(target[key])
+
+    def hdel(self, name, *keys):
+        with self.lock:
+            return sum(self.hashes.get(name, {}).pop(k, None) is not None for k in keys)
+
+    def exists(self, name):
+        return int(name in self.hashes)
+
+    def delete(self, name):
+        with self.lock:
+            return int(self.hashes.pop(name, None) is not None)
+
+    def zadd(self, name, mapping, nx=False):
+        with self.lock:
+            zset = self.zsets.setdefault(name, {})
+            added = 0
+            for member, score in mapping.items():
+                if nx and member in zset:
+                    continue
+                added += member not in zset
+                zset[member] = float(score)
+            return added
+
+    def zrem(self, name, member):
+        with self.lock:
+            return int(self.zsets.get(name, {}).pop(member, None) is not None)
+
+    def zrangebyscore(self, name, min_score, max_score, start=None, num=None):
+        low = float(min_score)
+        members = sorted(
+            (score, member)
+            for member, score in self.zsets.get(name, {}).items()
+            if low <= score <= float(max_score)
+        )
+        members = [member for _, member in members]
+        if start is not None:
+            members = members[start : start + num]
+        return members
+
+    def zcard(self, name):
+        return len(self.zsets.get(name, {}))
+
+    def lpush(self, name, value):
+        with self.lock:
+            self.lists.setdefault(name, []).insert(0, value)
+
+    def rpop(self, name):
+        with self.lock:
+            items = self.lists.get(name)
+            return items.pop() if items else None
+
+    def llen(self, name):
+        return len(self.lists.get(name, []))
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_queue(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SqliteJobQueue(tmp_path / "jobs.db", **kwargs)
+        return RedisJobQueue(FakeRedis(), **kwargs)
+
+    return make
+
+
+class TestJobQueue:
+    def test_lease_complete_and_fetch_result(self, make_queue):
+        queue = make_queue()
+        job_id = queue.publish("scan", {"url": "u"}, key="1|u")
+
+        jobs = queue.lease("node-a", 5)
+        assert [job["id"] for job in jobs] == [job_id]
+        assert jobs[0]["payload"] == {"url": "u"}
+        assert jobs[0]["attempts"] == 1
+        assert queue.lease("node-b", 5) == []  # Kiralanmış iş görünmez
+
+        assert queue.complete(jobs[0], {"ok": True})
+        assert not queue.complete(jobs[0], {"ok": True})
+        results = queue.fetch_results()
+        assert results == [
+            {"id": job_id, "kind": "scan", "key": "1|u", "result": {"ok": True}, "error": None}
+        ]
+        assert queue.fetch_results() == []
+
+    def test_active_key_deduplicates(self, make_queue):
+        queue = make_queue()
+        first = queue.publish("scan", {}, key="k")
+        assert queue.publish("scan", {}, key="k") == first
+        queue.complete(queue.lease("node", 1)[0], None)
+        assert queue.publish("scan", {}, key="k") != first
+
+    def test_expired_lease_is_retried_then_dead(self, make_queue):
+        queue = make_queue(visibility_timeout=0.05, max_attempts=2)
+        job_id = queue.publish("scan", {})
+
+        assert queue.lease("crashed-1", 1)[0]["attempts"] == 1
+        time.sleep(0.1)
+        retried = queue.lease("crashed-2", 1)
+        assert [job["id"] for job in retried] == [job_id]
+        assert retried[0]["attempts"] == 2
+        time.sleep(0.1)
+
+        assert queue.lease("node", 1) == []
+        [result] = queue.fetch_results()
+        assert result["id"] == job_id
+        assert "expired" in result["error"]
+
+    def test_failed_job_is_retried_after_delay(self, make_queue):
+        queue = make_queue(max_attempts=2)
+        queue.retry_delay = 0
+        queue.publish("scan", {})
+
+        job = queue.lease("node", 1)[0]
+        assert queue.fail(job, "boom")
+        job = queue.lease("node", 1)[0]
+        assert job["attempts"] == 2
+        assert queue.fail(job, "boom again")
+
+        assert queue.lease("node", 1) == []
+        [result] = queue.fetch_results()
+        assert result["error"] == "boom again"
+
+    def test_cancel_drops_job_and_ignores_late_result(self, make_queue):
+        queue = make_queue()
+        job_id = queue.publish("scan", {}, key="k")
+        job = queue.lease("node", 1)[0]
+
+        assert queue.cancel(job_id)
+        assert not queue.complete(job, {"late": True})
+        assert queue.fetch_results() == []
+        assert queue.publish("scan", {}, key="k") != job_id
+
+    def test_concurrent_workers_lease_each_job_once(self, make_queue):
+        queue = make_queue()
+        for i in range(50):
+            queue.publish("scan", {"i": i})
+        leased = []
+        lock = threading.Lock()
+
+        def worker(name):
+            while jobs := queue.lease(name, 3):
+                with lock:
+                    leased.extend(job["payload"]["i"] for job in jobs)
+
+        threads = [threading.Thread(target=worker, args=(f"w{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(leased) == list(range(50))
+
+
+class TestQueueScanEngine:
+    def test_node_results_resolve_client_futures(self, make_queue):
+        queue = make_queue()
+
+        def handler(job):
+            payload = job["payload"]
+            assert job["kind"] == SCAN_COURSE_JOB
+            if payload["username"] == "wrong":
+                return {"login_error": {"error_type": "INVALID_CREDENTIALS", "message": "x"}}
+            return {"grades": {"course_name": payload["url"], "grades": {}}}
+
+        client = QueueScanClient(queue, job_timeout=30)
+        node = ScanNode(queue, "node", concurrency=2, handler=handler)
+        stop = threading.Event()
+        node_thread = threading.Thread(target=node.run, args=(stop,))
+        node_thread.start()
+        try:
+            ok = client.submit("1", "BLG101", "user", "enc")
+            denied = client.submit("2", "BLG102", "wrong", "enc")
+            assert ok.result(timeout=10)["course_name"] == "BLG101"
+            with pytest.raises(LoginFailedError) as exc_info:
+                denied.result(timeout=10)
+        finally:
+            stop.set()
+            node_thread.join()
+            client.shutdown(wait=True)
+
+        assert exc_info.value.error_type == "INVALID_CREDENTIALS"
+        assert exc_info.value.chat_id == "2"
+        assert client.stats()["completed"] == 1
+        assert node.stats()["completed"] == 2
+
+    def test_job_without_node_times_out(self, make_queue):
+        queue = make_queue()
+        client = QueueScanClient(queue, job_timeout=0.1)
+        try:
+            future = client.submit("1", "BLG101", "user", "enc")
+            with pytest.raises(TimeoutError):
+                future.result(timeout=10)
+        finally:
+            client.shutdown(wait=True)
+
+        assert queue.lease("node", 1) == []  # İptal edilen iş kuyruktan silindi
+
+    def test_unfinished_job_carries_over_to_next_cycle(self, make_queue):
+        queue = make_queue()
+        client = QueueScanClient(queue, job_timeout=30)
+        try:
+            first = client.submit("1", "BLG101", "user", "enc")
+            with pytest.raises(TimeoutError):
+                first.result(timeout=0.1)  # Döngünün toplama süresi doldu, iş sürüyor
+            again = client.submit("1", "BLG101", "user", "enc")
+            assert again is first
+            assert client.stats()["published"] == 1
+
+            (job,) = queue.lease("node", 1)
+            queue.complete(job, {"grades": {"course_name": "BLG101"}})
+            assert again.result(timeout=10) == {"course_name": "BLG101"}
+        finally:
+            client.shutdown(wait=True)
+
+    def test_node_fetches_new_and_edited_announcement_details(self, monkeypatch):
+        announcements = [
+            {"id": "1", "url": "u1", "title": "A", "author": "x", "date": "d"},
+            {"id": "2", "url": "u2", "title": "B (düzeltme)", "author": "x", "date": "d"},
+            {"id": "3", "url": "u3", "title": "C", "author": "x", "date": "d"},
+        ]
+        fetched = []
+
+        def fake_details(_session, pending):
+            fetched.extend(ann["url"] for ann in pending)
+            return {ann["url"]: f"içerik {ann['id']}" for ann in pending}
+
+        monkeypatch.setattr(job_engine, "decrypt_password", lambda _enc: "pw")
+        monkeypatch.setattr(job_engine, "get_user_session", lambda _chat_id: "session")
+        monkeypatch.setattr(
+            job_engine, "get_grades", lambda *_args: {"announcements": announcements}
+        )
+        monkeypatch.setattr(job_engine, "get_announcement_details", fake_details)
+
+        result = run_scan_job(
+            {
+                "payload": {
+                    "chat_id": "1",
+                    "url": "BLG101",
+                    "username": "user",
+                    "password": "enc",
+                    "known_announcements": {"1": "A|x|d", "2": "B|x|d"},
+                }
+            }
+        )
+
+        assert fetched == ["u2", "u3"]
+        assert result["grades"]["announcement_details"] == {"u2": "içerik 2", "u3": "içerik 3"}
@@ -0,0 +1,143 @@
+"""Tests for common/notifier.py (durable, rate-limited notification dispatcher)."""
+
+import itertools
+import threading
+import time
+
+import pytest
+
+from common import notifier, utils
+from common.notifier import NotificationDispatcher, TelegramApiError, TokenBucket
+
+
+class _Sender:
+    """Records Bot API calls; failures maps chat_id -> list of errors to raise first."""
+
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = failures or {}
+        self.lock = threading.Lock()
+
+    def __call__(self, method, payload, chat_id):
+        with self.lock:
+            errors = self.failures.get(chat_id)
+            if errors:
+                raise errors.pop(0)
+            self.calls.append((time.monotonic(), chat_id, method, payload))
+        return {"message_id": len(self.calls)}
+
+
+@pytest.fixture
+def make_dispatcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(NotificationDispatcher, "MAX_BACKOFF", 0)
+    created = []
+
+    def make(sender, start=True, **kwargs):
+        options = {"workers": 4, "rate": 1000, "per_chat_interval": 0}
+        options.update(kwargs)
+        dispatcher = NotificationDispatcher(tmp_path / "outbox.db", sender=sender, **options)
+        if start:
+            dispatcher.start()
+        created.append(dispatcher)
+        return dispatcher
+
+    yield make
+    for dispatcher in created:
+        if not dispatcher._stop.is_set():
+            dispatcher.stop()
+
+
+class TestTokenBucket:
+    def test_limits_rate_after_burst(self):
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+        for _ in range(15):
+            bucket.acquire()
+        assert time.monotonic() - start >= 10 / 50 * 0.9
+
+    def test_pause_blocks_acquire(self):
+        bucket = TokenBucket(rate=1000)
+        bucket.pause(0.2)
+        start = time.monotonic()
+        bucket.acquire()
+        assert time.monotonic() - start >= 0.18
+
+
+class TestNotificationDispatcher:
+    def test_delivers_in_order_per_chat(self, make_dispatcher):
+        sender = _Sender()
+        dispatcher = make_dispatcher(sender)
+        for i in range(5):
+            for chat_id in ("1", "2", "3"):
+                dispatcher.enqueue(chat_id, "sendMessage", {"text": str(i)})
+
+        assert dispatcher.flush(timeout=10)
+        for chat_id in ("1", "2", "3"):
+            texts = [call[3]["text"] for call in sender.calls if call[1] == chat_id]
+            assert texts == ["0", "1", "2", "3", "4"]
+        assert sender.calls[0][3]["chat_id"] in ("1", "2", "3")
+        assert dispatcher.stats()["sent"] == 15
+
+    def test_per_chat_interval(self, make_dispatcher):
+        sender = _Sender()
+        dispatcher = make_dispatcher(sender, per_chat_interval=0.1)
+        for _ in range(3):
+            dispatcher.enqueue("1", "sendMessage", {"text": "x"})
+
+        assert dispatcher.flush(timeout=10)
+        times = [call[0] for call in sender.calls]
+        assert all(b - a >= 0.09 for a, b in itertools.pairwise(times))
+
+    def test_retry_after_pauses_and_resends(self, make_dispatcher):
+        sender = _Sender({"1": [TelegramApiError(429, "Too Many Requests", retry_after=0.2)]})
+        dispatcher = make_dispatcher(sender)
+        start = time.monotonic()
+        dispatcher.enqueue("1", "sendMessage", {"text": "x"})
+
+        assert dispatcher.flush(timeout=10)
+        assert [call[1] for call in sender.calls] == ["1"]
+        assert sender.calls[0][0] - start >= 0.18
+        assert dispatcher.stats()["rate_limited"] == 1
+
+    def test_transient_errors_retry_permanent_errors_drop(self, make_dispatcher):
+        sender = _Sender(
+            {
+                "1": [TelegramApiError(502, "Bad Gateway"), TelegramApiError(None, "timeout")],
+                "2": [TelegramApiError(403, "Forbidden: bot was blocked by the user")],
+            }
+        )
+        dispatcher = make_dispatcher(sender)
+        dispatcher.enqueue("1", "sendMessage", {"text": "x"})
+        dispatcher.enqueue("2", "sendMessage", {"text": "y"})
+
+        assert dispatcher.flush(timeout=10)
+        assert [call[1] for call in sender.calls] == ["1"]
+        stats = dispatcher.stats()
+        assert stats["retried"] == 2
+        assert stats["dropped"] == 1
+
+    def test_queued_messages_survive_restart(self, make_dispatcher):
+        first = make_dispatcher(_Sender(), start=False)
+        first.enqueue("1", "sendMessage", {"text": "a"})
+        first.enqueue("1", "sendPhoto", {"photo": "https://x/y.png"})
+        first.stop()
+
+        sender = _Sender()
+        second = make_dispatcher(sender)
+        assert second.flush(timeout=10)
+        assert [call[2] for call in sender.calls] == ["sendMessage", "sendPhoto"]
+        assert make_dispatcher(_Sender(), start=False).pending() == 0
+
+
+class TestSendTelegramMessage:
+    def test_enqueues_chunks_when_dispatcher_runs(self, make_dispatcher, monkeypatch):
+        dispatcher = make_dispatcher(_Sender(), start=False)  # queues, nothing delivers
+        monkeypatch.setattr(notifier, "get_notification_dispatcher", lambda: dispatcher)
+        monkeypatch.setattr(utils, "TELEGRAM_TOKEN", "123:abc")
+
+        utils.send_telegram_message("42", "\n".join(["x" * 100] * 80))
+
+        assert dispatcher.pending() == 3
+        queued = list(dispatcher._queues["42"])
+        assert all(entry[1] == "sendMessage" for entry in queued)
+        assert queued[0][2]["parse_mode"] == "HTML"
@@ -0,0 +1,110 @@
+"""Tests for services/ninova/page_cache.py and hash-based parse reuse in the scraper."""
+
+import pytest
+
+from services.ninova import scraper
+from services.ninova.fetch_plan import FetchPlan
+from services.ninova.page_cache import PageCache, page_hash
+from services.ninova.shared_cache import SharedContentCache
+
+BASE_URL = "https://ninova.itu.edu.tr/Sinif/1.2"
+
+PAGES = {
+    "/Notlar": (
+        '<div class="yol"><a href="/Sinif/1.2">BLG 101</a></div>'
+        '<table class="data"><tr><th>Ad</th><th>Not</th></tr>'
+        "<tr><td>Vize</td><td>85</td></tr></table>"
+    ),
+    "/Odevler": "<p>yok</p>",
+    "/SinifDosyalari": (
+        '<table class="data"><tr><td><img src="/ikon-pdf.png"/>'
+        '<a href="/f/1">a.pdf</a></td><td>1 MB</td><td>01 Ocak 2025 10:00</td></tr></table>'
+    ),
+    "/DersDosyalari": "<p>yok</p>",
+    "/Duyurular": "<p>yok</p>",
+}
+
+
+class _Response:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.status_code = 200
+
+
+class _Session:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def request(self, _method, url, **_kwargs):
+        return _Response(url, self.pages[url.removeprefix(BASE_URL)])
+
+
+@pytest.fixture
+def page_cache(monkeypatch):
+    """Fresh page cache used by the scraper."""
+    cache = PageCache(max_entries=100)
+    plan = FetchPlan()  # every section on every scan
+    monkeypatch.setattr(scraper, "get_page_cache", lambda *_args: cache)
+    monkeypatch.setattr(scraper, "get_fetch_plan", lambda *_args: plan)
+    # consecutive calls simulate separate scan cycles
+    monkeypatch.setattr(scraper, "get_shared_cache", lambda *_args: SharedContentCache(ttl=0))
+    return cache
+
+
+class TestPageCache:
+    def test_hash_ignores_viewstate(self):
+        a = '<input type="hidden" name="__VIEWSTATE" value="abc" /><p>x</p>'
+        b = '<input type="hidden" name="__VIEWSTATE" value="xyz" /><p>x</p>'
+        assert page_hash(a) == page_hash(b)
+        assert page_hash(a) != page_hash(a.replace("<p>x", "<p>y"))
+
+    def test_same_hash_reuses_copy_of_parsed_result(self):
+        cache = PageCache()
+        calls = []
+
+        def parser(html):
+            calls.append(html)
+            return [{"v": html}]
+
+        first = cache.get_or_parse("1", "u", "h1", parser, "a")
+        first[0]["v"] = "mutated"
+        second = cache.get_or_parse("1", "u", "h1", parser, "a")
+
+        assert second == [{"v": "a"}]
+        assert len(calls) == 1
+        cache.get_or_parse("1", "u", "h2", parser, "b")
+        assert len(calls) == 2
+        assert cache.stats()["hits"] == 1
+
+    def test_lru_eviction(self):
+        cache = PageCache(max_entries=2)
+        for i in range(3):
+            cache.get_or_parse("1", f"u{i}", "h", lambda html: html, "x")
+        assert cache.stats()["entries"] == 2
+
+
+class TestScraperHashShortCircuit:
+    def test_unchanged_pages_are_not_reparsed(self, page_cache):
+        session = _Session(dict(PAGES))
+        first = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+        second = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        assert first["grades"]["Vize"]["not"] == "85"
+        assert first["files"][0]["source"] == "Sınıf"
+        assert first["section_hashes"] == second["section_hashes"]
+        assert first == second
+        assert page_cache.stats()["hits"] == len(PAGES)
+
+    def test_changed_page_changes_only_its_section_hash(self, page_cache):
+        pages = dict(PAGES)
+        session = _Session(pages)
+        first = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        pages["/Notlar"] = pages["/Notlar"].replace("85", "90")
+        second = scraper.get_grades(session, BASE_URL, "42", "user", "pw")
+
+        assert second["grades"]["Vize"]["not"] == "90"
+        assert first["section_hashes"]["grades"] != second["section_hashes"]["grades"]
+        assert first["section_hashes"]["files"] == second["section_hashes"]["files"]
+        assert page_cache.stats()["hits"] == len(PAGES) - 1
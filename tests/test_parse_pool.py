@@ -0,0 +1,60 @@
+"""Tests for services/ninova/parse_pool.py and parse offloading in the scraper."""
+
+import functools
+import os
+
+import pytest
+
+from services.ninova import scraper
+from services.ninova.parse_pool import ParsePool
+
+FILE_LISTING = (
+    '<table class="data"><tr><td><img src="/ikon-pdf.png"/>'
+    '<a href="/f/1">a.pdf</a></td><td>1 MB</td><td>01 Ocak 2025 10:00</td></tr></table>'
+)
+
+
+def _pid_parser(html):
+    return {"pid": os.getpid(), "length": len(html)}
+
+
+def _broken_parser(html):
+    # A parser bug such as calling a method on a missing tag
+    return None.find_all(html)
+
+
+@pytest.fixture
+def pool():
+    parse_pool = ParsePool(max_workers=1)
+    yield parse_pool
+    parse_pool.shutdown(wait=True)
+
+
+class TestParsePool:
+    def test_disabled_pool_parses_in_thread(self):
+        parse_pool = ParsePool(max_workers=0)
+        assert parse_pool.parse(_pid_parser, "abc") == {"pid": os.getpid(), "length": 3}
+        assert parse_pool.stats()["inline"] == 1
+
+    def test_parser_runs_in_worker_process(self, pool):
+        result = pool.parse(_pid_parser, "abcd")
+        assert result["length"] == 4
+        assert result["pid"] != os.getpid()
+        assert pool.stats()["offloaded"] == 1
+
+    def test_scraper_parser_gives_same_records(self, pool):
+        parser = functools.partial(scraper._parse_file_listing, url="https://ninova.itu.edu.tr/x")
+        assert pool.parse(parser, FILE_LISTING) == parser(FILE_LISTING)
+
+    def test_unpicklable_parser_falls_back_to_thread(self, pool):
+        def local_parser(html):
+            return html.upper()
+
+        assert pool.parse(local_parser, "abc") == "ABC"
+        assert pool.stats()["failures"] == 1
+
+    def test_parser_error_propagates_without_fallback(self, pool):
+        with pytest.raises(AttributeError, match="find_all"):
+            pool.parse(_broken_parser, "abc")
+        assert pool.stats()["failures"] == 0
+        assert pool.stats()["inline"] == 0
@@ -0,0 +1,66 @@
+"""Tests for common/poll_scheduler.py."""
+
+from common.poll_scheduler import CoursePollScheduler
+
+URL = "https://ninova.itu.edu.tr/Sinif/1.2"
+
+
+class TestCoursePollScheduler:
+    def test_unknown_course_is_due(self):
+        poll = CoursePollScheduler(min_interval=300, max_interval=3600)
+        assert poll.is_due("1", URL, now=0)
+
+    def test_unchanged_scans_back_off_up_to_max(self):
+        poll = CoursePollScheduler(min_interval=100, max_interval=300, backoff=2)
+        assert poll.record_result("1", URL, changed=False, now=0) == 100
+        assert poll.record_result("1", URL, changed=False, now=100) == 200
+        assert poll.record_result("1", URL, changed=False, now=300) == 300
+        assert poll.record_result("1", URL, changed=False, now=600) == 300
+
+        assert not poll.is_due("1", URL, now=899)
+        assert poll.is_due("1", URL, now=900)
+
+    def test_change_snaps_back_to_min_interval(self):
+        poll = CoursePollScheduler(min_interval=100, max_interval=1000, backoff=3)
+        poll.record_result("1", URL, changed=False, now=0)
+        poll.record_result("1", URL, changed=False, now=100)
+        assert poll.record_result("1", URL, changed=True, now=400) == 100
+        assert poll.is_due("1", URL, now=500)
+
+    def test_changed_course_is_due_on_next_jittered_cycle(self):
+        # CHECK_INTERVAL=300 with ±30 s jitter; next_due is set when the scan finishes
+        poll = CoursePollScheduler(min_interval=300, max_interval=3600, tolerance=150)
+        poll.record_result("1", URL, changed=True, now=1000)
+        assert poll.is_due("1", URL, now=1270)
+        assert poll.is_due("1", URL, now=1299)
+        assert not poll.is_due("1", URL, now=1100)
+
+    def test_tolerance_does_not_pull_backed_off_courses_forward(self):
+        poll = CoursePollScheduler(min_interval=300, max_interval=3600, backoff=2, tolerance=150)
+        poll.record_result("1", URL, changed=False, now=0)
+        assert poll.record_result("1", URL, changed=False, now=300) == 600
+        assert not poll.is_due("1", URL, now=600)
+        assert poll.is_due("1", URL, now=760)
+
+    def test_force_overrides_interval(self):
+        poll = CoursePollScheduler(min_interval=100)
+        poll.record_result("1", URL, changed=False, now=0)
+        assert not poll.is_due("1", URL, now=50)
+        assert poll.is_due("1", URL, now=50, force=True)
+        stats = poll.stats()
+        assert stats["skipped"] == 1
+        assert stats["forced"] == 1
+
+    def test_state_round_trip_and_prune(self):
+        poll = CoursePollScheduler(min_interval=100, max_interval=1000, backoff=2)
+        poll.record_result("1", URL, changed=False, now=0)
+        poll.record_result("1", URL, changed=False, now=100)
+        poll.record_result("2", URL, changed=True, now=0)
+
+        restored = CoursePollScheduler(min_interval=100, max_interval=1000, backoff=2)
+        restored.load_state({**poll.export_state(), "3": {URL: {"interval": "bad"}}})
+        assert restored.export_state() == poll.export_state()
+        assert not restored.is_due("1", URL, now=250)
+
+        assert restored.prune({"1": [URL]}) == 1
+        assert list(restored.export_state()) == ["1"]
@@ -0,0 +1,100 @@
+"""Tests for services/ninova/prewarm.py (file ID pre-warming for new Ninova files)."""
+
+import hashlib
+import io
+import threading
+
+import pytest
+
+from common.cache_manager import content_key
+from common.streaming import BudgetedSpool, ByteBudget
+from services.ninova import prewarm
+from services.ninova.prewarm import FilePrewarmer
+
+
+@pytest.fixture
+def transfers(monkeypatch):
+    """Fake download/upload; downloads block until release is set."""
+    state = {"downloads": [], "uploads": [], "release": threading.Event(), "fail": False}
+
+    def fake_download(_session, url, filename, **_kwargs):
+        state["downloads"].append(url)
+        state["release"].wait(5)
+        if state["fail"]:
+            return None
+        return io.BytesIO(b"data"), f"{filename}.pdf"
+
+    def fake_upload(chat_id, _document, filename="", **_kwargs):
+        state["uploads"].append((chat_id, filename))
+        return f"id-{filename}"
+
+    monkeypatch.setattr(prewarm, "download_file", fake_download)
+    monkeypatch.setattr(prewarm, "send_telegram_document", fake_upload)
+    return state
+
+
+def test_concurrent_requests_share_one_transfer(transfers):
+    stored = {}
+    prewarmer = FilePrewarmer("-100", store=stored.__setitem__, lookup=stored.get)
+    try:
+        futures = [prewarmer.prewarm("https://ninova/f1", "hafta1", object()) for _ in range(5)]
+        assert prewarmer.in_flight("https://ninova/f1") is futures[0]
+        transfers["release"].set()
+
+        assert {future.result(timeout=5) for future in futures} == {"id-hafta1.pdf"}
+        assert transfers["downloads"] == ["https://ninova/f1"]
+        assert transfers["uploads"] == [("-100", "hafta1.pdf")]
+        assert stored == {"https://ninova/f1": "id-hafta1.pdf"}
+
+        # Önbellekteki dosya tekrar aktarılmaz
+        assert (
+            prewarmer.prewarm("https://ninova/f1", "hafta1", object()).result() == "id-hafta1.pdf"
+        )
+        assert len(transfers["downloads"]) == 1
+        stats = prewarmer.stats()
+        assert (stats["warmed"], stats["coalesced"], stats["cached"]) == (1, 4, 1)
+    finally:
+        prewarmer.shutdown(wait=True)
+
+
+def test_failed_download_is_not_cached(transfers):
+    stored = {}
+    transfers["fail"] = True
+    transfers["release"].set()
+    prewarmer = FilePrewarmer("-100", store=stored.__setitem__, lookup=stored.get)
+    try:
+        assert prewarmer.prewarm("https://ninova/f2", "odev", object()).result(timeout=5) is None
+    finally:
+        prewarmer.shutdown(wait=True)
+
+    assert stored == {}
+    assert transfers["uploads"] == []
+    assert prewarmer.stats()["failed"] == 1
+    assert prewarmer.in_flight("https://ninova/f2") is None
+
+
+def test_same_content_under_new_url_skips_upload(transfers, monkeypatch):
+    def spooled_download(_session, url, filename, **_kwargs):
+        transfers["downloads"].append(url)
+        spool = BudgetedSpool(ByteBudget(1024), max_size=1024)
+        spool.write(b"same syllabus bytes")
+        spool.seek(0)
+        return spool, f"{filename}.pdf"
+
+    monkeypatch.setattr(prewarm, "download_file", spooled_download)
+    stored = {}
+    prewarmer = FilePrewarmer("-100", store=stored.__setitem__, lookup=stored.get)
+    try:
+        first = prewarmer.prewarm("https://ninova/sec1/syllabus", "syllabus", object())
+        assert first.result(timeout=5) == "id-syllabus.pdf"
+        second = prewarmer.prewarm("https://ninova/sec2/izlence", "izlence", object())
+        assert second.result(timeout=5) == "id-syllabus.pdf"
+    finally:
+        prewarmer.shutdown(wait=True)
+
+    digest = hashlib.sha256(b"same syllabus bytes").hexdigest()
+    assert transfers["uploads"] == [("-100", "syllabus.pdf")]
+    assert len(transfers["downloads"]) == 2
+    assert stored["https://ninova/sec2/izlence"] == "id-syllabus.pdf"
+    assert stored[content_key(digest)] == "id-syllabus.pdf"
+    assert prewarmer.stats()["deduplicated"] == 1
@@ -0,0 +1,76 @@
+"""Tests for common/scan_scheduler.py — per-user caps and fair interleaving."""
+
+import threading
+import time
+from concurrent.futures import as_completed
+
+import pytest
+
+from common.scan_scheduler import ScanScheduler
+
+
+@pytest.fixture
+def scheduler():
+    """Small scheduler that is always shut down after the test."""
+    sched = ScanScheduler(max_workers=4, per_user_limit=2)
+    yield sched
+    sched.shutdown(wait=True)
+
+
+class TestScanSchedulerResults:
+    def test_result_and_exception_propagate(self, scheduler):
+        ok = scheduler.submit("u1", lambda x: x * 2, 21)
+        bad = scheduler.submit("u1", lambda: 1 / 0)
+        assert ok.result(timeout=2) == 42
+        with pytest.raises(ZeroDivisionError):
+            bad.result(timeout=2)
+
+    def test_submit_after_shutdown_raises(self):
+        sched = ScanScheduler(max_workers=1)
+        sched.shutdown(wait=True)
+        with pytest.raises(RuntimeError):
+            sched.submit("u1", lambda: None)
+
+
+class TestScanSchedulerFairness:
+    def test_per_user_limit_is_respected(self, scheduler):
+        lock = threading.Lock()
+        running = {"now": 0, "peak": 0}
+
+        def job():
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+
+        futures = [scheduler.submit("heavy", job) for _ in range(8)]
+        for f in as_completed(futures, timeout=5):
+            f.result()
+        assert running["peak"] <= 2
+
+    def test_other_users_are_not_starved(self, scheduler):
+        started = []
+        lock = threading.Lock()
+
+        def job(owner):
+            with lock:
+                started.append(owner)
+            time.sleep(0.02)
+
+        futures = [scheduler.submit("heavy", job, "heavy") for _ in range(10)]
+        futures.append(scheduler.submit("light", job, "light"))
+        for f in as_completed(futures, timeout=5):
+            f.result()
+        # Light user's only job should start long before the heavy queue drains
+        assert started.index("light") < 5
+
+    def test_stats_track_completion(self, scheduler):
+        futures = [scheduler.submit(f"u{i}", lambda: None) for i in range(5)]
+        for f in as_completed(futures, timeout=2):
+            f.result()
+        stats = scheduler.stats()
+        assert stats["submitted"] == 5
+        assert stats["completed"] == 5
+        assert stats["pending"] == 0
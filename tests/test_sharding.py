@@ -0,0 +1,109 @@
+"""Tests for common/sharding.py (chat_id shards and ShardCoordinator)."""
+
+import threading
+from collections import Counter
+
+from common.sharding import ShardCoordinator, shard_of
+
+
+def _echo_shard(index, shards, outbox, wake, stop):
+    """Shard worker: report its index on every wake until stopped."""
+    outbox.put({"type": "started", "shard": index, "shards": shards})
+    while not stop.is_set():
+        if wake.wait(0.05):
+            wake.clear()
+            outbox.put({"type": "scanned", "shard": index})
+
+
+def _crashing_shard(index, _shards, outbox, _wake, stop):
+    """Shard worker that exits immediately on its first run."""
+    outbox.put({"type": "started", "shard": index})
+    if stop.is_set():
+        return
+    raise SystemExit(3)
+
+
+class _Collector:
+    def __init__(self):
+        self.messages = []
+        self.cond = threading.Condition()
+
+    def __call__(self, message):
+        with self.cond:
+            self.messages.append(message)
+            self.cond.notify_all()
+
+    def wait_for(self, predicate, timeout=30):
+        with self.cond:
+            return self.cond.wait_for(lambda: predicate(self.messages), timeout)
+
+
+class TestShardOf:
+    def test_stable_and_in_range(self):
+        for chat_id in ("1", "123456789", "-100200300"):
+            assert shard_of(chat_id, 4) == shard_of(chat_id, 4)
+            assert 0 <= shard_of(chat_id, 4) < 4
+        assert shard_of("123", 1) == 0
+        assert shard_of("123", 0) == 0
+
+    def test_int_and_str_ids_agree(self):
+        assert shard_of(987654, 8) == shard_of("987654", 8)
+
+    def test_distribution_is_balanced(self):
+        counts = Counter(shard_of(str(chat_id), 4) for chat_id in range(10_000))
+        assert set(counts) == {0, 1, 2, 3}
+        assert min(counts.values()) > 2000
+
+
+class TestShardCoordinator:
+    def test_dispatches_messages_from_shard_processes(self):
+        collector = _Collector()
+        coordinator = ShardCoordinator(2, _echo_shard, collector)
+        coordinator.start()
+        try:
+            assert collector.wait_for(lambda m: sum(x["type"] == "started" for x in m) == 2)
+            coordinator.trigger()
+            assert collector.wait_for(
+                lambda m: {x["shard"] for x in m if x["type"] == "scanned"} == {0, 1}
+            )
+        finally:
+            coordinator.stop(timeout=10)
+
+        started = [m for m in collector.messages if m["type"] == "started"]
+        assert sorted(m["shard"] for m in started) == [0, 1]
+        assert all(m["shards"] == 2 for m in started)
+        stats = coordinator.stats()
+        assert stats["alive"] == 0
+        assert stats["dispatched"] == len(collector.messages)
+
+    def test_supervise_restarts_dead_shards(self):
+        collector = _Collector()
+        coordinator = ShardCoordinator(1, _crashing_shard, collector)
+        coordinator.start()
+        try:
+            assert collector.wait_for(lambda m: len(m) == 1)
+            coordinator._processes[0].join(10)
+            assert coordinator.supervise() == 1
+            assert collector.wait_for(lambda m: len(m) == 2)
+        finally:
+            coordinator.stop(timeout=10)
+
+        assert coordinator.stats()["restarts"] == 1
+
+    def test_dispatch_errors_do_not_stop_the_dispatcher(self):
+        collector = _Collector()
+
+        def dispatch(message):
+            if message["type"] == "started":
+                raise RuntimeError("boom")
+            collector(message)
+
+        coordinator = ShardCoordinator(1, _echo_shard, dispatch)
+        coordinator.start()
+        try:
+            coordinator.trigger()
+            assert collector.wait_for(lambda m: any(x["type"] == "scanned" for x in m))
+        finally:
+            coordinator.stop(timeout=10)
+
+        assert coordinator.stats()["dispatch_errors"] == 1
@@ -0,0 +1,221 @@
+"""Tests for services/ninova/shared_cache.py and cross-user content sharing in the scraper."""
+
+import threading
+
+import pytest
+
+from services.ninova import scraper
+from services.ninova.fetch_plan import FetchPlan
+from services.ninova.page_cache import PageCache
+from services.ninova.shared_cache import SharedContentCache
+
+BASE_URL = "https://ninova.itu.edu.tr/Sinif/1.2"
+
+PAGES = {
+    "/Notlar": (
+        '<div class="yol"><a href="/Sinif/1.2">BLG 101</a></div>'
+        '<table class="data"><tr><td>Vize</td><td>85</td></tr></table>'
+    ),
+    "/Odevler": "<p>yok</p>",
+    "/SinifDosyalari": (
+        '<table class="data"><tr><td><img src="/ikon-pdf.png"/>'
+        '<a href="/f/1">a.pdf</a></td><td>1 MB</td><td>01 Ocak 2025 10:00</td></tr></table>'
+    ),
+    "/DersDosyalari": "<p>yok</p>",
+    "/Duyurular": (
+        '<div class="duyuruGoruntule"><h2><a href="/Sinif/1.2/Duyuru/7">Sınav</a></h2>'
+        '<div class="tarih"><span class="tarih">03 Ocak 2026 16:53</span></div>'
+        '<div class="icerik">Yarın</div></div>'
+    ),
+}
+
+
+class _Response:
+    def __init__(self, url, text):
+        self.url = url
+        self.text = text
+        self.status_code = 200
+
+
+class _Session:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def request(self, _method, url, **_kwargs):
+        path = url.removeprefix(BASE_URL)
+        self.requested.append(path)
+        return _Response(url, self.pages[path])
+
+
+def _announcement(ann_id, title="Sınav"):
+    return {
+        "id": ann_id,
+        "title": title,
+        "author": "Hoca",
+        "date": "03 Ocak 2026",
+        "url": f"{BASE_URL}/Duyuru/{ann_id}",
+    }
+
+
+def _detail_page(text):
+    return f'<div class="duyuruGoruntule"><div class="icerik"><b>{text}</b></div></div>'
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    """Fresh shared cache, fetch plan and page cache used by the scraper."""
+    cache = SharedContentCache(ttl=60)
+    plan = FetchPlan()
+    page_cache = PageCache()
+    monkeypatch.setattr(scraper, "get_shared_cache", lambda *_args: cache)
+    monkeypatch.setattr(scraper, "get_fetch_plan", lambda *_args: plan)
+    monkeypatch.setattr(scraper, "get_page_cache", lambda *_args: page_cache)
+    return cache
+
+
+class TestSharedContentCache:
+    def test_fresh_entry_is_shared_as_copy(self):
+        cache = SharedContentCache(ttl=60)
+        calls = []
+
+        def fetcher():
+            calls.append(1)
+            return [{"name": "a"}]
+
+        first = cache.get_or_fetch("u", "files", fetcher)
+        first[0]["name"] = "mutated"
+        second = cache.get_or_fetch("u", "files", fetcher)
+
+        assert second == [{"name": "a"}]
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_failures_are_not_cached(self):
+        cache = SharedContentCache(ttl=60)
+        assert cache.get_or_fetch("u", "files", lambda: None) is None
+        assert cache.get_or_fetch("u", "files", lambda: ["x"]) == ["x"]
+
+    def test_concurrent_requests_are_coalesced(self):
+        cache = SharedContentCache(ttl=60)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_fetcher():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ["data"]
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(cache.get_or_fetch("u", "files", slow_fetcher))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(cache.get_or_fetch("u", "files", slow_fetcher))
+            )
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+        assert results == [["data"]] * 4
+        assert len(calls) == 1
+        assert cache.stats()["hits"] + cache.stats()["coalesced"] == 3
+
+
+class TestScraperSharedSections:
+    def test_class_sections_fetched_once_for_all_students(self, shared_cache):
+        first_session = _Session(dict(PAGES))
+        second_session = _Session(dict(PAGES))
+
+        first = scraper.get_grades(first_session, BASE_URL, "1", "user1", "pw")
+        second = scraper.get_grades(second_session, BASE_URL, "2", "user2", "pw")
+
+        assert second["files"] == first["files"]
+        assert second["announcements"] == first["announcements"]
+        assert second["section_hashes"] == first["section_hashes"]
+        assert sorted(second_session.requested) == ["/Notlar", "/Odevler"]
+        assert shared_cache.stats()["hits"] == 2
+
+
+class TestAnnouncementDetails:
+    @pytest.fixture(autouse=True)
+    def _fresh_details_cache(self, monkeypatch):
+        monkeypatch.setattr(scraper, "_announcement_details", SharedContentCache(ttl=60))
+
+    def test_details_fetched_once_across_users(self):
+        pages = {f"/Duyuru/{i}": _detail_page(f"duyuru {i}") for i in range(1, 4)}
+        first_session = _Session(pages)
+        second_session = _Session(pages)
+        announcements = [_announcement(i) for i in range(1, 4)]
+
+        first = scraper.get_announcement_details(first_session, announcements)
+        second = scraper.get_announcement_details(second_session, announcements)
+
+        assert first[f"{BASE_URL}/Duyuru/2"] == "<b>duyuru 2</b>"
+        assert second == first
+        assert sorted(first_session.requested) == ["/Duyuru/1", "/Duyuru/2", "/Duyuru/3"]
+        assert second_session.requested == []
+
+    def test_edited_announcement_is_refetched(self):
+        pages = {"/Duyuru/1": _detail_page("ilk")}
+        session = _Session(pages)
+        scraper.get_announcement_details(session, [_announcement(1)])
+
+        pages["/Duyuru/1"] = _detail_page("düzeltme")
+        edited = scraper.get_announcement_details(
+            session, [_announcement(1, title="Sınav (güncel)")]
+        )
+
+        assert edited[f"{BASE_URL}/Duyuru/1"] == "<b>düzeltme</b>"
+        assert len(session.requested) == 2
+
+    def test_failed_detail_is_not_cached(self):
+        pages = {"/Duyuru/1": "<p>yok</p>"}
+        session = _Session(pages)
+        assert scraper.get_announcement_details(session, [_announcement(1)]) == {
+            f"{BASE_URL}/Duyuru/1": ""
+        }
+
+        pages["/Duyuru/1"] = _detail_page("geldi")
+        result = scraper.get_announcement_details(session, [_announcement(1)])
+        assert result[f"{BASE_URL}/Duyuru/1"] == "<b>geldi</b>"
+
+
+class TestScraperPools:
+    def test_requests_reuse_long_lived_pools(self, monkeypatch):
+        monkeypatch.setattr(scraper, "_announcement_details", SharedContentCache(ttl=0))
+        pages = {**PAGES, "/Duyuru/1": _detail_page("duyuru")}
+        scraper.get_all_files(_Session(pages), BASE_URL)  # Havuzlar ilk kullanımda açılır
+
+        created = []
+        real_executor = scraper.ThreadPoolExecutor
+
+        def counting_executor(*args, **kwargs):
+            created.append(kwargs.get("thread_name_prefix"))
+            return real_executor(*args, **kwargs)
+
+        monkeypatch.setattr(scraper, "ThreadPoolExecutor", counting_executor)
+        threads = set()
+
+        class _TrackingSession(_Session):
+            def request(self, method, url, **kwargs):
+                threads.add(threading.current_thread().name)
+                return super().request(method, url, **kwargs)
+
+        for _ in range(3):
+            session = _TrackingSession(pages)
+            files = scraper.get_all_files(session, BASE_URL)
+            scraper.get_announcement_details(session, [_announcement(1)])
+            assert [f["name"] for f in files] == ["a.pdf"]
+
+        assert created == []
+        assert {name.split("_")[0] for name in threads} <= {"ninova-io", "MainThread"}
@@ -0,0 +1,61 @@
+"""Tests for common/single_flight.py (coalesced file transfers)."""
+
+import threading
+
+from common.scan_scheduler import ScanScheduler
+from common.single_flight import SingleFlight
+
+
+def test_concurrent_requests_share_one_operation():
+    flights = SingleFlight()
+    scheduler = ScanScheduler(max_workers=4, per_user_limit=1)
+    release = threading.Event()
+    runs = []
+
+    def transfer(url):
+        runs.append(url)
+        release.wait(5)
+        return f"file-id:{url}"
+
+    try:
+        results = [
+            flights.submit("u1", lambda chat=chat: scheduler.submit(chat, transfer, "u1"))
+            for chat in range(10)
+        ]
+        assert [leader for _, leader in results] == [True] + [False] * 9
+        assert flights.get("u1") is results[0][0]
+        release.set()
+
+        assert {future.result(timeout=5) for future, _ in results} == {"file-id:u1"}
+        assert runs == ["u1"]
+        assert flights.get("u1") is None
+        assert flights.stats() == {"in_flight": 0, "started": 1, "coalesced": 9}
+
+        # Bitmiş işlemden sonra aynı anahtar yeni bir işlem başlatır
+        future, leader = flights.submit("u1", lambda: scheduler.submit("0", transfer, "u1"))
+        assert leader
+        assert future.result(timeout=5) == "file-id:u1"
+    finally:
+        scheduler.shutdown(wait=True)
+
+
+def test_failure_is_shared_with_followers():
+    flights = SingleFlight()
+    scheduler = ScanScheduler(max_workers=1, per_user_limit=1)
+    release = threading.Event()
+
+    def transfer():
+        release.wait(5)
+        raise ConnectionError("ninova down")
+
+    try:
+        leader_future, _ = flights.submit("u2", lambda: scheduler.submit("1", transfer))
+        follower_future, leader = flights.submit("u2", lambda: scheduler.submit("2", transfer))
+        release.set()
+
+        assert not leader
+        assert follower_future is leader_future
+        assert isinstance(follower_future.exception(timeout=5), ConnectionError)
+        assert scheduler.stats()["submitted"] == 1
+    finally:
+        scheduler.shutdown(wait=True)
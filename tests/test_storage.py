@@ -0,0 +1,121 @@
+"""Tests for common/storage.py — SQLite backend diff writes and JSON migration."""
+
+import json
+
+import pytest
+
+from common.config import _atomic_json_write
+from common.storage import JsonStorage, SqliteStorage, migrate_json_to_sqlite
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    """SQLite storage in a temp directory, closed after the test."""
+    storage = SqliteStorage(tmp_path / "ninova.db")
+    yield storage
+    storage.close()
+
+
+class TestSqliteStorageUsers:
+    def test_roundtrip_keeps_order(self, sqlite_storage):
+        users = {"2": {"username": "b"}, "1": {"username": "a"}}
+        sqlite_storage.save_users(users)
+        assert list(sqlite_storage.load_users()) == ["2", "1"]
+
+    def test_only_changed_rows_are_written(self, sqlite_storage):
+        sqlite_storage.save_users({"1": {"username": "a"}, "2": {"username": "b"}})
+        before = sqlite_storage.stats()["rows_written"]
+
+        sqlite_storage.save_users({"1": {"username": "a"}, "2": {"username": "changed"}})
+        assert sqlite_storage.stats()["rows_written"] == before + 1
+
+    def test_missing_users_are_deleted(self, sqlite_storage):
+        sqlite_storage.save_users({"1": {"username": "a"}, "2": {"username": "b"}})
+        sqlite_storage.save_users({"1": {"username": "a"}})
+        assert sqlite_storage.load_users() == {"1": {"username": "a"}}
+
+
+class TestSqliteStorageGrades:
+    def test_user_batch_keeps_other_users(self, sqlite_storage):
+        sqlite_storage.save_grades({"1": {"c1": {"n": 1}}, "2": {"c2": {"n": 2}}})
+        sqlite_storage.save_user_grades({"1": {"c3": {"n": 3}, "c1": {"n": 1}}})
+
+        assert sqlite_storage.load_grades() == {
+            "1": {"c3": {"n": 3}, "c1": {"n": 1}},
+            "2": {"c2": {"n": 2}},
+        }
+        assert list(sqlite_storage.load_user_grades("1")) == ["c3", "c1"]
+
+    def test_unchanged_courses_are_skipped(self, sqlite_storage):
+        sqlite_storage.save_grades({"1": {"c1": {"n": 1}, "c2": {"n": 2}}})
+        before = sqlite_storage.stats()["rows_written"]
+        sqlite_storage.save_user_grades({"1": {"c1": {"n": 1}, "c2": {"n": 5}}})
+        assert sqlite_storage.stats()["rows_written"] == before + 1
+
+    def test_full_replace_removes_users(self, sqlite_storage):
+        sqlite_storage.save_grades({"1": {"c1": {}}, "2": {"c2": {}}})
+        sqlite_storage.save_grades({"2": {"c2": {}}})
+        assert sqlite_storage.load_grades() == {"2": {"c2": {}}}
+
+    def test_full_replace_keeps_rows_inserted_by_other_connection(self, tmp_path):
+        coordinator = SqliteStorage(tmp_path / "ninova.db")
+        shard = SqliteStorage(tmp_path / "ninova.db")
+        try:
+            coordinator.save_grades({"1": {"c1": {"n": 1}}})
+            snapshot = coordinator.load_grades()
+            shard.save_user_grades({"2": {"c2": {"n": 2}}})
+
+            snapshot["1"]["c1"] = {"n": 5}
+            coordinator.save_grades(snapshot)
+
+            assert coordinator.load_grades() == {"1": {"c1": {"n": 5}}, "2": {"c2": {"n": 2}}}
+        finally:
+            coordinator.close()
+            shard.close()
+
+
+class TestSqliteStorageStamps:
+    def test_stamps_change_only_for_written_table(self, tmp_path):
+        coordinator = SqliteStorage(tmp_path / "ninova.db")
+        shard = SqliteStorage(tmp_path / "ninova.db")
+        try:
+            users_stamp, grades_stamp = coordinator.users_stamp(), coordinator.grades_stamp()
+            shard.save_user_grades({"1": {"c1": {"n": 1}}})
+            assert coordinator.users_stamp() == users_stamp
+            assert coordinator.grades_stamp() != grades_stamp
+
+            grades_stamp = coordinator.grades_stamp()
+            shard.save_users({"1": {"username": "a"}})
+            shard.save_state("data/sks_state.json", {"x": 1})
+            assert coordinator.users_stamp() != users_stamp
+            assert coordinator.grades_stamp() == grades_stamp
+        finally:
+            coordinator.close()
+            shard.close()
+
+    def test_unchanged_save_keeps_stamp(self, sqlite_storage):
+        sqlite_storage.save_user_grades({"1": {"c1": {"n": 1}}})
+        stamp = sqlite_storage.grades_stamp()
+        sqlite_storage.save_user_grades({"1": {"c1": {"n": 1}}})
+        assert sqlite_storage.grades_stamp() == stamp
+
+
+class TestMigration:
+    def test_json_files_are_imported(self, tmp_path, sqlite_storage):
+        users_file = tmp_path / "users.json"
+        data_file = tmp_path / "ninova_data.json"
+        state_file = tmp_path / "sks_state.json"
+        users_file.write_text(json.dumps({"1": {"username": "a", "urls": ["c1"]}}))
+        data_file.write_text(json.dumps({"1": {"c1": {"course_name": "X"}}}))
+        state_file.write_text(json.dumps({"2024-01-01": ["lunch"]}))
+
+        source = JsonStorage(users_file, data_file, _atomic_json_write)
+        counts = migrate_json_to_sqlite(
+            source, sqlite_storage, [state_file, tmp_path / "missing_state.json"]
+        )
+
+        assert counts == {"users": 1, "courses": 1, "states": 1}
+        assert sqlite_storage.load_users() == source.load_users()
+        assert sqlite_storage.load_grades() == source.load_grades()
+        assert sqlite_storage.load_state(state_file) == {"2024-01-01": ["lunch"]}
+        assert sqlite_storage.load_state("data/unknown_state.json", {}) == {}
@@ -0,0 +1,109 @@
+"""Tests for common/streaming.py (spooled downloads and streamed multipart uploads)."""
+
+import hashlib
+import io
+from email import policy
+from email.parser import BytesParser
+
+import requests
+
+from common.streaming import BudgetedSpool, ByteBudget, MultipartStream
+
+
+class TestBudgetedSpool:
+    def test_small_file_stays_in_memory_and_releases_budget(self):
+        budget = ByteBudget(1000)
+        spool = BudgetedSpool(budget, max_size=500)
+        spool.write(b"x" * 300)
+
+        assert not spool.on_disk
+        assert budget.stats()["used"] == 300
+        spool.seek(0)
+        assert spool.read() == b"x" * 300
+        spool.close()
+        assert budget.stats()["used"] == 0
+
+    def test_large_file_rolls_over_to_disk(self):
+        budget = ByteBudget(10_000)
+        spool = BudgetedSpool(budget, max_size=500)
+        for _ in range(4):
+            spool.write(b"y" * 200)
+
+        assert spool.on_disk
+        assert budget.stats()["used"] == 0  # Diske taşınan veri bütçeden düşer
+        spool.seek(0)
+        assert spool.read() == b"y" * 800
+        spool.close()
+
+    def test_exhausted_budget_spills_to_disk(self):
+        budget = ByteBudget(500)
+        first = BudgetedSpool(budget, max_size=1000)
+        second = BudgetedSpool(budget, max_size=1000)
+        first.write(b"a" * 400)
+        second.write(b"b" * 400)
+
+        assert not first.on_disk
+        assert second.on_disk
+        assert budget.stats() == {"capacity": 500, "used": 400, "peak": 400, "denied": 1}
+        first.close()
+        second.close()
+        assert budget.stats()["used"] == 0
+
+    def test_sha256_covers_memory_and_disk_parts(self):
+        spool = BudgetedSpool(ByteBudget(10_000), max_size=500)
+        data = b"".join(bytes([i]) * 100 for i in range(10))
+        for i in range(0, len(data), 100):
+            spool.write(data[i : i + 100])
+
+        assert spool.on_disk
+        assert spool.sha256 == hashlib.sha256(data).hexdigest()
+        spool.close()
+
+
+class TestMultipartStream:
+    def _parse(self, content_type, body):
+        message = BytesParser(policy=policy.default).parsebytes(
+            b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body
+        )
+        return {
+            part.get_param("name", header="content-disposition"): (
+                part.get_filename(),
+                part.get_payload(decode=True),
+            )
+            for part in message.iter_parts()
+        }
+
+    def test_body_is_valid_multipart_and_read_in_chunks(self):
+        data = bytes(range(256)) * 300
+        stream = MultipartStream(
+            {"chat_id": 42, "caption": "📄 Ödev 1", "parse_mode": None},
+            "document",
+            'Hafta "1".pdf',
+            io.BytesIO(data),
+        )
+        expected_length = len(stream)
+        chunks = []
+        while chunk := stream.read(1000):
+            assert len(chunk) <= 1000
+            chunks.append(chunk)
+        body = b"".join(chunks)
+
+        assert len(body) == expected_length
+        parts = self._parse(stream.content_type, body)
+        assert parts["chat_id"] == (None, b"42")
+        assert parts["caption"][1].decode() == "📄 Ödev 1"
+        assert "parse_mode" not in parts
+        assert parts["document"] == ("Hafta %221%22.pdf", data)
+
+    def test_requests_streams_body_with_content_length(self):
+        stream = MultipartStream({"chat_id": 1}, "document", "a.pdf", io.BytesIO(b"pdf"))
+        prepared = requests.Request(
+            "POST",
+            "https://api.telegram.org/botX/sendDocument",
+            data=stream,
+            headers={"Content-Type": stream.content_type},
+        ).prepare()
+
+        assert prepared.body is stream
+        assert prepared.headers["Content-Length"] == str(len(stream))
+        assert prepared.headers["Content-Type"].startswith("multipart/form-data; boundary=")
@@ -0,0 +1,83 @@
+"""Tests for common/user_repository.py — in-memory reads and write-behind flushes."""
+
+import json
+import os
+
+import pytest
+
+from common.config import _atomic_json_write
+from common.storage import JsonStorage
+from common.user_repository import UserRepository
+
+
+@pytest.fixture
+def users_file(tmp_path):
+    """users.json with a single registered user."""
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({"1": {"username": "ali", "password": "x", "urls": ["u1"]}}))
+    return path
+
+
+@pytest.fixture
+def repo(users_file):
+    """Repository with a long debounce so tests control flushes explicitly."""
+    storage = JsonStorage(users_file, users_file.parent / "data.json", _atomic_json_write)
+    return UserRepository(storage, flush_delay=60)
+
+
+class TestUserRepositoryReads:
+    def test_reads_come_from_memory(self, repo):
+        assert repo.get("1")["username"] == "ali"
+        repo.get(1)
+        repo.all()
+        assert repo.stats()["loads"] == 1
+
+    def test_returned_data_is_a_copy(self, repo):
+        user = repo.get("1")
+        user["urls"].append("u2")
+        assert repo.get("1")["urls"] == ["u1"]
+
+    def test_missing_user_returns_none(self, repo):
+        assert repo.get("999") is None
+        assert repo.count() == 1
+
+
+class TestUserRepositoryWrites:
+    def test_update_and_flush_write_file(self, repo, users_file):
+        repo.update("1", last_check="2024-01-01")
+        repo.update("2", username="veli")
+        assert json.loads(users_file.read_text())["1"].get("last_check") is None
+
+        assert repo.flush() is True
+        on_disk = json.loads(users_file.read_text())
+        assert on_disk["1"]["last_check"] == "2024-01-01"
+        assert on_disk["2"] == {"username": "veli", "password": "", "urls": []}
+
+    def test_updates_are_coalesced(self, repo):
+        for i in range(10):
+            repo.update("1", last_check=str(i))
+        assert repo.flush() is True
+        assert repo.flush() is False
+        assert repo.stats()["flushes"] == 1
+
+    def test_remove_fields_and_delete(self, repo, users_file):
+        repo.update("1", temp_expired_courses=["u9"])
+        assert repo.remove_fields("1", "temp_expired_courses") is True
+        assert "temp_expired_courses" not in repo.get("1")
+        assert repo.delete("1") is True
+        repo.flush()
+        assert json.loads(users_file.read_text()) == {}
+
+    def test_removing_field_holding_none_is_persisted(self, repo, users_file):
+        repo.update("1", temp_expired_courses=None)
+        repo.flush()
+        assert repo.remove_fields("1", "temp_expired_courses") is True
+        assert repo.flush() is True
+        assert "temp_expired_courses" not in json.loads(users_file.read_text())["1"]
+
+    def test_external_change_is_reloaded(self, repo, users_file):
+        repo.get("1")
+        users_file.write_text(json.dumps({"3": {"username": "ayse", "password": "", "urls": []}}))
+        stat = users_file.stat()
+        os.utime(users_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert repo.ids() == ["3"]
@@ -1,7 +1,9 @@
 """Tests for common/utils.py — encryption, date parsing, HTML sanitization, escape_html."""
 
+import json
 import unittest.mock as mock
 
+import pytest
 from cryptography.fernet import Fernet
 
 # Patch cipher_suite before importing utils so we use a test key
@@ -9,11 +11,14 @@ _TEST_KEY = Fernet.generate_key()
 _TEST_CIPHER = Fernet(_TEST_KEY)
 
 with mock.patch("common.config.cipher_suite", _TEST_CIPHER):
+    from common.config import get_storage
     from common.utils import (
         escape_html,
         get_file_icon,
+        get_user_grades_view,
         parse_turkish_date,
         sanitize_html_for_telegram,
+        save_user_grades_batch,
     )
 
 
@@ -143,6 +148,13 @@ class TestSanitizeHtmlForTelegram:
         result = sanitize_html_for_telegram("<code>print()</code>")
         assert "<code>print()</code>" in result
 
+    def test_repeated_input_is_memoized(self):
+        html = "<p>memo <b>test</b></p>"
+        first = sanitize_html_for_telegram(html)
+        hits = sanitize_html_for_telegram.cache_info().hits
+        assert sanitize_html_for_telegram(html) == first
+        assert sanitize_html_for_telegram.cache_info().hits == hits + 1
+
 
 # ---------------------------------------------------------------------------
 # get_file_icon
@@ -174,3 +186,54 @@ class TestGetFileIcon:
     def test_non_string_returns_default(self):
         assert get_file_icon(None) == "📄"
         assert get_file_icon(123) == "📄"
+
+
+# ---------------------------------------------------------------------------
+# save_user_grades_batch
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    """Point the JSON storage backend at a temp ninova_data.json."""
+    path = tmp_path / "ninova_data.json"
+    monkeypatch.setattr(get_storage(), "data_file", path)
+    return path
+
+
+class TestSaveUserGradesBatch:
+    def test_merges_only_given_users(self, data_file):
+        data_file.write_text(json.dumps({"1": {"u": "old"}, "2": {"u": "keep"}}), encoding="utf-8")
+
+        assert save_user_grades_batch({"1": {"u": "new"}, 3: {"u": "added"}}) == 2
+
+        saved = json.loads(data_file.read_text(encoding="utf-8"))
+        assert saved == {"1": {"u": "new"}, "2": {"u": "keep"}, "3": {"u": "added"}}
+
+    def test_empty_batch_does_not_touch_file(self, data_file):
+
+        assert save_user_grades_batch({}) == 0
+        assert not data_file.exists()
+
+
+# ---------------------------------------------------------------------------
+# get_user_grades_view
+# ---------------------------------------------------------------------------
+
+
+class TestUserGradesView:
+    def test_view_is_cached_until_file_is_written(self, data_file):
+        data_file.write_text(json.dumps({"1": {"c1": {"course_name": "A"}}}), encoding="utf-8")
+
+        first = get_user_grades_view("1")
+        assert first == {"c1": {"course_name": "A"}}
+        with mock.patch("common.storage.json.load") as json_load:
+            assert get_user_grades_view(1) is first
+            json_load.assert_not_called()
+
+        save_user_grades_batch({"1": {"c1": {"course_name": "B"}}})
+        assert get_user_grades_view("1") == {"c1": {"course_name": "B"}}
+
+    def test_missing_file_gives_empty_view(self, data_file):
+        assert not data_file.exists()
+        assert get_user_grades_view("1") == {}